@@ -0,0 +1,79 @@
+"""
+Pasting a block of cells into the mission table: one setData per cell, as the view
+would apply them, against MissionTableModel.set_cells (paste, fill-down and "Set
+Column...").
+
+    python -m benchmarks.bench_bulk_edit [--rows 20000] [--cells 10000]
+
+Each run edits `--cells` cells (ten columns of consecutive rows) in a model shown in a
+QTableView, then lets the event loop repaint, and undoes the paste (without repainting
+between steps). Per cell, every edit is its own undo step, to be undone one click at a
+time, and its own dataChanged and header update; set_cells records one step and updates
+the view once.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+COLUMNS = range(1, 11)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--cells", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication, QTableView
+    from sqlalchemy.orm import sessionmaker
+    from db.database import make_engine
+    from ui.mission_table_model import MissionTableModel
+    from benchmarks.synthetic import make_synthetic_db, Timer
+
+    app = QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        session = sessionmaker(bind=make_engine(db_path, read_only=True))()
+        model = MissionTableModel(session, batch_size=args.rows)
+        model.reload()
+        session.close()
+    view = QTableView()
+    view.setModel(model)
+    view.resize(1200, 800)
+    view.show()
+    app.processEvents()
+
+    block_rows = min(args.cells // len(COLUMNS), model.rowCount())
+    changes = [(row, col, f"pasted {row}") for row in range(block_rows) for col in COLUMNS]
+    results = {}
+
+    with Timer() as t:
+        for row, col, text in changes:
+            model.setData(model.index(row, col), text)
+        app.processEvents()
+    results["setData per cell"] = (t.seconds, len(model.edits.undo_steps))
+    with Timer() as t:
+        while model.undo():
+            pass
+        app.processEvents()
+    results["  undo all of it"] = (t.seconds, None)
+
+    with Timer() as t:
+        model.set_cells(changes)
+        app.processEvents()
+    results["set_cells"] = (t.seconds, len(model.edits.undo_steps))
+    with Timer() as t:
+        model.undo()
+        app.processEvents()
+    results["  undo it"] = (t.seconds, None)
+
+    print(f"{len(changes)} cells pasted into {block_rows} rows of {model.rowCount()}, with repaint\n")
+    print(f"{'':<28} {'time':>8}    {'undo steps':>10}")
+    for name, (seconds, steps) in results.items():
+        print(f"{name:<28} {seconds * 1000:5.0f} ms    {'' if steps is None else steps:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Categorical columns stored as lookup ids (categorical_storage = codes) against text.
+
+    python -m benchmarks.bench_categorical [--rows 1000000] [--loaded 100000] [--repeat 3]
+
+Builds a synthetic database, copies it and converts the copy the way init_db does, then
+compares the two: file size after VACUUM and the bytes of the missions table and its
+indexes, GROUP BY queries (raw SQL and through the ORM, which decodes the ids), an
+indexed equality filter, and reading `--loaded` table rows, which pays for decoding.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from db.database import make_engine
+from db.migrations import convert_categorical_storage, fill_lookup_tables, prepare_lookup_tables
+from db.models import Mission, decoded_sql, use_categorical_codes
+from ui.mission_table_model import QUERY_COLUMNS
+from benchmarks.synthetic import make_synthetic_db, Timer
+
+# (label, dimensions) of the GROUP BY queries
+GROUPINGS = [("platform", ["platform"]), ("chassis", ["chassis"]),
+             ("platform, customer, outcome", ["platform", "customer", "outcome"])]
+
+
+def median_ms(func, repeat):
+    func()  # Warm the cache
+    times = []
+    for _ in range(repeat):
+        with Timer() as t:
+            func()
+        times.append(t.seconds)
+    return statistics.median(times) * 1000
+
+
+def table_bytes(path):
+    """Bytes of the missions table and its indexes."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = 'missions' OR name IN "
+                            "(SELECT name FROM sqlite_master WHERE tbl_name = 'missions' "
+                            "AND type = 'index')").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def group_by_sql(dimensions):
+    """The stored values are grouped and only each group's ids are decoded, as the rollups do."""
+    columns = ", ".join(dimensions)
+    names = ", ".join(decoded_sql(d, d) for d in dimensions)
+    return (f"SELECT {names}, flights, data_gb FROM (SELECT {columns}, COUNT(*) AS flights, "
+            f"SUM(filesize_gb) AS data_gb FROM missions GROUP BY {columns})")
+
+
+def raw_group_by(path, dimensions):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(group_by_sql(dimensions)).fetchall()
+    finally:
+        conn.close()
+
+
+def orm_group_by(session, dimensions):
+    columns = [getattr(Mission, d) for d in dimensions]
+    return session.execute(select(*columns, func.count(), func.sum(Mission.filesize_gb))
+                           .group_by(*columns)).all()
+
+
+def orm_count(session, customer):
+    return session.execute(select(func.count()).select_from(Mission)
+                           .where(Mission.customer == customer)).scalar()
+
+
+def orm_rows(session, limit):
+    return session.execute(select(*QUERY_COLUMNS).order_by(Mission.date.desc()).limit(limit)).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--loaded", type=int, default=100_000, help="table rows read for the decode cost")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"text": os.path.join(tmp, "text.db"), "codes": os.path.join(tmp, "codes.db")}
+        make_synthetic_db(paths["text"], args.rows)
+        engine = make_engine(paths["text"])
+        with engine.connect() as conn:
+            prepare_lookup_tables(conn)
+            fill_lookup_tables(conn)
+            conn.commit()
+        engine.dispose()
+        shutil.copy(paths["text"], paths["codes"])
+        engine = make_engine(paths["codes"])
+        with engine.connect() as conn, Timer() as convert:
+            convert_categorical_storage(conn, True)
+        engine.dispose()
+        print(f"{args.rows} missions: converted to lookup ids in {convert.seconds:.1f} s")
+
+        for path in paths.values():
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode = DELETE")
+            conn.execute("VACUUM")
+            conn.close()
+        sizes = {mode: (os.path.getsize(path), table_bytes(path)) for mode, path in paths.items()}
+        print(f"\n{'':<28} {'text':>10} {'codes':>10}")
+        print(f"{'file (MiB)':<28} {sizes['text'][0] / 2**20:10.1f} {sizes['codes'][0] / 2**20:10.1f}")
+        print(f"{'missions + indexes (MiB)':<28} {sizes['text'][1] / 2**20:10.1f} {sizes['codes'][1] / 2**20:10.1f}")
+
+        sessions = {}
+        for mode, path in paths.items():
+            # Compiled statements are cached per engine, so each mode gets its own
+            use_categorical_codes(mode == "codes")
+            sessions[mode] = sessionmaker(bind=make_engine(path, read_only=True))()
+        results = {}
+        for label, dimensions in GROUPINGS:
+            for mode, path in paths.items():
+                results[f"GROUP BY {label} (SQL)", mode] = median_ms(
+                    lambda: raw_group_by(path, dimensions), args.repeat)
+        for mode, session in sessions.items():
+            use_categorical_codes(mode == "codes")
+            for label, dimensions in GROUPINGS:
+                results[f"GROUP BY {label} (ORM)", mode] = median_ms(
+                    lambda: orm_group_by(session, dimensions), args.repeat)
+            results["customer = 'Acme' count", mode] = median_ms(lambda: orm_count(session, "Acme"), args.repeat)
+            results[f"read {args.loaded} table rows", mode] = median_ms(
+                lambda: orm_rows(session, args.loaded), args.repeat)
+        use_categorical_codes(False)
+        for session in sessions.values():
+            session.close()
+
+        print(f"\n{'query':<44} {'text':>10} {'codes':>10}")
+        for name in dict.fromkeys(name for name, _ in results):
+            print(f"{name:<44} {results[name, 'text']:7.0f} ms {results[name, 'codes']:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
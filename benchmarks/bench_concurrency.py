@@ -0,0 +1,108 @@
+"""
+One writer and several readers hitting the same database, with SQLite's defaults
+(rollback journal) vs. the tuning profile from db.database (WAL + pragmas, read-only pool).
+
+    python -m benchmarks.bench_concurrency [--rows 200000] [--readers 4] [--seconds 5]
+
+Each reader and the writer run in their own process, like a background importer next
+to the GUI. Reports writer commits/s, reader queries/s, p95 reader latency and the number
+of operations that failed with "database is locked".
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from db.database import make_engine
+from benchmarks.synthetic import make_synthetic_db
+
+READ_QUERY = text("SELECT id, date, platform, altitude_m FROM missions "
+                  "WHERE platform = :platform ORDER BY date DESC LIMIT 500")
+WRITE_QUERY = text("UPDATE missions SET wind_knots = wind_knots + 1 WHERE id = :id")
+
+# SQLite's behaviour without the tuning profile (pysqlite still waits up to 5 s on locks)
+DEFAULT_PROFILE = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+
+def engine_for(path, profile, read_only):
+    if profile == "tuned":
+        return make_engine(path, read_only=read_only)
+    return make_engine(path, pragmas={} if read_only else DEFAULT_PROFILE)
+
+
+def writer(path, profile, seconds, rows, results):
+    engine = engine_for(path, profile, read_only=False)
+    commits = errors = 0
+    deadline = time.perf_counter() + seconds
+    with engine.connect() as conn:
+        while time.perf_counter() < deadline:
+            try:
+                # Small transactions, like an importer committing every few rows
+                conn.execute(WRITE_QUERY, [{"id": (commits * 10 + i) % rows + 1} for i in range(10)])
+                conn.commit()
+                commits += 1
+            except OperationalError:
+                conn.rollback()
+                errors += 1
+    results.put(("writer", commits, errors, []))
+
+
+def reader(path, profile, seconds, results):
+    engine = engine_for(path, profile, read_only=True)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    with engine.connect() as conn:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.execute(READ_QUERY, {"platform": "M300"}).fetchall()
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                errors += 1
+            conn.rollback()
+    results.put(("reader", len(latencies), errors, latencies))
+
+
+def run(path, profile, readers, seconds, rows):
+    # The journal mode is stored in the file, so switch it before starting the processes
+    setup = engine_for(path, profile, read_only=False)
+    with setup.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+    setup.dispose()
+
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=writer, args=(path, profile, seconds, rows, results))]
+    procs += [multiprocessing.Process(target=reader, args=(path, profile, seconds, results))
+              for _ in range(readers)]
+    for p in procs:
+        p.start()
+    outcomes = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    commits = sum(o[1] for o in outcomes if o[0] == "writer")
+    queries = sum(o[1] for o in outcomes if o[0] == "reader")
+    errors = sum(o[2] for o in outcomes)
+    latencies = sorted(l for o in outcomes for l in o[3])
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan")
+    print(f"{profile:>8} {commits / seconds:>12.0f} {queries / seconds:>12.0f} {p95:>12.1f} {errors:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "concurrency.db"), args.rows)
+        print(f"{'profile':>8} {'commits/s':>12} {'queries/s':>12} {'p95 read ms':>12} {'locked':>8}")
+        for profile in ("default", "tuned"):
+            run(path, profile, args.readers, args.seconds, args.rows)
+
+
+if __name__ == "__main__":
+    main()
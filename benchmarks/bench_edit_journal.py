@@ -0,0 +1,166 @@
+"""
+Pending edits in the mission table: the EditJournal (ui/edit_journal.py) against the
+row-indexed `edited_cells` dict and undo/redo dict stacks it replaced.
+
+    python -m benchmarks.bench_edit_journal [--rows 100000] [--edits 100000]
+
+First the bookkeeping alone, journal against the old structures on the same workload:
+recording `--edits` edits spread over `--rows` rows, asking whether each row is dirty
+(every row header paint), removing rows at the top one at a time (a sync or delete) and
+undoing every edit. The old per-row dirty check scanned every edit, so it is timed on a
+sample of rows. Then the same through a MissionTableModel the way the view drives it,
+signals and cell formatting included, plus a grouped edit and collecting the cells to save.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Rows timed for the old per-row dirty check, which is linear in the pending edits
+LEGACY_SAMPLE = 100
+
+
+class LegacyEdits:
+    """The old bookkeeping: (row, col) dict plus undo/redo stacks of dicts keyed by row."""
+
+    def __init__(self):
+        self.edited_cells = {}
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def record(self, row, col, old, new):
+        self.undo_stack.append({'row': row, 'col': col, 'old': old, 'new': new})
+        self.redo_stack.clear()
+        if (row, col) not in self.edited_cells:
+            self.edited_cells[(row, col)] = old
+
+    def is_row_dirty(self, row):
+        return any(r == row for r, c in self.edited_cells.keys())
+
+    def rows_removed(self, first, last):
+        count = last - first + 1
+        for stack in (self.undo_stack, self.redo_stack):
+            stack[:] = [action for action in stack if not first <= action['row'] <= last]
+            for action in stack:
+                if action['row'] > last:
+                    action['row'] -= count
+        self.edited_cells = {(r - count if r > last else r, c): v for (r, c), v in self.edited_cells.items()
+                             if not first <= r <= last}
+
+    def undo(self):
+        action = self.undo_stack.pop()
+        self.redo_stack.append(action)
+        original = self.edited_cells.get((action['row'], action['col']))
+        if original is not None and action['old'] == original:
+            self.edited_cells.pop((action['row'], action['col']), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--edits", type=int, default=100_000)
+    parser.add_argument("--removed", type=int, default=100, help="rows removed one at a time from the top")
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication
+    from sqlalchemy.orm import sessionmaker
+    from db.database import make_engine
+    from ui.edit_journal import EditJournal
+    from ui.mission_table_model import MissionTableModel, COLUMNS
+    from benchmarks.synthetic import make_synthetic_db, Timer
+
+    app = QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        session = sessionmaker(bind=make_engine(db_path, read_only=True))()
+        model = MissionTableModel(session, batch_size=args.rows)
+        model.reload()
+        session.close()
+
+    rows = model.rowCount()
+    columns = range(1, len(COLUMNS))
+    cells = [(i % rows, columns[i // rows % len(columns)]) for i in range(args.edits)]
+    sample = range(0, rows, max(1, rows // LEGACY_SAMPLE))
+    journal, old, through_model = {}, {}, {}
+
+    edits = EditJournal(len(COLUMNS))
+    with Timer() as t:
+        for row, col in cells:
+            edits.record(row, col, "", f"edit {row}")
+    journal["record edits"] = t.seconds
+    with Timer() as t:
+        for row in range(rows):
+            edits.is_row_dirty(row)
+    journal[f"is_row_dirty for all {rows} rows"] = t.seconds
+    with Timer() as t:
+        for row in range(args.removed):
+            edits.forget([row])
+    journal[f"remove {args.removed} rows at the top"] = t.seconds
+    with Timer() as t:
+        while edits.undo():
+            pass
+    journal["undo every edit, one at a time"] = t.seconds
+
+    legacy = LegacyEdits()
+    with Timer() as t:
+        for row, col in cells:
+            legacy.record(row, col, "", f"edit {row}")
+    old["record edits"] = t.seconds
+    with Timer() as t:
+        for row in sample:
+            legacy.is_row_dirty(row)
+    old[f"is_row_dirty for all {rows} rows"] = t.seconds * rows / len(sample)
+    with Timer() as t:
+        for _ in range(args.removed):
+            legacy.rows_removed(0, 0)
+    old[f"remove {args.removed} rows at the top"] = t.seconds
+    with Timer() as t:
+        while legacy.undo_stack:
+            legacy.undo()
+    old["undo every edit, one at a time"] = t.seconds
+
+    with Timer() as t:
+        for row, col in cells:
+            model.setData(model.index(row, col), f"edit {row}")
+    through_model["record edits (setData)"] = t.seconds
+    with Timer() as t:
+        for row in range(rows):
+            model.is_row_dirty(row)
+    through_model[f"is_row_dirty for all {rows} rows"] = t.seconds
+    with Timer() as t:
+        for _ in range(args.removed):
+            model.remove_row(0)
+    through_model[f"remove {args.removed} rows at the top"] = t.seconds
+    with Timer() as t:
+        while model.undo():
+            pass
+    through_model["undo every edit, one at a time"] = t.seconds
+    with Timer() as t:
+        with model.edits.group():
+            for row, col in cells:
+                if row < model.rowCount():
+                    model.setData(model.index(row, col), f"edit {row}")
+    through_model["the same edits as one group"] = t.seconds
+    with Timer() as t:
+        model.undo()
+        model.redo()
+    through_model["undo and redo the group"] = t.seconds
+    with Timer() as t:
+        sorted((model.row_for_key(key), col) for key, col in model.edits.originals)
+    through_model["collect dirty cells to save"] = t.seconds
+
+    print(f"{rows} rows, {args.edits} edits pending\n")
+    print(f"{'bookkeeping':<40} {'journal':>10} {'old dicts':>12}")
+    for name, seconds in journal.items():
+        print(f"{name:<40} {seconds * 1000:7.0f} ms {old[name] * 1000:9.0f} ms")
+    print(f"\n{'through the table model':<40} {'journal':>10}")
+    for name, seconds in through_model.items():
+        print(f"{name:<40} {seconds * 1000:7.0f} ms")
+    print(f"\n(old is_row_dirty extrapolated from {len(sample)} rows; the old undo was row-indexed "
+          "and had no grouping)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Latency of the mission table's server-side filter and sort (ui.mission_table_model.fetch_page).
+
+    python -m benchmarks.bench_filter_sort [--rows 1000000] [--batch-size 500] [--repeat 5]
+
+Builds a synthetic database, then times the first page of the table for a set of
+typical filter bar searches and header sorts, and the 200th page (keyset paging) of a
+few. Each timing is the median of `--repeat` runs on a warm cache. The target is under
+50 ms at 1M rows; searches on unindexed columns scan and are listed to show what that
+costs. Free words use the full-text index (see bench_search).
+"""
+import argparse
+import os
+import statistics
+import tempfile
+from sqlalchemy.orm import sessionmaker
+from db.database import make_engine
+from logic.flight_ops import parse_search
+from ui.mission_table_model import SORT_KEY, fetch_page
+from benchmarks.synthetic import make_synthetic_db, Timer
+
+CASES = [
+    # (filter bar text, sort column, descending)
+    ("", "id", False),
+    ("", "date", True),
+    ("", "altitude_m", False),
+    ("customer:Acme", "id", False),
+    ("customer:Acme", "date", True),
+    ("platform:M300,M350", "date", True),
+    ("site:KB*", "date", False),
+    ("date>=2030-01-01 date<2030-02-01", "date", False),
+    ("customer:Hooli date:2040-06-01", "id", False),
+    ("altitude>100", "altitude_m", True),
+    ("customer:Acme altitude>=100", "id", False),
+    ("", "wind_knots", False),              # unindexed sort
+    ("outcome:Failed", "id", False),        # unindexed filter
+    ("vibration", "id", False),             # free word: full-text index
+    ("gps dropout", "date", True),
+]
+DEEP_PAGE = 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows, search_index=True)
+        session = sessionmaker(bind=make_engine(path, read_only=True))()
+
+        def first_page(criteria, attr, descending):
+            return fetch_page(session, criteria, attr, descending, None, args.batch_size)[1]
+
+        print(f"{'search':<36} {'sort':<14} {'rows':>5} {'first page':>11} {'page ' + str(DEEP_PAGE):>10}")
+        for text, attr, descending in CASES:
+            criteria = parse_search(text)
+            first_page(criteria, attr, descending)  # Warm the cache
+            times = []
+            for _ in range(args.repeat):
+                with Timer() as t:
+                    rows = first_page(criteria, attr, descending)
+                times.append(t.seconds)
+            deep = ""
+            if len(rows) == args.batch_size and text in ("", "customer:Acme"):
+                # Walk to the deep page, then time fetching it from the previous one's keyset
+                after = None
+                for _ in range(DEEP_PAGE - 1):
+                    page = fetch_page(session, criteria, attr, descending, after, args.batch_size)[1]
+                    after = (page[-1][SORT_KEY], page[-1][0])
+                with Timer() as t:
+                    fetch_page(session, criteria, attr, descending, after, args.batch_size)
+                deep = f"{t.seconds * 1000:8.1f} ms"
+            sort = ("-" if descending else "") + attr
+            print(f"{text or '(none)':<36} {sort:<14} {len(rows):>5} "
+                  f"{statistics.median(times) * 1000:8.1f} ms {deep:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+How long the GUI thread stalls while the whole mission table is paged in: queries on
+the GUI thread (MissionTableModel with a session) vs. on the database worker thread
+(MissionTableModel with a DatabaseRunner).
+
+    python -m benchmarks.bench_gui_responsiveness [--rows 100000] [--batch-size 500]
+
+A 5 ms timer runs on the GUI thread during the load; the gaps between its ticks are
+how long the window would have been unable to repaint or react to input (a median
+close to 5 ms means the event loop kept up).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+TICK_MS = 5
+
+
+def measure(db_path, mode, batch_size):
+    # The worker's sessions are bound to the configured database, so point it at ours
+    os.environ["FLIGHTLOG_DB"] = db_path
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication, QTableView
+    from db.database import SessionLocal
+    from ui.db_worker import DatabaseRunner
+    from ui.mission_table_model import MissionTableModel
+
+    app = QApplication(sys.argv)
+    runner = DatabaseRunner() if mode == "worker" else None
+    model = MissionTableModel(None if runner else SessionLocal(), batch_size=batch_size, runner=runner)
+    view = QTableView()
+    view.setModel(model)
+
+    ticks = []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(TICK_MS)
+
+    def keep_fetching():
+        # Stand-in for the user dragging the scrollbar to the bottom
+        if model.canFetchMore():
+            model.fetchMore()
+
+    pump = QTimer()
+    pump.timeout.connect(keep_fetching)
+    pump.start(0)
+
+    start = time.perf_counter()
+    ticks.append(start)
+    model.reload()
+    while not model._exhausted or model._fetching:
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    if runner:
+        runner.shutdown()
+
+    gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:])) or [elapsed * 1000]
+    print(f"{model.rowCount()} {elapsed:.3f} {gaps[len(gaps) // 2]:.1f} {gaps[-1]:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(*args.child, args.batch_size)
+        return
+
+    from benchmarks.synthetic import make_synthetic_db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_synthetic_db(os.path.join(tmp, "responsiveness.db"), args.rows)
+        print(f"{'mode':>8} {'rows':>10} {'load (s)':>10} {'median tick (ms)':>17} {'max tick (ms)':>14}")
+        for mode in ("gui", "worker"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_gui_responsiveness", "--child", db_path, mode,
+                 "--batch-size", str(args.batch_size)],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            rows, seconds, median, worst = out[-4:]
+            print(f"{mode:>8} {rows:>10} {float(seconds):>10.3f} {float(median):>17.1f} {float(worst):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
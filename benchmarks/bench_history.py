@@ -0,0 +1,132 @@
+"""
+The mission change history (logic/history.py): what its triggers add to saving edits, what
+a change takes on disk, and reconstructing missions as of a past time from the last
+checkpoint against replaying the history from its start.
+
+    python -m benchmarks.bench_history [--rows 50000] [--rounds 10] [--edits 5000]
+
+A synthetic database gets `--rounds` saves of `--edits` missions with three fields changed
+each (save_missions, as "Save Edits" does), timed with the history triggers; a few more
+are timed without them. Then the whole log and a sample of single missions are
+reconstructed as of halfway through the saves both ways, and compared.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+from db.database import make_engine
+from db.migrations import migrate
+from db.models import HISTORY_FIELDS, MISSION_HISTORY_TRIGGERS
+from logic import history
+from logic.flight_ops import save_missions
+from benchmarks.synthetic import make_synthetic_db, Timer
+
+HISTORY_TRIGGERS = ["missions_history_insert", "missions_history_update", "missions_history_delete"]
+
+# Saves timed without the history triggers
+SAVES_WITHOUT = 3
+
+# Single missions reconstructed
+SAMPLE = 1000
+
+
+def replay_from_start(session, until):
+    """
+    Every mission as of `until` from the snapshots the history started with and every
+    change since, as missions_as_of would without checkpoints (the saves here only
+    update missions, so there are no inserts or deletes to handle).
+    """
+    conn = session.connection()
+    states = {mission_id: list(values) for mission_id, *values in conn.exec_driver_sql(
+        f"SELECT id, {', '.join(HISTORY_FIELDS)} FROM mission_snapshots WHERE change_id = 0")}
+    for mission_id, field, value in conn.exec_driver_sql(
+            "SELECT mission_id, field, value FROM mission_history WHERE changed_at <= ? ORDER BY id", (until,)):
+        states[mission_id][field] = value
+    return [dict(history._mission(values), id=mission_id) for mission_id, values in sorted(states.items())]
+
+
+def table_size(conn, *names):
+    return conn.exec_driver_sql(f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({', '.join('?' * len(names))})",
+                                names).scalar() or 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--edits", type=int, default=5_000, help="missions edited per save")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        engine = make_engine(path)
+        with Timer() as baseline:
+            migrate(engine)  # Starts the history with a snapshot of every mission
+        session = sessionmaker(bind=engine)()
+
+        def save(round_number):
+            edits = {mission_id: {"altitude_m": rng.uniform(30, 120), "site": f"Site {rng.randrange(50)}",
+                                  "comments": f"Edited in round {round_number}"}
+                     for mission_id in rng.sample(range(1, args.rows + 1), args.edits)}
+            with Timer() as t:
+                save_missions(edits, [], session=session)
+            return t.seconds
+
+        saves, halfway = [], None
+        for round_number in range(args.rounds):
+            saves.append(save(round_number))
+            if round_number == args.rounds // 2 - 1:
+                time.sleep(0.01)
+                halfway = datetime.now()
+                time.sleep(0.01)
+
+        conn = session.connection()
+        changes = conn.exec_driver_sql("SELECT COUNT(*) FROM mission_history").scalar()
+        checkpoints = conn.exec_driver_sql("SELECT COUNT(*) FROM mission_checkpoints").scalar()
+        history_bytes = table_size(conn, "mission_history", "ix_mission_history_mission_id")
+        snapshot_bytes = table_size(conn, "mission_snapshots")
+        missions_bytes = table_size(conn, "missions")
+        session.commit()
+
+        conn = session.connection()
+        for name in HISTORY_TRIGGERS:
+            conn.exec_driver_sql(f"DROP TRIGGER {name}")
+        session.commit()
+        saves_without = [save(args.rounds + i) for i in range(SAVES_WITHOUT)]
+        conn = session.connection()
+        for ddl in MISSION_HISTORY_TRIGGERS:
+            conn.exec_driver_sql(ddl)
+        session.commit()
+
+        with Timer() as from_checkpoint:
+            missions = list(history.missions_as_of(session, halfway))
+        with Timer() as from_start:
+            replayed = replay_from_start(session, history.to_ms(halfway))
+        assert missions == replayed, "the reconstructions differ"
+
+        sample = rng.sample(range(1, args.rows + 1), SAMPLE)
+        with Timer() as single:
+            for mission_id in sample:
+                mission = history.mission_as_of(session, mission_id, halfway)
+                assert dict(mission, id=mission_id) == missions[mission_id - 1]
+        session.close()
+
+    print(f"{args.rows} missions, {args.rounds} saves of {args.edits} missions x 3 fields: "
+          f"{changes} changes, {checkpoints} checkpoints\n")
+    print(f"starting the history (snapshot of every mission)  {baseline.seconds * 1000:7.0f} ms")
+    print(f"save, with the history triggers (median)         {statistics.median(saves) * 1000:7.0f} ms")
+    print(f"save, without them (median of {SAVES_WITHOUT})                {statistics.median(saves_without) * 1000:7.0f} ms")
+    print(f"\nhistory on disk     {history_bytes / changes:5.1f} bytes per change, with its index")
+    print(f"snapshots on disk   {snapshot_bytes / 2**20:5.1f} MiB (the missions table: {missions_bytes / 2**20:.1f} MiB)")
+    print(f"\nwhole log as of halfway, from the last checkpoint     {from_checkpoint.seconds * 1000:7.0f} ms")
+    print(f"whole log as of halfway, replaying from the start    {from_start.seconds * 1000:7.0f} ms")
+    print(f"one mission as of halfway (mean of {SAMPLE})             {single.seconds / SAMPLE * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Throughput of the bulk importer (logic.importer) on a synthetic CSV log.
+
+    python -m benchmarks.bench_import [--rows 500000] [--existing 0] [--chunk-size 20000] [--bad-every 1000]
+
+Writes a CSV with the mission table's header labels (every `--bad-every`th row has an
+unparseable altitude, so the reject path is exercised too), then imports it into a
+database that already holds `--existing` missions and reports rows/s. Imports at least
+as large as the table rebuild the indexes at the end; smaller ones maintain them.
+The target is at least 50k rows/s on a local SSD. The history, rollups, lookup values
+and full-text index are filled after the last chunk, which is timed separately, and
+checked.
+
+Then a few rows are imported into an AUTOINCREMENT table (like the legacy log's) whose
+newest missions were deleted, so the new IDs start past the largest there is, and the
+tombstones, history, rollups, lookup values and full-text index are checked.
+"""
+import argparse
+import csv
+import os
+import tempfile
+from sqlalchemy.orm import sessionmaker
+from db.database import make_engine
+from db.migrations import migrate
+from db.models import Base, ROW_INSERTED
+from logic.fleet_stats import check_stats
+from logic.flight_ops import MISSION_COLUMNS, delete_missions
+from logic.importer import import_missions
+from logic.search import check_search_index
+from benchmarks.synthetic import (
+    MISSION_COLUMNS as SYNTHETIC_COLUMNS, make_synthetic_db, synthetic_rows, Timer
+)
+
+
+def write_csv(path, n, bad_every):
+    labels = [(label, attr) for label, attr, _ in MISSION_COLUMNS if attr != "id"]
+    positions = [SYNTHETIC_COLUMNS.index(attr) for _, attr in labels]
+    with open(path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow([label for label, _ in labels])
+        for i, row in enumerate(synthetic_rows(n)):
+            cells = []
+            for (label, attr), pos in zip(labels, positions):
+                value = row[pos]
+                if attr == "date":
+                    value = value[:10]
+                elif attr == "is_test":
+                    value = "Yes" if value else "No"
+                elif attr == "altitude_m" and bad_every and i % bad_every == 0:
+                    value = "approx. 100"
+                cells.append("" if value is None else value)
+            out.writerow(cells)
+
+
+def check_after_deletes(tmp):
+    """Imports rows after the newest missions were deleted and checks what the chunk updates."""
+    csv_path = os.path.join(tmp, "after_deletes.csv")
+    write_csv(csv_path, 5, 0)
+    db_path = make_synthetic_db(os.path.join(tmp, "after_deletes.db"), 1000, seed=2, search_index=True,
+                                autoincrement=True)
+    engine = make_engine(db_path)
+    Base.metadata.create_all(engine)
+    migrate(engine)
+    session = sessionmaker(bind=engine)()
+    conn = session.connection()
+    newest = [id_ for (id_,) in conn.exec_driver_sql("SELECT id FROM missions ORDER BY id DESC LIMIT 2")]
+    session.commit()
+    delete_missions(newest, session=session)
+    before = session.connection().exec_driver_sql("SELECT MAX(id) FROM missions").scalar()
+    import_missions(csv_path, session=session)
+
+    conn = session.connection()
+    new_ids = [id_ for (id_,) in conn.exec_driver_sql("SELECT id FROM missions WHERE id > ? ORDER BY id", (before,))]
+    assert len(new_ids) == 5 and new_ids[0] > max(newest), f"unexpected IDs {new_ids}"
+    tombstones = conn.exec_driver_sql(f"SELECT COUNT(*) FROM mission_tombstones WHERE mission_id IN "
+                                      f"({', '.join('?' * len(newest))})", tuple(newest)).scalar()
+    assert tombstones == len(newest), "the import cleared tombstones of other missions"
+    created = conn.exec_driver_sql("SELECT COUNT(*) FROM mission_history WHERE field = ? AND mission_id > ?",
+                                   (ROW_INSERTED, before)).scalar()
+    assert created == len(new_ids), f"{len(new_ids) - created} imported missions have no history"
+    missing = conn.exec_driver_sql("SELECT COUNT(*) FROM missions WHERE id > ? AND TRIM(chassis) NOT IN "
+                                   "(SELECT name FROM chassis)", (before,)).scalar()
+    assert not missing, f"{missing} imported chassis aren't in the lookup table"
+    session.rollback()
+    differences = check_stats(session)
+    assert not differences, f"{differences} rollup rows are out of date after the import"
+    check_search_index(session)
+    session.close()
+    engine.dispose()
+    print(f"import after deleting the newest missions: IDs {new_ids[0]}-{new_ids[-1]}, "
+          f"tombstones, history, rollups, lookups and search index check out")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--existing", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    parser.add_argument("--bad-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "legacy.csv")
+        with Timer() as t:
+            write_csv(csv_path, args.rows, args.bad_every)
+        print(f"wrote {args.rows} rows ({os.path.getsize(csv_path) / 2**20:.0f} MiB) in {t.seconds:.1f} s")
+
+        db_path = os.path.join(tmp, "import.db")
+        make_synthetic_db(db_path, args.existing, seed=1, search_index=True)
+        engine = make_engine(db_path)
+        Base.metadata.create_all(engine)
+        migrate(engine)  # The importer writes the history, rollups and lookups like init_db's databases
+        session = sessionmaker(bind=engine)()
+        result = import_missions(csv_path, session=session, chunk_size=args.chunk_size)
+        print(f"imported {result.imported}, rejected {result.rejected} in {result.seconds:.2f} s "
+              f"= {result.rows / result.seconds:,.0f} rows/s")
+        total = result.seconds + result.finish_seconds
+        print(f"then {result.finish_seconds:.2f} s for the history, rollups, lookups, search index and "
+              f"indexes: {total:.2f} s in all = {result.rows / total:,.0f} rows/s")
+        session.rollback()
+        differences = check_stats(session)
+        assert not differences, f"{differences} rollup rows are out of date after the import"
+        check_search_index(session)
+        session.close()
+        engine.dispose()
+
+        check_after_deletes(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Peak memory and time to walk every mission: get_all_missions() (all ORM objects at once)
+vs. the streaming iter_missions().
+
+    python -m benchmarks.bench_iter_missions [--sizes 100000 1000000] [--batch-size 1000]
+
+Each run sums the altitude over all missions in a fresh interpreter and reports the
+growth of peak RSS over the interpreter's baseline after imports. SQLite's mmap is
+turned off for these runs, since mapped database pages would otherwise count as RSS.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def measure(db_path, mode, batch_size):
+    # flight_ops opens its sessions on the configured database, so point it at ours
+    os.environ["FLIGHTLOG_DB"] = db_path
+    settings = os.path.join(os.path.dirname(db_path), "bench_settings.ini")
+    with open(settings, "w") as f:
+        f.write("[pragmas]\nmmap_size = 0\n")
+    os.environ["FLIGHTLOG_SETTINGS"] = settings
+    from logic.flight_ops import get_all_missions, iter_missions
+    from benchmarks.synthetic import peak_rss_mb, Timer
+
+    baseline = peak_rss_mb()
+    with Timer() as t:
+        total = count = 0
+        if mode == "all":
+            for m in get_all_missions():
+                total += m.altitude_m or 0
+                count += 1
+        else:
+            for row in iter_missions(batch_size=batch_size):
+                total += row.altitude_m or 0
+                count += 1
+    print(f"{count} {t.seconds:.3f} {peak_rss_mb() - baseline:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(*args.child, args.batch_size)
+        return
+
+    from benchmarks.synthetic import make_synthetic_db
+
+    print(f"{'rows':>10} {'mode':>8} {'time (s)':>10} {'peak RSS growth (MiB)':>22}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            db_path = make_synthetic_db(os.path.join(tmp, f"missions_{n}.db"), n)
+            for mode in ("all", "stream"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_iter_missions", "--child", db_path, mode,
+                     "--batch-size", str(args.batch_size)],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                seconds, rss = float(out[-2]), float(out[-1])
+                print(f"{n:>10} {mode:>8} {seconds:>10.3f} {rss:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
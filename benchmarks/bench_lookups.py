@@ -0,0 +1,134 @@
+"""
+Autocompletion from the in-memory lookup cache (logic.lookups) against querying the
+missions per keystroke, and what interning saves in the loaded table rows.
+
+    python -m benchmarks.bench_lookups [--rows 1000000] [--loaded 100000] [--repeat 5]
+
+Builds a synthetic database and backfills the lookup tables the way the migration does,
+then times loading the cache, a completer prefix lookup (QCompleter over the cached
+values, as the form and cell editors use it) against a SELECT DISTINCT ... LIKE per
+keystroke, and measures the memory `--loaded` table rows hold with and without their
+categorical cells interned. Also reports what the lookup triggers add to inserts.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import tracemalloc
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from PyQt5.QtWidgets import QApplication
+from db.database import make_engine
+from db.migrations import add_lookup_triggers
+from db.models import Mission
+from logic.lookups import LookupCache
+from ui.completion import LookupCompletion
+from ui.mission_table_model import INTERNED_COLUMNS, QUERY_COLUMNS, interned_row
+from benchmarks.synthetic import MISSION_COLUMNS, make_synthetic_db, synthetic_rows, Timer
+
+PREFIXES = ["M", "M3", "CH-0", "CH-01", "BAT-4"]
+WRITE_ROWS = 20_000
+
+
+def median_ms(func, repeat):
+    func()  # Warm the cache
+    times = []
+    for _ in range(repeat):
+        with Timer() as t:
+            func()
+        times.append(t.seconds)
+    return statistics.median(times) * 1000
+
+
+def field_for(prefix):
+    return "chassis" if prefix.startswith("CH") else "battery" if prefix.startswith("BAT") else "platform"
+
+
+def query_matches(session, field, prefix):
+    column = getattr(Mission, field)
+    return session.execute(select(column).distinct().where(column.like(f"{prefix}%"))
+                           .order_by(column).limit(50)).all()
+
+
+def completer_matches(completer, prefix):
+    completer.setCompletionPrefix(prefix)
+    return completer.completionCount()
+
+
+def rows_bytes(session, limit, intern):
+    """Bytes the first `limit` table rows hold once fetched, as lists like the table model keeps."""
+    tracemalloc.start()
+    fetched = session.execute(select(*QUERY_COLUMNS).limit(limit)).all()
+    rows = [interned_row(row) if intern else list(row) for row in fetched]
+    del fetched
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(rows), size
+
+
+def insert_ms(path, with_triggers):
+    conn = sqlite3.connect(path)
+    try:
+        if not with_triggers:
+            for trigger in ("missions_lookups_insert", "missions_lookups_update"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        sql = (f"INSERT INTO missions ({', '.join(MISSION_COLUMNS)}) "
+               f"VALUES ({', '.join('?' for _ in MISSION_COLUMNS)})")
+        first = conn.execute("SELECT MAX(id) + 1 FROM missions").fetchone()[0]
+        with Timer() as insert:
+            conn.executemany(sql, synthetic_rows(WRITE_ROWS, seed=1))
+            conn.commit()
+        conn.execute("DELETE FROM missions WHERE id >= ?", (first,))
+        conn.commit()
+        return insert.seconds * 1000
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--loaded", type=int, default=100_000, help="table rows for the memory comparison")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    app = QApplication.instance() or QApplication(["bench", "-platform", "offscreen"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as conn, Timer() as backfill:
+            add_lookup_triggers(conn)
+        engine.dispose()
+
+        session = sessionmaker(bind=make_engine(path, read_only=True))()
+        cache = LookupCache()
+        load_ms = median_ms(lambda: cache.load(session), args.repeat)
+        print(f"{args.rows} missions: lookup tables backfilled in {backfill.seconds:.1f} s, "
+              f"cache of {sum(map(len, cache.values.values()))} values loaded in {load_ms:.2f} ms")
+
+        completion = LookupCompletion()
+        completion.set_values(cache.values)
+        completers = {field: completion.completer(field) for field in cache.values}
+        print(f"\n{'prefix':<8} {'field':<9} {'matches':>7} {'query':>10} {'completer':>10}")
+        for prefix in PREFIXES:
+            field = field_for(prefix)
+            query = median_ms(lambda: query_matches(session, field, prefix), args.repeat)
+            completer = median_ms(lambda: completer_matches(completers[field], prefix), args.repeat)
+            matches = completer_matches(completers[field], prefix)
+            print(f"{prefix:<8} {field:<9} {matches:>7} {query:7.1f} ms {completer:7.3f} ms")
+
+        count, copied = rows_bytes(session, args.loaded, False)
+        _, interned = rows_bytes(session, args.loaded, True)
+        session.close()
+        print(f"\n{count} table rows: {copied / 2**20:.1f} MiB as fetched, {interned / 2**20:.1f} MiB with "
+              f"the {len(INTERNED_COLUMNS)} categorical columns interned")
+
+        triggered = insert_ms(path, True)
+        plain = insert_ms(path, False)
+        print(f"Insert {WRITE_ROWS} missions: {plain:.0f} ms without the lookup triggers, {triggered:.0f} ms with them")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Throughput of the METAR decoder (logic.metar) on a synthetic corpus.
+
+    python -m benchmarks.bench_metar [--reports 1000000] [--distinct 50000]
+
+Reports reports/s for decoding one report at a time with decode_metar() and for
+decode_batch() on:
+  - unique:     every report distinct, cache empty (the worst case)
+  - repeated:   `--reports` drawn from `--distinct` reports, as when many missions share
+                a station's hourly report, cache empty
+  - warm:       the unique corpus again, now that every report is cached
+"""
+import argparse
+import random
+from logic import metar
+from logic.metar import decode_batch, decode_metar
+from benchmarks.synthetic import synthetic_metars, Timer
+
+
+def rate(n, seconds):
+    return f"{n / seconds:>12,.0f} reports/s ({seconds:.2f} s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=50_000)
+    args = parser.parse_args()
+
+    reports = list(synthetic_metars(args.reports))
+    rng = random.Random(1)
+    pool = reports[:args.distinct]
+    repeated = [rng.choice(pool) for _ in range(args.reports)]
+
+    single = reports[:min(args.reports, 100_000)]
+    with Timer() as t:
+        for raw in single:
+            decode_metar(raw)
+    print(f"decode_metar, one by one:   {rate(len(single), t.seconds)}")
+
+    metar._cache.clear()
+    with Timer() as t:
+        columns = decode_batch(repeated)
+    print(f"decode_batch, repeated:     {rate(len(repeated), t.seconds)}")
+
+    metar._cache.clear()
+    metar.CACHE_SIZE = max(metar.CACHE_SIZE, len(reports))
+    with Timer() as t:
+        columns = decode_batch(reports)
+    print(f"decode_batch, unique:       {rate(len(reports), t.seconds)}")
+
+    with Timer() as t:
+        decode_batch(reports)
+    print(f"decode_batch, warm cache:   {rate(len(reports), t.seconds)}")
+    print(f"decoded {int(columns['valid'].sum())} of {len(reports)}")
+
+
+if __name__ == "__main__":
+    main()
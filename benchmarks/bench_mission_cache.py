@@ -0,0 +1,125 @@
+"""
+Memory and speed of the columnar mission cache (logic.mission_cache) against holding the
+same missions as ORM Mission objects or as the row lists the table model used to keep.
+
+    python -m benchmarks.bench_mission_cache [--rows 1000000] [--updates 1000]
+
+Each holder is loaded in a fresh interpreter so RSS numbers don't bleed into each other,
+and once more under tracemalloc for the bytes it keeps once loading is done (RSS also has
+what the allocator holds on to from the query results passing through).
+For the cache it also times a statistics breakdown over every cached mission, reading
+every cell of a screenful of rows the way the table does, and applying `--updates`
+changed rows the way a sync does.
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+HOLDERS = ["orm", "rows", "cache"]
+
+SCREEN_ROWS = 50
+
+
+def measure(db_path, holder, updates, traced=False):
+    from sqlalchemy.orm import sessionmaker
+    from db.database import make_engine
+    from db.models import Mission
+    from logic.fleet_stats import cached_breakdown
+    from logic.flight_ops import format_value
+    from logic.mission_cache import CACHE_FIELDS, MissionCache
+    from ui.mission_table_model import QUERY_COLUMNS, interned_row
+    from benchmarks.synthetic import rss_mb, Timer
+
+    session = sessionmaker(bind=make_engine(db_path, read_only=True))()
+    session.query(*QUERY_COLUMNS).first()  # Compile and connect before measuring
+    session.query(Mission).first()
+    if traced:
+        tracemalloc.start()
+    rss_before = rss_mb()
+    with Timer() as load:
+        if holder == "orm":
+            held = session.query(Mission).all()
+        elif holder == "rows":
+            held = [interned_row(row) for row in session.query(*QUERY_COLUMNS)]
+        else:
+            held = MissionCache()
+            held.load(session)
+    session.close()  # Loaded objects stay referenced by `held`, not the session
+    gc.collect()
+    if traced:
+        print(f"kept {tracemalloc.get_traced_memory()[0] / 2**20:.1f}")
+        return
+    print(f"load {load.seconds:.2f} {rss_mb() - rss_before:.1f}")
+    if holder != "cache":
+        return
+
+    cache = held
+    print(f"nbytes {cache.nbytes() / 2**20:.1f}")
+    positions = cache.live_positions()
+    with Timer() as t:
+        cached_breakdown(cache, positions, "platform")
+    print(f"breakdown {t.seconds * 1000:.1f}")
+    with Timer() as t:
+        for position in positions[:SCREEN_ROWS].tolist():
+            for field in CACHE_FIELDS:
+                format_value(cache.value(position, field))
+    print(f"screen {t.seconds * 1000:.2f}")
+    changed = [cache.row(position) for position in positions[::max(1, len(positions) // updates)][:updates].tolist()]
+    for row in changed:
+        row[CACHE_FIELDS.index("comments")] = "Updated comment"
+    with Timer() as t:
+        cache.put(changed)
+    print(f"sync {t.seconds * 1000:.1f}")
+
+
+def run_child(db_path, holder, updates, traced=False):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_mission_cache", "--child", db_path, holder, str(updates)]
+        + (["--traced"] if traced else []),
+        check=True, capture_output=True, text=True
+    ).stdout
+    return {line.split()[0]: [float(value) for value in line.split()[1:]] for line in out.splitlines()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--updates", type=int, default=1000, help="rows changed by the timed sync")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    parser.add_argument("--traced", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        db_path, holder, updates = args.child
+        measure(db_path, holder, int(updates), args.traced)
+        return
+
+    from benchmarks.synthetic import make_synthetic_db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        results = {holder: run_child(db_path, holder, args.updates) for holder in HOLDERS}
+        for holder in HOLDERS:
+            results[holder].update(run_child(db_path, holder, args.updates, traced=True))
+
+    orm_mb = results["orm"]["kept"][0]
+    print(f"{args.rows} missions\n")
+    print(f"{'held as':<10} {'load (s)':>9} {'RSS (MiB)':>10} {'kept (MiB)':>11} {'bytes/mission':>14} {'vs ORM':>7}")
+    for holder in HOLDERS:
+        seconds, rss = results[holder]["load"]
+        kept = results[holder]["kept"][0]
+        print(f"{holder:<10} {seconds:9.2f} {rss:10.1f} {kept:11.1f} {kept * 2**20 / args.rows:14.0f} "
+              f"{orm_mb / kept:6.1f}x")
+    cache = results["cache"]
+    print(f"\ncache arrays: {cache['nbytes'][0]:.1f} MiB")
+    print(f"breakdown by platform over all missions: {cache['breakdown'][0]:.1f} ms")
+    print(f"format a screen of {SCREEN_ROWS} rows: {cache['screen'][0]:.2f} ms")
+    print(f"put {args.updates} changed rows: {cache['sync'][0]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
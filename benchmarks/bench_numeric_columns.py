@@ -0,0 +1,78 @@
+"""
+Range filters and averages over altitude/speed/spacing before and after the migration
+that retypes them from text to REAL.
+
+    python -m benchmarks.bench_numeric_columns [--rows 1000000]
+
+"Before" rebuilds the legacy layout (VARCHAR columns holding numbers as text), where every
+query needs CAST on each row; "after" runs db.migrations and queries the REAL columns.
+"""
+import argparse
+import os
+import tempfile
+from sqlalchemy import create_engine, text
+from db.migrations import migrate, NUMERIC_TEXT_COLUMNS
+from benchmarks.synthetic import make_synthetic_db, Timer
+
+BEFORE = {
+    "altitude range": "SELECT count(*) FROM missions WHERE CAST(altitude_m AS REAL) BETWEEN 80 AND 100",
+    "avg altitude/speed/spacing": "SELECT avg(CAST(altitude_m AS REAL)), avg(CAST(speed_m_s AS REAL)), "
+                                  "avg(CAST(spacing_m AS REAL)) FROM missions",
+    "avg speed by platform": "SELECT platform, avg(CAST(speed_m_s AS REAL)) FROM missions GROUP BY platform",
+}
+AFTER = {
+    "altitude range": "SELECT count(*) FROM missions WHERE altitude_m BETWEEN 80 AND 100",
+    "avg altitude/speed/spacing": "SELECT avg(altitude_m), avg(speed_m_s), avg(spacing_m) FROM missions",
+    "avg speed by platform": "SELECT platform, avg(speed_m_s) FROM missions GROUP BY platform",
+}
+
+
+def make_legacy_layout(engine):
+    """Turns the numeric columns back into text columns, as the original schema had them."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_missions_altitude_m")
+        for col in NUMERIC_TEXT_COLUMNS:
+            conn.exec_driver_sql(f"ALTER TABLE missions ADD COLUMN {col}__old VARCHAR")
+            conn.exec_driver_sql(f"UPDATE missions SET {col}__old = CAST({col} AS TEXT)")
+            conn.exec_driver_sql(f"ALTER TABLE missions DROP COLUMN {col}")
+            conn.exec_driver_sql(f"ALTER TABLE missions RENAME COLUMN {col}__old TO {col}")
+        # A few legacy values the migration has to flag
+        conn.exec_driver_sql("UPDATE missions SET altitude_m = '40/60/80' WHERE id % 997 = 0")
+        conn.exec_driver_sql("PRAGMA user_version = 2")
+
+
+def run(engine, queries):
+    with engine.connect() as conn:
+        timings = {}
+        for name, sql in queries.items():
+            with Timer() as t:
+                conn.execute(text(sql)).fetchall()
+            timings[name] = t.seconds
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "numeric.db"), args.rows)
+        engine = create_engine(f"sqlite:///{path}")
+        make_legacy_layout(engine)
+        before = run(engine, BEFORE)
+
+        with Timer() as migration:
+            migrate(engine)
+        with engine.connect() as conn:
+            flagged = conn.exec_driver_sql("SELECT count(*) FROM mission_value_issues").scalar()
+        after = run(engine, AFTER)
+
+    print(f"Migration of {args.rows} rows: {migration.seconds:.2f} s, {flagged} value(s) flagged")
+    print(f"{'query':<28} {'text + CAST':>12} {'REAL':>10}")
+    for name in BEFORE:
+        print(f"{name:<28} {before[name] * 1000:>9.1f} ms {after[name] * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
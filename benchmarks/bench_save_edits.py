@@ -0,0 +1,80 @@
+"""
+Saving 5,000 pasted rows: per-object ORM persistence (the old save_edits) vs.
+flight_ops.save_missions, which batches inserts and updates into executemany calls.
+
+    python -m benchmarks.bench_save_edits [--rows 5000]
+"""
+import argparse
+import os
+import tempfile
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db.models import Mission
+from logic.flight_ops import save_missions
+from logic.schema import parse_cell
+from benchmarks.synthetic import make_synthetic_db, synthetic_rows, MISSION_COLUMNS, Timer
+
+# Same attribute/type pairs MainWindow.save_edits parses table cells with
+FIELDS = [
+    ("associated_mission", int), ("date", datetime), ("platform", str), ("chassis", str),
+    ("customer", str), ("site", str), ("altitude_m", float), ("speed_m_s", float),
+    ("spacing_m", float), ("sky_conditions", str), ("wind_knots", float), ("battery", str),
+    ("filesize_gb", float), ("is_test", bool), ("issues_hw", str), ("issues_operator", str),
+    ("issues_sw", str), ("outcome", str), ("comments", str), ("raw_metar", str)
+]
+
+
+def pasted_rows(n):
+    """Synthetic missions rendered as the cell text a spreadsheet paste would produce."""
+    for values in synthetic_rows(n, seed=1):
+        record = dict(zip(MISSION_COLUMNS, values))
+        record["date"] = record["date"][:10]
+        record["is_test"] = "Yes" if record["is_test"] else "No"
+        yield [("" if record[attr] is None else str(record[attr])) for attr, _ in FIELDS]
+
+
+def parse(rows):
+    return [{attr: parse_cell(text, type_func) for (attr, type_func), text in zip(FIELDS, row)}
+            for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    cells = list(pasted_rows(args.rows))
+    print(f"{'path':>10} {'insert (s)':>11} {'update (s)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("orm", "bulk"):
+            path = make_synthetic_db(os.path.join(tmp, f"{mode}.db"), args.rows)
+            session = sessionmaker(bind=create_engine(f"sqlite:///{path}"))()
+            edits = {mission_id: {"platform": f"P{mission_id % 7}", "wind_knots": 5.0}
+                     for mission_id in range(1, args.rows + 1)}
+
+            with Timer() as insert_time:
+                new_missions = parse(cells)
+                if mode == "orm":
+                    for data in new_missions:
+                        session.add(Mission(**data))
+                    session.commit()
+                else:
+                    save_missions({}, new_missions, session=session)
+
+            with Timer() as update_time:
+                if mode == "orm":
+                    for mission_id, changes in edits.items():
+                        mission = session.get(Mission, mission_id)
+                        for attr, value in changes.items():
+                            setattr(mission, attr, value)
+                    session.commit()
+                else:
+                    save_missions(edits, [], session=session)
+
+            session.close()
+            print(f"{mode:>10} {insert_time.seconds:>11.3f} {update_time.seconds:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Full-text search (missions_fts) against LIKE '%word%' scans of the same text columns.
+
+    python -m benchmarks.bench_search [--rows 1000000] [--repeat 3]
+
+Builds a synthetic database with the search index, then for words from very rare to
+in every row times, per method, counting the matches and fetching the table's first
+page of 500 (ORDER BY id), plus the ranked top 100 with snippets (search.search_missions).
+Also reports the index's build time and size, and what its triggers add to inserts
+and text edits.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from db.database import make_engine
+from db.models import Mission
+from logic.flight_ops import _like_any_text, text_match
+from logic.search import search_missions
+from benchmarks.synthetic import MISSION_COLUMNS, add_search_index, make_synthetic_db, synthetic_rows, Timer
+
+WORDS = [
+    # A mission number from the synthetic comments is added per run, for one match
+    ("dropout", "5% of missions"),
+    ("vibration", "10%"),
+    ("KBFI", "1 in 6, in the METAR"),
+    ("vib", "prefix of 10%"),
+    ("mission", "every mission"),
+]
+PAGE = 500
+WRITE_ROWS = 20_000
+
+
+def median_ms(func, repeat):
+    func()  # Warm the cache
+    times = []
+    for _ in range(repeat):
+        with Timer() as t:
+            func()
+        times.append(t.seconds)
+    return statistics.median(times) * 1000
+
+
+def index_size_mb(conn):
+    try:
+        size = conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'missions_fts%'").fetchone()[0]
+    except sqlite3.OperationalError:  # SQLite built without dbstat
+        return float("nan")
+    return size / (1024 * 1024)
+
+
+def write_overhead(path, indexed):
+    """ms to insert WRITE_ROWS missions and then edit their comments, with or without the triggers."""
+    conn = sqlite3.connect(path)
+    try:
+        if not indexed:
+            for trigger in ("missions_fts_insert", "missions_fts_update", "missions_fts_delete"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        sql = (f"INSERT INTO missions ({', '.join(MISSION_COLUMNS)}) "
+               f"VALUES ({', '.join('?' for _ in MISSION_COLUMNS)})")
+        first = conn.execute("SELECT MAX(id) + 1 FROM missions").fetchone()[0]
+        with Timer() as insert:
+            conn.executemany(sql, synthetic_rows(WRITE_ROWS, seed=1))
+            conn.commit()
+        with Timer() as edit:
+            conn.execute("UPDATE missions SET comments = comments || ' checked' WHERE id >= ?", (first,))
+            conn.commit()
+        conn.execute("DELETE FROM missions WHERE id >= ?", (first,))
+        conn.commit()
+        return insert.seconds * 1000, edit.seconds * 1000
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        conn = sqlite3.connect(path)
+        with Timer() as build:
+            add_search_index(conn)
+        print(f"{args.rows} missions: index built in {build.seconds:.1f} s, "
+              f"{index_size_mb(conn):.0f} MiB (database {os.path.getsize(path) / 2**20:.0f} MiB)")
+        conn.close()
+
+        session = sessionmaker(bind=make_engine(path, read_only=True))()
+        print(f"\n{'word':<10} {'matches':>8} {'':<22} {'LIKE count':>11} {'FTS count':>10} "
+              f"{'LIKE page':>10} {'FTS page':>9} {'ranked':>8}")
+        for word, note in [(str(args.rows // 2), "one mission")] + WORDS:
+            like, fts = _like_any_text(word), text_match([word])
+
+            def count(criterion):
+                return session.execute(select(func.count()).select_from(Mission).where(criterion)).scalar()
+
+            def page(criterion):
+                return session.execute(select(Mission.id).where(criterion).order_by(Mission.id).limit(PAGE)).all()
+
+            matches = count(fts)
+            timings = [median_ms(lambda: count(like), args.repeat), median_ms(lambda: count(fts), args.repeat),
+                       median_ms(lambda: page(like), args.repeat), median_ms(lambda: page(fts), args.repeat),
+                       median_ms(lambda: search_missions(session, word), args.repeat)]
+            print(f"{word:<10} {matches:>8} {note:<22} " + " ".join(
+                f"{ms:>{width - 3}.1f} ms" for ms, width in zip(timings, (11, 10, 10, 9, 8))))
+        session.close()
+
+        fts_insert, fts_edit = write_overhead(path, indexed=True)
+        plain_insert, plain_edit = write_overhead(path, indexed=False)
+        print(f"\nInsert {WRITE_ROWS} missions: {plain_insert:.0f} ms without the index, {fts_insert:.0f} ms with it")
+        print(f"Edit their comments:  {plain_edit:.0f} ms without the index, {fts_edit:.0f} ms with it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Cold start to first paint: from launching the interpreter to the mission table painting
+its first rows, with and without the snapshot the previous exit saved (ui/startup.py).
+
+    python -m benchmarks.bench_startup [--rows 100000] [--runs 5]
+
+Each run is a fresh interpreter running main.start(), the same path as `python main.py`,
+and also reports when the main window itself (database open, model restored or the first
+page loaded) has painted. Runs with a snapshot are timed with one of the first page, as
+a plain exit leaves it, and one of every mission, as after scrolling to the bottom.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def child(launched, load_all):
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication, QTableView
+    import main
+
+    class Paints(QObject):
+        """Prints when a table first paints rows, then when the main window's does."""
+        window = None
+        painted = False
+
+        def eventFilter(self, obj, event):
+            if event.type() != QEvent.Paint or not isinstance(obj.parent(), QTableView):
+                return False
+            view = obj.parent()
+            if not view.model().rowCount():
+                return False
+            if not self.painted:
+                self.painted = True
+                print(f"paint {time.time() - launched:.4f}", flush=True)
+            if self.window is not None and view is self.window.missionTable:
+                print(f"ready {time.time() - launched:.4f}", flush=True)
+                app.removeEventFilter(self)
+                if load_all:
+                    # Load every row before exiting, so the snapshot saved has them all
+                    self.window.model.batch_size = 10 ** 9
+                    self.window.model.reloaded.connect(self.window.close)
+                    self.window.model.reload()
+                else:
+                    QTimer.singleShot(0, self.window.close)
+            return False
+
+    app = QApplication(sys.argv[:1])
+    paints = Paints()
+    app.installEventFilter(paints)
+    paints.window = main.start()
+    app.exec_()
+
+
+def run_child(db_path, load_all=False):
+    env = dict(os.environ, FLIGHTLOG_DB=db_path)
+    launched = time.time()
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", str(launched)]
+                         + (["--load-all"] if load_all else []),
+                         check=True, capture_output=True, text=True, env=env).stdout
+    times = {line.split()[0]: float(line.split()[1]) for line in out.splitlines() if line[:5] in ("paint", "ready")}
+    return times["paint"], times["ready"]
+
+
+def summary(times):
+    return (f"{statistics.median(times) * 1000:5.0f} ms median "
+            f"(min {min(times) * 1000:.0f}, max {max(times) * 1000:.0f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--load-all", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.load_all)
+        return
+
+    from db.database import make_engine
+    from db.migrations import migrate
+    from benchmarks.synthetic import make_synthetic_db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        engine = make_engine(db_path)
+        migrate(engine)  # Upgrade it once, as the first real start would
+        engine.dispose()
+        snapshot_path = f"{db_path}.snapshot"
+
+        results = {}
+        cold = []
+        for _ in range(args.runs):
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+            cold.append(run_child(db_path))
+        results["no snapshot"] = cold
+        # Each run saves the snapshot the next one starts from
+        results["snapshot of the first page"] = [run_child(db_path) for _ in range(args.runs)]
+        run_child(db_path, load_all=True)
+        size = os.path.getsize(snapshot_path)
+        results[f"snapshot of all {args.rows} rows"] = [run_child(db_path, load_all=True) for _ in range(args.runs)]
+
+    print(f"{args.rows} missions, {args.runs} runs each "
+          f"(a snapshot of every row is {size / 2**20:.1f} MiB)\n")
+    for name, times in results.items():
+        print(f"{name}:")
+        print(f"  first paint        {summary([paint for paint, _ in times])}")
+        print(f"  main window ready  {summary([ready for _, ready in times])}")
+
+
+if __name__ == "__main__":
+    main()
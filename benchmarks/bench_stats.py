@@ -0,0 +1,138 @@
+"""
+Fleet statistics from the materialized rollups (logic.fleet_stats) against computing them
+from the missions.
+
+    python -m benchmarks.bench_stats [--rows 1000000] [--repeat 3]
+
+Builds a synthetic database, fills the daily/monthly rollups the way the migration does,
+then times dashboard queries three ways: aggregating rows streamed into Python (what
+get_all_missions-based code does, minus the ORM objects), a GROUP BY over missions, and
+the rollups. Also reports what the rollup triggers add to inserts and edits.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from db.database import make_engine
+from db.migrations import add_fleet_statistics
+from db.models import Mission
+from logic.flight_ops import iter_missions
+from logic.fleet_stats import fleet_breakdown, fleet_totals
+from benchmarks.synthetic import MISSION_COLUMNS, make_synthetic_db, synthetic_rows, Timer
+
+WRITE_ROWS = 20_000
+STATS_TRIGGERS = ["missions_stats_insert", "missions_stats_update", "missions_stats_delete"]
+
+
+def median_ms(func, repeat):
+    func()  # Warm the cache
+    times = []
+    for _ in range(repeat):
+        with Timer() as t:
+            func()
+        times.append(t.seconds)
+    return statistics.median(times) * 1000
+
+
+def python_breakdown(session, attr, start=None):
+    totals = defaultdict(lambda: [0, 0.0])
+    for row in iter_missions({}, "id", 10_000, ["date", attr, "filesize_gb"], session=session):
+        if start is None or row.date.date() >= start:
+            group = totals[getattr(row, attr)]
+            group[0] += 1
+            group[1] += row.filesize_gb or 0.0
+    return totals
+
+
+def sql_breakdown(session, attr, start=None):
+    column = getattr(Mission, attr)
+    query = select(column, func.count(), func.sum(Mission.filesize_gb)).group_by(column)
+    if start is not None:
+        query = query.where(Mission.date >= start)
+    return session.execute(query).all()
+
+
+def write_overhead(path, with_stats):
+    """ms to insert WRITE_ROWS missions one statement at a time, then change their outcome."""
+    conn = sqlite3.connect(path)
+    try:
+        if not with_stats:
+            for trigger in STATS_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        sql = (f"INSERT INTO missions ({', '.join(MISSION_COLUMNS)}) "
+               f"VALUES ({', '.join('?' for _ in MISSION_COLUMNS)})")
+        first = conn.execute("SELECT MAX(id) + 1 FROM missions").fetchone()[0]
+        with Timer() as insert:
+            conn.executemany(sql, synthetic_rows(WRITE_ROWS, seed=1))
+            conn.commit()
+        with Timer() as edit:
+            conn.executemany("UPDATE missions SET outcome = 'Failed' WHERE id = ?",
+                             [(i,) for i in range(first, first + WRITE_ROWS)])
+            conn.commit()
+        conn.execute("DELETE FROM missions WHERE id >= ?", (first,))
+        conn.commit()
+        return insert.seconds * 1000, edit.seconds * 1000
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "missions.db"), args.rows)
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as conn, Timer() as fill:
+            add_fleet_statistics(conn)
+        with engine.connect() as conn:
+            daily = conn.exec_driver_sql("SELECT COUNT(*) FROM mission_stats_daily").scalar()
+            monthly = conn.exec_driver_sql("SELECT COUNT(*) FROM mission_stats_monthly").scalar()
+        engine.dispose()
+        print(f"{args.rows} missions: rollups filled in {fill.seconds:.1f} s "
+              f"({daily} daily rows, {monthly} monthly rows)")
+
+        session = sessionmaker(bind=make_engine(path, read_only=True))()
+        last = session.execute(select(func.max(Mission.date))).scalar().date()
+        month_start = date(last.year, last.month, 1) - timedelta(days=330)
+        month_start = date(month_start.year, month_start.month, 1)
+        last_30 = last - timedelta(days=29)
+
+        cases = [
+            ("totals, all time", "customer", None,
+             lambda: fleet_totals(session)),
+            ("by chassis, all time", "chassis", None,
+             lambda: fleet_breakdown(session, "chassis")),
+            ("by platform, last 12 months", "platform", month_start,
+             lambda: fleet_breakdown(session, "platform", month_start)),
+            ("by battery, last 30 days", "battery", last_30,
+             lambda: fleet_breakdown(session, "battery", last_30, last + timedelta(days=1))),
+            ("by month, all time", None, None,
+             lambda: fleet_breakdown(session, "month")),
+        ]
+        print(f"\n{'query':<30} {'Python':>10} {'GROUP BY':>10} {'rollups':>9}")
+        for label, attr, start, rollup in cases:
+            if attr:
+                python_ms = f"{median_ms(lambda: python_breakdown(session, attr, start), 1):7.0f} ms"
+                sql_ms = f"{median_ms(lambda: sql_breakdown(session, attr, start), args.repeat):7.0f} ms"
+            else:
+                python_ms = sql_ms = "-"
+            print(f"{label:<30} {python_ms:>10} {sql_ms:>10} {median_ms(rollup, args.repeat):6.2f} ms")
+        session.close()
+
+        stats_insert, stats_edit = write_overhead(path, with_stats=True)
+        plain_insert, plain_edit = write_overhead(path, with_stats=False)
+        print(f"\nInsert {WRITE_ROWS} missions: {plain_insert:.0f} ms without the rollup triggers, "
+              f"{stats_insert:.0f} ms with them")
+        print(f"Edit their outcome:     {plain_edit:.0f} ms without, {stats_edit:.0f} ms with")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Sync between replicas (logic/sync.py): several copies of a synthetic database edited
+concurrently and synced in shuffled orders must end up holding the same missions, and a
+sync must cost the same for the same changes however large the database.
+
+    python -m benchmarks.bench_sync [--rows 20000] [--replicas 4] [--rounds 5] [--edits 300]
+
+The first replica plays the central log, serving over HTTP on localhost; the others are
+clones of it. Each round every replica saves `--edits` random field edits (save_missions,
+as "Save Edits" does; they often hit the same missions as another replica's), adds and
+deletes a few missions, then they sync in a shuffled order, half by bundle files and half
+over HTTP. At the end everyone syncs with the central log until nothing is left to send,
+and every replica's missions (by their global key, references included) and lookup
+values are compared. Then the same batch of changes is synced into a database of
+`--rows` missions and into one ten times larger.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from db.database import make_engine
+from db.migrations import migrate
+from db.models import HISTORY_FIELDS, MISSION_LOOKUP_TABLES
+from logic import sync
+from logic.flight_ops import delete_missions, save_missions
+from benchmarks.synthetic import CUSTOMERS, PLATFORMS, SITES, make_synthetic_db, Timer
+
+# Missions added and deleted by each replica per round
+INSERTS = 10
+DELETES = 5
+
+# Changes synced for the scaling comparison
+SCALE_EDITS = 2000
+
+
+class Replica:
+    def __init__(self, path):
+        self.path = path
+        self.engine = make_engine(path)
+        self.session = sessionmaker(bind=self.engine)()
+        self.name = None
+
+    def live_ids(self):
+        return [id_ for (id_,) in self.session.connection().exec_driver_sql("SELECT id FROM missions")]
+
+    def close(self):
+        self.session.close()
+        self.engine.dispose()
+
+
+def edit(replica, rng, edits, tag):
+    """A save of `edits` random field edits, some added missions, then some deletions."""
+    ids = replica.live_ids()
+    replica.session.commit()
+    # Most edits land on a small set of missions, so replicas edit the same ones
+    hot = ids[:max(len(ids) // 50, 10)]
+    updates = {}
+    for _ in range(edits):
+        mission_id = rng.choice(hot if rng.random() < 0.5 else ids)
+        field = rng.choice(("site", "altitude_m", "comments", "customer", "associated_mission"))
+        value = {"site": lambda: rng.choice(SITES + [f"Field {rng.randrange(100)}"]),
+                 "altitude_m": lambda: float(rng.randrange(30, 130)),
+                 "comments": lambda: f"{tag}: note {rng.randrange(10**6)}",
+                 "customer": lambda: rng.choice(CUSTOMERS + [f"Customer {rng.randrange(100)}"]),
+                 "associated_mission": lambda: rng.choice(ids)}[field]()
+        updates.setdefault(mission_id, {})[field] = value
+    new = [{"date": datetime(2025, 1, 1) + timedelta(days=rng.randrange(300)), "platform": rng.choice(PLATFORMS),
+            "chassis": f"CH-{rng.randrange(200):03d}", "site": rng.choice(SITES),
+            "associated_mission": rng.choice(ids), "comments": f"{tag}: new {i}"} for i in range(INSERTS)]
+    save_missions(updates, new, session=replica.session)
+    delete_missions(rng.sample(ids, DELETES), session=replica.session)
+
+
+def state(replica):
+    """The replica's missions by global key, with references as keys, and its lookup values."""
+    conn = replica.session.connection()
+    keys = {mission_id: (uuid, origin_id) for mission_id, uuid, origin_id in conn.exec_driver_sql(
+        "SELECT s.mission_id, r.uuid, s.origin_id FROM sync_missions AS s JOIN sync_replicas AS r ON r.id = s.origin")}
+    missions = {}
+    for mission_id, *values in conn.exec_driver_sql(f"SELECT id, {', '.join(HISTORY_FIELDS)} FROM missions"):
+        values[sync.REF_FIELD] = keys.get(values[sync.REF_FIELD])
+        missions[keys[mission_id]] = values
+    lookups = {name: {value for (value,) in conn.exec_driver_sql(f"SELECT name FROM {name}")}
+               for name in MISSION_LOOKUP_TABLES.values()}
+    replica.session.commit()
+    return missions, lookups
+
+
+def sync_by_file(sender, receiver, tmp):
+    """
+    Sends `receiver` what it's missing as a bundle file; returns (bundle bytes, changes,
+    SyncResult). Replicas that haven't heard from each other yet go by the receiver's
+    version vector instead, as an exchange would.
+    """
+    path = os.path.join(tmp, "out.bundle")
+    try:
+        count = sync.export_bundle(sender.session, path, to=receiver.name)
+    except ValueError:
+        bundle = sync.changes_for(sender.session, sync._seqs(sync.version_bundle(receiver.session).versions))
+        with open(path, "wb") as f:
+            f.write(bundle.to_bytes())
+        count = len(bundle)
+    size = os.path.getsize(path)
+    result = sync.merge_file(receiver.session, path)
+    os.remove(path)
+    return size, count, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=300, help="field edits per replica per round")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        central = Replica(make_synthetic_db(os.path.join(tmp, "central.db"), args.rows))
+        migrate(central.engine)
+        central.name = "central"
+        sync.rename(central.session, central.name)
+        replicas = [central]
+        for i in range(1, args.replicas):
+            path = os.path.join(tmp, f"crew-{i}.db")
+            sync.clone(central.session, path, f"crew-{i}")
+            replicas.append(Replica(path))
+            replicas[-1].name = f"crew-{i}"
+
+        server = sync.make_server(port=0, session_factory=sessionmaker(bind=central.engine), quiet=True)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        file_syncs, http_syncs, sizes = [], [], []
+        for round_number in range(args.rounds):
+            for replica in replicas:
+                edit(replica, rng, args.edits, f"{replica.name} round {round_number}")
+            pairs = [(a, b) for a in replicas for b in replicas if a is not b]
+            rng.shuffle(pairs)
+            for sender, receiver in pairs[:len(pairs) // 2]:
+                if rng.random() < 0.5 and central in (sender, receiver):
+                    laptop = receiver if sender is central else sender
+                    with Timer() as t:
+                        sync.exchange(laptop.session, url)
+                    http_syncs.append(t.seconds)
+                else:
+                    with Timer() as t:
+                        size, count, _ = sync_by_file(sender, receiver, tmp)
+                    file_syncs.append(t.seconds)
+                    if count:
+                        sizes.append(size / count)
+
+        # Everything through the central log, twice: in, then back out to everyone
+        for _ in range(2):
+            for laptop in replicas[1:]:
+                sync.exchange(laptop.session, url)
+        leftover = sum(len(sync.changes_for(laptop.session, sync._seqs(sync.version_bundle(central.session).versions)))
+                       for laptop in replicas[1:])
+        server.shutdown()
+        server.server_close()
+
+        states = [state(replica) for replica in replicas]
+        for replica, other in zip(replicas[1:], states[1:]):
+            assert other[1] == states[0][1], f"{replica.name}'s lookup values differ from the central log's"
+            differ = [key for key in states[0][0].keys() | other[0].keys() if states[0][0].get(key) != other[0].get(key)]
+            assert not differ, f"{replica.name} differs from the central log in {len(differ)} missions, e.g. {differ[0]}"
+        assert leftover == 0, f"{leftover} changes were still unsynced"
+        missions = len(states[0][0])
+        logged = sum(len(sync.conflicts(replica.session, limit=10**9)) for replica in replicas)
+        for replica in replicas:
+            replica.close()
+
+        # The same changes into a small and a large database
+        scaling = []
+        for rows in (args.rows, args.rows * 10):
+            source = Replica(make_synthetic_db(os.path.join(tmp, f"source-{rows}.db"), rows))
+            migrate(source.engine)
+            source.name = "source"
+            sync.rename(source.session, source.name)
+            target_path = os.path.join(tmp, f"target-{rows}.db")
+            sync.clone(source.session, target_path, "target")
+            target = Replica(target_path)
+            target.name = "target"
+            edit_rng = random.Random(1)
+            save_missions({mission_id: {"comments": f"scaling {mission_id}", "altitude_m": 50.0}
+                           for mission_id in edit_rng.sample(range(1, rows + 1), SCALE_EDITS // 2)}, [],
+                          session=source.session)
+            with Timer() as t:
+                size, count, _ = sync_by_file(source, target, tmp)
+            scaling.append((rows, count, t.seconds, size))
+            source.close()
+            target.close()
+
+    print(f"{args.replicas} replicas of {args.rows} missions, {args.rounds} rounds of {args.edits} edits, "
+          f"{INSERTS} inserts and {DELETES} deletes each")
+    print(f"converged: {missions} missions the same everywhere, {logged} concurrent edits of a field "
+          f"resolved as conflicts\n")
+    print(f"sync by bundle file (median of {len(file_syncs)})   {statistics.median(file_syncs) * 1000:7.0f} ms")
+    print(f"sync over HTTP (median of {len(http_syncs)})        {statistics.median(http_syncs) * 1000:7.0f} ms")
+    print(f"bundle size                           {statistics.median(sizes):7.1f} bytes per change (median)\n")
+    for rows, count, seconds, size in scaling:
+        print(f"{count} changes into {rows:>8} missions   {seconds * 1000:7.0f} ms, "
+              f"{size / 1024:6.1f} KiB bundle")
+
+
+if __name__ == "__main__":
+    main()
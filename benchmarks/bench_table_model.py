@@ -0,0 +1,94 @@
+"""
+Refresh time and RSS of the mission table: lazily-fetched MissionTableModel vs. the
+previous QTableWidget that built one item per cell.
+
+    python -m benchmarks.bench_table_model [--sizes 10000 100000 1000000] [--legacy-max 100000]
+
+Each measurement runs in a fresh interpreter so RSS numbers don't bleed into each other.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def measure(db_path, mode):
+    from PyQt5.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from db.models import Mission
+    from ui.mission_table_model import MissionTableModel, HEADERS
+    from benchmarks.synthetic import rss_mb, Timer
+
+    app = QApplication(sys.argv)
+    session = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+    rss_before = rss_mb()
+
+    with Timer() as t:
+        if mode == "model":
+            view = QTableView()
+            model = MissionTableModel(session)
+            view.setModel(model)
+            model.reload()
+            view.resizeColumnsToContents()
+        else:
+            # The refresh path MainWindow.load_missions used before the model existed
+            view = QTableWidget()
+            view.setColumnCount(len(HEADERS))
+            view.setHorizontalHeaderLabels(HEADERS)
+            for row_idx, m in enumerate(session.query(Mission).all()):
+                view.insertRow(row_idx)
+                values = [
+                    m.id, m.associated_mission, m.date.strftime('%Y-%m-%d') if m.date else "",
+                    m.platform, m.chassis, m.customer, m.site, m.altitude_m,
+                    m.speed_m_s, m.spacing_m, m.sky_conditions, m.wind_knots,
+                    m.battery, m.filesize_gb, "Yes" if m.is_test else "No",
+                    m.issues_hw, m.issues_operator, m.issues_sw, m.outcome,
+                    m.comments, m.raw_metar
+                ]
+                for col_idx, val in enumerate(values):
+                    view.setItem(row_idx, col_idx, QTableWidgetItem(str(val or "")))
+                view.setVerticalHeaderItem(row_idx, QTableWidgetItem(str(row_idx + 1)))
+            view.resizeColumnsToContents()
+        app.processEvents()
+
+    print(f"{t.seconds:.3f} {rss_mb() - rss_before:.1f}")
+
+
+def run_child(db_path, mode):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_table_model", "--child", db_path, mode],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest size to also run through the old QTableWidget path")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(*args.child)
+        return
+
+    from benchmarks.synthetic import make_synthetic_db
+
+    print(f"{'rows':>10} {'mode':>8} {'refresh (s)':>12} {'RSS delta (MiB)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            db_path = make_synthetic_db(os.path.join(tmp, f"missions_{n}.db"), n)
+            modes = ["model"] + (["legacy"] if n <= args.legacy_max else [])
+            for mode in modes:
+                seconds, rss = run_child(db_path, mode)
+                print(f"{n:>10} {mode:>8} {seconds:>12.3f} {rss:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Checking cell text before a save or import: validate_columns (logic/schema.py), which
+classifies whole columns with NumPy, against parsing every cell, as saves did before.
+
+    python -m benchmarks.bench_validation [--rows 100000] [--bad 0.005]
+
+Validates `--rows` synthetic missions as the text the table shows, ten columns (1M
+cells by default): dates, five numeric columns, platform and chassis (required), the
+test flag and comments. A `--bad` fraction of the numeric and date cells is made
+invalid, and a few valid but unusual ones ('1e3', ' 12 ') are mixed in. Both ways must
+find the same bad cells.
+"""
+import argparse
+import random
+from benchmarks.synthetic import synthetic_rows, Timer
+from logic.formatting import format_value
+from logic.schema import FIELD, REQUIRED_FIELDS, parse_cell, validate_columns
+
+# Synthetic row index of each validated field
+SOURCE = {"date": 1, "platform": 2, "chassis": 3, "altitude_m": 6, "speed_m_s": 7,
+          "spacing_m": 8, "wind_knots": 10, "filesize_gb": 12, "is_test": 13, "comments": 19}
+
+BAD = {"date": ["2024-02-30", "2024/01/05", "yesterday"], "number": ["12,5", "n/a", "1.2.3"]}
+UNUSUAL = ["1e3", " 12 ", "+4", "1_000"]
+
+
+def make_columns(rows, bad, seed=0):
+    rng = random.Random(seed)
+    columns = {attr: [] for attr in SOURCE}
+    for values in synthetic_rows(rows, seed):
+        for attr, index in SOURCE.items():
+            value = values[index]
+            text = value[:10] if attr == "date" else format_value(value)
+            if FIELD[attr].type in (float, int) or attr == "date":
+                roll = rng.random()
+                if roll < bad:
+                    text = rng.choice(BAD["date" if attr == "date" else "number"])
+                elif roll < 2 * bad and attr != "date":
+                    text = rng.choice(UNUSUAL)
+            columns[attr].append(text)
+    return columns
+
+
+def validate_per_cell(columns, required):
+    """Every cell through parse_cell, as save_edits checked them one by one."""
+    errors = set()
+    for attr, texts in columns.items():
+        type_func = FIELD[attr].type
+        for row, text in enumerate(texts):
+            try:
+                value = parse_cell(text, type_func)
+            except (ValueError, TypeError):
+                errors.add((row, attr))
+                continue
+            if attr in required and value is None:
+                errors.add((row, attr))
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--bad", type=float, default=0.005, help="fraction of numeric and date cells made invalid")
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows, args.bad)
+    cells = sum(len(texts) for texts in columns.values())
+
+    with Timer() as per_cell:
+        expected = validate_per_cell(columns, REQUIRED_FIELDS)
+    with Timer() as batch:
+        errors = validate_columns(columns, required=REQUIRED_FIELDS)
+    found = {(error.row, error.attr) for error in errors}
+    if found != expected:
+        raise SystemExit(f"validate_columns disagrees: {len(found ^ expected)} cells differ")
+
+    print(f"{cells} cells ({args.rows} rows x {len(columns)} columns), {len(errors)} invalid\n")
+    print(f"parse_cell per cell      {per_cell.seconds * 1000:6.0f} ms")
+    print(f"validate_columns         {batch.seconds * 1000:6.0f} ms  ({per_cell.seconds / batch.seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Ingest, lookup and backfill speed of the offline METAR archive (logic.weather).
+
+    python -m benchmarks.bench_weather [--reports 1000000] [--missions 200000] [--lookups 100000]
+
+Ingests a NOAA-style text dump of `--reports` synthetic hourly reports, then times
+nearest-report lookups at random stations and times (µs per lookup, cold open included),
+and a backfill of the METAR, sky and wind of `--missions` synthetic missions that have
+none. The synthetic missions' sites are the synthetic stations, so every site maps.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from benchmarks.synthetic import SITES, make_synthetic_db, synthetic_observations, Timer
+
+
+def backfill(db_path, archive_path):
+    # weather.py opens its sessions on the configured database, so point it at ours
+    os.environ["FLIGHTLOG_DB"] = db_path
+    from logic.weather import MetarArchive, backfill_missions
+    with MetarArchive(archive_path) as archive, Timer() as t:
+        checked, filled = backfill_missions(archive)
+    print(f"backfill: {filled} of {checked} missions in {t.seconds:.2f} s = {checked / t.seconds:,.0f} missions/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=1_000_000)
+    parser.add_argument("--missions", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--backfill", nargs=2, help=argparse.SUPPRESS)  # Child process: db, archive
+    args = parser.parse_args()
+    if args.backfill:
+        backfill(*args.backfill)
+        return
+
+    from logic.weather import MetarArchive, ingest
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "sa.txt")
+        with open(dump, "w") as f:
+            for when, raw in synthetic_observations(args.reports):
+                f.write(f"{when:%Y/%m/%d %H:%M}\n{raw}\n\n")
+        archive_path = os.path.join(tmp, "weather.metar")
+        with Timer() as t:
+            read, total, _ = ingest([dump], archive_path)
+        print(f"ingest: {read} reports in {t.seconds:.2f} s = {read / t.seconds:,.0f} reports/s; "
+              f"{os.path.getsize(dump) / 2**20:.0f} MiB of text -> "
+              f"{os.path.getsize(archive_path) / 2**20:.1f} MiB archive")
+
+        rng = random.Random(2)
+        start, hours = datetime(2018, 1, 1), args.reports // len(SITES)
+        queries = [(rng.choice(SITES), start + timedelta(minutes=rng.randrange(hours * 60)))
+                   for _ in range(args.lookups)]
+        with Timer() as t:
+            archive = MetarArchive(archive_path)
+            found = sum(archive.nearest(station, when) is not None for station, when in queries)
+        archive.close()
+        print(f"lookup: {found} of {len(queries)} found, {t.seconds / len(queries) * 1e6:.1f} µs per lookup")
+
+        db_path = os.path.join(tmp, "missions.db")
+        make_synthetic_db(db_path, args.missions)
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE missions SET raw_metar = NULL, sky_conditions = NULL, wind_knots = NULL")
+        conn.commit()
+        conn.close()
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_weather", "--backfill", db_path, archive_path],
+                       check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Checks that the analyst queries against `missions` are served by indexes.
+
+Builds a synthetic database, prints EXPLAIN QUERY PLAN for each query together with its
+timing before and after the index migration, and exits non-zero if any query still
+scans the whole table or sorts through a temporary B-tree. Run it after schema changes:
+
+    python -m benchmarks.check_query_plans [--rows 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+from sqlalchemy import create_engine, or_, text
+from sqlalchemy.orm import sessionmaker
+from db.migrations import migrate, explain
+from db.models import Mission, MissionTombstone
+from benchmarks.synthetic import make_synthetic_db, Timer
+
+
+def analyst_queries(session):
+    """The queries the app and analysts run, built the same way the code builds them."""
+    since = datetime(2020, 1, 1)
+    queries = {
+        "get_all_missions": session.query(Mission).order_by(Mission.date.desc()),
+        "associated_mission": session.query(Mission.id).filter(Mission.associated_mission == 42),
+        "sync updated rows": session.query(Mission.id).filter(
+            Mission.id <= 10_000, or_(Mission.updated_at >= since, Mission.created_at >= since)),
+        "sync tombstones": session.query(MissionTombstone.mission_id).filter(
+            MissionTombstone.deleted_at >= since),
+    }
+    for attr, value in [("platform", "M300"), ("chassis", "CH-007"),
+                        ("customer", "Acme"), ("site", "KBFI")]:
+        column = getattr(Mission, attr)
+        queries[f"{attr} filter"] = (session.query(Mission)
+                                     .filter(column == value)
+                                     .order_by(Mission.date.desc()))
+    return {name: str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+            for name, query in queries.items()}
+
+
+def is_regression(plan):
+    for detail in plan:
+        if detail.startswith("SCAN missions") and "INDEX" not in detail:
+            return True
+        if "TEMP B-TREE" in detail:
+            return True
+    return False
+
+
+def time_queries(conn, queries):
+    timings = {}
+    for name, sql in queries.items():
+        with Timer() as t:
+            conn.execute(text(sql)).fetchall()
+        timings[name] = t.seconds
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_synthetic_db(os.path.join(tmp, "plans.db"), args.rows)
+        engine = create_engine(f"sqlite:///{path}")
+        queries = analyst_queries(sessionmaker(bind=engine)())
+
+        # Start from a pre-index database: drop what create_all made and rewind the version
+        with engine.begin() as conn:
+            for (name,) in conn.exec_driver_sql(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'").fetchall():
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+            conn.exec_driver_sql("PRAGMA user_version = 0")
+        with engine.connect() as conn:
+            before = time_queries(conn, queries)
+
+        migrate(engine)
+
+        failures = []
+        with engine.connect() as conn:
+            after = time_queries(conn, queries)
+            for name, sql in queries.items():
+                plan = explain(conn, sql)
+                status = "SCAN" if is_regression(plan) else "ok"
+                if status != "ok":
+                    failures.append(name)
+                print(f"{name:<20} {before[name] * 1000:>9.1f} ms -> {after[name] * 1000:>9.1f} ms  [{status}]")
+                for detail in plan:
+                    print(f"    {detail}")
+
+    if failures:
+        print(f"\nQueries without a usable index: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
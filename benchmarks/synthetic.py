@@ -0,0 +1,156 @@
+"""Helpers shared by the benchmark scripts: synthetic mission databases and RSS sampling."""
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import MetaData, create_engine
+from db.models import Base, Mission, MISSION_SEARCH_TABLE, MISSION_SEARCH_TRIGGERS, MISSION_TEXT_VIEW
+
+PLATFORMS = ["TSU Alta X", "M300", "M350", "Astro", "Freefly"]
+CHASSIS = [f"CH-{i:03d}" for i in range(40)]
+CUSTOMERS = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark"]
+SITES = ["KBFI", "KPAE", "KSEA", "KRNT", "KOLM", "KTIW"]
+SKY = ["Clear", "Partly Cloudy", "Overcast", "Rain", "Fog"]
+OUTCOMES = ["Success", "Partial", "Aborted", "Failed"]
+
+MISSION_COLUMNS = [
+    "associated_mission", "date", "platform", "chassis", "customer", "site",
+    "altitude_m", "speed_m_s", "spacing_m", "sky_conditions", "wind_knots", "battery",
+    "filesize_gb", "is_test", "issues_hw", "issues_operator", "issues_env", "issues_sw",
+    "outcome", "comments", "raw_metar", "created_at", "updated_at"
+]
+
+
+def synthetic_rows(n, seed=0):
+    """Yields `n` plausible mission rows as tuples ordered like MISSION_COLUMNS."""
+    rng = random.Random(seed)
+    start = datetime(2018, 1, 1)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for i in range(n):
+        day = start + timedelta(days=i // 50)
+        site = rng.choice(SITES)
+        wind = rng.randint(0, 25)
+        yield (
+            None, day.strftime('%Y-%m-%d %H:%M:%S.000000'), rng.choice(PLATFORMS),
+            rng.choice(CHASSIS), rng.choice(CUSTOMERS), site,
+            rng.choice((60.0, 80.0, 100.0, 120.0)), rng.choice((5.0, 8.0, 10.0)),
+            rng.choice((10.0, 15.0, 20.0)), rng.choice(SKY), float(wind),
+            f"BAT-{rng.randint(1, 60):02d}", round(rng.uniform(0.5, 40.0), 2),
+            rng.random() < 0.1, None if rng.random() < 0.9 else "Motor vibration",
+            None, None, None if rng.random() < 0.95 else "GPS dropout",
+            rng.choice(OUTCOMES), f"Synthetic mission {i}",
+            f"{site} {day:%d}1853Z {rng.randint(0, 36) * 10:03d}{wind:02d}KT 10SM FEW040 15/08 A3002",
+            now, now
+        )
+
+
+def synthetic_observations(n, seed=0, stations=SITES):
+    """
+    Yields `n` (time, METAR report) pairs with the variety seen in real logs: gusts,
+    variable and calm winds, fractional visibility, several cloud layers, sub-zero
+    temperatures and remarks. Reports are hourly per station, so most are distinct.
+    """
+    rng = random.Random(seed)
+    start = datetime(2018, 1, 1)
+    covers = ["FEW", "SCT", "BKN", "OVC"]
+    for i in range(n):
+        when = start + timedelta(hours=i // len(stations))
+        station = stations[i % len(stations)]
+        speed = rng.randint(0, 30)
+        if speed == 0:
+            wind = "00000KT"
+        elif rng.random() < 0.1:
+            wind = f"VRB{speed:02d}KT"
+        else:
+            wind = f"{rng.randint(1, 36) * 10:03d}{speed:02d}"
+            wind += f"G{speed + rng.randint(5, 15)}KT" if rng.random() < 0.2 else "KT"
+        visibility = rng.choice(("10SM", "10SM", "10SM", "7SM", "3SM", "1 1/2SM", "3/4SM", "M1/4SM"))
+        layers = sorted(rng.sample(range(5, 250), rng.randint(0, 3)))
+        sky = " ".join(f"{rng.choice(covers)}{base:03d}" for base in layers) or "CLR"
+        temperature = rng.randint(-20, 35)
+        dewpoint = temperature - rng.randint(0, 15)
+        temps = "/".join(f"M{-t:02d}" if t < 0 else f"{t:02d}" for t in (temperature, dewpoint))
+        yield when + timedelta(minutes=53), (
+            f"{station} {when:%d%H}53Z {wind} {visibility} {sky} {temps} "
+            f"A{rng.randint(2950, 3070)} RMK AO2 SLP{rng.randint(0, 999):03d}")
+
+
+def synthetic_metars(n, seed=0, stations=SITES):
+    """Yields `n` METAR reports, see synthetic_observations."""
+    return (raw for _, raw in synthetic_observations(n, seed, stations))
+
+
+def make_synthetic_db(path, n, seed=0, chunk=50_000, search_index=False, autoincrement=False):
+    """
+    Creates (or replaces) a SQLite database at `path` holding `n` synthetic missions,
+    plus the full-text index and its triggers if `search_index` is set. With
+    `autoincrement` the missions table is AUTOINCREMENT, like the legacy log's, so
+    IDs are never reused and new ones can be past the largest there is.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    if autoincrement:
+        missions = Mission.__table__.to_metadata(MetaData())
+        missions.dialect_kwargs["sqlite_autoincrement"] = True
+        missions.create(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    placeholders = ", ".join("?" for _ in MISSION_COLUMNS)
+    sql = f"INSERT INTO missions ({', '.join(MISSION_COLUMNS)}) VALUES ({placeholders})"
+    conn = sqlite3.connect(path)
+    try:
+        rows = synthetic_rows(n, seed)
+        while True:
+            batch = [row for _, row in zip(range(chunk), rows)]
+            if not batch:
+                break
+            conn.executemany(sql, batch)
+        conn.commit()
+        if search_index:
+            add_search_index(conn)
+    finally:
+        conn.close()
+    return path
+
+
+def add_search_index(conn):
+    """Creates and fills the missions_fts index on a sqlite3 connection, as the migration does."""
+    for ddl in [MISSION_TEXT_VIEW, MISSION_SEARCH_TABLE, *MISSION_SEARCH_TRIGGERS]:
+        conn.execute(ddl)
+    conn.execute("INSERT INTO missions_fts (missions_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO missions_fts (missions_fts) VALUES ('optimize')")
+    conn.commit()
+
+
+def rss_mb():
+    """Current resident set size of this process in MiB (Linux), or peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Timer:
+    """Context manager that records the elapsed wall time in `seconds`."""
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        return False
@@ -1,22 +1,73 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from db.settings import CATEGORICAL_STORAGE, DATABASE_PATH, PRAGMAS, READ_POOL_SIZE, WRITE_ONLY_PRAGMAS
 
-DATABASE_URL = "sqlite:///test_flightlog.db"
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
-engine = create_engine(DATABASE_URL, echo=False)
+
+def make_engine(path=DATABASE_PATH, read_only=False, pragmas=None, **kwargs):
+    """
+    Creates an engine for the SQLite database at `path` that applies `pragmas`
+    (default: the configured tuning profile) to each connection as it is opened.
+
+    A read-only engine opens the file with mode=ro and query_only, so its pooled
+    connections can serve queries alongside the writer without ever taking a write lock.
+    """
+    pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+    if read_only:
+        url = f"sqlite:///file:{os.path.abspath(path)}?mode=ro&uri=true"
+        pragmas = {k: v for k, v in pragmas.items() if k not in WRITE_ONLY_PRAGMAS}
+        pragmas["query_only"] = "ON"
+    else:
+        url = f"sqlite:///{path}"
+
+    new_engine = create_engine(url, echo=False, **kwargs)
+
+    @event.listens_for(new_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return new_engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(bind=engine)
 Session = SessionLocal
 
+# Pooled read-only connections for query workloads (table paging, reports, exports)
+read_engine = make_engine(read_only=True, pool_size=READ_POOL_SIZE)
+ReadSessionLocal = sessionmaker(bind=read_engine)
+
 Base = declarative_base()
 
 def get_session():
     return SessionLocal()
 
+def get_read_session():
+    return ReadSessionLocal()
+
 # This must come *after* Base is defined
-from db.models import Base  # Ensure this is not above Base or it will error
+from db.models import Base, use_categorical_codes  # Ensure this is not above Base or it will error
+from db.migrations import convert_categorical_storage, migrate, restore_search_index
+
+use_categorical_codes(CATEGORICAL_STORAGE == "codes")
 
 def init_db():
     Base.metadata.create_all(bind=engine)
-
-
-
+    # Upgrade existing databases (indexes, triggers, ...) to the current schema version
+    migrate(engine)
+    with engine.connect() as conn:
+        convert_categorical_storage(conn, CATEGORICAL_STORAGE == "codes")
+    # Put back indexes (and the full-text index) a bulk import dropped if it was
+    # interrupted before rebuilding them, and add its missions to the derived tables
+    from logic.importer import finish_imports
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        finish_imports(conn)
+        restore_search_index(conn)
@@ -0,0 +1,488 @@
+"""
+Versioned schema migrations for the flight log database.
+
+The schema version lives in SQLite's `PRAGMA user_version`. Each migration is a
+function registered with @migration, in order; migration N upgrades a database from
+version N-1 to N. `create_all` only creates missing tables, so anything that has to
+change an existing database (indexes, triggers, column conversions) belongs here.
+
+Migrations should be idempotent (IF NOT EXISTS etc.): SQLite commits DDL as it goes,
+and long data migrations commit in batches so other connections aren't locked out,
+so a migration interrupted halfway is simply run again on the next start.
+
+Run pending migrations against a specific database file with:
+
+    python -m db.migrations path/to/flightlog.db
+"""
+import math
+import re
+import socket
+import sqlite3
+import sys
+import uuid
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+MIGRATIONS = []
+
+
+def migration(func):
+    """Registers `func(conn)` as the next schema migration."""
+    MIGRATIONS.append(func)
+    return func
+
+
+def schema_version(conn):
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine):
+    """Brings the database up to the latest schema version. Returns the new version."""
+    with engine.connect() as conn:
+        version = schema_version(conn)
+        for number, func in enumerate(MIGRATIONS[version:], start=version + 1):
+            func(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {number}")
+            conn.commit()
+    return max(version, len(MIGRATIONS))
+
+
+def column_names(conn, table):
+    return [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")]
+
+
+def explain(conn, sql, params=None):
+    """Returns the EXPLAIN QUERY PLAN details for `sql` as a list of strings."""
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params or {})
+    return [row[-1] for row in rows]
+
+
+# --- Migrations ---
+
+@migration
+def add_change_tracking_triggers(conn):
+    """Tombstone and updated_at triggers used to sync the mission table incrementally."""
+    from db.models import MISSION_TRIGGERS
+    for ddl in MISSION_TRIGGERS:
+        conn.execute(text(ddl))
+
+
+@migration
+def add_mission_indexes(conn):
+    """Indexes for date ordering, the analyst filters and change tracking."""
+    statements = [
+        "CREATE INDEX IF NOT EXISTS ix_missions_date ON missions (date)",
+        # Filter on one attribute, newest first
+        "CREATE INDEX IF NOT EXISTS ix_missions_platform_date ON missions (platform, date)",
+        "CREATE INDEX IF NOT EXISTS ix_missions_chassis_date ON missions (chassis, date)",
+        "CREATE INDEX IF NOT EXISTS ix_missions_customer_date ON missions (customer, date)",
+        "CREATE INDEX IF NOT EXISTS ix_missions_site_date ON missions (site, date)",
+        "CREATE INDEX IF NOT EXISTS ix_missions_associated_mission ON missions (associated_mission)",
+        # Incremental sync looks rows up by their timestamps
+        "CREATE INDEX IF NOT EXISTS ix_missions_updated_at ON missions (updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_missions_created_at ON missions (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_mission_tombstones_deleted_at ON mission_tombstones (deleted_at)",
+    ]
+    for ddl in statements:
+        conn.execute(text(ddl))
+
+
+# Columns that were declared String but always held numbers
+NUMERIC_TEXT_COLUMNS = ["altitude_m", "speed_m_s", "spacing_m"]
+CONVERSION_BATCH_SIZE = 20_000
+
+
+def parse_legacy_number(value):
+    """Returns `value` as a float, or raises ValueError if it isn't a finite number."""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode(errors="replace")
+    number = float(value.strip() if isinstance(value, str) else value)
+    if not math.isfinite(number):
+        raise ValueError(f"not a finite number: {value!r}")
+    return number
+
+
+@migration
+def convert_numeric_columns_to_real(conn):
+    """
+    Retypes altitude_m, speed_m_s and spacing_m as REAL.
+
+    SQLite can't change a column's type, so each column gets a REAL twin that is filled
+    in batches (committing between them), then the old column is dropped and the twin
+    renamed into its place. Values that don't parse as numbers become NULL and are
+    recorded in mission_value_issues with the original text.
+    """
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        raise RuntimeError("Converting numeric columns needs SQLite 3.35 or newer "
+                           f"(this is {sqlite3.sqlite_version}).")
+
+    from db.models import MISSION_TRIGGERS
+
+    # The old columns can't be dropped while indexed, and a retyped value isn't a change
+    # the touch trigger should stamp into updated_at
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_missions_altitude_m")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS missions_touch_updated_at")
+
+    existing = column_names(conn, "missions")
+    columns = [c for c in NUMERIC_TEXT_COLUMNS if c in existing or f"{c}__real" in existing]
+    for col in columns:
+        if f"{col}__real" not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE missions ADD COLUMN {col}__real REAL")
+    conn.commit()
+
+    # Convert in primary key batches; only columns that still have their old copy
+    pending = [c for c in columns if c in column_names(conn, "missions")]
+    if pending:
+        select = f"SELECT id, {', '.join(pending)} FROM missions WHERE id > :last ORDER BY id LIMIT :limit"
+        assign = ", ".join(f"{c}__real = :{c}" for c in pending)
+        update = text(f"UPDATE missions SET {assign} WHERE id = :id")
+        flag = text("INSERT INTO mission_value_issues (mission_id, column_name, raw_value, flagged_at) "
+                    "VALUES (:mission_id, :column_name, :raw_value, CURRENT_TIMESTAMP)")
+        last = 0
+        while True:
+            batch = conn.execute(text(select), {"last": last, "limit": CONVERSION_BATCH_SIZE}).fetchall()
+            if not batch:
+                break
+            params, issues = [], []
+            for row in batch:
+                values = {"id": row[0]}
+                for col, raw in zip(pending, row[1:]):
+                    try:
+                        values[col] = None if raw is None or str(raw).strip() == "" else parse_legacy_number(raw)
+                    except (ValueError, TypeError):
+                        values[col] = None
+                        issues.append({"mission_id": row[0], "column_name": col, "raw_value": str(raw)})
+                params.append(values)
+            conn.execute(update, params)
+            if issues:
+                # A rerun after an interruption re-flags the same values; keep one of each
+                conn.execute(text("DELETE FROM mission_value_issues WHERE mission_id = :mission_id "
+                                  "AND column_name = :column_name"), issues)
+                conn.execute(flag, issues)
+            conn.commit()
+            last = batch[-1][0]
+
+    for col in columns:
+        if col in column_names(conn, "missions"):
+            conn.exec_driver_sql(f"ALTER TABLE missions DROP COLUMN {col}")
+        conn.exec_driver_sql(f"ALTER TABLE missions RENAME COLUMN {col}__real TO {col}")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_missions_altitude_m ON missions (altitude_m)"))
+    for ddl in MISSION_TRIGGERS:
+        conn.execute(text(ddl))
+
+
+
+@migration
+def add_full_text_search(conn):
+    """FTS5 index over the mission text, kept in sync by triggers and filled from missions."""
+    from db.models import MISSION_SEARCH_TABLE, MISSION_SEARCH_TRIGGERS, MISSION_TEXT_VIEW
+    # The indexed text is decoded through the lookup tables
+    prepare_lookup_tables(conn)
+    conn.execute(text(MISSION_TEXT_VIEW))
+    try:
+        conn.execute(text(MISSION_SEARCH_TABLE))
+    except OperationalError as e:
+        raise RuntimeError(f"Full-text search needs SQLite built with FTS5 ({e.orig}).")
+    for ddl in MISSION_SEARCH_TRIGGERS:
+        conn.execute(text(ddl))
+    fill_search_index(conn)
+
+
+def fill_search_index(conn):
+    """
+    Refills the full-text index from the missions table. Merging it into one segment
+    afterwards matters: otherwise the next writes pay for merging the rebuilt segments.
+    """
+    conn.exec_driver_sql("INSERT INTO missions_fts (missions_fts) VALUES ('rebuild')")
+    conn.exec_driver_sql("INSERT INTO missions_fts (missions_fts) VALUES ('optimize')")
+
+
+# Bulk imports drop this trigger and index their missions at the end instead; older ones
+# refilled the whole index (restore_search_index)
+SEARCH_INSERT_TRIGGER = "missions_fts_insert"
+
+
+def restore_search_index(conn):
+    """Recreates the full-text insert trigger and refills the index if the trigger was dropped."""
+    from db.models import MISSION_SEARCH_TRIGGERS
+    exists = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                                  (SEARCH_INSERT_TRIGGER,)).first()
+    if exists:
+        return False
+    for ddl in MISSION_SEARCH_TRIGGERS:
+        conn.execute(text(ddl))
+    fill_search_index(conn)
+    return True
+
+
+@migration
+def add_fleet_statistics(conn):
+    """Daily and monthly mission rollups, kept current by triggers and filled from missions."""
+    from db.models import DailyMissionStats, MonthlyMissionStats, MISSION_STATS_TRIGGERS
+    prepare_lookup_tables(conn)
+    for model in (DailyMissionStats, MonthlyMissionStats):
+        model.__table__.create(conn, checkfirst=True)
+    for ddl in MISSION_STATS_TRIGGERS:
+        conn.execute(text(ddl))
+    fill_mission_stats(conn)
+
+
+def fill_mission_stats(conn):
+    """Recomputes the rollup tables from the missions table."""
+    from db.models import MISSION_STATS_TABLES, mission_stats_fill_sql
+    for table, length in MISSION_STATS_TABLES:
+        conn.exec_driver_sql(f"DELETE FROM {table}")
+        conn.exec_driver_sql(mission_stats_fill_sql(table, length))
+
+
+@migration
+def add_lookup_triggers(conn):
+    """Backfills the lookup tables (platforms, chassis, ...) from missions and keeps them current."""
+    from db.models import MISSION_LOOKUP_TRIGGERS
+    fill_lookup_tables(conn)
+    for ddl in MISSION_LOOKUP_TRIGGERS:
+        conn.execute(text(ddl))
+
+
+def fill_lookup_tables(conn):
+    """Adds the values in use in missions that their lookup tables don't list yet."""
+    from db.models import MISSION_LOOKUP_TABLES, lookup_fill_sql
+    for field in MISSION_LOOKUP_TABLES:
+        conn.exec_driver_sql(lookup_fill_sql(field))
+
+
+def prepare_lookup_tables(conn):
+    """
+    Creates the lookup tables that are missing and gives those keyed by name an integer
+    id, which categorical columns store in codes mode. Plain rowids won't do: VACUUM
+    may renumber them in tables without an INTEGER PRIMARY KEY.
+    """
+    from db.models import MISSION_LOOKUP_TABLES, Base
+    for name in dict.fromkeys(MISSION_LOOKUP_TABLES.values()):
+        Base.metadata.tables[name].create(conn, checkfirst=True)
+        info = conn.exec_driver_sql(f'PRAGMA table_info("{name}")').fetchall()
+        if any(row[1] == "id" and row[5] and row[2].upper() == "INTEGER" for row in info):
+            continue
+        others = [(row[1], row[2]) for row in info if row[1] not in ("id", "name")]
+        columns = "".join(f', "{column}" {type_}' for column, type_ in others)
+        copied = ", ".join(f'"{column}"' for column in ["name"] + [c for c, _ in others])
+        conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{name}__new"')
+        conn.exec_driver_sql(f'CREATE TABLE "{name}__new" (id INTEGER NOT NULL PRIMARY KEY, '
+                             f'name VARCHAR NOT NULL UNIQUE{columns})')
+        conn.exec_driver_sql(f'INSERT OR IGNORE INTO "{name}__new" ({copied}) '
+                             f'SELECT {copied} FROM "{name}" WHERE name IS NOT NULL ORDER BY name')
+        conn.exec_driver_sql(f'DROP TABLE "{name}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{name}__new" RENAME TO "{name}"')
+
+
+def _trigger_names(ddls):
+    return [re.search(r"CREATE TRIGGER IF NOT EXISTS (\w+)", ddl).group(1) for ddl in ddls]
+
+
+@migration
+def add_categorical_lookups(conn):
+    """
+    Sky condition and outcome lookup tables, integer ids for all of them, and triggers
+    and a full-text index that read categorical columns stored as those ids (codes mode,
+    see convert_categorical_storage) as their text.
+    """
+    from db.models import (
+        MISSION_LOOKUP_TRIGGERS, MISSION_SEARCH_TABLE, MISSION_SEARCH_TRIGGERS, MISSION_STATS_TRIGGERS,
+        MISSION_TEXT_VIEW
+    )
+    prepare_lookup_tables(conn)
+    fill_lookup_tables(conn)
+    triggers = MISSION_STATS_TRIGGERS + MISSION_LOOKUP_TRIGGERS + MISSION_SEARCH_TRIGGERS
+    for name in _trigger_names(triggers):
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    for ddl in MISSION_STATS_TRIGGERS + MISSION_LOOKUP_TRIGGERS:
+        conn.execute(text(ddl))
+    # The index reads its text from the mission_text view now instead of missions
+    conn.execute(text(MISSION_TEXT_VIEW))
+    conn.exec_driver_sql("DROP TABLE IF EXISTS missions_fts")
+    conn.execute(text(MISSION_SEARCH_TABLE))
+    for ddl in MISSION_SEARCH_TRIGGERS:
+        conn.execute(text(ddl))
+    fill_search_index(conn)
+
+
+def categorical_storage(conn):
+    """{column: 'codes' or 'text'} for the categorical mission columns, by their declared type."""
+    from db.models import CATEGORICAL_COLUMNS
+    declared = {row[1]: row[2] for row in conn.exec_driver_sql("PRAGMA table_info(missions)")}
+    return {c: "codes" if declared[c] == "" else "text" for c in CATEGORICAL_COLUMNS if c in declared}
+
+
+def convert_categorical_storage(conn, codes):
+    """
+    Stores the categorical mission columns as lookup ids (`codes`) or as text, converting
+    the columns that aren't already; returns those. As with the numeric columns, each one
+    gets a twin of the new type (none for ids, so SQLite keeps them integers) that is filled
+    in batches, committing between them, and then replaces it. Values read the same
+    either way, so the full-text index and the rollups are left as they are.
+    """
+    from db.models import CATEGORICAL_COLUMNS, MISSION_ENCODE_TRIGGERS, MISSION_LOOKUP_TABLES, MISSION_TEXT_VIEW, \
+        decoded_sql
+    suffix, other = ("__code", "__text") if codes else ("__text", "__code")
+    existing = column_names(conn, "missions")
+    # Left over from an interrupted conversion the other way
+    for col in [c + other for c in CATEGORICAL_COLUMNS if c + other in existing]:
+        conn.exec_driver_sql(f"ALTER TABLE missions DROP COLUMN {col}")
+    target = "codes" if codes else "text"
+    storage = categorical_storage(conn)
+    columns = [c for c in CATEGORICAL_COLUMNS if c + suffix in existing or storage.get(c, target) != target]
+    encode_triggers = _trigger_names(MISSION_ENCODE_TRIGGERS)
+    if not columns:
+        for ddl, name in zip(MISSION_ENCODE_TRIGGERS, encode_triggers):
+            conn.exec_driver_sql(ddl if codes else f"DROP TRIGGER IF EXISTS {name}")
+        conn.commit()
+        return []
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        raise RuntimeError("Converting categorical columns needs SQLite 3.35 or newer "
+                           f"(this is {sqlite3.sqlite_version}).")
+
+    # Columns can't be dropped while an index, trigger or view uses them (triggers on
+    # other tables too, like the history checkpoint), and the touch trigger mustn't stamp
+    # the conversion into updated_at; all are put back as they were
+    dependents = [
+        (type_, name, sql) for type_, name, sql in conn.exec_driver_sql(
+            "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL "
+            "AND (type = 'trigger' OR (type = 'index' AND tbl_name = 'missions'))").fetchall()
+        if type_ == "trigger" or any(row[2] in columns for row in conn.exec_driver_sql(f"PRAGMA index_info({name})"))
+    ]
+    conn.exec_driver_sql("DROP VIEW IF EXISTS mission_text")
+    for type_, name, _ in dependents:
+        conn.exec_driver_sql(f"DROP {type_.upper()} IF EXISTS {name}")
+
+    for col in columns:
+        if col + suffix not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE missions ADD COLUMN {col}{suffix}"
+                                 + ("" if codes else " VARCHAR"))
+    conn.commit()
+
+    # Only columns that still have their old copy
+    pending = [c for c in columns if c in column_names(conn, "missions")]
+    if codes:
+        for col in pending:
+            conn.exec_driver_sql(f"INSERT OR IGNORE INTO {MISSION_LOOKUP_TABLES[col]} (name) "
+                                 f"SELECT DISTINCT {col} FROM missions WHERE typeof({col}) = 'text' "
+                                 f"AND TRIM({col}) <> ''")
+        assign = ", ".join(
+            f"{c}__code = CASE WHEN typeof({c}) = 'text' AND TRIM({c}) <> '' THEN "
+            f"(SELECT id FROM {MISSION_LOOKUP_TABLES[c]} WHERE name = {c}) ELSE {c} END" for c in pending)
+    else:
+        assign = ", ".join(f"{c}__text = {decoded_sql(c, c)}" for c in pending)
+    if pending:
+        low, high = conn.exec_driver_sql("SELECT MIN(id), MAX(id) FROM missions").first()
+        for first in range(low or 0, (high or -1) + 1, CONVERSION_BATCH_SIZE):
+            conn.exec_driver_sql(f"UPDATE missions SET {assign} WHERE id BETWEEN ? AND ?",
+                                 (first, first + CONVERSION_BATCH_SIZE - 1))
+            conn.commit()
+
+    for col in columns:
+        if col in column_names(conn, "missions"):
+            conn.exec_driver_sql(f"ALTER TABLE missions DROP COLUMN {col}")
+        conn.exec_driver_sql(f"ALTER TABLE missions RENAME COLUMN {col}{suffix} TO {col}")
+    for type_, name, sql in dependents:
+        if name not in encode_triggers:
+            conn.exec_driver_sql(sql)
+    conn.execute(text(MISSION_TEXT_VIEW))
+    for ddl, name in zip(MISSION_ENCODE_TRIGGERS, encode_triggers):
+        conn.exec_driver_sql(ddl if codes else f"DROP TRIGGER IF EXISTS {name}")
+    conn.commit()
+    return columns
+
+
+@migration
+def add_change_history(conn):
+    """
+    The append-only mission history and the triggers that keep it, starting from a
+    snapshot of every mission (checkpoint 0).
+    """
+    from db.models import (
+        MissionCheckpoint, MISSION_HISTORY_INDEX, MISSION_HISTORY_TABLE, MISSION_HISTORY_TRIGGERS,
+        history_baseline_sql, mission_snapshots
+    )
+    conn.execute(text(MISSION_HISTORY_TABLE))
+    conn.execute(text(MISSION_HISTORY_INDEX))
+    mission_snapshots.create(conn, checkfirst=True)
+    MissionCheckpoint.__table__.create(conn, checkfirst=True)
+    for sql in history_baseline_sql():
+        conn.exec_driver_sql(sql)
+    for ddl in MISSION_HISTORY_TRIGGERS:
+        conn.execute(text(ddl))
+
+
+@migration
+def add_sync(conn):
+    """
+    The tables sync keeps (see logic/sync.py), this database's identity as a replica and
+    its missions and lookup values recorded as its first changes.
+    """
+    from db.models import (
+        NOW_MS, SYNC_CHANGES_INDEX, SYNC_CHANGES_TABLE, SYNC_CONFLICTS_TABLE, SyncCapture, SyncMission,
+        SyncPeerVersion, SyncReplica, SyncRowVersion, history_checkpoint_sql, sync_baseline_sql
+    )
+    for model in (SyncReplica, SyncPeerVersion, SyncMission, SyncRowVersion, SyncCapture):
+        model.__table__.create(conn, checkfirst=True)
+    conn.execute(text(SYNC_CHANGES_TABLE))
+    conn.execute(text(SYNC_CHANGES_INDEX))
+    conn.execute(text(SYNC_CONFLICTS_TABLE))
+    conn.exec_driver_sql("INSERT INTO sync_replicas (uuid, name, local, seq, clock) SELECT ?, ?, 1, 0, 0 "
+                         "WHERE NOT EXISTS (SELECT 1 FROM sync_replicas WHERE local)",
+                         (uuid.uuid4().hex, socket.gethostname()))
+    # Every mission's latest snapshot has to be as of now: checkpoint the latest change
+    last = conn.exec_driver_sql("SELECT MAX(id) FROM mission_history").scalar()
+    if last is not None and last != conn.exec_driver_sql("SELECT MAX(change_id) FROM mission_checkpoints").scalar():
+        for sql in history_checkpoint_sql(str(last), NOW_MS):
+            conn.exec_driver_sql(sql)
+    for sql in sync_baseline_sql():
+        conn.exec_driver_sql(sql)
+
+
+def legacy_bool_sql(expr):
+    """`expr` as 1 or 0 if it's text ('TRUE', 'FALSE', '', read the way a cell is), else as it is."""
+    return (f"CASE WHEN typeof({expr}) = 'text' THEN LOWER(TRIM({expr})) IN ('yes', 'true', '1') "
+            f"ELSE {expr} END")
+
+
+@migration
+def convert_is_test_to_integer(conn):
+    """
+    Stores is_test as 1 or 0. Legacy rows hold 'TRUE', 'FALSE' or '' text, which
+    `is_test = 1` doesn't match and the ORM reads as true whenever it isn't empty.
+
+    The values the history, the snapshots and sync recorded are converted along with
+    the missions; like the numeric columns' retyping, it isn't a change to record or
+    to stamp into updated_at.
+    """
+    from db.models import HISTORY_FIELDS, MISSION_HISTORY_TRIGGERS, MISSION_TRIGGERS
+    field = HISTORY_FIELDS.index("is_test")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS missions_touch_updated_at")
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS missions_history_update")
+    conn.exec_driver_sql(f"UPDATE missions SET is_test = {legacy_bool_sql('is_test')} "
+                         f"WHERE typeof(is_test) = 'text'")
+    conn.exec_driver_sql(f"UPDATE mission_snapshots SET is_test = {legacy_bool_sql('is_test')} "
+                         f"WHERE typeof(is_test) = 'text'")
+    conn.exec_driver_sql(f"UPDATE mission_history SET value = {legacy_bool_sql('value')} "
+                         f"WHERE field = {field} AND typeof(value) = 'text'")
+    conn.exec_driver_sql(f"UPDATE sync_changes SET value = {legacy_bool_sql('value')} "
+                         f"WHERE tbl = 0 AND field = {field} AND typeof(value) = 'text'")
+    conn.exec_driver_sql(f"UPDATE sync_conflicts SET kept = {legacy_bool_sql('kept')}, "
+                         f"lost = {legacy_bool_sql('lost')} WHERE field = {field}")
+    for ddl in MISSION_TRIGGERS + MISSION_HISTORY_TRIGGERS:
+        conn.execute(text(ddl))
+
+
+@migration
+def add_import_pending_after(conn):
+    """Where a bulk import's missions start until they're added to the derived tables (logic/importer.py)."""
+    columns = column_names(conn, "mission_imports")
+    if columns and "pending_after" not in columns:
+        conn.exec_driver_sql("ALTER TABLE mission_imports ADD COLUMN pending_after INTEGER")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m db.migrations path/to/flightlog.db")
+    print(f"Schema version {migrate(create_engine(f'sqlite:///{sys.argv[1]}'))}")
@@ -5,12 +5,114 @@ Base = declarative_base()
 
 
 from sqlalchemy import (
-    Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, func
+    Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index, MetaData, Table, func,
+    case, column, not_, or_, select, table, type_coerce
 )
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
 
 Base = declarative_base()
 
+
+# Mission field -> the lookup table of the values it takes. db/migrations.py backfills
+# the tables from the missions and triggers (below) add each new value as it's written.
+MISSION_LOOKUP_TABLES = {
+    "platform": "platforms", "chassis": "chassis", "customer": "customers", "site": "sites",
+    "battery": "batteries", "sky_conditions": "sky_conditions", "outcome": "outcomes",
+    "issues_hw": "issues_hw", "issues_operator": "issues_operator", "issues_sw": "issues_sw",
+    "issues_env": "issues_env",
+}
+
+
+# --- Categorical columns ---
+# Short fields that repeat a few values across every mission. With the database's
+# `categorical_storage = codes` setting (see db/database.py) they store the id of the
+# value in its lookup table instead of the text; the columns are then declared without
+# a type, so SQLite keeps integers as integers. Either way the ORM reads and writes
+# text: selects decode the ids and bound values are replaced by theirs.
+CATEGORICAL_COLUMNS = ["platform", "chassis", "customer", "site", "battery", "sky_conditions", "outcome"]
+
+_categorical = {"codes": False}
+
+
+def use_categorical_codes(enabled):
+    """
+    Switches how Categorical columns are queried. Statements are compiled (and cached)
+    for one mode, so this is set once, before the first query.
+    """
+    _categorical["codes"] = bool(enabled)
+
+
+def categorical_codes():
+    return _categorical["codes"]
+
+
+def decoded_sql(expr, field):
+    """SQL for the text of `expr`, a value of `field` that may be stored as a lookup id."""
+    if field not in CATEGORICAL_COLUMNS:
+        return expr
+    return (f"(CASE typeof({expr}) WHEN 'integer' THEN (SELECT name FROM {MISSION_LOOKUP_TABLES[field]} "
+            f"WHERE id = {expr}) ELSE {expr} END)")
+
+
+def _lookup_table(field):
+    return table(MISSION_LOOKUP_TABLES[field], column("id", Integer), column("name", String))
+
+
+def _decoded_expression(expr, field):
+    lookup = _lookup_table(field)
+    name = select(lookup.c.name).where(lookup.c.id == expr).scalar_subquery()
+    return case((func.typeof(expr) == "integer", name), else_=type_coerce(expr, String))
+
+
+def decoded(expr):
+    """The text of a Categorical column expression (e.g. to sort by), the column itself otherwise."""
+    if categorical_codes() and isinstance(expr.type, Categorical):
+        return _decoded_expression(expr, expr.type.field)
+    return expr
+
+
+class Categorical(TypeDecorator):
+    """
+    A CATEGORICAL_COLUMNS column. In codes mode selects decode it, bound values become
+    their lookup id where the table has them (new values are left as text for the
+    encode triggers), equality and IN compare the stored ids, so they can use the
+    indexes, and other comparisons (LIKE, ranges, ordering) the decoded text.
+    """
+    impl = String
+    cache_ok = True
+
+    def __init__(self, field):
+        super().__init__()
+        self.field = field
+
+    class comparator_factory(String.Comparator):
+        def operate(self, op, *other, **kwargs):
+            if not categorical_codes():
+                return super().operate(op, *other, **kwargs)
+            if op in (operators.in_op, operators.not_in_op) and isinstance(other[0], (list, tuple)):
+                # Each value needs its own encoding subquery, which an expanding IN can't hold
+                matches = or_(*[self.expr == value for value in other[0]])
+                return matches if op is operators.in_op else not_(matches)
+            if op in (operators.eq, operators.ne, operators.is_, operators.is_not):
+                return super().operate(op, *other, **kwargs)
+            return op(_decoded_expression(self.expr, self.type.field), *other, **kwargs)
+
+    def column_expression(self, col):
+        return _decoded_expression(col, self.field) if categorical_codes() else col
+
+    def bind_expression(self, bindvalue):
+        if not categorical_codes():
+            return bindvalue
+        lookup = _lookup_table(self.field)
+        # The value is referenced twice, but a bound parameter can appear only once
+        value = select(type_coerce(bindvalue, String).label("value")).subquery()
+        return (select(func.coalesce(lookup.c.id, value.c.value))
+                .select_from(value.outerjoin(lookup, lookup.c.name == value.c.value))
+                .scalar_subquery())
+
+
 class Mission(Base):
     __tablename__ = 'missions'
 
@@ -18,72 +120,728 @@ class Mission(Base):
     mission_id = Column(Integer, nullable=True)
     associated_mission = Column(Integer, ForeignKey('missions.id'), nullable=True)
     date = Column(DateTime, nullable=False)
-    platform = Column(String, nullable=True)
-    chassis = Column(String, nullable=True)
-    customer = Column(String, nullable=True)
-    site = Column(String, nullable=True)
-    altitude_m = Column(String, nullable=True)
-    speed_m_s = Column(String, nullable=True)
-    spacing_m = Column(String, nullable=True)
-    sky_conditions = Column(String, nullable=True)
+    platform = Column(Categorical("platform"), nullable=True)
+    chassis = Column(Categorical("chassis"), nullable=True)
+    customer = Column(Categorical("customer"), nullable=True)
+    site = Column(Categorical("site"), nullable=True)
+    altitude_m = Column(Float, nullable=True)
+    speed_m_s = Column(Float, nullable=True)
+    spacing_m = Column(Float, nullable=True)
+    sky_conditions = Column(Categorical("sky_conditions"), nullable=True)
     wind_knots = Column(Float, nullable=True)
-    battery = Column(String, nullable=True)
+    battery = Column(Categorical("battery"), nullable=True)
     filesize_gb = Column(Float, nullable=True)
     is_test = Column(Boolean, default=False)
     issues_hw = Column(Text, nullable=True)
     issues_operator = Column(Text, nullable=True)
     issues_env = Column(Text, nullable=True)
     issues_sw = Column(Text, nullable=True)
-    outcome = Column(String, nullable=True)
+    outcome = Column(Categorical("outcome"), nullable=True)
     comments = Column(Text, nullable=True)
     raw_metar = Column(Text, nullable=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    # Existing databases get these through db/migrations.py
+    __table_args__ = (
+        Index('ix_missions_date', 'date'),
+        Index('ix_missions_platform_date', 'platform', 'date'),
+        Index('ix_missions_chassis_date', 'chassis', 'date'),
+        Index('ix_missions_customer_date', 'customer', 'date'),
+        Index('ix_missions_site_date', 'site', 'date'),
+        Index('ix_missions_associated_mission', 'associated_mission'),
+        Index('ix_missions_updated_at', 'updated_at'),
+        Index('ix_missions_created_at', 'created_at'),
+        Index('ix_missions_altitude_m', 'altitude_m'),
+    )
+
+
+class MissionTombstone(Base):
+    """Deleted mission IDs, filled in by a trigger so views can sync deletions."""
+    __tablename__ = 'mission_tombstones'
+
+    mission_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False, default=func.now())
+
+    __table_args__ = (
+        Index('ix_mission_tombstones_deleted_at', 'deleted_at'),
+    )
+
+
+class MissionValueIssue(Base):
+    """Legacy values that couldn't be converted when a column was retyped."""
+    __tablename__ = 'mission_value_issues'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    mission_id = Column(Integer, nullable=False)
+    column_name = Column(String, nullable=False)
+    raw_value = Column(Text, nullable=True)
+    flagged_at = Column(DateTime, default=func.now())
+
+
+class MissionImport(Base):
+    """Progress of a bulk import, committed with each chunk so it can be resumed."""
+    __tablename__ = 'mission_imports'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String, nullable=False)  # Absolute path of the imported file
+    fingerprint = Column(String, nullable=False)  # Size and modification time of the file
+    rows_done = Column(Integer, nullable=False, default=0)  # Data rows read, incl. rejects
+    imported = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+    # Until its missions are in the history, statistics, lookup and search tables: the
+    # largest mission ID before them (see logic.importer.finish_imports)
+    pending_after = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index('ix_mission_imports_source', 'source'),
+    )
+
+
+# Triggers that keep change tracking correct for writes made outside the ORM
+MISSION_TRIGGERS = [
+    # Leave a tombstone behind for every deleted mission
+    """
+    CREATE TRIGGER IF NOT EXISTS missions_tombstone_on_delete
+    AFTER DELETE ON missions
+    BEGIN
+        INSERT OR REPLACE INTO mission_tombstones (mission_id, deleted_at)
+        VALUES (OLD.id, CURRENT_TIMESTAMP);
+    END
+    """,
+    # An ID that comes back (e.g. reused by SQLite) is no longer deleted
+    """
+    CREATE TRIGGER IF NOT EXISTS missions_clear_tombstone_on_insert
+    AFTER INSERT ON missions
+    BEGIN
+        DELETE FROM mission_tombstones WHERE mission_id = NEW.id;
+    END
+    """,
+    # Bump updated_at for raw SQL updates that don't set it themselves
+    """
+    CREATE TRIGGER IF NOT EXISTS missions_touch_updated_at
+    AFTER UPDATE ON missions
+    WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE missions SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END
+    """,
+]
+
+
+# Full-text index over the mission text (an FTS5 table whose content is read from the
+# mission_text view, i.e. missions with the categorical ids decoded). create_all can't
+# make virtual tables or views, so db/migrations.py creates them and the index is
+# described here only for queries, outside Base.metadata.
+MISSION_SEARCH_COLUMNS = ["comments", "issues_hw", "issues_operator", "issues_sw", "issues_env",
+                          "raw_metar", "platform", "chassis", "customer", "site", "battery", "outcome"]
+
+mission_search = Table(
+    "missions_fts", MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    *[Column(name, Text) for name in MISSION_SEARCH_COLUMNS],
+)
+
+_search_columns = ", ".join(MISSION_SEARCH_COLUMNS)
+_new_values = ", ".join(decoded_sql(f"NEW.{name}", name) for name in MISSION_SEARCH_COLUMNS)
+_old_values = ", ".join(decoded_sql(f"OLD.{name}", name) for name in MISSION_SEARCH_COLUMNS)
+
+MISSION_TEXT_VIEW = (f"CREATE VIEW IF NOT EXISTS mission_text AS SELECT id, "
+                     f"{', '.join(f'{decoded_sql(name, name)} AS {name}' for name in MISSION_SEARCH_COLUMNS)} "
+                     f"FROM missions")
+
+MISSION_SEARCH_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS missions_fts USING fts5(
+        {_search_columns},
+        content='mission_text', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+
+# An external content index has to be told the old text to remove it
+MISSION_SEARCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS missions_fts_insert
+    AFTER INSERT ON missions
+    BEGIN
+        INSERT INTO missions_fts (rowid, {_search_columns}) VALUES (NEW.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS missions_fts_delete
+    AFTER DELETE ON missions
+    BEGIN
+        INSERT INTO missions_fts (missions_fts, rowid, {_search_columns})
+        VALUES ('delete', OLD.id, {_old_values});
+    END
+    """,
+    # Only edits to the indexed text, not e.g. the updated_at touch
+    f"""
+    CREATE TRIGGER IF NOT EXISTS missions_fts_update
+    AFTER UPDATE OF {_search_columns} ON missions
+    BEGIN
+        INSERT INTO missions_fts (missions_fts, rowid, {_search_columns})
+        VALUES ('delete', OLD.id, {_old_values});
+        INSERT INTO missions_fts (rowid, {_search_columns}) VALUES (NEW.id, {_new_values});
+    END
+    """,
+]
+
+
+
+# --- Fleet statistics ---
+# Missions rolled up per day and per month, overall ('all') and by each of
+# MISSION_STATS_DIMENSIONS, so dashboards read a handful of rows instead of every
+# mission. Triggers keep them current; db/migrations.py fills them for existing databases.
+MISSION_STATS_DIMENSIONS = ["platform", "chassis", "battery", "site", "customer", "outcome"]
+
+# Outcomes counted as failures, compared ignoring case and surrounding spaces. Changing
+# this needs a `python -m logic.fleet_stats --rebuild`.
+FAILURE_OUTCOMES = ["failed", "failure", "aborted", "crashed", "crash"]
+
+ISSUE_COLUMNS = ["issues_hw", "issues_operator", "issues_sw", "issues_env"]
+
+
+class _MissionStats:
+    period = Column(String, primary_key=True)  # 'YYYY-MM-DD' or 'YYYY-MM'
+    dimension = Column(String, primary_key=True)  # 'all' or one of MISSION_STATS_DIMENSIONS
+    value = Column(String, primary_key=True)  # The dimension's value, '' for blank
+    flights = Column(Integer, nullable=False, default=0)
+    data_gb = Column(Float, nullable=False, default=0.0)
+    with_outcome = Column(Integer, nullable=False, default=0)  # Flights with an outcome recorded
+    failures = Column(Integer, nullable=False, default=0)
+    issues_hw = Column(Integer, nullable=False, default=0)  # Flights with HW issues noted, etc.
+    issues_operator = Column(Integer, nullable=False, default=0)
+    issues_sw = Column(Integer, nullable=False, default=0)
+    issues_env = Column(Integer, nullable=False, default=0)
+
+
+class DailyMissionStats(_MissionStats, Base):
+    __tablename__ = 'mission_stats_daily'
+
+    # Breakdowns by one dimension read only that dimension's rows
+    __table_args__ = (
+        Index('ix_mission_stats_daily_dimension', 'dimension', 'period'),
+    )
+
+
+class MonthlyMissionStats(_MissionStats, Base):
+    __tablename__ = 'mission_stats_monthly'
+
+    __table_args__ = (
+        Index('ix_mission_stats_monthly_dimension', 'dimension', 'period'),
+    )
+
+
+# (table, length of the date prefix that is its period)
+MISSION_STATS_TABLES = [("mission_stats_daily", 10), ("mission_stats_monthly", 7)]
+
+MISSION_STATS_COUNTERS = ["flights", "data_gb", "with_outcome", "failures"] + ISSUE_COLUMNS
+
+
+def _is_set(expr):
+    return f"(TRIM(IFNULL({expr}, '')) <> '')"
+
+
+def _stats_measures(ref, sign):
+    """SQL for each of MISSION_STATS_COUNTERS of one mission row (`ref` is NEW, OLD or a table)."""
+    failures = ", ".join(f"'{outcome}'" for outcome in FAILURE_OUTCOMES)
+    prefix = f"{ref}." if ref else ""
+    return [
+        f"{sign}1",
+        f"{sign}CAST(IFNULL({prefix}filesize_gb, 0) AS REAL)",
+        f"{sign}{_is_set(prefix + 'outcome')}",
+        f"{sign}(LOWER(TRIM(IFNULL({decoded_sql(prefix + 'outcome', 'outcome')}, ''))) IN ({failures}))",
+    ] + [f"{sign}{_is_set(prefix + column)}" for column in ISSUE_COLUMNS]
+
+
+_stats_columns = ", ".join(["period", "dimension", "value"] + MISSION_STATS_COUNTERS)
+_stats_upsert = ("ON CONFLICT (period, dimension, value) DO UPDATE SET "
+                 + ", ".join(f"{c} = {c} + excluded.{c}" for c in MISSION_STATS_COUNTERS))
+
+
+def _stats_row_sql(table, length, ref, sign):
+    """Adds (`sign` '') or removes (`sign` '-') one mission row in every rollup it belongs to."""
+    dimensions = " UNION ALL ".join(
+        ["SELECT 'all' AS dimension, '' AS value"]
+        + [f"SELECT '{d}', TRIM(IFNULL({decoded_sql(f'{ref}.{d}', d)}, ''))" for d in MISSION_STATS_DIMENSIONS])
+    return (f"INSERT INTO {table} ({_stats_columns}) "
+            f"SELECT SUBSTR({ref}.date, 1, {length}), d.dimension, d.value, "
+            f"{', '.join(_stats_measures(ref, sign))} FROM ({dimensions}) AS d WHERE true "
+            f"{_stats_upsert};")
+
+
+def mission_stats_fill_sql(table, length, where="true"):
+    """Adds the missions matching `where` to a rollup table in one set-based statement."""
+    # Each mission's measures are computed once, then summed per dimension
+    measures = ", ".join(f"{m} AS {c}" for m, c in zip(_stats_measures("", ""), MISSION_STATS_COUNTERS))
+    rows = (f"SELECT SUBSTR(date, 1, {length}) AS period, {', '.join(MISSION_STATS_DIMENSIONS)}, {measures} "
+            f"FROM missions WHERE {where}")
+    sums = ", ".join(f"SUM({c}) AS {c}" for c in MISSION_STATS_COUNTERS)
+    groups = [f"SELECT period, 'all', '', {sums} FROM rows GROUP BY 1"]
+    # Grouped by the stored values, so ids are decoded once per group; values that only
+    # differ in surrounding spaces are merged by the upsert
+    groups += [f"SELECT period, '{d}', TRIM(IFNULL({decoded_sql('value', d)}, '')), "
+               f"{', '.join(MISSION_STATS_COUNTERS)} FROM (SELECT period, {d} AS value, "
+               f"{sums} FROM rows GROUP BY 1, 2)" for d in MISSION_STATS_DIMENSIONS]
+    return (f"WITH rows AS MATERIALIZED ({rows}) INSERT INTO {table} ({_stats_columns}) "
+            f"SELECT * FROM ({' UNION ALL '.join(groups)}) WHERE true {_stats_upsert}")
+
+
+def mission_stats_rows_sql(where="true"):
+    """
+    The day, the value of each of MISSION_STATS_DIMENSIONS (as the rollups key them) and
+    each of MISSION_STATS_COUNTERS of the missions matching `where`, one row per mission,
+    for adding them up outside SQLite (see mission_stats_upsert_sql).
+    """
+    dimensions = ", ".join(f"TRIM(IFNULL({decoded_sql(d, d)}, ''))" for d in MISSION_STATS_DIMENSIONS)
+    return (f"SELECT SUBSTR(date, 1, 10), {dimensions}, {', '.join(_stats_measures('', ''))} "
+            f"FROM missions WHERE {where}")
+
+
+def mission_stats_upsert_sql(table):
+    """Adds a row of counters (period, dimension, value and MISSION_STATS_COUNTERS) to a rollup table."""
+    return (f"INSERT INTO {table} ({_stats_columns}) VALUES ({', '.join('?' * (3 + len(MISSION_STATS_COUNTERS)))}) "
+            f"{_stats_upsert}")
+
+
+def _stats_trigger(name, event, body, when=""):
+    when = f" WHEN {when}" if when else ""
+    return f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON missions{when} BEGIN {body} END"
+
+
+_stats_add = " ".join(_stats_row_sql(table, length, "NEW", "") for table, length in MISSION_STATS_TABLES)
+_stats_remove = " ".join(_stats_row_sql(table, length, "OLD", "-") for table, length in MISSION_STATS_TABLES)
+# Rollup rows no mission counts towards any more
+_stats_prune = " ".join(f"DELETE FROM {table} WHERE period = SUBSTR(OLD.date, 1, {length}) AND flights = 0;"
+                        for table, length in MISSION_STATS_TABLES)
+_stats_inputs = ["date", "filesize_gb", "outcome"] + ISSUE_COLUMNS + [
+    d for d in MISSION_STATS_DIMENSIONS if d != "outcome"]
+
+MISSION_STATS_TRIGGERS = [
+    _stats_trigger("missions_stats_insert", "INSERT", _stats_add),
+    _stats_trigger("missions_stats_delete", "DELETE", _stats_remove + " " + _stats_prune),
+    # Only for edits to what the rollups count
+    _stats_trigger("missions_stats_update", f"UPDATE OF {', '.join(_stats_inputs)}",
+                   _stats_remove + " " + _stats_add + " " + _stats_prune,
+                   when=" OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in _stats_inputs)),
+]
+
 
+# Lookup tables of the values in use (MISSION_LOOKUP_TABLES), for autocompletion and
+# as the codes of the categorical columns
 
-# Optional: lookup tables for dropdown menus (not required unless you want to enforce domain values)
+class _Lookup:
+    id = Column(Integer, primary_key=True)  # What a categorical column stores in codes mode
+    name = Column(String, nullable=False, unique=True)
 
-class Platform(Base):
+
+class Platform(_Lookup, Base):
     __tablename__ = 'platforms'
-    name = Column(String, primary_key=True)
 
 
-class Chassis(Base):
+class Chassis(_Lookup, Base):
     __tablename__ = 'chassis'
-    name = Column(String, primary_key=True)
 
 
-class Customer(Base):
+class Customer(_Lookup, Base):
     __tablename__ = 'customers'
-    name = Column(String, primary_key=True)
 
 
-class Site(Base):
+class Site(_Lookup, Base):
     __tablename__ = 'sites'
-    name = Column(String, primary_key=True)
 
 
-class Battery(Base):
+class Battery(_Lookup, Base):
     __tablename__ = 'batteries'
-    name = Column(String, primary_key=True)
 
 
-class IssuesSw(Base):
+class SkyCondition(_Lookup, Base):
+    __tablename__ = 'sky_conditions'
+
+
+class Outcome(_Lookup, Base):
+    __tablename__ = 'outcomes'
+
+
+class IssuesSw(_Lookup, Base):
     __tablename__ = 'issues_sw'
-    name = Column(String, primary_key=True)
 
 
-class IssuesHw(Base):
+class IssuesHw(_Lookup, Base):
     __tablename__ = 'issues_hw'
-    name = Column(String, primary_key=True)
 
 
-class IssuesOperator(Base):
+class IssuesOperator(_Lookup, Base):
     __tablename__ = 'issues_operator'
-    name = Column(String, primary_key=True)
 
 
-class IssuesEnv(Base):
+class IssuesEnv(_Lookup, Base):
     __tablename__ = 'issues_env'
-    name = Column(String, primary_key=True)
+
+
+def lookup_fill_sql(field, where="true"):
+    """Adds the values of `field` in the missions matching `where` to its lookup table."""
+    return (f"INSERT OR IGNORE INTO {MISSION_LOOKUP_TABLES[field]} (name) SELECT DISTINCT TRIM({field}) "
+            f"FROM missions WHERE {where} AND {_is_text(field)}")
+
+
+def _is_text(expr):
+    """Whether `expr` is a non-blank value stored as text, i.e. not (yet) as a lookup id."""
+    return f"(typeof({expr}) = 'text' AND TRIM({expr}) <> '')"
+
+
+def _lookup_inserts():
+    return " ".join(
+        f"INSERT OR IGNORE INTO {table} (name) SELECT TRIM(NEW.{field}) WHERE {_is_text('NEW.' + field)};"
+        for field, table in MISSION_LOOKUP_TABLES.items())
+
+
+MISSION_LOOKUP_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS missions_lookups_insert AFTER INSERT ON missions "
+    f"BEGIN {_lookup_inserts()} END",
+    f"CREATE TRIGGER IF NOT EXISTS missions_lookups_update "
+    f"AFTER UPDATE OF {', '.join(MISSION_LOOKUP_TABLES)} ON missions "
+    f"WHEN {' OR '.join(f'OLD.{c} IS NOT NEW.{c}' for c in MISSION_LOOKUP_TABLES)} "
+    f"BEGIN {_lookup_inserts()} END",
+]
+
+
+# Codes mode only: categorical values written as text (new ones, or by raw SQL) are
+# added to their lookup table and replaced by their id
+_categorical_text = " OR ".join(_is_text(f"NEW.{c}") for c in CATEGORICAL_COLUMNS)
+_encode_body = (" ".join(f"INSERT OR IGNORE INTO {MISSION_LOOKUP_TABLES[c]} (name) SELECT NEW.{c} "
+                         f"WHERE {_is_text('NEW.' + c)};" for c in CATEGORICAL_COLUMNS)
+                + " UPDATE missions SET "
+                + ", ".join(f"{c} = CASE WHEN {_is_text('NEW.' + c)} THEN (SELECT id FROM "
+                            f"{MISSION_LOOKUP_TABLES[c]} WHERE name = NEW.{c}) ELSE NEW.{c} END"
+                            for c in CATEGORICAL_COLUMNS)
+                + " WHERE id = NEW.id;")
+
+MISSION_ENCODE_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS missions_encode_insert AFTER INSERT ON missions "
+    f"WHEN {_categorical_text} BEGIN {_encode_body} END",
+    f"CREATE TRIGGER IF NOT EXISTS missions_encode_update "
+    f"AFTER UPDATE OF {', '.join(CATEGORICAL_COLUMNS)} ON missions "
+    f"WHEN {_categorical_text} BEGIN {_encode_body} END",
+]
+
+
+# --- Change history ---
+# Every write to a mission, kept for good: triggers append the columns each write
+# changed to mission_history (one row per column, with its new value) in the writing
+# transaction, so no writer can skip them. An inserted mission is recorded whole in
+# mission_snapshots, and every HISTORY_CHECKPOINT_INTERVAL changes a checkpoint snapshots
+# each mission changed since the last one; a mission's state at any change is then its
+# latest snapshot plus at most an interval's changes (see logic/history.py).
+
+# The mission columns the history records, by their code in mission_history.field.
+# Append only: changing the code of a column would rewrite the meaning of the history.
+HISTORY_FIELDS = [
+    "mission_id", "associated_mission", "date", "platform", "chassis", "customer", "site",
+    "altitude_m", "speed_m_s", "spacing_m", "sky_conditions", "wind_knots", "battery",
+    "filesize_gb", "is_test", "issues_hw", "issues_operator", "issues_env", "issues_sw",
+    "outcome", "comments", "raw_metar",
+]
+
+# mission_history.field of the rows recording a whole mission being inserted or deleted
+ROW_INSERTED = -1
+ROW_DELETED = -2
+
+# Changes between checkpoints. Changing it needs the checkpoint trigger recreated.
+HISTORY_CHECKPOINT_INTERVAL = 10_000
+
+# The current time in milliseconds since the Unix epoch; the same for every row a
+# statement writes
+NOW_MS = "CAST(ROUND((julianday('now') - 2440587.5) * 86400000) AS INTEGER)"
+
+# `value` has no type, so each value is kept as the column stored it (create_all can't
+# declare that); db/migrations.py creates the table and the table is described here for
+# queries only, like the full-text index
+MISSION_HISTORY_TABLE = """
+    CREATE TABLE IF NOT EXISTS mission_history (
+        id INTEGER PRIMARY KEY,
+        mission_id INTEGER NOT NULL,
+        changed_at INTEGER NOT NULL,
+        field INTEGER NOT NULL,
+        value
+    )
+"""
+MISSION_HISTORY_INDEX = "CREATE INDEX IF NOT EXISTS ix_mission_history_mission_id ON mission_history (mission_id)"
+
+mission_history = Table(
+    "mission_history", MetaData(),
+    Column("id", Integer, primary_key=True),  # In the order the changes were made
+    Column("mission_id", Integer, nullable=False),
+    Column("changed_at", Integer, nullable=False),  # Milliseconds since the Unix epoch
+    Column("field", Integer, nullable=False),  # HISTORY_FIELDS index, ROW_INSERTED or ROW_DELETED
+    Column("value"),
+)
+
+
+def _history_type(name):
+    # Categorical values are recorded as their text, whichever way they're stored
+    type_ = Mission.__table__.c[name].type
+    return String if isinstance(type_, Categorical) else type_
+
+
+# Missions as they were at a change: after it was inserted, or at a checkpoint
+mission_snapshots = Table(
+    "mission_snapshots", Base.metadata,
+    Column("id", Integer, primary_key=True),  # The mission's
+    Column("change_id", Integer, primary_key=True),  # The mission_history row it's as of
+    Column("deleted", Boolean, nullable=False),
+    *[Column(name, _history_type(name)) for name in HISTORY_FIELDS],
+    sqlite_with_rowid=False,
+)
+
+
+class MissionCheckpoint(Base):
+    """Every mission changed since the previous checkpoint has a snapshot as of `change_id`."""
+    __tablename__ = 'mission_checkpoints'
+
+    change_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 for the missions history started with
+    taken_at = Column(Integer, nullable=False)  # Milliseconds since the Unix epoch
+
+
+_history_columns = ", ".join(HISTORY_FIELDS)
+
+
+def _history_values(ref):
+    return ", ".join(decoded_sql(f"{ref}.{name}", name) for name in HISTORY_FIELDS)
+
+
+def history_inserts_sql(where):
+    """Records the missions matching `where` as inserted: a history row and a snapshot each."""
+    return [
+        f"INSERT INTO mission_history (mission_id, changed_at, field) "
+        f"SELECT id, {NOW_MS}, {ROW_INSERTED} FROM missions WHERE {where} ORDER BY id",
+        # Replaces the same snapshot if a checkpoint was taken at the insert itself
+        f"INSERT OR REPLACE INTO mission_snapshots (id, change_id, deleted, {_history_columns}) "
+        f"SELECT m.id, (SELECT MAX(id) FROM mission_history WHERE mission_id = m.id), 0, "
+        f"{_history_values('m')} FROM missions AS m WHERE {where}",
+    ]
+
+
+def history_checkpoint_sql(change_id, taken_at):
+    """
+    Takes a checkpoint as of `change_id` (SQL expressions, as are the others): a snapshot
+    of each mission with changes after the last checkpoint up to it, deleted or not.
+    """
+    return [
+        f"INSERT OR REPLACE INTO mission_snapshots (id, change_id, deleted, {_history_columns}) "
+        f"SELECT c.mission_id, {change_id}, m.id IS NULL, {_history_values('m')} "
+        f"FROM (SELECT DISTINCT mission_id FROM mission_history WHERE id <= {change_id} "
+        f"AND id > (SELECT IFNULL(MAX(change_id), -1) FROM mission_checkpoints)) AS c "
+        f"LEFT JOIN missions AS m ON m.id = c.mission_id",
+        f"INSERT OR REPLACE INTO mission_checkpoints (change_id, taken_at) VALUES ({change_id}, {taken_at})",
+    ]
+
+
+def history_baseline_sql():
+    """Snapshots every mission as the start of the history (checkpoint 0), unless history has started."""
+    return [
+        f"INSERT OR IGNORE INTO mission_snapshots (id, change_id, deleted, {_history_columns}) "
+        f"SELECT id, 0, 0, {_history_values('missions')} FROM missions "
+        f"WHERE NOT EXISTS (SELECT 1 FROM mission_checkpoints)",
+        f"INSERT OR IGNORE INTO mission_checkpoints (change_id, taken_at) VALUES (0, {NOW_MS})",
+    ]
+
+
+def _history_changed(name):
+    changed = f"OLD.{name} IS NOT NEW.{name}"
+    if name in CATEGORICAL_COLUMNS:
+        # Not the encode trigger swapping text for its id
+        changed += f" AND {decoded_sql('OLD.' + name, name)} IS NOT {decoded_sql('NEW.' + name, name)}"
+    return changed
+
+
+_history_updates = " UNION ALL ".join(
+    f"SELECT {code} AS field, {decoded_sql('NEW.' + name, name)} AS value WHERE {_history_changed(name)}"
+    for code, name in enumerate(HISTORY_FIELDS))
+
+MISSION_HISTORY_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS missions_history_insert AFTER INSERT ON missions "
+    f"BEGIN {'; '.join(history_inserts_sql('id = NEW.id'))}; END",
+    # One row per changed column, in one INSERT
+    f"CREATE TRIGGER IF NOT EXISTS missions_history_update AFTER UPDATE OF {_history_columns} ON missions "
+    f"WHEN {' OR '.join(f'OLD.{name} IS NOT NEW.{name}' for name in HISTORY_FIELDS)} "
+    f"BEGIN INSERT INTO mission_history (mission_id, changed_at, field, value) "
+    f"SELECT NEW.id, {NOW_MS}, field, value FROM ({_history_updates}); END",
+    f"CREATE TRIGGER IF NOT EXISTS missions_history_delete AFTER DELETE ON missions "
+    f"BEGIN INSERT INTO mission_history (mission_id, changed_at, field) VALUES (OLD.id, {NOW_MS}, {ROW_DELETED}); END",
+    f"CREATE TRIGGER IF NOT EXISTS mission_history_checkpoint AFTER INSERT ON mission_history "
+    f"WHEN NEW.id % {HISTORY_CHECKPOINT_INTERVAL} = 0 "
+    f"BEGIN {'; '.join(history_checkpoint_sql('NEW.id', 'NEW.changed_at'))}; END",
+]
+
+
+# --- Sync ---
+# Changes exchanged with other copies of the flight log (replicas: each crew's laptop, the
+# central log), see logic/sync.py. Each replica records its own changes, read from the
+# history when a sync starts, as one entry per mission field or lookup value in
+# sync_changes: the value, who made the change (`origin`), its sequence number there and
+# its clock. A field keeps only its latest entry, so what a replica holds is its state,
+# and the changes another replica is missing are those past what that replica is known to
+# have of each origin: a range of the (origin, seq) index, however large the database.
+
+# The tables sync covers, by their code in sync_changes.tbl. Append only, like HISTORY_FIELDS.
+SYNC_TABLES = ["missions"] + list(MISSION_LOOKUP_TABLES.values())
+
+
+class SyncReplica(Base):
+    """A copy of the flight log: this one (`local`) or one whose changes have reached it."""
+    __tablename__ = 'sync_replicas'
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(String, nullable=False, unique=True)  # 32 hex digits, made by the replica itself
+    name = Column(String, nullable=True)  # e.g. "Crew B"
+    local = Column(Boolean, nullable=False, default=False)
+    seq = Column(Integer, nullable=False, default=0)  # Its changes up to this one are merged here
+    clock = Column(Integer, nullable=False, default=0)  # The latest clock of those
+
+
+class SyncPeerVersion(Base):
+    """What a replica had merged when it last sent us a bundle: `replica`'s changes up to `seq`."""
+    __tablename__ = 'sync_peer_versions'
+
+    peer = Column(Integer, primary_key=True)
+    replica = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+
+class SyncMission(Base):
+    """Which mission a local one is everywhere: the replica that created it and its ID there."""
+    __tablename__ = 'sync_missions'
+
+    mission_id = Column(Integer, primary_key=True, autoincrement=False)  # Here
+    origin = Column(Integer, nullable=False)  # sync_replicas.id
+    origin_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_sync_missions_origin', 'origin', 'origin_id', unique=True),
+    )
+
+
+class SyncRowVersion(Base):
+    """A mission's version vector: the latest change to it by each replica that is merged here."""
+    __tablename__ = 'sync_row_versions'
+
+    mission_id = Column(Integer, primary_key=True)
+    replica = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+
+class SyncCapture(Base):
+    """How far local changes have been recorded for sync: `source`'s rows up to `last_id`."""
+    __tablename__ = 'sync_captures'
+
+    source = Column(String, primary_key=True)  # mission_history or a lookup table
+    last_id = Column(Integer, nullable=False, default=0)
+
+
+# `value` and the conflict values have no type, like mission_history.value, so they're
+# created by db/migrations.py and described here for queries only.
+# A mission entry is a field (HISTORY_FIELDS code, `row_id` the local mission ID), whether
+# the mission is deleted (ROW_DELETED, 1 or 0) or its creation (ROW_INSERTED, the value
+# its mission_snapshots change_id: the values it was created with, whatever fields have
+# no entry of their own). A lookup entry is a value in use (`row_id` its id, field 0).
+SYNC_CHANGES_TABLE = """
+    CREATE TABLE IF NOT EXISTS sync_changes (
+        tbl INTEGER NOT NULL,
+        row_id INTEGER NOT NULL,
+        field INTEGER NOT NULL,
+        value,
+        clock INTEGER NOT NULL,
+        origin INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        PRIMARY KEY (tbl, row_id, field)
+    ) WITHOUT ROWID
+"""
+SYNC_CHANGES_INDEX = "CREATE INDEX IF NOT EXISTS ix_sync_changes_origin ON sync_changes (origin, seq)"
+
+sync_changes = Table(
+    "sync_changes", MetaData(),
+    Column("tbl", Integer, primary_key=True),  # SYNC_TABLES index
+    Column("row_id", Integer, primary_key=True),
+    Column("field", Integer, primary_key=True),
+    Column("value"),
+    Column("clock", Integer, nullable=False),  # Milliseconds since the Unix epoch, or later (logic/sync.py)
+    Column("origin", Integer, nullable=False),  # sync_replicas.id of the replica that made the change
+    Column("seq", Integer, nullable=False),  # Its sequence number there
+)
+
+# Fields two replicas changed without either having seen the other's change: `kept` won
+# and `lost` was overwritten (or never written), the same way on every replica
+SYNC_CONFLICTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS sync_conflicts (
+        id INTEGER PRIMARY KEY,
+        mission_id INTEGER NOT NULL,
+        field INTEGER NOT NULL,
+        kept,
+        lost,
+        kept_by INTEGER NOT NULL,
+        lost_by INTEGER NOT NULL,
+        resolved_at INTEGER NOT NULL
+    )
+"""
+
+sync_conflicts = Table(
+    "sync_conflicts", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("mission_id", Integer, nullable=False),
+    Column("field", Integer, nullable=False),  # HISTORY_FIELDS index or ROW_DELETED
+    Column("kept"),
+    Column("lost"),
+    Column("kept_by", Integer, nullable=False),  # sync_replicas.id
+    Column("lost_by", Integer, nullable=False),
+    Column("resolved_at", Integer, nullable=False),  # Milliseconds since the Unix epoch
+)
+
+
+def _lookup_tbl(name):
+    return SYNC_TABLES.index(name)
+
+
+_local_replica = "(SELECT id FROM sync_replicas WHERE local)"
+_next_seq = f"IFNULL((SELECT MAX(seq) FROM sync_changes WHERE origin = {_local_replica}), 0)"
+
+
+def sync_baseline_sql():
+    """
+    Records the missions and lookup values there are as the local replica's first
+    changes, unless that was done: a creation entry per mission (its latest snapshot,
+    which needs a history checkpoint as of the latest change) and an entry per value.
+    """
+    statements = [
+        f"INSERT OR IGNORE INTO sync_missions (mission_id, origin, origin_id) "
+        f"SELECT id, {_local_replica}, id FROM missions "
+        f"WHERE NOT EXISTS (SELECT 1 FROM sync_captures)",
+        f"INSERT OR IGNORE INTO sync_changes (tbl, row_id, field, value, clock, origin, seq) "
+        f"SELECT 0, s.id, {ROW_INSERTED}, MAX(s.change_id), {NOW_MS}, {_local_replica}, "
+        f"ROW_NUMBER() OVER (ORDER BY s.id) FROM mission_snapshots AS s JOIN missions AS m ON m.id = s.id "
+        f"WHERE NOT EXISTS (SELECT 1 FROM sync_captures) GROUP BY s.id",
+        f"INSERT OR IGNORE INTO sync_row_versions (mission_id, replica, seq) "
+        f"SELECT row_id, origin, seq FROM sync_changes WHERE tbl = 0 AND field = {ROW_INSERTED} "
+        f"AND NOT EXISTS (SELECT 1 FROM sync_captures)",
+    ]
+    for name in MISSION_LOOKUP_TABLES.values():
+        statements.append(
+            f"INSERT OR IGNORE INTO sync_changes (tbl, row_id, field, value, clock, origin, seq) "
+            f"SELECT {_lookup_tbl(name)}, id, 0, name, {NOW_MS}, {_local_replica}, "
+            f"{_next_seq} + ROW_NUMBER() OVER (ORDER BY id) FROM {name} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM sync_captures)")
+    statements += [
+        f"UPDATE sync_replicas SET seq = {_next_seq}, clock = {NOW_MS} WHERE local "
+        f"AND NOT EXISTS (SELECT 1 FROM sync_captures)",
+        "INSERT OR IGNORE INTO sync_captures (source, last_id) "
+        "SELECT 'mission_history', IFNULL(MAX(id), 0) FROM mission_history",
+    ] + [f"INSERT OR IGNORE INTO sync_captures (source, last_id) SELECT '{name}', IFNULL(MAX(id), 0) FROM {name}"
+         for name in MISSION_LOOKUP_TABLES.values()]
+    return statements
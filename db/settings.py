@@ -0,0 +1,50 @@
+"""
+Settings, read without importing SQLAlchemy so the startup preview (ui/startup.py) can
+find the database and its snapshot before the database modules load.
+
+The database path comes from $FLIGHTLOG_DB, then the [database] section of the settings
+file ($FLIGHTLOG_SETTINGS, default ./settings.ini), then the default below. Pragmas in a
+[pragmas] section override the tuning profile.
+"""
+import configparser
+import os
+
+DEFAULT_DATABASE_PATH = "test_flightlog.db"
+SETTINGS_FILE = os.environ.get("FLIGHTLOG_SETTINGS", "settings.ini")
+
+# Applied to every new connection. WAL lets readers and one writer work at the same time;
+# synchronous=NORMAL is safe with WAL and avoids an fsync per commit.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,           # ms to wait on a lock before "database is locked"
+    "cache_size": -64000,           # negative = KiB, so ~64 MB of page cache
+    "mmap_size": 268435456,         # 256 MB of memory-mapped I/O
+    "temp_store": "MEMORY",
+}
+
+# Pragmas that only make sense on a connection allowed to write
+WRITE_ONLY_PRAGMAS = {"journal_mode"}
+
+
+def load_settings(path=SETTINGS_FILE):
+    settings = configparser.ConfigParser()
+    settings.read(path)
+    return settings
+
+
+_settings = load_settings()
+
+DATABASE_PATH = os.environ.get(
+    "FLIGHTLOG_DB", _settings.get("database", "path", fallback=DEFAULT_DATABASE_PATH))
+PRAGMAS = {**DEFAULT_PRAGMAS, **(dict(_settings["pragmas"]) if _settings.has_section("pragmas") else {})}
+READ_POOL_SIZE = _settings.getint("database", "read_pool_size", fallback=4)
+# How the categorical mission columns are stored: 'text', or 'codes' (lookup table ids,
+# see CATEGORICAL_COLUMNS in db/models.py). init_db converts the database to match.
+CATEGORICAL_STORAGE = _settings.get("database", "categorical_storage", fallback="text").strip().lower()
+if CATEGORICAL_STORAGE not in ("text", "codes"):
+    raise ValueError(f"categorical_storage must be 'text' or 'codes', not '{CATEGORICAL_STORAGE}'")
+
+# The table's rows are saved here on exit and shown first on the next start (see
+# ui/startup.py); an empty path turns that off
+SNAPSHOT_PATH = _settings.get("database", "snapshot", fallback=f"{DATABASE_PATH}.snapshot")
@@ -0,0 +1,241 @@
+"""
+Typed column storage for the mission cache (logic.mission_cache) and its on-disk snapshot
+(logic.snapshot).
+
+Each column holds one field's values by position: numbers, dates and flags in a NumPy
+array with a sentinel for NULL, categories as int32 codes into a list of their values,
+and free text as UTF-8 in one byte buffer. Only NumPy is imported here, so the startup
+preview can read a snapshot before the database modules load.
+"""
+import sys
+from datetime import datetime
+import numpy as np
+
+# NULL in the integer columns
+INT_NULL = np.iinfo(np.int64).min
+
+# Rows per step when text is gathered, which bounds the temporary index arrays
+GATHER_CHUNK = 65536
+
+
+def grown(array, capacity, fill=None):
+    """`array` copied into a new one of `capacity` elements, the new ones set to `fill`."""
+    new = np.empty(capacity, array.dtype) if fill is None else np.full(capacity, fill, array.dtype)
+    new[:len(array)] = array
+    return new
+
+
+class Column:
+    """One field's values by position; `other` keeps those the typed storage can't hold."""
+    kind = None  # Python type the storage holds; None takes anything
+
+    def __init__(self):
+        self.other = {}
+
+    def set(self, positions, values):
+        """Stores `values` (a list) at `positions` (an int array)."""
+        if self.other:
+            for position in positions.tolist():
+                self.other.pop(position, None)
+        kind = self.kind
+        if kind is not None and not all(v is None or type(v) is kind for v in values):
+            fitting = []
+            for position, value in zip(positions.tolist(), values):
+                if value is None or type(value) is kind:
+                    fitting.append(value)
+                else:
+                    self.other[position] = value
+                    fitting.append(None)
+            values = fitting
+        self._store(positions, values)
+
+    def value(self, position):
+        if self.other and position in self.other:
+            return self.other[position]
+        return self._load(position)
+
+    def release(self, positions):
+        """Called with the positions being discarded."""
+        for position in positions.tolist():
+            self.other.pop(position, None)
+
+
+class ArrayColumn(Column):
+    """Integers, numbers, dates or flags in one NumPy array, NULL stored as `null`."""
+
+    def __init__(self, kind, dtype, null):
+        super().__init__()
+        self.kind = kind
+        self.null = null
+        self.array = np.empty(0, dtype)
+
+    def grow(self, capacity):
+        self.array = grown(self.array, capacity)
+
+    def nulls(self, positions):
+        """Boolean mask of the NULLs among `positions`."""
+        values = self.array[positions]
+        if values.dtype.kind == "f":
+            return np.isnan(values)
+        if values.dtype.kind == "M":
+            return np.isnat(values)
+        return values == self.null
+
+    def _store(self, positions, values):
+        null = self.null
+        self.array[positions] = [null if v is None else v for v in values]
+
+    def _load(self, position):
+        value = self.array[position]
+        if value == self.null or value != value:  # The sentinel, NaN or NaT
+            return None
+        value = value.item()
+        return bool(value) if self.kind is bool else value
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+
+class CategoryColumn(Column):
+    """Dictionary-encoded: int32 codes into `categories` (interned), -1 for NULL."""
+
+    def __init__(self):
+        super().__init__()
+        self.codes = np.empty(0, np.int32)
+        self.categories = []
+        self._code_of = {}
+
+    def grow(self, capacity):
+        self.codes = grown(self.codes, capacity)
+
+    def code(self, value):
+        """The code of `value`, which becomes a new category if it isn't one yet."""
+        code = self._code_of.get(value)
+        if code is None:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            code = self._code_of[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def _store(self, positions, values):
+        code = self.code
+        self.codes[positions] = [-1 if v is None else code(v) for v in values]
+
+    def _load(self, position):
+        code = self.codes[position]
+        return None if code < 0 else self.categories[code]
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(map(sys.getsizeof, self.categories))
+
+
+class TextColumn(Column):
+    """
+    Free text as UTF-8 in one byte buffer: a value is `lengths[p]` bytes from `starts[p]`,
+    length -1 for NULL. Updates append; the bytes they replace are reclaimed by compact()
+    once they make up half the buffer.
+    """
+    kind = str
+
+    def __init__(self):
+        super().__init__()
+        self.starts = np.empty(0, np.int64)
+        self.lengths = np.empty(0, np.int32)
+        self.data = np.empty(0, np.uint8)
+        self.used = 0  # Bytes of `data` written, current or replaced
+        self.garbage = 0  # Bytes of `data` no value points at any more
+
+    def grow(self, capacity):
+        self.starts = grown(self.starts, capacity, 0)
+        self.lengths = grown(self.lengths, capacity, -1)
+
+    def _store(self, positions, values):
+        self._free(positions)
+        encoded = [b"" if v is None else v.encode() for v in values]
+        lengths = np.fromiter(map(len, encoded), np.int64, len(encoded))
+        blob = b"".join(encoded)
+        if self.used + len(blob) > len(self.data):
+            self.data = grown(self.data[:self.used], max(2 * len(self.data), self.used + len(blob), 1 << 16))
+        self.data[self.used:self.used + len(blob)] = np.frombuffer(blob, np.uint8)
+        self.starts[positions] = self.used + np.cumsum(lengths) - lengths
+        self.lengths[positions] = np.where(np.fromiter((v is None for v in values), bool, len(values)),
+                                           -1, lengths)
+        self.used += len(blob)
+        if self.garbage > max(self.used // 2, 1 << 20):
+            self.compact()
+
+    def _load(self, position):
+        length = int(self.lengths[position])
+        if length < 0:
+            return None
+        start = int(self.starts[position])
+        return self.data[start:start + length].tobytes().decode()
+
+    def release(self, positions):
+        super().release(positions)
+        self._free(positions)
+
+    def _free(self, positions):
+        lengths = self.lengths[positions]
+        self.garbage += int(lengths[lengths > 0].sum())
+        self.lengths[positions] = -1
+
+    def gather(self, positions, data=None):
+        """
+        The values at `positions` back to back: (their starts in the new buffer, the
+        buffer). The bytes go into `data` if given, which must be large enough.
+        """
+        lengths = np.maximum(self.lengths[positions], 0).astype(np.int64)
+        starts = np.cumsum(lengths) - lengths
+        total = int(lengths.sum())
+        if data is None:
+            data = np.empty(total, np.uint8)
+        for first in range(0, len(positions), GATHER_CHUNK):
+            part = slice(first, first + GATHER_CHUNK)
+            begin = int(starts[part][0])
+            count = int(lengths[part].sum())
+            source = np.arange(begin, begin + count) + np.repeat(self.starts[positions[part]] - starts[part],
+                                                                lengths[part])
+            data[begin:begin + count] = self.data[source]
+        return starts, data
+
+    def compact(self):
+        """Rewrites the buffer with only the bytes that values still point at."""
+        live = np.flatnonzero(self.lengths > 0)
+        total = int(self.lengths[live].sum(dtype=np.int64))
+        starts, data = self.gather(live, np.empty(max(2 * total, 1 << 16), np.uint8))
+        self.starts[live] = starts
+        self.data, self.used, self.garbage = data, total, 0
+
+    @property
+    def nbytes(self):
+        return self.starts.nbytes + self.lengths.nbytes + self.data.nbytes
+
+
+# Column kinds by name, as snapshots record them
+KINDS = {"int": int, "float": float, "datetime": datetime, "bool": bool, "category": None, "text": str}
+
+
+def make_column(kind):
+    """An empty column for values of `kind` (a name in KINDS)."""
+    if kind == "category":
+        return CategoryColumn()
+    if kind == "int":
+        return ArrayColumn(int, np.int64, INT_NULL)
+    if kind == "float":
+        return ArrayColumn(float, np.float64, np.nan)
+    if kind == "datetime":
+        return ArrayColumn(datetime, "datetime64[us]", np.datetime64("NaT"))
+    if kind == "bool":
+        return ArrayColumn(bool, np.int8, -1)
+    return TextColumn()
+
+
+def column_kind(column):
+    """The name in KINDS of the column's kind."""
+    if isinstance(column, CategoryColumn):
+        return "category"
+    return next(name for name, kind in KINDS.items() if kind is column.kind)
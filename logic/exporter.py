@@ -0,0 +1,198 @@
+"""
+Streaming export of missions to CSV, JSON Lines, Parquet or Arrow.
+
+    python -m logic.exporter missions.parquet [--filter platform=M300,M600] [--order=-date]
+
+The format follows the file extension (.csv, .jsonl/.ndjson, .parquet, .arrow/.feather).
+Missions are read with iter_missions and written `batch_size` rows at a time, so memory
+stays bounded however many missions match. Output goes to a temporary file that is
+renamed into place once complete, so a failed or cancelled export leaves nothing behind.
+
+CSV uses the table's header labels and cell text, so it can be imported again with
+logic.importer, and by default has the table's columns. JSON Lines and Parquet/Arrow use
+the Mission attribute names and typed values, and by default have every Mission column.
+Parquet and Arrow need pyarrow.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from itertools import islice
+from db.database import ReadSessionLocal
+from db.models import Mission
+from logic.flight_ops import format_value, iter_missions, mission_filter
+from logic.schema import FIELD, FIELDS
+
+EXPORT_BATCH_SIZE = 10_000
+
+FORMATS = {
+    ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl",
+    ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow",
+}
+
+LABELS = {field.attr: field.label for field in FIELDS}
+# Categorical columns load as text; every other column as its Python type
+TYPES = {column.key: str if column.type.python_type is object else column.type.python_type
+         for column in Mission.__table__.columns}
+
+# What a CSV (the table's columns) and the typed formats (every column) export by default
+CSV_COLUMNS = [field.attr for field in FIELDS]
+ALL_COLUMNS = list(TYPES)
+
+
+def export_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Don't know how to export to '{path}'; use one of {', '.join(FORMATS)}.")
+    return fmt
+
+
+def _batches(rows, size):
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(f, columns, batches):
+    out = csv.writer(f)
+    out.writerow([LABELS.get(attr, attr) for attr in columns])
+    for batch in batches:
+        out.writerows([format_value(value) for value in row] for row in batch)
+        yield len(batch)
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_jsonl(f, columns, batches):
+    encode = json.JSONEncoder(default=_json_value, ensure_ascii=False).encode
+    for batch in batches:
+        f.write("".join(encode(dict(zip(columns, row))) + "\n" for row in batch))
+        yield len(batch)
+
+
+def arrow_schema(pa, columns):
+    types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(),
+             str: pa.string(), datetime: pa.timestamp("us")}
+    return pa.schema([(attr, types[TYPES.get(attr, str)]) for attr in columns])
+
+
+def write_arrow(path, columns, batches, parquet):
+    """Writes each batch as one Parquet row group or Arrow record batch."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exporting Parquet/Arrow needs pyarrow (pip install pyarrow).")
+    schema = arrow_schema(pa, columns)
+    if parquet:
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        for batch in batches:
+            arrays = [pa.array([row[i] for row in batch], type=field.type)
+                      for i, field in enumerate(schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield len(batch)
+    finally:
+        writer.close()
+
+
+def export_missions(path, filters=None, order="id", columns=None, batch_size=EXPORT_BATCH_SIZE,
+                    session=None, progress=None):
+    """
+    Exports the missions matching `filters`, sorted by `order` (see iter_missions), to
+    `path`. Returns the number of missions written. Without `columns` a CSV gets the
+    table's columns and the other formats every Mission column.
+
+    `progress(done, total)` is called after each batch; an exception raised from it
+    (e.g. a cancelled job) aborts the export and removes the partial file.
+    """
+    fmt = export_format(path)
+    columns = list(columns or (CSV_COLUMNS if fmt == "csv" else ALL_COLUMNS))
+    own_session = session is None
+    if own_session:
+        session = ReadSessionLocal()
+    part = path + ".part"
+    try:
+        total = session.query(Mission).filter(*mission_filter(filters)).count()
+        rows = iter_missions(filters, order, batch_size, columns, session=session)
+        batches = _batches(rows, batch_size)
+        done = 0
+        if fmt in ("parquet", "arrow"):
+            written = write_arrow(part, columns, batches, parquet=fmt == "parquet")
+            try:
+                for count in written:
+                    done += count
+                    if progress:
+                        progress(done, total)
+            finally:
+                written.close()  # Closes the writer before a partial file is removed
+        else:
+            newline = "" if fmt == "csv" else "\n"
+            with open(part, "w", newline=newline, encoding="utf-8") as f:
+                writer = write_csv if fmt == "csv" else write_jsonl
+                for count in writer(f, columns, batches):
+                    done += count
+                    if progress:
+                        progress(done, total)
+        os.replace(part, path)
+        return done
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        if own_session:
+            session.close()
+
+
+def parse_filters(specs):
+    """Turns ["platform=M300,M600", "is_test=no"] into an iter_missions filter mapping."""
+    filters = {}
+    for spec in specs or []:
+        attr, sep, text = spec.partition("=")
+        attr = attr.strip()
+        if not sep or attr not in FIELD:
+            raise ValueError(f"Bad filter '{spec}'; expected <field>=<value>[,<value>...]")
+        values = [FIELD[attr].parse(value) for value in text.split(",")]
+        filters[attr] = values if len(values) > 1 else values[0]
+    return filters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="output file; the extension picks the format")
+    parser.add_argument("--filter", action="append", metavar="FIELD=VALUE[,VALUE...]",
+                        help="only export missions with these values (repeatable)")
+    parser.add_argument("--order", default="id",
+                        help="comma-separated fields to sort by, '-field' for descending (--order=-date)")
+    parser.add_argument("--columns", help="comma-separated fields to export (default: the table's columns for CSV, "
+                             "every field otherwise)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    def report(done, total):
+        print(f"\r{done}/{total} missions", end="", file=sys.stderr, flush=True)
+
+    try:
+        count = export_missions(args.path, filters=parse_filters(args.filter),
+                                order=args.order.split(","),
+                                columns=args.columns.split(",") if args.columns else None,
+                                batch_size=args.batch_size, progress=report)
+    except (ValueError, RuntimeError, AttributeError) as e:
+        sys.exit(f"\n{e}")
+    print(file=sys.stderr)
+    print(f"Exported {count} missions to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
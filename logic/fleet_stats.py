@@ -0,0 +1,246 @@
+"""
+Fleet statistics from the materialized mission rollups (mission_stats_daily/_monthly).
+
+    python -m logic.fleet_stats [--by platform|chassis|battery|site|customer|outcome|month|day]
+                                [--from 2024-01-01] [--to 2025-01-01]
+    python -m logic.fleet_stats --rebuild [--check]
+
+Triggers on missions keep one row per period and dimension value up to date, so every
+query here reads at most (periods in range) x (distinct values) rows, however many
+missions there are. Ranges on whole months are answered from the monthly rollup, any
+other range from the daily one. --rebuild recomputes the rollups from the missions.
+
+cached_totals() and cached_breakdown() compute the same from the rows in a MissionCache
+(logic.mission_cache) instead, for any subset of missions such as the table's filter.
+"""
+import argparse
+import sys
+from collections import namedtuple
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import func, select
+from db.database import ReadSessionLocal, SessionLocal
+from db.migrations import fill_mission_stats
+from db.models import (
+    DailyMissionStats, MonthlyMissionStats, FAILURE_OUTCOMES, ISSUE_COLUMNS, MISSION_STATS_COUNTERS,
+    MISSION_STATS_DIMENSIONS, MISSION_STATS_TABLES, mission_stats_fill_sql
+)
+
+# What a breakdown can be grouped by: a dimension, or the periods themselves
+GROUPS = MISSION_STATS_DIMENSIONS + ["month", "day"]
+
+
+class StatsRow(namedtuple("StatsRow", ["key"] + MISSION_STATS_COUNTERS)):
+    """Totals for one group; `key` is the dimension value or period."""
+    __slots__ = ()
+
+    @property
+    def failure_rate(self):
+        """Failures among the flights with an outcome recorded, or None without any."""
+        return self.failures / self.with_outcome if self.with_outcome else None
+
+    @property
+    def issues(self):
+        return self.issues_hw + self.issues_operator + self.issues_sw + self.issues_env
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value.date() if isinstance(value, datetime) else value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _source(start, end, group=None):
+    """(rollup model, period bounds) for [start, end); monthly when both are on a month start."""
+    monthly = group != "day" and all(d is None or d.day == 1 for d in (start, end))
+    model, fmt = (MonthlyMissionStats, "%Y-%m") if monthly else (DailyMissionStats, "%Y-%m-%d")
+    return model, [d and d.strftime(fmt) for d in (start, end)]
+
+
+def _totals(model):
+    return [func.coalesce(func.sum(getattr(model, c)), 0) for c in MISSION_STATS_COUNTERS]
+
+
+def _in_range(model, bounds):
+    start, end = bounds
+    criteria = []
+    if start is not None:
+        criteria.append(model.period >= start)
+    if end is not None:
+        criteria.append(model.period < end)
+    return criteria
+
+
+def fleet_totals(session, start=None, end=None):
+    """StatsRow over all missions dated in [start, end) (dates or 'YYYY-MM-DD'; None is open)."""
+    start, end = _as_date(start), _as_date(end)
+    model, bounds = _source(start, end)
+    row = session.execute(select(*_totals(model))
+                          .where(model.dimension == "all", *_in_range(model, bounds))).one()
+    return StatsRow("all", *row)
+
+
+def fleet_breakdown(session, group, start=None, end=None):
+    """
+    StatsRows for missions dated in [start, end), one per value of `group` (see GROUPS),
+    most flights first; grouped by month or day they are in date order instead (by
+    month, the months `start` and `end` fall in count whole).
+    """
+    if group not in GROUPS:
+        raise ValueError(f"Can't group by '{group}'; use one of {', '.join(GROUPS)}.")
+    start, end = _as_date(start), _as_date(end)
+    if group == "month":
+        model, bounds = MonthlyMissionStats, [d and d.strftime("%Y-%m") for d in (start, end)]
+    else:
+        model, bounds = _source(start, end, group)
+    by_period = group in ("month", "day")
+    key = model.period if by_period else model.value
+    query = (select(key, *_totals(model))
+             .where(model.dimension == ("all" if by_period else group), *_in_range(model, bounds))
+             .group_by(key))
+    query = query.order_by(key) if by_period else query.order_by(func.sum(model.flights).desc(), key)
+    return [StatsRow(*row) for row in session.execute(query) if row[1]]
+
+
+# --- From the mission cache ---
+
+def _trimmed(value):
+    """A value as the rollups key it: text with surrounding spaces removed (SQLite's TRIM)."""
+    return "" if value is None else str(value).strip(" ")
+
+
+def _is_set(value):
+    return _trimmed(value) != ""
+
+
+def _is_failure(value):
+    return _trimmed(value).lower() in FAILURE_OUTCOMES
+
+
+def _cached_flags(cache, field, test, positions):
+    """test(value) of a categorical field at `positions`, False where it is NULL."""
+    flags = np.array([test(value) for value in cache.categories(field)] + [False], bool)
+    return flags[cache.array(field)[positions]]  # Code -1 (NULL) picks the trailing False
+
+
+def _cached_in_range(cache, positions, start, end):
+    dates = cache.array("date")[positions]
+    keep = np.ones(len(positions), bool)
+    if start is not None:
+        keep &= dates >= np.datetime64(start, "us")
+    if end is not None:
+        keep &= dates < np.datetime64(end, "us")
+    return positions[keep]
+
+
+def _cached_rows(cache, positions, keys, groups):
+    """StatsRows of the missions at `positions` summed by `groups` (indexes into `keys`)."""
+    def count(weights=None):
+        return np.bincount(groups, weights, minlength=len(keys))
+
+    sizes = cache.array("filesize_gb")[positions]
+    sums = [count(), count(np.nan_to_num(sizes)), count(_cached_flags(cache, "outcome", _is_set, positions)),
+            count(_cached_flags(cache, "outcome", _is_failure, positions))]
+    sums += [count(_cached_flags(cache, column, _is_set, positions)) for column in ISSUE_COLUMNS]
+    return [StatsRow(key, *(float(s[i]) if c == "data_gb" else int(s[i])
+                            for c, s in zip(MISSION_STATS_COUNTERS, sums)))
+            for i, key in enumerate(keys) if sums[0][i]]
+
+
+def cached_totals(cache, positions, start=None, end=None):
+    """fleet_totals() of the missions at `positions` in a MissionCache."""
+    positions = _cached_in_range(cache, positions, _as_date(start), _as_date(end))
+    rows = _cached_rows(cache, positions, ["all"], np.zeros(len(positions), np.intp))
+    return rows[0] if rows else StatsRow("all", *[0] * len(MISSION_STATS_COUNTERS))
+
+
+def cached_breakdown(cache, positions, group, start=None, end=None):
+    """
+    fleet_breakdown() of the missions at `positions` in a MissionCache, except that by
+    month only the days in [start, end) count.
+    """
+    if group not in GROUPS:
+        raise ValueError(f"Can't group by '{group}'; use one of {', '.join(GROUPS)}.")
+    positions = _cached_in_range(cache, positions, _as_date(start), _as_date(end))
+    if group in ("month", "day"):
+        periods = cache.array("date")[positions].astype("datetime64[M]" if group == "month" else "datetime64[D]")
+        keys, groups = np.unique(periods, return_inverse=True)
+        keys = [None if np.isnat(key) else str(key) for key in keys]
+        rows = _cached_rows(cache, positions, keys, groups.ravel())
+        return sorted(rows, key=lambda row: (row.key is not None, row.key or ""))
+    # Values that only differ in surrounding spaces are one group, as in the rollups
+    names = [_trimmed(value) for value in cache.categories(group)] + [""]
+    keys = list(dict.fromkeys(names))
+    index = {key: i for i, key in enumerate(keys)}
+    groups = np.array([index[name] for name in names], np.intp)[cache.array(group)[positions]]
+    rows = _cached_rows(cache, positions, keys, groups)
+    return sorted(rows, key=lambda row: (-row.flights, row.key))
+
+
+def rebuild_stats(session):
+    """Recomputes the rollups from the missions table."""
+    fill_mission_stats(session.connection())
+    session.commit()
+
+
+def check_stats(session):
+    """Returns the number of rollup rows that differ from a fresh computation."""
+    conn = session.connection()
+    differences = 0
+    for table, length in MISSION_STATS_TABLES:
+        conn.exec_driver_sql(f"CREATE TEMP TABLE expected AS SELECT * FROM {table} WHERE false")
+        conn.exec_driver_sql("CREATE UNIQUE INDEX temp.expected_key ON expected (period, dimension, value)")
+        conn.exec_driver_sql(mission_stats_fill_sql(table, length).replace(table, "expected", 1))
+        # Sums of data_gb kept up by triggers can differ from a fresh sum in the last digits
+        columns = ", ".join(["period", "dimension", "value"] + [
+            "ROUND(data_gb, 6)" if c == "data_gb" else c for c in MISSION_STATS_COUNTERS])
+        differences += conn.exec_driver_sql(
+            f"SELECT COUNT(*) FROM (SELECT {columns} FROM {table} EXCEPT SELECT {columns} FROM expected "
+            f"UNION ALL SELECT {columns} FROM expected EXCEPT SELECT {columns} FROM {table})").scalar()
+        conn.exec_driver_sql("DROP TABLE expected")
+    session.rollback()
+    return differences
+
+
+def _format(row):
+    rate = "-" if row.failure_rate is None else f"{row.failure_rate:.1%}"
+    return (f"{row.key or '(blank)':<24} {row.flights:>8} {row.data_gb:>12,.1f} {rate:>8} "
+            f"{row.issues_hw:>6} {row.issues_operator:>6} {row.issues_sw:>6} {row.issues_env:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--by", choices=GROUPS, help="break the totals down by this")
+    parser.add_argument("--from", dest="start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="day after the last, YYYY-MM-DD")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the rollups from the missions")
+    parser.add_argument("--check", action="store_true", help="compare the rollups with the missions")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        with SessionLocal() as session:
+            rebuild_stats(session)
+        print("Rebuilt the mission statistics")
+    if args.check:
+        with SessionLocal() as session:
+            differences = check_stats(session)
+        if differences:
+            sys.exit(f"{differences} rollup rows are out of date; run --rebuild")
+        print("The mission statistics match the missions")
+    if args.rebuild or args.check:
+        return
+
+    try:
+        with ReadSessionLocal() as session:
+            rows = [fleet_totals(session, args.start, args.end)]
+            if args.by:
+                rows += fleet_breakdown(session, args.by, args.start, args.end)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{'':<24} {'flights':>8} {'data (GB)':>12} {'failed':>8} {'HW':>6} {'oper.':>6} {'SW':>6} {'env.':>6}")
+    for row in rows:
+        print(_format(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,341 @@
-from db.database import SessionLocal
-from db.models import Mission
-from sqlalchemy.exc import SQLAlchemyError
-
-def get_all_missions():
-    session = SessionLocal()
-    try:
-        return session.query(Mission).order_by(Mission.date.desc()).all()
-    except SQLAlchemyError as e:
-        print("Database error while fetching missions:", e)
-        return []
-    finally:
-        session.close()
-
-def add_mission(data):
-    session = SessionLocal()
-    try:
-        mission = Mission(**data)
-        session.add(mission)
-        session.commit()
-    except SQLAlchemyError as e:
-        session.rollback()
-        print("Error adding mission:", e)
-        raise
-    finally:
-        session.close()
-
-def delete_mission(mission_id):
-    session = SessionLocal()
-    try:
-        mission = session.query(Mission).get(mission_id)
-        if mission:
-            session.delete(mission)
-            session.commit()
-    except SQLAlchemyError as e:
-        session.rollback()
-        print("Error deleting mission:", e)
-    finally:
-        session.close()
+import re
+import shlex
+from db.database import SessionLocal, ReadSessionLocal
+from db.models import Mission, MISSION_SEARCH_COLUMNS, mission_search
+from sqlalchemy import (
+    insert, update, delete, select, bindparam, and_, or_, literal_column, type_coerce, String
+)
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timedelta
+from logic.formatting import format_value
+from logic.schema import FIELDS, CELL_PARSERS
+
+# Keeps IN (...) lists well under SQLite's bound-parameter limit
+DELETE_CHUNK_SIZE = 500
+
+# Every column of the missions table, in declaration order
+MISSION_FIELDS = [column.key for column in Mission.__table__.columns]
+
+# The user-facing mission columns in table order: (label, Mission attribute, type the
+# cell text is parsed to by parse_cell), from the schema
+MISSION_COLUMNS = [(field.label, field.attr, field.type) for field in FIELDS]
+
+
+def get_all_missions():
+    session = ReadSessionLocal()
+    try:
+        return session.query(Mission).order_by(Mission.date.desc()).all()
+    except SQLAlchemyError as e:
+        print("Database error while fetching missions:", e)
+        return []
+    finally:
+        session.close()
+
+def mission_filter(filters):
+    """
+    Turns `filters` into WHERE criteria. Accepts a mapping of attribute -> value (a
+    list, tuple or set means IN, None means IS NULL) and/or SQLAlchemy expressions.
+    """
+    if not filters:
+        return []
+    if not isinstance(filters, dict):
+        return list(filters)
+    criteria = []
+    for attr, value in filters.items():
+        if isinstance(value, ColumnElement):
+            criteria.append(value)
+            continue
+        column = getattr(Mission, attr)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            criteria.append(column.in_(list(value)))
+        elif value is None:
+            criteria.append(column.is_(None))
+        else:
+            criteria.append(column == value)
+    return criteria
+
+
+def mission_order(order):
+    """
+    Turns `order` (an attribute name or list of names, "-name" for descending) into
+    ORDER BY clauses, with the ID as the final tie-breaker so the order is stable.
+    """
+    if isinstance(order, str):
+        order = [order]
+    clauses, names = [], set()
+    for name in order or []:
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        column = getattr(Mission, name)
+        clauses.append(column.desc() if descending else column.asc())
+        names.add(name)
+    if "id" not in names:
+        clauses.append(Mission.id.asc())
+    return clauses
+
+
+def _field_key(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+# Field names a search may use: attribute names and header labels, ignoring case,
+# spaces and punctuation ("wind_knots", "Wind (kts)" and "windkts" all work)
+SEARCH_FIELDS = {}
+for _label, _attr, _type in MISSION_COLUMNS:
+    SEARCH_FIELDS[_field_key(_label)] = SEARCH_FIELDS[_field_key(_attr)] = (_attr, _type)
+
+# Text columns that free words in a search are looked for in (the full-text index)
+SEARCH_TEXT_FIELDS = list(MISSION_SEARCH_COLUMNS)
+
+SEARCH_TERM_RE = re.compile(r"^([A-Za-z_][\w()?/ ]*?)(>=|<=|:|=|>|<)(.*)$", re.S)
+
+# Characters the full-text index keeps (letters and digits); anything else separates words
+WORD_CHAR_RE = re.compile(r"[^\W_]")
+
+
+def search_field(name):
+    """(attribute, type) for a field name in a search, allowing a unique prefix ("alt")."""
+    key = _field_key(name)
+    if key in SEARCH_FIELDS:
+        return SEARCH_FIELDS[key]
+    matches = {field for alias, field in SEARCH_FIELDS.items() if alias.startswith(key)}
+    if len(matches) != 1:
+        raise ValueError(f"Unknown field '{name}'" if not matches else f"'{name}' could be "
+                         + " or ".join(sorted(attr for attr, _ in matches)))
+    return matches.pop()
+
+
+def _day(column):
+    return type_coerce(column, String)
+
+
+def _day_text(day, days_later=0):
+    # Dates are compared as 'YYYY-MM-DD' text, which sorts right against both the
+    # 'YYYY-MM-DD' of older rows and the 'YYYY-MM-DD HH:MM:SS.ffffff' the ORM writes
+    return (day + timedelta(days=days_later)).strftime('%Y-%m-%d')
+
+
+def _search_term(attr, type_func, op, text):
+    column = getattr(Mission, attr)
+    parse = CELL_PARSERS.get(type_func, type_func)
+    if op in (":", "="):
+        values = [value.strip() for value in text.split(",")]
+        if type_func is str:
+            prefixes = [value[:-1] for value in values if value.endswith("*")]
+            exact = [value for value in values if not value.endswith("*")]
+            # A prefix is a range on the column, so it can use an index (LIKE can't)
+            criteria = [and_(column >= prefix, column < prefix + "\U0010ffff") for prefix in prefixes]
+            if exact:
+                criteria.append(column.in_(exact) if len(exact) > 1 else column == exact[0])
+            return or_(*criteria) if len(criteria) > 1 else criteria[0]
+        if type_func is datetime:
+            # Dates match the whole day
+            return or_(*[and_(_day(column) >= _day_text(day), _day(column) < _day_text(day, 1))
+                         for day in map(parse, values)])
+        parsed = [parse(value) for value in values]
+        return column.in_(parsed) if len(parsed) > 1 else column == parsed[0]
+    value = parse(text.strip())
+    if type_func is datetime:
+        # After the day / up to the end of it
+        value = _day_text(value, 1 if op in (">", "<=") else 0)
+        op = {">": ">=", "<=": "<"}.get(op, op)
+        column = _day(column)
+    return {">": column > value, ">=": column >= value, "<": column < value, "<=": column <= value}[op]
+
+
+def fts_query(words):
+    """
+    The FTS5 query for free words: every word, as a prefix of a word in the text
+    ("vib" finds "vibration"). Quoting keeps FTS5 syntax in what was typed literal.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def text_match(words):
+    """WHERE criterion for missions whose text contains all of `words` (see fts_query)."""
+    match = literal_column("missions_fts").op("MATCH")(fts_query(words))
+    return Mission.id.in_(select(mission_search.c.rowid).where(match))
+
+
+def _like_any_text(word):
+    pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(*[getattr(Mission, attr).ilike(pattern, escape="\\") for attr in SEARCH_TEXT_FIELDS])
+
+
+def split_search(text):
+    """
+    Splits a search (see parse_search) into the WHERE criteria of its field terms and
+    the list of its free words.
+    """
+    try:
+        terms = shlex.split(text)
+    except ValueError as e:
+        raise ValueError(f"Bad search: {e}")
+    criteria, words = [], []
+    for term in terms:
+        match = SEARCH_TERM_RE.match(term)
+        if match and match.group(3).strip():
+            name, op, value = match.groups()
+            attr, type_func = search_field(name.strip())
+            try:
+                criteria.append(_search_term(attr, type_func, op, value))
+            except (ValueError, TypeError):
+                raise ValueError(f"Bad value for {attr}: '{value}'")
+        elif WORD_CHAR_RE.search(term):
+            words.append(term)
+        else:
+            # Punctuation isn't indexed, so look for it the slow way
+            criteria.append(_like_any_text(term))
+    return criteria, words
+
+
+def parse_search(text):
+    """
+    Turns a search typed into the filter bar into a list of WHERE criteria (see
+    mission_filter), all of which must hold:
+
+      customer:Acme             equal (case-sensitive); platform:M300,M350 for either
+      site:Field*               starts with
+      date:2024-03-07           on that day; date>=2024-01-01, altitude>100, wind<=10
+      "site:Field 9D"           quote terms with spaces; "engine out" for a phrase
+      vibration                 any other word: a word in the text columns starts with it
+
+    Field terms are plain comparisons the column indexes can serve and free words are
+    looked up in the full-text index (missions_fts). Raises ValueError for unknown
+    fields or values that don't parse.
+    """
+    criteria, words = split_search(text)
+    if words:
+        criteria.append(text_match(words))
+    return criteria
+
+
+def iter_missions(filters=None, order="id", batch_size=1000, columns=None, session=None):
+    """
+    Streams missions as lightweight rows instead of loading ORM objects.
+
+    Yields SQLAlchemy Row tuples with one attribute per column (`row.platform`, or
+    `row._asdict()`), `batch_size` rows at a time from a streaming cursor (yield_per), so memory
+    stays flat no matter how many missions match. `columns` restricts the row to those
+    attribute names (default: all of MISSION_FIELDS). See mission_filter and
+    mission_order for `filters` and `order`.
+
+    Without a session, a read-only session is opened and closed when the iterator is
+    exhausted or closed.
+    """
+    own_session = session is None
+    if own_session:
+        session = ReadSessionLocal()
+    try:
+        query = (session.query(*[getattr(Mission, name) for name in columns or MISSION_FIELDS])
+                 .filter(*mission_filter(filters))
+                 .order_by(*mission_order(order))
+                 .yield_per(batch_size))
+        yield from query
+    finally:
+        if own_session:
+            session.close()
+
+
+def add_mission(data):
+    session = SessionLocal()
+    try:
+        mission = Mission(**data)
+        session.add(mission)
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        print("Error adding mission:", e)
+        raise
+    finally:
+        session.close()
+
+def delete_mission(mission_id):
+    try:
+        delete_missions([mission_id])
+    except SQLAlchemyError:
+        pass  # Already reported by delete_missions
+
+
+def delete_missions(ids, session=None, progress=None):
+    """
+    Deletes missions by primary key with chunked DELETE ... WHERE id IN (...) statements,
+    all in one transaction. Missions whose `associated_mission` points at a deleted
+    mission get it cleared, so no row is left referencing a missing ID.
+    `progress(done, total)` is called after each chunk if given.
+    Returns the number of missions deleted.
+    """
+    own_session = session is None
+    if own_session:
+        session = SessionLocal()
+    table = Mission.__table__
+    ids = sorted(set(ids))
+    deleted = 0
+    try:
+        for start in range(0, len(ids), DELETE_CHUNK_SIZE):
+            chunk = ids[start:start + DELETE_CHUNK_SIZE]
+            session.execute(update(table)
+                            .where(table.c.associated_mission.in_(chunk))
+                            .values(associated_mission=None))
+            deleted += session.execute(delete(table).where(table.c.id.in_(chunk))).rowcount
+            if progress:
+                progress(start + len(chunk), len(ids))
+        session.commit()
+        return deleted
+    except SQLAlchemyError as e:
+        session.rollback()
+        print("Error deleting missions:", e)
+        raise
+    finally:
+        if own_session:
+            session.close()
+
+def save_missions(updates, new_missions, session=None, progress=None):
+    """
+    Applies edits to existing missions and inserts new ones in a single transaction.
+
+    `updates` maps mission ID -> {attribute: value}. Missions that changed the same set
+    of attributes are written with one executemany UPDATE, and all of `new_missions`
+    (dicts of attribute values) go in with one executemany INSERT.
+    `progress(done, total)` is called with the number of missions written so far.
+    """
+    own_session = session is None
+    if own_session:
+        session = SessionLocal()
+    table = Mission.__table__
+    try:
+        # Group updates by the set of columns they touch so each group is one statement
+        by_columns = {}
+        for mission_id, changes in updates.items():
+            if changes:
+                by_columns.setdefault(tuple(sorted(changes)), []).append(
+                    {"_id": mission_id, **changes})
+
+        total = sum(len(params) for params in by_columns.values()) + len(new_missions)
+        done = 0
+        for columns, params in by_columns.items():
+            stmt = (update(table)
+                    .where(table.c.id == bindparam("_id"))
+                    .values({col: bindparam(col) for col in columns}))
+            session.execute(stmt, params)
+            done += len(params)
+            if progress:
+                progress(done, total)
+
+        if new_missions:
+            # executemany needs every row to bind the same columns
+            columns = set().union(*new_missions)
+            rows = [{col: data.get(col) for col in columns} for data in new_missions]
+            session.execute(insert(table), rows)
+            if progress:
+                progress(total, total)
+
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        print("Error saving missions:", e)
+        raise
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,22 @@
+"""
+How mission values are shown as text. Kept apart from logic.flight_ops, which needs the
+database modules, so the startup preview (ui/startup.py) can format cells without them.
+"""
+from datetime import datetime
+
+
+def format_value(value):
+    """Formats a raw database value as cell text, the way the mission table displays it."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float):
+        # Shortest round-tripping form, without a trailing ".0" on whole numbers
+        text = repr(value)
+        return text[:-2] if text.endswith('.0') else text
+    return str(value)
@@ -0,0 +1,297 @@
+"""
+The change history of the missions: what changed when, one mission or the whole log as
+it was at any time, and putting a mission back the way it was.
+
+    python -m logic.history 42                               # the changes to mission 42
+    python -m logic.history 42 --as-of "2024-06-01 14:00"
+    python -m logic.history --as-of "2024-06-01 14:00" --out missions.csv
+    python -m logic.history 42 --revert-to "2024-06-01 14:00"
+    python -m logic.history --checkpoint
+
+Triggers on missions (db/models.py) append the columns each write changes to
+mission_history in the writing transaction, however the write is made. mission_snapshots
+holds each mission whole as it was inserted and, at every checkpoint (one per
+HISTORY_CHECKPOINT_INTERVAL changes), as it was then if it had changed since the last.
+A mission at some time is its latest snapshot from before then with its later changes
+applied, never more than an interval's; the whole log is the snapshots as of the last
+checkpoint before then plus the changes made after it. Reverting writes the old values
+back as new changes, so the history itself is never rewritten.
+
+The history starts with the missions there were when it was added (checkpoint 0).
+Times are local, to the millisecond.
+"""
+import argparse
+import sys
+from collections import namedtuple
+from datetime import datetime
+from itertools import groupby, islice
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import sqlite
+from db.database import ReadSessionLocal, SessionLocal
+from db.models import Mission, HISTORY_FIELDS, NOW_MS, ROW_DELETED, ROW_INSERTED, history_checkpoint_sql
+from logic.flight_ops import delete_missions
+from logic.formatting import format_value
+from logic.schema import FIELD
+
+# A change to a mission: `attr` went from `old` to `new`. For the mission being inserted
+# or deleted `attr` is None and `old` or `new` is the whole mission ({attribute: value}).
+Change = namedtuple("Change", "id mission_id changed_at attr old new")
+
+# After any change, for "up to now"
+LATEST = 2 ** 62
+
+_dialect = sqlite.dialect()
+# Stored value -> the value the ORM reads, per HISTORY_FIELDS column
+_CONVERTERS = [Mission.__table__.c[name].type.dialect_impl(_dialect).result_processor(_dialect, None)
+               for name in HISTORY_FIELDS]
+
+_snapshot_columns = ", ".join(HISTORY_FIELDS)
+
+
+def to_ms(when):
+    """Milliseconds since the Unix epoch of a local datetime or 'YYYY-MM-DD[ HH:MM[:SS]]' text."""
+    if isinstance(when, str):
+        when = datetime.fromisoformat(when.strip())
+    return round(when.timestamp() * 1000)
+
+
+def from_ms(ms):
+    return datetime.fromtimestamp(ms / 1000)
+
+
+def _value(field, stored):
+    convert = _CONVERTERS[field]
+    return convert(stored) if convert and stored is not None else stored
+
+
+def _mission(values):
+    """{attribute: value} of a mission's stored values (in HISTORY_FIELDS order), or None."""
+    if values is None:
+        return None
+    return {name: _value(field, stored) for field, (name, stored) in enumerate(zip(HISTORY_FIELDS, values))}
+
+
+def _replay(values, changes):
+    """A mission's stored values (a list, or None while it doesn't exist) after history rows (field, value)."""
+    for field, value in changes:
+        if field == ROW_DELETED:
+            values = None
+        elif field == ROW_INSERTED:
+            values = [None] * len(HISTORY_FIELDS)  # Its snapshot at the insert has the values
+        else:
+            values[field] = value
+    return values
+
+
+def history_start(session):
+    """When the history starts (checkpoint 0), in ms; None if the database has no history."""
+    return session.connection().exec_driver_sql(
+        "SELECT taken_at FROM mission_checkpoints ORDER BY change_id LIMIT 1").scalar()
+
+
+def _check_start(session, until):
+    start = history_start(session)
+    if start is None:
+        raise ValueError("This database has no mission history.")
+    if until < start:
+        raise ValueError(f"The mission history starts at {from_ms(start):%Y-%m-%d %H:%M:%S}.")
+
+
+def mission_state(session, mission_id, until=LATEST, before=LATEST):
+    """
+    The mission as it was with the changes made up to `until` (ms) and before the change
+    `before` (a mission_history id), as {attribute: value}; None if it didn't exist then.
+    Raises ValueError if the history doesn't go back that far.
+    """
+    _check_start(session, until)
+    conn = session.connection()
+    # The snapshot's time is its change's, or the checkpoint's for checkpoint 0
+    snapshot = conn.exec_driver_sql(
+        f"SELECT s.change_id, s.deleted, {', '.join(f's.{name}' for name in HISTORY_FIELDS)} "
+        f"FROM mission_snapshots AS s LEFT JOIN mission_history AS h ON h.id = s.change_id "
+        f"LEFT JOIN mission_checkpoints AS c ON c.change_id = s.change_id "
+        f"WHERE s.id = ? AND s.change_id < ? AND COALESCE(h.changed_at, c.taken_at) <= ? "
+        f"ORDER BY s.change_id DESC LIMIT 1", (mission_id, before, until)).first()
+    if snapshot is None:
+        return None  # Inserted later
+    change_id, deleted, *values = snapshot
+    changes = conn.exec_driver_sql(
+        "SELECT field, value FROM mission_history WHERE mission_id = ? AND id > ? AND id < ? AND changed_at <= ? "
+        "ORDER BY id", (mission_id, change_id, before, until))
+    return _mission(_replay(None if deleted else values, changes))
+
+
+def mission_as_of(session, mission_id, when):
+    """The mission as it was at `when` (see to_ms), or None if it didn't exist then."""
+    return mission_state(session, mission_id, until=to_ms(when))
+
+
+def missions_as_of(session, when):
+    """
+    Yields every mission there was at `when` (see to_ms) as {attribute: value} with its
+    'id', by ID. Reads the snapshots as of the last checkpoint before then and the
+    changes made between it and `when`, and replays only those.
+    """
+    until = to_ms(when)
+    _check_start(session, until)
+    conn = session.connection()
+    checkpoint = conn.exec_driver_sql(
+        "SELECT MAX(change_id) FROM mission_checkpoints WHERE taken_at <= ?", (until,)).scalar()
+    following = conn.exec_driver_sql(
+        "SELECT MIN(change_id) FROM mission_checkpoints WHERE change_id > ?", (checkpoint,)).scalar()
+    changes = {}
+    last = checkpoint
+    for change_id, mission_id, field, value in conn.exec_driver_sql(
+            "SELECT id, mission_id, field, value FROM mission_history WHERE id > ? AND id <= ? AND changed_at <= ? "
+            "ORDER BY id", (checkpoint, following or LATEST, until)):
+        changes.setdefault(mission_id, []).append((change_id, field, value))
+        last = change_id
+    # Each mission's latest snapshot (SQLite takes the other columns from the MAX row);
+    # every mission written since the history started has one
+    snapshots = conn.exec_driver_sql(
+        f"SELECT id, MAX(change_id), deleted, {_snapshot_columns} FROM mission_snapshots "
+        f"WHERE change_id <= ? GROUP BY id ORDER BY id", (last,))
+    for mission_id, change_id, deleted, *values in snapshots:
+        later = [(field, value) for id_, field, value in changes.get(mission_id, ()) if id_ > change_id]
+        mission = _mission(_replay(None if deleted else values, later))
+        if mission is not None:
+            mission["id"] = mission_id
+            yield mission
+
+
+def mission_changes(session, mission_id):
+    """Every change to a mission since the history started, oldest first, as Changes."""
+    conn = session.connection()
+    snapshots = {change_id: None if deleted else values for change_id, deleted, *values in conn.exec_driver_sql(
+        f"SELECT change_id, deleted, {_snapshot_columns} FROM mission_snapshots WHERE id = ?", (mission_id,))}
+    values = snapshots.get(0)  # As the history started
+    values = list(values) if values is not None else None
+    changes = []
+    for change_id, changed_at, field, value in conn.exec_driver_sql(
+            "SELECT id, changed_at, field, value FROM mission_history WHERE mission_id = ? ORDER BY id",
+            (mission_id,)):
+        when = from_ms(changed_at)
+        if field == ROW_INSERTED:
+            values = list(snapshots[change_id])
+            changes.append(Change(change_id, mission_id, when, None, None, _mission(values)))
+        elif field == ROW_DELETED:
+            changes.append(Change(change_id, mission_id, when, None, _mission(values), None))
+            values = None
+        else:
+            changes.append(Change(change_id, mission_id, when, HISTORY_FIELDS[field],
+                                  _value(field, values[field]), _value(field, value)))
+            values[field] = value
+    return changes
+
+
+def change_steps(changes):
+    """Changes grouped into the writes that made them (the same time), oldest first."""
+    return [list(step) for _, step in groupby(changes, key=lambda change: change.changed_at)]
+
+
+def describe_change(change):
+    """One line for a Change, e.g. "Altitude (m): 120 -> 150"."""
+    if change.attr is None:
+        return "created" if change.old is None else "deleted"
+    field = FIELD.get(change.attr)
+    label = field.label if field else change.attr
+    return f"{label}: {format_value(change.old) or '(blank)'} -> {format_value(change.new) or '(blank)'}"
+
+
+def revert_mission(session, mission_id, until=LATEST, before=LATEST):
+    """
+    Puts a mission back the way it was (see mission_state): writes its old values over
+    the ones changed since, inserts it again if it has been deleted since, or deletes it
+    if it didn't exist yet. The revert is recorded in the history like any other write.
+    Returns the attributes written, or None if the mission was deleted.
+    """
+    target = mission_state(session, mission_id, until, before)
+    current = mission_state(session, mission_id)
+    table = Mission.__table__
+    if target is None:
+        if current is not None:
+            delete_missions([mission_id], session=session)
+        return None
+    if current is None:
+        changed = target
+        session.execute(insert(table).values(id=mission_id, **target))
+    else:
+        changed = {attr: value for attr, value in target.items() if current[attr] != value}
+        if changed:
+            session.execute(update(table).where(table.c.id == mission_id).values(changed))
+    session.commit()
+    return changed
+
+
+def take_checkpoint(session):
+    """
+    Checkpoints the history as of the latest change, so looking back to now replays
+    nothing. Returns the change it's at, or None if nothing changed since the last one.
+    """
+    conn = session.connection()
+    last = conn.exec_driver_sql("SELECT MAX(id) FROM mission_history").scalar()
+    if last is None or last == conn.exec_driver_sql("SELECT MAX(change_id) FROM mission_checkpoints").scalar():
+        return None
+    for sql in history_checkpoint_sql(str(last), NOW_MS):
+        conn.exec_driver_sql(sql)
+    session.commit()
+    return last
+
+
+def _print_mission(mission):
+    for attr, value in mission.items():
+        field = FIELD.get(attr)
+        print(f"{field.label if field else attr:<16} {format_value(value)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("mission", nargs="?", type=int, help="mission ID (default: every mission)")
+    parser.add_argument("--as-of", metavar="TIME", help="show it as it was then, 'YYYY-MM-DD[ HH:MM[:SS]]'")
+    parser.add_argument("--out", help="write every mission as of --as-of to this CSV")
+    parser.add_argument("--revert-to", metavar="TIME", help="put the mission back the way it was then")
+    parser.add_argument("--checkpoint", action="store_true", help="checkpoint the history now")
+    args = parser.parse_args()
+
+    try:
+        if args.checkpoint:
+            with SessionLocal() as session:
+                change_id = take_checkpoint(session)
+            print(f"Checkpoint at change {change_id}" if change_id else "Nothing changed since the last checkpoint")
+        elif args.revert_to:
+            if args.mission is None:
+                parser.error("--revert-to needs a mission ID")
+            with SessionLocal() as session:
+                changed = revert_mission(session, args.mission, until=to_ms(args.revert_to))
+            print(f"Deleted mission {args.mission}, which didn't exist then" if changed is None
+                  else f"Reverted {len(changed)} field(s) of mission {args.mission}")
+        elif args.mission is not None:
+            with ReadSessionLocal() as session:
+                if args.as_of:
+                    mission = mission_as_of(session, args.mission, args.as_of)
+                    if mission is None:
+                        sys.exit(f"Mission {args.mission} didn't exist at {args.as_of}")
+                    _print_mission(mission)
+                    return
+                for step in change_steps(mission_changes(session, args.mission)):
+                    print(f"{step[0].changed_at:%Y-%m-%d %H:%M:%S.%f}"[:-3] + "  "
+                          + "; ".join(describe_change(change) for change in step))
+        elif args.as_of:
+            from logic.exporter import CSV_COLUMNS, EXPORT_BATCH_SIZE, write_csv
+            with ReadSessionLocal() as session:
+                rows = ([mission.get(attr) for attr in CSV_COLUMNS] for mission in missions_as_of(session, args.as_of))
+                batches = iter(lambda: list(islice(rows, EXPORT_BATCH_SIZE)), [])
+                if args.out:
+                    with open(args.out, "w", newline="", encoding="utf-8") as f:
+                        count = sum(write_csv(f, CSV_COLUMNS, batches))
+                    print(f"Wrote the {count} missions there were at {args.as_of} to {args.out}")
+                else:
+                    print(f"{sum(map(len, batches))} missions at {args.as_of}")
+        else:
+            parser.error("give a mission ID, --as-of, or --checkpoint")
+    except ValueError as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
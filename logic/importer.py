@@ -0,0 +1,514 @@
+"""
+Bulk import of historical mission logs from CSV or Excel (.xlsx) files.
+
+    python -m logic.importer logs/2019.csv [--rejects 2019.rejects.csv] [--restart]
+
+Columns are matched by the mission table's header labels ("Altitude (m)") or by the
+Mission attribute names ("altitude_m"), ignoring case; an ID column is ignored, since
+imported missions get new IDs. Cells are converted and checked by the same schema
+(logic.schema) as edits in the table and the form. Rows are validated and inserted `chunk_size` at a time, each chunk
+in one transaction together with the import's progress, so an interrupted import picks
+up after the last committed chunk when it is run again on the same, unchanged file.
+The history, statistics, lookup values and full-text index are brought up to date with
+all of the imported missions at once after the last chunk (or after a cancel or error,
+or by init_db if the import was interrupted), rather than by their triggers row by row.
+
+Rows that can't be imported are written to a rejects CSV (default: next to the source,
+`<name>.rejects.csv`) with their row number, the reason and the original cells.
+Reading .xlsx files needs openpyxl.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+from sqlalchemy import text
+from db.database import SessionLocal
+from db.migrations import SEARCH_INSERT_TRIGGER, restore_search_index
+from db.models import (
+    Mission, MissionImport, CATEGORICAL_COLUMNS, MISSION_ENCODE_TRIGGERS, MISSION_HISTORY_TRIGGERS,
+    MISSION_SEARCH_COLUMNS, MISSION_SEARCH_TRIGGERS, MISSION_STATS_COUNTERS, MISSION_STATS_DIMENSIONS,
+    MISSION_STATS_TABLES, MISSION_LOOKUP_TABLES, MISSION_LOOKUP_TRIGGERS, MISSION_STATS_TRIGGERS, MISSION_TRIGGERS,
+    categorical_codes, history_inserts_sql, lookup_fill_sql, mission_stats_rows_sql, mission_stats_upsert_sql
+)
+from logic.schema import FIELD, FIELDS, REQUIRED_FIELDS
+
+CHUNK_SIZE = 20_000
+
+# Imports this large, and at least as large as the table, drop the missions indexes and
+# rebuild them at the end, which beats maintaining them row by row. Queries from other
+# connections run without the indexes until the import finishes.
+INDEX_REBUILD_MIN_ROWS = 50_000
+
+# The insert triggers that keep the tables derived from the missions up to date: the
+# tombstones, the full-text index, the statistics, the lookup values and the history. An
+# import drops them with its first chunk and adds all of its missions to those tables in
+# one pass after its last (finish_imports), which recreates them. Until then
+# mission_imports.pending_after holds the largest mission ID before its missions: IDs only
+# go up while the write lock is held, but with AUTOINCREMENT they start past the largest
+# ID ever used, not the largest there is.
+DERIVED_INSERT_TRIGGERS = [
+    (MISSION_TRIGGERS, "missions_clear_tombstone_on_insert"),
+    (MISSION_SEARCH_TRIGGERS, SEARCH_INSERT_TRIGGER),
+    (MISSION_STATS_TRIGGERS, "missions_stats_insert"),
+    (MISSION_LOOKUP_TRIGGERS, "missions_lookups_insert"),
+    (MISSION_HISTORY_TRIGGERS, "missions_history_insert"),
+]
+PENDING_MISSIONS = "id > :after"
+CLEAR_TOMBSTONES = (f"DELETE FROM mission_tombstones WHERE mission_id IN "
+                    f"(SELECT id FROM missions WHERE {PENDING_MISSIONS})")
+_search_columns = ", ".join(MISSION_SEARCH_COLUMNS)
+INDEX_SEARCH_TEXT = (f"INSERT INTO missions_fts (rowid, {_search_columns}) "
+                     f"SELECT id, {_search_columns} FROM mission_text WHERE {PENDING_MISSIONS}")
+ADD_TO_LOOKUPS = [lookup_fill_sql(field, PENDING_MISSIONS) for field in MISSION_LOOKUP_TABLES]
+ADD_TO_HISTORY = history_inserts_sql(PENDING_MISSIONS)
+# The statistics' per mission, added up with NumPy (grouping in SQLite sorts the missions
+# once per dimension and table) this many missions at a time, which bounds the memory
+PENDING_STATS_ROWS = mission_stats_rows_sql(f"{PENDING_MISSIONS} AND id <= :upto")
+STATS_BLOCK_SIZE = 250_000
+# In codes mode chunks are encoded before they are inserted, which the encode trigger
+# would otherwise do row by row with an UPDATE
+ENCODE_INSERT_TRIGGER = "missions_encode_insert"
+
+# `seconds` the rows took to read and insert, `finish_seconds` to add the missions to the
+# derived tables and rebuild the indexes after the last chunk
+ImportResult = namedtuple("ImportResult", "imported rejected rows resumed_at seconds finish_seconds rejects_path")
+
+
+def _normalize(name):
+    return " ".join(str(name or "").split()).lower()
+
+
+# Header label or attribute name -> (attribute, type)
+HEADER_ALIASES = {}
+for _field in FIELDS:
+    if _field.editable:
+        HEADER_ALIASES[_normalize(_field.label)] = (_field.attr, _field.type)
+        HEADER_ALIASES[_normalize(_field.attr)] = (_field.attr, _field.type)
+
+# Columns the database won't accept blank, and defaults for blank cells
+_table = Mission.__table__
+REQUIRED = list(dict.fromkeys(
+    REQUIRED_FIELDS + [c.key for c in _table.columns
+                       if not c.nullable and not c.primary_key and c.default is None]))
+BLANK_DEFAULTS = {c.key: c.default.arg for c in _table.columns
+                  if c.default is not None and c.default.is_scalar}
+
+
+class ImportAlreadyDone(Exception):
+    """The file was imported before and hasn't changed since."""
+
+
+def map_columns(header):
+    """
+    Returns ([(cell index, attribute, type)], [unrecognized headers]) for a header row.
+    Raises ValueError if a required column is missing.
+    """
+    mapping, unknown, seen = [], [], set()
+    for index, name in enumerate(header):
+        match = HEADER_ALIASES.get(_normalize(name))
+        if match and match[0] not in seen:
+            mapping.append((index, *match))
+            seen.add(match[0])
+        elif _normalize(name) not in ("", "id"):
+            unknown.append(name)
+    missing = [attr for attr in REQUIRED if attr not in seen]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return mapping, unknown
+
+
+def _cell_text(value):
+    """Text for an Excel cell value, the way it would have been typed into the table."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def read_rows(path):
+    """Yields the header and then each row of a CSV or .xlsx file as a list of strings."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        try:
+            import openpyxl
+        except ImportError:
+            raise RuntimeError("Importing Excel files needs openpyxl (pip install openpyxl).")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield [_cell_text(value) for value in row]
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+
+
+def count_rows(path):
+    """Cheap estimate of the number of data rows, for progress reporting."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        return None
+    with open(path, "rb") as f:
+        lines = sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+    return max(lines - 1, 0)
+
+
+def fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _converter(attr, process, default):
+    """Cell text -> the value bound for a column: the schema's parser, blank default, bind processing."""
+    parse = FIELD[attr].parse
+    if process is None and default is None:
+        return parse
+
+    def convert(text):
+        value = parse(text)
+        if value is None:
+            value = default
+        return value if value is None or process is None else process(value)
+
+    if FIELD[attr].type is datetime:
+        # Logs repeat the same dates over and over
+        return lru_cache(maxsize=8192)(convert)
+    return convert
+
+
+class RowParser:
+    """
+    Converts rows of cell text into parameter tuples for the bulk INSERT.
+
+    The converters are resolved once per column, so each cell costs a single call.
+    Values are bound the way SQLAlchemy would store them (e.g. dates as its
+    DATETIME strings), since rows bypass SQLAlchemy's per-row processing.
+    """
+
+    def __init__(self, mapping, dialect):
+        self.mapping = mapping
+        self.columns = [attr for _, attr, _ in mapping]
+        self.width = max(index for index, _, _ in mapping) + 1
+        self.converters = [
+            (index, _converter(attr, _table.c[attr].type.bind_processor(dialect),
+                               BLANK_DEFAULTS.get(attr)))
+            for index, attr, _ in mapping
+        ]
+        self.required = [(self.columns.index(attr), attr) for attr in REQUIRED]
+
+    def __call__(self, cells):
+        """Returns the row's values in `columns` order; raises ValueError on bad input."""
+        if len(cells) < self.width:
+            cells = cells + [""] * (self.width - len(cells))
+        try:
+            values = tuple([convert(cells[index]) for index, convert in self.converters])
+        except (ValueError, TypeError):
+            # Slow path, only to name the offending cell
+            for (index, _), attr in zip(self.converters, self.columns):
+                message = FIELD[attr].error(cells[index])
+                if message:
+                    raise ValueError(message)
+            raise
+        missing = [attr for position, attr in self.required if not values[position]]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        return values
+
+    def insert_sql(self):
+        columns = self.columns + ["created_at", "updated_at"]
+        placeholders = ["?"] * len(self.columns) + ["CURRENT_TIMESTAMP"] * 2
+        return f"INSERT INTO missions ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
+
+
+def import_missions(path, session=None, chunk_size=CHUNK_SIZE, rejects_path=None,
+                    restart=False, progress=None):
+    """
+    Imports the missions in a CSV or .xlsx file; see the module docstring.
+
+    `progress(done, total)` is called after each chunk (total may be 0 if unknown).
+    Raises ImportAlreadyDone if this exact file was fully imported before, unless
+    `restart` is set, which also ignores an unfinished earlier run.
+    """
+    own_session = session is None
+    if own_session:
+        session = SessionLocal()
+    source = os.path.abspath(path)
+    rejects_path = rejects_path or os.path.splitext(path)[0] + ".rejects.csv"
+    start = time.perf_counter()
+    dropped_indexes = False
+    try:
+        record = (session.query(MissionImport)
+                  .filter_by(source=source, fingerprint=fingerprint(path))
+                  .order_by(MissionImport.id.desc())
+                  .first())
+        if record and record.finished_at and not restart:
+            raise ImportAlreadyDone(f"{path} was already imported on {record.finished_at:%Y-%m-%d %H:%M} "
+                                    f"({record.imported} missions).")
+        if record is None or restart:
+            record = MissionImport(source=source, fingerprint=fingerprint(path),
+                                   rows_done=0, imported=0, rejected=0)
+            session.add(record)
+            session.commit()
+        resumed_at = record.rows_done
+        total = count_rows(path) or 0
+
+        rows = read_rows(path)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError(f"{path} is empty.")
+        mapping, _ = map_columns(header)
+        parse_row = RowParser(mapping, session.get_bind().dialect)
+        insert_sql = parse_row.insert_sql()
+
+        remaining = total - resumed_at
+        existing = session.query(Mission).count()
+        if remaining >= INDEX_REBUILD_MIN_ROWS and remaining >= existing:
+            drop_mission_indexes(session)
+            dropped_indexes = True
+
+        # Resumed runs add to the rejects of the earlier run
+        with open(rejects_path, "a" if resumed_at else "w", newline="", encoding="utf-8") as f:
+            rejects = csv.writer(f)
+            if not resumed_at:
+                rejects.writerow(["row", "error"] + header)
+
+            done = resumed_at
+            for done, batch, batch_rejects in parse_chunks(rows, parse_row, chunk_size, resumed_at):
+                _commit_chunk(session, insert_sql, record, batch, batch_rejects, done, columns=parse_row.columns)
+                # Written once their chunk is committed, so a resumed run can't repeat them
+                rejects.writerows(batch_rejects)
+                f.flush()
+                if progress:
+                    progress(done, max(total, done))
+            record.finished_at = datetime.now()
+            session.commit()
+
+        seconds = time.perf_counter() - start
+        finish_imports(session.connection())
+        session.commit()
+        if dropped_indexes:
+            create_mission_indexes(session)
+            dropped_indexes = False
+        if progress:
+            progress(done, done)
+        return ImportResult(record.imported, record.rejected, done, resumed_at, seconds,
+                            time.perf_counter() - start - seconds, rejects_path)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        # After a cancel or an error, for the chunks committed before it
+        session.rollback()
+        finish_imports(session.connection())
+        session.commit()
+        if dropped_indexes:
+            create_mission_indexes(session)
+        if own_session:
+            session.close()
+
+
+def parse_chunks(rows, parse_row, chunk_size, skip=0):
+    """
+    Yields (data rows read so far, parsed rows, rejects) for every `chunk_size` data
+    rows, after skipping the first `skip` data rows (committed by an earlier run).
+    Rejects are [row number, reason, *cells].
+    """
+    batch, rejects = [], []
+    done = 0
+    # Row numbers are 1-based and the header is row 1, as in a spreadsheet
+    for row_number, cells in enumerate(rows, start=2):
+        done += 1
+        if done <= skip or not any(cells):  # Already imported, or a blank line
+            continue
+        try:
+            batch.append(parse_row(cells))
+        except ValueError as e:
+            rejects.append([row_number, str(e)] + cells)
+        if (done - skip) % chunk_size == 0:
+            yield done, batch, rejects
+            batch, rejects = [], []
+    if (done - skip) % chunk_size:
+        yield done, batch, rejects
+
+
+def encode_categoricals(conn, columns, batch):
+    """
+    Returns the rows of `batch` (values in `columns` order) with their categorical values
+    replaced by lookup ids, adding the values the lookup tables don't have yet.
+    """
+    positions = [(position, attr) for position, attr in enumerate(columns) if attr in CATEGORICAL_COLUMNS]
+    if not positions:
+        return batch
+    codes = {}
+    for position, attr in positions:
+        table = MISSION_LOOKUP_TABLES[attr]
+        # As the encode trigger: blank values stay as they are
+        names = {row[position] for row in batch
+                 if isinstance(row[position], str) and row[position].strip(" ")}
+        conn.exec_driver_sql(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(name,) for name in names])
+        codes[position] = {name: id_ for id_, name in conn.exec_driver_sql(f"SELECT id, name FROM {table}")
+                           if name in names}
+    encoded = []
+    for row in batch:
+        row = list(row)
+        for position, _ in positions:
+            row[position] = codes[position].get(row[position], row[position])
+        encoded.append(tuple(row))
+    return encoded
+
+
+def _commit_chunk(session, insert_sql, record, batch, batch_rejects, done, columns=()):
+    """
+    Inserts a chunk and records the import's progress in the same transaction; its
+    missions are added to the derived tables by finish_imports. `columns` are the
+    attributes of the batch's values, encoded in codes mode.
+    """
+    record.rows_done = done
+    record.imported += len(batch)
+    record.rejected += len(batch_rejects)
+    # Writing the progress first opens the transaction and takes the write lock, so the
+    # new IDs can't move and the trigger swap below is part of this transaction
+    session.flush()
+    if batch:
+        conn = session.connection()
+        if record.pending_after is None:
+            record.pending_after = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM missions").scalar()
+            for _, name in DERIVED_INSERT_TRIGGERS:
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        if categorical_codes():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {ENCODE_INSERT_TRIGGER}")
+            batch = encode_categoricals(conn, columns, batch)
+        conn.exec_driver_sql(insert_sql, batch)
+        if categorical_codes():
+            conn.exec_driver_sql(next(ddl for ddl in MISSION_ENCODE_TRIGGERS if ENCODE_INSERT_TRIGGER in ddl))
+    session.commit()
+
+
+def finish_imports(conn):
+    """
+    Adds the missions imported since the derived tables' insert triggers were dropped to
+    those tables (tombstones, full-text index, statistics, lookup values, history), each
+    in one set-based pass, and recreates the triggers. Runs after an import's last chunk
+    and, for one that was interrupted, from init_db. Returns the number of missions added.
+
+    Any import that hasn't finished counts, since the triggers were dropped for all of
+    them. Missions that other connections inserted meanwhile are added too; their edits
+    to missions not added yet should wait until then (the statistics would count them twice).
+    """
+    after = conn.exec_driver_sql("SELECT MIN(pending_after) FROM mission_imports").scalar()
+    if after is None:
+        return 0
+    # A chunk committed since would make this write fail rather than be missed
+    conn.exec_driver_sql("UPDATE mission_imports SET pending_after = NULL WHERE pending_after IS NOT NULL")
+    ids = {"after": after}
+    conn.exec_driver_sql(CLEAR_TOMBSTONES, ids)
+    conn.exec_driver_sql(INDEX_SEARCH_TEXT, ids)
+    add_to_stats(conn, ids["after"])
+    for sql in ADD_TO_LOOKUPS + ADD_TO_HISTORY:
+        conn.exec_driver_sql(sql, ids)
+    for triggers, name in DERIVED_INSERT_TRIGGERS:
+        conn.exec_driver_sql(next(ddl for ddl in triggers if name in ddl))
+    return conn.exec_driver_sql(f"SELECT COUNT(*) FROM missions WHERE {PENDING_MISSIONS}", ids).scalar()
+
+
+def add_to_stats(conn, after):
+    """Adds the missions past ID `after` to the rollups: one upsert per period, dimension and value."""
+    last = conn.exec_driver_sql("SELECT IFNULL(MAX(id), 0) FROM missions").scalar()
+    for start in range(after, last, STATS_BLOCK_SIZE):
+        rows = conn.exec_driver_sql(PENDING_STATS_ROWS, {"after": start, "upto": start + STATS_BLOCK_SIZE}).fetchall()
+        if rows:
+            _add_rows_to_stats(conn, rows)
+
+
+def _add_rows_to_stats(conn, rows):
+    columns = list(zip(*rows))
+    # Each column's distinct values once; a table's periods are cut from the distinct days
+    days, day_codes = np.unique(np.array(columns[0], dtype=str), return_inverse=True)
+    dimensions = [("all", [""], np.zeros(len(rows), np.intp))]
+    for name, values in zip(MISSION_STATS_DIMENSIONS, columns[1:]):
+        names, value_codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+        dimensions.append((name, names.tolist(), value_codes))
+    # In the rollups' key order: by period, then dimension, then value
+    dimensions.sort(key=lambda dimension: dimension[0])
+    counters = np.array(columns[1 + len(MISSION_STATS_DIMENSIONS):], dtype=float)
+    whole = [i for i, counter in enumerate(MISSION_STATS_COUNTERS) if counter != "data_gb"]
+    for table, length in MISSION_STATS_TABLES:
+        periods, day_periods = np.unique(days.astype(f"U{length}"), return_inverse=True)
+        period_codes = day_periods[day_codes]
+        key_periods, key_dimensions, key_values, key_sums = [], [], [], []
+        for dimension, names, value_codes in dimensions:
+            keys, groups = np.unique(period_codes * len(names) + value_codes, return_inverse=True)
+            key_periods.append(keys // len(names))
+            key_dimensions += [dimension] * len(keys)
+            key_values += [names[code] for code in (keys % len(names)).tolist()]
+            key_sums.append(np.array([np.bincount(groups, counter, len(keys)) for counter in counters]))
+        # Stable, so each period keeps its dimensions and values in order
+        order = np.argsort(np.concatenate(key_periods), kind="stable")
+        sums = np.concatenate(key_sums, axis=1)[:, order]
+        sums = [np.rint(totals).astype(np.int64).tolist() if i in whole else totals.tolist()
+                for i, totals in enumerate(sums)]
+        order = order.tolist()
+        params = list(zip(periods[np.concatenate(key_periods)[order]].tolist(),
+                          [key_dimensions[i] for i in order], [key_values[i] for i in order], *sums))
+        conn.exec_driver_sql(mission_stats_upsert_sql(table), params)
+
+
+def drop_mission_indexes(session):
+    for index in Mission.__table__.indexes:
+        session.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    session.commit()
+
+
+def create_mission_indexes(session):
+    """
+    Puts the missions indexes back and refills the full-text index (init_db also does
+    this after an interrupted import).
+    """
+    session.rollback()
+    for index in Mission.__table__.indexes:
+        index.create(session.connection(), checkfirst=True)
+    restore_search_index(session.connection())
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV or .xlsx file to import")
+    parser.add_argument("--rejects", help="where to write rejected rows (default: <name>.rejects.csv)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true",
+                        help="import from the top even if this file was (partly) imported before")
+    args = parser.parse_args()
+
+    from db.database import init_db
+    init_db()
+
+    def report(done, total):
+        print(f"\r{done}/{total or '?'} rows", end="", file=sys.stderr, flush=True)
+
+    try:
+        result = import_missions(args.path, chunk_size=args.chunk_size, rejects_path=args.rejects,
+                                 restart=args.restart, progress=report)
+    except (ImportAlreadyDone, ValueError, RuntimeError) as e:
+        sys.exit(f"\n{e}")
+    print(file=sys.stderr)
+    if result.resumed_at:
+        print(f"Resumed after row {result.resumed_at}.")
+    rate = (result.rows - result.resumed_at) / result.seconds if result.seconds else 0
+    print(f"Imported {result.imported} missions, rejected {result.rejected} "
+          f"({rate:,.0f} rows/s, then {result.finish_seconds:.1f} s for the history, statistics and indexes).")
+    if result.rejected:
+        print(f"Rejected rows are in {result.rejects_path}")
+
+
+if __name__ == "__main__":
+    main()
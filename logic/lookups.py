@@ -0,0 +1,95 @@
+"""
+Known values of the categorical mission fields, for autocompleting the form and the
+table's cells.
+
+    python -m logic.lookups [platform|chassis|...]
+    python -m logic.lookups --backfill
+
+The lookup tables (platforms, chassis, ..., outcomes, issues_*) list every
+value in use: db/migrations.py backfills them from the distinct values in missions and
+triggers add each new value as missions are written. LookupCache reads them once, keeps
+each field's values sorted case-insensitively (the order QCompleter bisects) and interned,
+so the same string object is shared by the cache and every table row showing it.
+--backfill adds values the tables are missing, e.g. after the triggers were dropped.
+"""
+import argparse
+import sys
+from sqlalchemy import text
+from db.database import ReadSessionLocal, SessionLocal
+from db.migrations import fill_lookup_tables
+from db.models import MISSION_LOOKUP_TABLES
+
+LOOKUP_FIELDS = list(MISSION_LOOKUP_TABLES)
+
+# Table cells interned as rows are loaded
+INTERNED_FIELDS = LOOKUP_FIELDS
+
+
+def sort_key(value):
+    return value.casefold(), value
+
+
+def read_lookups(session):
+    """Returns {field: its values, interned and sorted case-insensitively} from the lookup tables."""
+    values = {}
+    for field, table in MISSION_LOOKUP_TABLES.items():
+        names = {name.strip() for (name,) in session.execute(text(f"SELECT name FROM {table}")) if name}
+        values[field] = sorted(map(sys.intern, filter(None, names)), key=sort_key)
+    return values
+
+
+def backfill_lookups(session):
+    """Adds the values missions use that the lookup tables are missing; returns how many."""
+    before = sum(map(len, read_lookups(session).values()))
+    fill_lookup_tables(session.connection())
+    session.commit()
+    return sum(map(len, read_lookups(session).values())) - before
+
+
+class LookupCache:
+    """
+    The lookup values in memory, {field: sorted list}. Load it once and again after it
+    was invalidated by a write; in between, lookups cost no queries.
+    """
+
+    def __init__(self):
+        self.values = {field: [] for field in LOOKUP_FIELDS}
+        self.stale = True
+
+    def load(self, session):
+        return self.replace(read_lookups(session))
+
+    def replace(self, values):
+        """Takes freshly read values (see read_lookups); returns the fields that changed."""
+        changed = [field for field, names in values.items() if names != self.values.get(field)]
+        self.values.update(values)
+        self.stale = False
+        return changed
+
+    def invalidate(self):
+        """Marks the cache out of date, e.g. after missions were written."""
+        self.stale = True
+
+    def __getitem__(self, field):
+        return self.values[field]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("field", nargs="?", choices=LOOKUP_FIELDS, help="list only this field's values")
+    parser.add_argument("--backfill", action="store_true", help="add values in use that the tables miss")
+    args = parser.parse_args()
+
+    if args.backfill:
+        with SessionLocal() as session:
+            print(f"Added {backfill_lookups(session)} values")
+        return
+    cache = LookupCache()
+    with ReadSessionLocal() as session:
+        cache.load(session)
+    for field in [args.field] if args.field else LOOKUP_FIELDS:
+        print(f"{field} ({len(cache[field])}): {', '.join(cache[field])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+METAR decoding for the raw_metar column.
+
+`decode_metar(raw)` decodes one report into a Metar tuple, e.g. to fill in the wind and
+sky fields of the mission form. `decode_batch(reports)` decodes many reports into NumPy
+columns (wind, gust, visibility, cloud layers, ceiling, temperature, ...), one entry per
+report, and `decode_missions()` does that for every mission with a METAR.
+
+Each distinct report is parsed once: batches are de-duplicated, and decoded reports are
+kept in a cache keyed by the report text, so re-decoding the table after a few edits
+only parses the new reports. Parsing uses a handful of precompiled regexes per report.
+
+    python -m logic.metar "KLAF 131754Z 31011G18KT 10SM CLR 07/M03 A3004"
+    python -m logic.metar            # decode the mission table and summarize it
+
+Batch decoding needs NumPy.
+"""
+import math
+import re
+import sys
+from collections import namedtuple
+
+# Cloud cover codes in order of significance; the batch columns store their index
+COVERS = ["", "CLR", "FEW", "SCT", "BKN", "OVC", "VV"]
+COVER_CODES = {cover: code for code, cover in enumerate(COVERS)}
+MAX_LAYERS = 4
+
+KT_PER_MPS = 1.943844
+KT_PER_KMH = 0.539957
+METERS_PER_SM = 1609.344
+INHG_PER_HPA = 0.0295300
+
+Metar = namedtuple("Metar", [
+    "station", "day", "hour", "minute",  # None for shorthand without a header
+    "wind_dir_deg",     # None when variable or missing
+    "wind_variable",
+    "wind_speed_kt", "wind_gust_kt",
+    "visibility_sm",
+    "clouds",           # ((cover, base_ft), ...) lowest first; base is None for CLR
+    "sky",              # Most significant cover: CLR, FEW, SCT, BKN, OVC or VV
+    "ceiling_ft",       # Lowest BKN/OVC/VV base, None if unlimited
+    "temperature_c", "dewpoint_c", "altimeter_inhg",
+])
+
+# Reports are upper-cased before matching. Besides full reports, the log holds
+# shorthand such as "CLR 26003KT" or "SCT clouds, wind 210 @ 8KT G18KT", so groups are
+# searched for anywhere in the text and the station/time header is optional.
+HEAD_RE = re.compile(r"^(?:(?:METAR|SPECI)\s+)?([A-Z][A-Z0-9]{3})\s+(\d\d)(\d\d)(\d\d)Z(?!\S)")
+WIND_RE = re.compile(r"(?<!\S)(\d{3}|VRB|///)(\d{2,3}|//)(?:G(\d{2,3}))?(KT|MPS|KMH)(?!\S)")
+LOG_WIND_RE = re.compile(r"\bWIND\s+(\d{1,3}|VRB)\s*@\s*(\d{1,3})\s*KT(?:\s*G\s*(\d{1,3})\s*KT)?")
+VISIBILITY_RE = re.compile(r"""
+    (?<!\S)(?:
+        (?P<cavok>CAVOK)
+      | (?P<mod>[MP])?(?:(?P<whole>\d{1,2})\s+(?=\d/))?
+        (?:(?P<num>\d)/(?P<den>\d{1,2})|(?P<int>\d{1,3}))SM
+    )(?!\S)
+""", re.X)
+# Metric visibility only counts in a full report; elsewhere a bare number is ambiguous
+METRIC_VISIBILITY_RE = re.compile(r"(?<!\S)(\d{4})(?:NDV)?(?!\S)")
+CLOUD_RE = re.compile(r"(?<![A-Z])(FEW|SCT|BKN|OVC|VV)(\d{3}|///)?(?:CB|TCU|///)?(?![A-Z0-9])")
+CLEAR_RE = re.compile(r"(?<![A-Z])(?:CLR|SKC|NSC|NCD|CAVOK)(?![A-Z])")
+TEMP_RE = re.compile(r"(?<!\S)(M?\d\d)/(M?\d\d)?(?!\S)")
+ALTIMETER_RE = re.compile(r"(?<!\S)(?:A(\d{4})|Q(\d{4}))(?!\S)")
+# Remarks: temperature and dew point to a tenth of a degree, e.g. T00171006
+TENTHS_RE = re.compile(r"(?<!\S)T([01])(\d{3})(?:([01])(\d{3}))?(?!\S)")
+WIND_FACTORS = {"KT": 1.0, "MPS": KT_PER_MPS, "KMH": KT_PER_KMH}
+
+NAN = math.nan
+
+# Flat, all-numeric form of a decoded report, used for the batch columns
+FIELDS = (
+    ["valid", "day", "hour", "minute", "wind_dir_deg", "wind_variable", "wind_speed_kt",
+     "wind_gust_kt", "visibility_sm", "sky", "ceiling_ft", "temperature_c", "dewpoint_c",
+     "altimeter_inhg"]
+    + [f"cloud_cover_{i}" for i in range(1, MAX_LAYERS + 1)]
+    + [f"cloud_base_ft_{i}" for i in range(1, MAX_LAYERS + 1)]
+)
+# Flags and cover codes are 0 for reports that don't decode; everything else is NaN
+INVALID = tuple(0.0 if name in ("valid", "wind_variable", "sky") or name.startswith("cloud_cover")
+                else NAN for name in FIELDS)
+
+# Report text -> flat tuple; cleared when it grows past CACHE_SIZE entries
+CACHE_SIZE = 500_000
+_cache = {}
+
+
+def _temperature(text):
+    return -float(text[1:]) if text[0] == "M" else float(text)
+
+
+def _parse(raw):
+    """Decodes one report into (flat tuple, station, clouds), or raises ValueError."""
+    body, _, remarks = raw.upper().partition(" RMK ")
+    head = HEAD_RE.match(body.strip())
+    station = None
+    day = hour = minute = NAN
+    if head:
+        station = head.group(1)
+        day, hour, minute = float(head.group(2)), float(head.group(3)), float(head.group(4))
+
+    wind_dir = wind_speed = wind_gust = NAN
+    variable = 0.0
+    wind = WIND_RE.search(body)
+    if wind:
+        direction, speed, gust, unit = wind.groups()
+        factor = WIND_FACTORS[unit]
+    else:
+        wind = LOG_WIND_RE.search(body)
+        if wind:
+            direction, speed, gust = wind.groups()
+            factor = 1.0
+    if wind:
+        if direction == "VRB":
+            variable = 1.0
+        elif direction != "///":
+            wind_dir = float(direction)
+        if speed != "//":
+            wind_speed = float(speed) * factor
+        if gust:
+            wind_gust = float(gust) * factor
+
+    visibility = NAN
+    vis = VISIBILITY_RE.search(body)
+    if vis:
+        if vis.group("cavok"):
+            visibility = 10_000 / METERS_PER_SM
+        elif vis.group("int"):
+            visibility = float(vis.group("int"))
+        else:
+            visibility = float(vis.group("whole") or 0) + float(vis.group("num")) / float(vis.group("den"))
+    elif head:
+        metric = METRIC_VISIBILITY_RE.search(body, head.end())
+        if metric:
+            visibility = float(metric.group(1)) / METERS_PER_SM
+
+    clouds = [(cover, float(base) * 100 if base and base != "///" else None)
+              for cover, base in CLOUD_RE.findall(body)]
+    if not clouds and CLEAR_RE.search(body):
+        clouds = [("CLR", None)]
+    sky = max((COVER_CODES[cover] for cover, _ in clouds), default=0)
+    ceilings = [base for cover, base in clouds if cover in ("BKN", "OVC", "VV") and base is not None]
+    ceiling = min(ceilings) if ceilings else NAN
+
+    temperature = dewpoint = NAN
+    tenths = TENTHS_RE.search(remarks) if remarks else None
+    if tenths:
+        sign = -1.0 if tenths.group(1) == "1" else 1.0
+        temperature = sign * float(tenths.group(2)) / 10
+        if tenths.group(3):
+            dewpoint = (-1.0 if tenths.group(3) == "1" else 1.0) * float(tenths.group(4)) / 10
+    else:
+        temp = TEMP_RE.search(body)
+        if temp:
+            temperature = _temperature(temp.group(1))
+            if temp.group(2):
+                dewpoint = _temperature(temp.group(2))
+
+    altimeter = NAN
+    alt = ALTIMETER_RE.search(body)
+    if alt:
+        altimeter = float(alt.group(1)) / 100 if alt.group(1) else float(alt.group(2)) * INHG_PER_HPA
+
+    if not (head or wind or clouds or vis or temperature == temperature):
+        raise ValueError(f"Not a METAR report: {raw!r}")
+
+    layers = clouds[:MAX_LAYERS]
+    covers = [float(COVER_CODES[cover]) for cover, _ in layers] + [0.0] * (MAX_LAYERS - len(layers))
+    bases = [NAN if base is None else base for _, base in layers] + [NAN] * (MAX_LAYERS - len(layers))
+    flat = (1.0, day, hour, minute, wind_dir, variable, wind_speed, wind_gust, visibility,
+            float(sky), ceiling, temperature, dewpoint, altimeter, *covers, *bases)
+    return flat, station, tuple(clouds)
+
+
+def _none(value):
+    return None if value != value else value  # NaN -> None
+
+
+def _int(value):
+    return None if value != value else int(value)
+
+
+def decode_metar(raw):
+    """
+    Decodes one METAR report, or log shorthand like "SCT 36014G19KT", into a Metar.
+    Raises ValueError if nothing in it decodes.
+    """
+    flat, station, clouds = _parse(raw)
+    values = dict(zip(FIELDS, flat))
+    return Metar(
+        station=station, day=_int(values["day"]), hour=_int(values["hour"]),
+        minute=_int(values["minute"]),
+        wind_dir_deg=_none(values["wind_dir_deg"]), wind_variable=bool(values["wind_variable"]),
+        wind_speed_kt=_none(values["wind_speed_kt"]), wind_gust_kt=_none(values["wind_gust_kt"]),
+        visibility_sm=_none(values["visibility_sm"]), clouds=clouds,
+        sky=COVERS[int(values["sky"])] or None, ceiling_ft=_none(values["ceiling_ft"]),
+        temperature_c=_none(values["temperature_c"]), dewpoint_c=_none(values["dewpoint_c"]),
+        altimeter_inhg=_none(values["altimeter_inhg"]),
+    )
+
+
+def _decode_flat(raw):
+    """The flat tuple for a report, from the cache if it has been seen before."""
+    flat = _cache.get(raw)
+    if flat is None:
+        try:
+            flat = _parse(raw)[0] if raw else INVALID
+        except ValueError:
+            flat = INVALID
+        if len(_cache) >= CACHE_SIZE:
+            _cache.clear()
+        _cache[raw] = flat
+    return flat
+
+
+def decode_batch(reports):
+    """
+    Decodes a sequence of METAR strings (None/blank allowed) into a dict of NumPy
+    arrays, one entry per report:
+
+      valid (bool), day/hour/minute (float, NaN without a header), wind_dir_deg, wind_variable (bool),
+      wind_speed_kt, wind_gust_kt, visibility_sm, sky (int8 index into COVERS),
+      ceiling_ft, temperature_c, dewpoint_c, altimeter_inhg,
+      cloud_cover (int8, n x MAX_LAYERS), cloud_base_ft (n x MAX_LAYERS)
+
+    Missing values are NaN. Each distinct report is decoded once and the rows are
+    gathered from the distinct results with one fancy-indexing step.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("Batch METAR decoding needs NumPy (pip install numpy).")
+
+    positions = {}
+    inverse = np.fromiter((positions.setdefault(raw, len(positions)) for raw in reports),
+                          dtype=np.intp)
+    distinct = np.array([_decode_flat(raw) for raw in positions], dtype=np.float64)
+    if distinct.size == 0:
+        distinct = np.empty((0, len(FIELDS)))
+    table = distinct[inverse]
+
+    columns = {name: table[:, i] for i, name in enumerate(FIELDS[:14])}
+    columns["valid"] = columns["valid"].astype(bool)
+    columns["wind_variable"] = columns["wind_variable"].astype(bool)
+    columns["sky"] = columns["sky"].astype(np.int8)
+    columns["cloud_cover"] = table[:, 14:14 + MAX_LAYERS].astype(np.int8)
+    columns["cloud_base_ft"] = table[:, 14 + MAX_LAYERS:]
+    return columns
+
+
+def decode_missions(session=None, batch_size=50_000):
+    """
+    Decodes the METAR of every mission that has one.
+    Returns (mission IDs as an int64 array, decode_batch columns for them).
+    """
+    import numpy as np
+    from logic.flight_ops import iter_missions
+    from db.models import Mission
+
+    ids, reports = [], []
+    rows = iter_missions([Mission.raw_metar.isnot(None)], "id", batch_size,
+                         ["id", "raw_metar"], session=session)
+    for mission_id, raw in rows:
+        ids.append(mission_id)
+        reports.append(raw)
+    return np.array(ids, dtype=np.int64), decode_batch(reports)
+
+
+def main():
+    if len(sys.argv) > 1:
+        for raw in sys.argv[1:]:
+            try:
+                print(decode_metar(raw))
+            except ValueError as e:
+                print(e)
+        return
+
+    import numpy as np
+    ids, columns = decode_missions()
+    valid = columns["valid"]
+    print(f"{len(ids)} missions with a METAR, {int(valid.sum())} decoded")
+    if valid.any():
+        for name in ("wind_speed_kt", "wind_gust_kt", "visibility_sm", "ceiling_ft", "temperature_c"):
+            values = columns[name][valid]
+            present = values[~np.isnan(values)]
+            if present.size:
+                print(f"  {name:<15} n={present.size:<7} mean={present.mean():8.1f} "
+                      f"min={present.min():8.1f} max={present.max():8.1f}")
+        skies = np.bincount(columns["sky"][valid], minlength=len(COVERS))
+        print("  sky            " + ", ".join(f"{COVERS[i] or '?'}={n}" for i, n in enumerate(skies) if n))
+
+
+if __name__ == "__main__":
+    main()
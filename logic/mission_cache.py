@@ -0,0 +1,309 @@
+"""
+Compact in-memory copy of the missions the UI has read, stored column by column.
+
+    python -m logic.mission_cache ["customer:Acme date>=2024-01-01"]
+
+Instead of a Python object per cell (or an ORM Mission per row), each field is one typed
+column (logic.columns) indexed by the row's position in the cache:
+
+- integers, numbers and dates: int64, float64 and datetime64 NumPy arrays with a
+  sentinel, NaN or NaT for NULL; the test flag is an int8 (-1 for NULL)
+- the categorical fields (INTERNED_FIELDS): int32 codes into the list of distinct values
+- comments and the METAR: UTF-8 in one byte buffer, each value at a start and length
+
+A mission keeps its position for as long as the cache lives: updates overwrite it in
+place and deletes only mark it dead, so positions held elsewhere (the table model keeps
+one per row) stay valid. A value that doesn't fit its field's type (text in a number
+column of a legacy database) is kept aside as it is, so a cell always reads back what
+SQLite returned. The cache is only touched from the GUI thread; the fetch_* functions
+run on the database thread and their results are applied with put() and discard().
+"""
+import argparse
+import sys
+from datetime import datetime
+import numpy as np
+from sqlalchemy import or_, text
+from db.database import ReadSessionLocal
+from db.models import Mission, MissionTombstone
+from logic.columns import KINDS, CategoryColumn, column_kind, grown, make_column
+from logic.flight_ops import parse_search
+from logic.lookups import INTERNED_FIELDS
+from logic.schema import FIELDS
+
+# Cached fields in row order: the table's columns, then the rest the statistics count
+CACHE_FIELDS = [field.attr for field in FIELDS] + ["issues_env"]
+
+CACHE_COLUMNS = [getattr(Mission, field) for field in CACHE_FIELDS]
+
+FIELD_TYPES = dict({field.attr: field.type for field in FIELDS}, issues_env=str)
+
+# Ids up to this (or 4x the cache's capacity, if more) are found by direct indexing; any
+# others go through a dict
+DIRECT_IDS = 1 << 20
+
+# Missions per query when fetching rows by ID
+FETCH_CHUNK = 10000
+
+
+def _make_column(field):
+    if field in INTERNED_FIELDS:
+        return make_column("category")
+    kind = FIELD_TYPES[field]
+    return make_column(next((name for name, type_func in KINDS.items() if type_func is kind), "text"))
+
+
+class MissionCache:
+    """
+    Mission rows (CACHE_FIELDS, the ID first) held as typed column arrays.
+
+    put() adds or overwrites rows and returns their positions; value() and row() read
+    them back as the Python values the database returned, and array()/categories() give
+    the columns to vectorized code (see logic.fleet_stats.cached_breakdown).
+
+    `synced_at` is the database time up to which every cached row is known to be
+    current: the fetch time of the first rows put into an empty cache, moved forward by
+    changes_applied() when a sync covered everything since. Rows put later were current
+    when they were fetched, so they never hold it back.
+    """
+
+    def __init__(self):
+        self.columns = {field: _make_column(field) for field in CACHE_FIELDS}
+        self.size = 0  # Positions handed out, live or dead
+        self.live = 0
+        self.alive = np.empty(0, bool)
+        self._position_of = np.empty(0, np.int32)  # ID -> position, -1 if not cached
+        self._far_positions = {}  # The same for IDs beyond DIRECT_IDS or negative
+        self.synced_at = None
+
+    def __len__(self):
+        return self.live
+
+    def __contains__(self, mission_id):
+        return self.position(mission_id) is not None
+
+    @property
+    def capacity(self):
+        return len(self.alive)
+
+    def _reserve(self, count):
+        if count <= self.capacity:
+            return
+        capacity = max(count, 2 * self.capacity, 1024)
+        for column in self.columns.values():
+            column.grow(capacity)
+        self.alive = grown(self.alive, capacity, False)
+
+    def _direct_limit(self):
+        return max(DIRECT_IDS, 4 * self.capacity)
+
+    # --- Lookup ---
+
+    def position(self, mission_id):
+        """The position of a cached mission, or None."""
+        if 0 <= mission_id < len(self._position_of):
+            position = int(self._position_of[mission_id])
+            return position if position >= 0 else None
+        return self._far_positions.get(mission_id)
+
+    def positions(self, mission_ids):
+        """Positions of `mission_ids` as an int64 array, -1 for those not cached."""
+        ids = np.asarray(mission_ids, np.int64)
+        positions = np.full(len(ids), -1, np.int64)
+        direct = (ids >= 0) & (ids < len(self._position_of))
+        positions[direct] = self._position_of[ids[direct]]
+        if self._far_positions:
+            for i in np.flatnonzero(~direct).tolist():
+                positions[i] = self._far_positions.get(int(ids[i]), -1)
+        return positions
+
+    def live_positions(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    # --- Reading ---
+
+    def value(self, position, field):
+        return self.columns[field].value(position)
+
+    def row(self, position):
+        """The cached row at `position` as a list ordered like CACHE_FIELDS."""
+        return [column.value(position) for column in self.columns.values()]
+
+    def array(self, field):
+        """The typed array of a number, date or flag field, or a categorical field's codes."""
+        column = self.columns[field]
+        return column.codes if isinstance(column, CategoryColumn) else column.array
+
+    def categories(self, field):
+        """A categorical field's values, indexed by the codes in array(field)."""
+        return self.columns[field].categories
+
+    def nbytes(self):
+        """Bytes held by the arrays, the ID index and the category values."""
+        return (sum(column.nbytes for column in self.columns.values())
+                + self.alive.nbytes + self._position_of.nbytes)
+
+    # --- Writing ---
+
+    def put(self, rows, fetched_at=None):
+        """
+        Adds or overwrites missions from `rows` (sequences ordered like CACHE_FIELDS; any
+        values past those are ignored) and returns their positions in the same order.
+        `fetched_at` is the database time the rows were read at.
+        """
+        if not rows:
+            return np.empty(0, np.int64)
+        if self.synced_at is None and not self.live:
+            self.synced_at = fetched_at
+        ids = [row[0] for row in rows]
+        latest = {mission_id: row for mission_id, row in zip(ids, rows)}
+        unique = list(latest.values()) if len(latest) < len(rows) else rows
+        positions = self._allocate(list(latest))
+        for i, (field, column) in enumerate(self.columns.items()):
+            column.set(positions, [row[i] for row in unique])
+        return positions if unique is rows else self.positions(ids)
+
+    def _allocate(self, mission_ids):
+        """Positions for the (distinct) IDs, new ones at the end for those not cached yet."""
+        positions = self.positions(mission_ids)
+        new = np.flatnonzero(positions < 0)
+        if len(new):
+            self._reserve(self.size + len(new))
+            positions[new] = np.arange(self.size, self.size + len(new))
+            self.size += len(new)
+            self.live += len(new)
+            self.alive[positions[new]] = True
+            self._index(np.asarray(mission_ids, np.int64)[new], positions[new])
+        return positions
+
+    def _index(self, ids, positions):
+        """Records the positions of newly cached IDs."""
+        limit = self._direct_limit()
+        direct = (ids >= 0) & (ids < limit)
+        if len(ids) and direct.any():
+            highest = int(ids[direct].max())
+            if highest >= len(self._position_of):
+                self._position_of = grown(self._position_of,
+                                          min(max(highest + 1, 2 * len(self._position_of)), limit), -1)
+            self._position_of[ids[direct]] = positions[direct]
+        for mission_id, position in zip(ids[~direct].tolist(), positions[~direct].tolist()):
+            self._far_positions[mission_id] = position
+
+    def discard(self, mission_ids):
+        """Marks the given missions dead (their positions aren't reused); returns how many were cached."""
+        positions = self.positions(mission_ids)
+        found = positions >= 0
+        positions = positions[found]
+        if not len(positions):
+            return 0
+        self.alive[positions] = False
+        self.live -= len(positions)
+        for column in self.columns.values():
+            column.release(positions)
+        ids = np.asarray(mission_ids, np.int64)[found]
+        direct = ids < len(self._position_of)
+        direct &= ids >= 0
+        self._position_of[ids[direct]] = -1
+        for mission_id in ids[~direct].tolist():
+            self._far_positions.pop(mission_id, None)
+        return len(positions)
+
+    def apply_changes(self, changes, since):
+        """
+        Applies the (database time, deleted IDs, changed rows) of fetch_cache_changes or
+        the table's sync; `since` is the time they were fetched from.
+        """
+        now, deleted, changed = changes
+        self.discard(deleted)
+        self.put(changed, now)
+        self.changes_applied(since, now)
+
+    def changes_applied(self, since, now):
+        """Moves `synced_at` to `now` if a sync of the changes since `since` covered it."""
+        if self.synced_at is not None and since <= self.synced_at:
+            self.synced_at = now
+
+    def clear(self):
+        self.__init__()
+
+    def restore(self, columns, count, synced_at=None):
+        """
+        Replaces the cache's contents with the `count` rows `columns` (field -> column, as
+        read from a snapshot by logic.snapshot) hold at positions 0 to count - 1. Raises
+        ValueError if the columns aren't the cached fields or have other kinds.
+        """
+        kinds = {field: column_kind(column) for field, column in self.columns.items()}
+        if {field: column_kind(column) for field, column in columns.items()} != kinds:
+            raise ValueError("The columns don't match the cached fields")
+        self.clear()
+        self.columns = {field: columns[field] for field in CACHE_FIELDS}
+        self.size = self.live = count
+        self.alive = np.ones(count, bool)
+        self._index(self.array("id")[:count], np.arange(count))
+        self.synced_at = synced_at
+
+    def load(self, session, criteria=(), batch_size=10000):
+        """Puts every mission matching `criteria` (WHERE expressions) into the cache."""
+        fetched_at = database_now(session)
+        result = session.execute(session.query(*CACHE_COLUMNS).filter(*criteria)
+                                 .statement.execution_options(yield_per=batch_size))
+        count = 0
+        for rows in result.partitions():
+            self.put(rows, fetched_at)
+            count += len(rows)
+        return count
+
+
+# --- Queries (run on the database thread) ---
+
+def database_now(session):
+    """Returns the database clock, which is what created_at/updated_at are stamped with."""
+    now = session.execute(text("SELECT CURRENT_TIMESTAMP")).scalar()
+    return datetime.strptime(now, '%Y-%m-%d %H:%M:%S')
+
+
+def fetch_ids(session, criteria=()):
+    """IDs of the missions matching `criteria`, as an int64 array."""
+    rows = session.query(Mission.id).filter(*criteria).all()
+    return np.fromiter((mission_id for (mission_id,) in rows), np.int64, len(rows))
+
+
+def fetch_rows(session, mission_ids):
+    """Returns (database time, the CACHE_FIELDS rows of `mission_ids`)."""
+    now = database_now(session)
+    ids = [int(mission_id) for mission_id in mission_ids]
+    rows = []
+    for first in range(0, len(ids), FETCH_CHUNK):
+        rows += session.query(*CACHE_COLUMNS).filter(Mission.id.in_(ids[first:first + FETCH_CHUNK])).all()
+    return now, rows
+
+
+def fetch_cache_changes(session, since):
+    """Returns (database time, IDs deleted since `since`, rows inserted or updated since `since`)."""
+    now = database_now(session)
+    deleted = [mission_id for (mission_id,) in
+               session.query(MissionTombstone.mission_id).filter(MissionTombstone.deleted_at >= since)]
+    changed = (session.query(*CACHE_COLUMNS)
+               .filter(or_(Mission.updated_at >= since, Mission.created_at >= since))
+               .all())
+    return now, deleted, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("search", nargs="?", default="", help="only cache the missions a filter bar search matches")
+    args = parser.parse_args()
+
+    try:
+        criteria = parse_search(args.search)
+    except ValueError as e:
+        sys.exit(str(e))
+    cache = MissionCache()
+    with ReadSessionLocal() as session:
+        cache.load(session, criteria)
+    print(f"{len(cache)} missions in {cache.nbytes() / 2**20:.1f} MiB")
+    for field, column in cache.columns.items():
+        print(f"  {field:<20} {column.nbytes / 2**20:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
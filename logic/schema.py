@@ -0,0 +1,248 @@
+"""
+The mission columns, declared once. The table's headers and cells, the form, saving
+edits, the importer and the exporter all take their labels, parsers and checks from
+FIELDS, so a cell is accepted (or not) the same way wherever it's typed or read from.
+
+Cell text becomes a value with the rules of parse_cell: blank text is None, numbers are
+what int() and float() accept, dates are '%Y-%m-%d' and flags are Yes/True/1. The
+validator checks whole columns of text at once with NumPy (validate_columns), for saves
+and imports of many cells; it reports the same cells the parsers would reject.
+
+Like logic.formatting this only imports NumPy, so it can be used without the database
+modules.
+"""
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+from logic.formatting import format_value
+
+# A cell validate_columns rejected: its index in the column, the Mission attribute, its
+# text and why
+CellError = namedtuple("CellError", "row attr text message")
+
+
+@lru_cache(maxsize=8192)
+def parse_date(value):
+    """Parses a '%Y-%m-%d' date; cached because logs repeat the same dates a lot."""
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def _parse_bool(value):
+    return value.strip().lower() in ["yes", "true", "1"]
+
+
+# Cell text -> value for each column type, blank text excluded. Bulk callers (the
+# importer) look these up once per column instead of going through parse_cell per cell.
+CELL_PARSERS = {datetime: parse_date, bool: _parse_bool}
+
+# What a cell of each type that can be mistyped has to look like, for error messages
+EXPECTED = {int: "a whole number", float: "a number", datetime: "a date like 2024-05-31"}
+
+
+def cell_parser(type_func):
+    """
+    Returns a function converting cell text to `type_func` exactly like parse_cell does:
+    blank text becomes None, unparseable text raises ValueError/TypeError.
+    """
+    parse = CELL_PARSERS.get(type_func, type_func)
+    return lambda value: parse(value) if value.strip() else None
+
+
+def parse_cell(value, type_func):
+    """
+    Converts the text of a table cell to the Python type stored in the database.
+    Blank cells become None; raises ValueError/TypeError for unparseable text.
+    """
+    if value.strip() == "":
+        # Allow empty strings for nullable fields
+        return None
+    return CELL_PARSERS.get(type_func, type_func)(value)
+
+
+class Field:
+    """
+    One mission column: its header `label`, the Mission `attr`, the `type` its text is
+    parsed to, whether new missions need it (`required`) and whether the table lets it
+    be edited.
+    """
+
+    def __init__(self, label, attr, type, required=False, editable=True):
+        self.label = label
+        self.attr = attr
+        self.type = type
+        self.required = required
+        self.editable = editable
+        self.parse = cell_parser(type)
+
+    def __repr__(self):
+        return f"Field({self.label!r}, {self.attr!r}, {self.type.__name__})"
+
+    def format(self, value):
+        """The value as cell text."""
+        return format_value(value)
+
+    def error(self, text, required=False):
+        """Why `text` can't be stored in this column (or is missing, if `required`); None if it can."""
+        try:
+            value = self.parse(text)
+        except (ValueError, TypeError):
+            return f"invalid value '{text}' in column '{self.label}' (expected {EXPECTED[self.type]})"
+        if required and value is None:
+            return f"'{self.label}' is required"
+        return None
+
+
+# The user-facing mission columns in table order
+FIELDS = [
+    Field("ID", "id", int, editable=False),
+    Field("Associated", "associated_mission", int),
+    Field("Date", "date", datetime),
+    Field("Platform", "platform", str, required=True),
+    Field("Chassis", "chassis", str, required=True),
+    Field("Customer", "customer", str),
+    Field("Site", "site", str),
+    Field("Altitude (m)", "altitude_m", float),
+    Field("Speed (m/s)", "speed_m_s", float),
+    Field("Spacing (m)", "spacing_m", float),
+    Field("Sky", "sky_conditions", str),
+    Field("Wind (kts)", "wind_knots", float),
+    Field("Battery", "battery", str),
+    Field("Filesize (GB)", "filesize_gb", float),
+    Field("Test?", "is_test", bool),
+    Field("HW Issues", "issues_hw", str),
+    Field("Operator Issues", "issues_operator", str),
+    Field("SW Issues", "issues_sw", str),
+    Field("Outcome", "outcome", str),
+    Field("Comments", "comments", str),
+    Field("Raw METAR", "raw_metar", str),
+]
+
+FIELD = {field.attr: field for field in FIELDS}
+
+HEADERS = [field.label for field in FIELDS]
+
+# New missions can't be saved without these
+REQUIRED_FIELDS = [field.attr for field in FIELDS if field.required]
+
+
+# --- Batch validation ---
+
+def _byte_class(values):
+    table = np.zeros(256, bool)
+    table[list(values)] = True
+    return table
+
+
+# Bytes str.strip() removes (newlines aside, which separate the cells) or that may be
+# part of a character it removes; digits; signs
+SPACE_BYTES = _byte_class(b"\t\x0b\x0c\r\x1c\x1d\x1e\x1f ")
+MAYBE_SPACE_BYTES = SPACE_BYTES | _byte_class(range(128, 256))
+DIGIT_BYTES = _byte_class(b"0123456789")
+DOT_BYTES = _byte_class(b".")
+SIGNS = (ord("+"), ord("-"))
+
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+# Offsets of the digits in 'YYYY-MM-DD'
+DATE_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9]
+
+
+class _ColumnBytes:
+    """
+    A column of cell text as one UTF-8 buffer, so every cell's bytes can be classified
+    at once. `split` is False if a cell has a newline of its own, which would split it.
+    """
+
+    def __init__(self, texts):
+        self.data = np.frombuffer("\n".join(texts).encode(), np.uint8)
+        breaks = np.flatnonzero(self.data == 10)
+        self.split = len(breaks) == len(texts) - 1
+        if self.split:
+            self.starts = np.concatenate(([0], breaks + 1))
+            self.lengths = np.concatenate((breaks, [len(self.data)])) - self.starts
+
+    def count(self, byte_class):
+        """How many bytes of each cell are in `byte_class`."""
+        # Padded, as an empty last cell starts past the end; reduceat gives an empty
+        # cell the byte it starts at rather than nothing
+        members = np.append(byte_class[self.data], False).view(np.uint8)
+        counts = np.add.reduceat(members, self.starts, dtype=np.int32)
+        counts[self.lengths == 0] = 0
+        return counts
+
+    def byte(self, offset):
+        """Each cell's byte at `offset`, or 0 for cells that short."""
+        inside = self.lengths > offset
+        values = np.zeros(len(self.starts), np.uint8)
+        values[inside] = self.data[self.starts[inside] + offset]
+        return values
+
+
+def _plain_numbers(cells, decimal):
+    """Cells that are an optional sign, digits and (if `decimal`) at most one point: valid for int()/float()."""
+    digits = cells.count(DIGIT_BYTES)
+    dots = cells.count(DOT_BYTES) if decimal else 0
+    signed = np.isin(cells.byte(0), SIGNS)
+    return (digits > 0) & (dots <= 1) & (signed + digits + dots == cells.lengths)
+
+
+def _plain_dates(cells):
+    """Cells that are a real date written 'YYYY-MM-DD': valid for parse_date."""
+    shaped = (cells.lengths == 10) & (cells.byte(4) == ord("-")) & (cells.byte(7) == ord("-"))
+    digits = cells.data[cells.starts[shaped][:, None] + DATE_DIGITS]
+    numbers = digits.astype(np.int32) - ord("0")
+    year = numbers[:, 0] * 1000 + numbers[:, 1] * 100 + numbers[:, 2] * 10 + numbers[:, 3]
+    month = numbers[:, 4] * 10 + numbers[:, 5]
+    day = numbers[:, 6] * 10 + numbers[:, 7]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    last_day = DAYS_IN_MONTH[np.clip(month, 0, 12)] + (leap & (month == 2))
+    valid = shaped.copy()
+    valid[shaped] = (DIGIT_BYTES[digits].all(axis=1) & (year >= 1)
+                     & (month >= 1) & (month <= 12) & (day >= 1) & (day <= last_day))
+    return valid
+
+
+def _suspect_cells(field, texts, required):
+    """
+    Indexes of the cells in `texts` that may be invalid, the rest being certainly fine:
+    the cells NumPy can't vouch for, to be checked one by one.
+    """
+    checked = field.type in (int, float, datetime)
+    if not checked and not required:
+        return ()  # Any text is a valid string or flag
+    cells = _ColumnBytes(texts)
+    if not cells.split:
+        return range(len(texts))
+    if checked:
+        fine = _plain_dates(cells) if field.type is datetime else _plain_numbers(cells, field.type is float)
+        if not required:
+            fine |= cells.lengths == 0  # Blank; cells of whitespace are checked one by one
+    else:
+        # Anything but blanks is there; cells of only whitespace or non-ASCII could be blank
+        fine = cells.count(MAYBE_SPACE_BYTES) < cells.lengths
+    return np.flatnonzero(~fine).tolist()
+
+
+def validate_columns(columns, required=()):
+    """
+    Checks columns of cell text, {Mission attribute: sequence of text} (the columns
+    needn't be the same length), and returns a CellError for each cell that wouldn't
+    parse, or that is blank in a `required` column, ordered by row then column.
+
+    Whole columns are classified with NumPy; only the cells it can't vouch for (e.g.
+    '1e3', ' 12 ' or a bad value) go through the cell's parser, so a column of good
+    numbers or dates costs a few array passes rather than a parse per cell.
+    """
+    errors = []
+    for attr, texts in columns.items():
+        field = FIELD[attr]
+        texts = list(texts)
+        needed = attr in required
+        for row in _suspect_cells(field, texts, needed):
+            message = field.error(texts[row], needed)
+            if message:
+                errors.append(CellError(row, attr, texts[row], message))
+    order = {attr: col for col, attr in enumerate(FIELD)}
+    errors.sort(key=lambda error: (error.row, order[error.attr]))
+    return errors
@@ -0,0 +1,111 @@
+"""
+Ranked full-text search over the mission text (comments, issues, METAR, ...).
+
+    python -m logic.search "gps dropout" [--limit 20]
+    python -m logic.search "customer:Acme vibration"
+    python -m logic.search --rebuild [--check]
+
+Searches take the filter bar syntax (see flight_ops.parse_search): field terms filter,
+free words are looked up in the missions_fts index and rank the hits by BM25, best first,
+each with a snippet of the text around the matched words.
+
+The index is an FTS5 table over the missions table that triggers keep in sync, and
+db/migrations.py fills it for existing databases. --rebuild re-reads it from the missions
+(e.g. after the triggers were dropped, or a database was copied in from elsewhere).
+"""
+import argparse
+import sys
+from collections import namedtuple
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.exc import DatabaseError
+from db.database import ReadSessionLocal, SessionLocal
+from db.migrations import fill_search_index
+from db.models import Mission, MISSION_SEARCH_TABLE, MISSION_SEARCH_TRIGGERS, MISSION_TEXT_VIEW, mission_search
+from logic.flight_ops import fts_query, split_search
+
+SEARCH_LIMIT = 100
+
+# Put around the matched words in snippets; the UI turns them into bold text
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+SNIPPET_TOKENS = 12
+
+SearchHit = namedtuple("SearchHit", "mission_id date platform customer site snippet rank")
+
+
+def search_missions(session, search, limit=SEARCH_LIMIT):
+    """
+    Returns the best `limit` SearchHits for `search` (filter bar syntax), best first.
+    A search without free words has nothing to rank and returns [].
+    """
+    criteria, words = split_search(search)
+    if not words:
+        return []
+    fts = literal_column("missions_fts")
+    query = (
+        select(Mission.id, Mission.date, Mission.platform, Mission.customer, Mission.site,
+               func.snippet(fts, -1, HIGHLIGHT_START, HIGHLIGHT_END, "…", SNIPPET_TOKENS),
+               literal_column("missions_fts.rank"))
+        .select_from(mission_search)
+        .join(Mission, Mission.id == mission_search.c.rowid)
+        .where(fts.op("MATCH")(fts_query(words)), *criteria)
+        .order_by(literal_column("missions_fts.rank"))
+        .limit(limit)
+    )
+    return [SearchHit(*row) for row in session.execute(query)]
+
+
+def rebuild_search_index(session):
+    """Re-creates missing parts of the index and refills it from the missions table."""
+    for ddl in [MISSION_TEXT_VIEW, MISSION_SEARCH_TABLE, *MISSION_SEARCH_TRIGGERS]:
+        session.execute(text(ddl))
+    fill_search_index(session.connection())
+    session.commit()
+    return session.query(Mission).count()
+
+
+def check_search_index(session):
+    """Raises sqlalchemy's DatabaseError if the index doesn't match the missions table."""
+    session.execute(text("INSERT INTO missions_fts (missions_fts, rank) VALUES ('integrity-check', 1)"))
+    session.rollback()
+
+
+def _plain(snippet):
+    return snippet.replace(HIGHLIGHT_START, "[").replace(HIGHLIGHT_END, "]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("search", nargs="?", help="words to look for, plus any filter bar field terms")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rebuild", action="store_true", help="refill the index from the missions")
+    parser.add_argument("--check", action="store_true", help="verify the index against the missions")
+    args = parser.parse_args()
+    if not (args.search or args.rebuild or args.check):
+        parser.error("give a search, --rebuild or --check")
+
+    if args.rebuild:
+        with SessionLocal() as session:
+            print(f"Indexed {rebuild_search_index(session)} missions")
+    if args.check:
+        with SessionLocal() as session:
+            try:
+                check_search_index(session)
+            except DatabaseError as e:
+                sys.exit(f"The search index is out of date; run --rebuild ({e})")
+        print("The search index matches the missions")
+    if args.search:
+        with ReadSessionLocal() as session:
+            try:
+                hits = search_missions(session, args.search, args.limit)
+            except ValueError as e:
+                sys.exit(str(e))
+        for hit in hits:
+            date = hit.date.strftime("%Y-%m-%d") if hasattr(hit.date, "strftime") else hit.date
+            print(f"{hit.mission_id:>8}  {date}  {hit.platform or '':<8} {hit.customer or '':<12} "
+                  f"{_plain(hit.snippet)}")
+        if not hits:
+            print("No matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Snapshot of the mission table's rows, written on exit and mapped on the next start so the
+table can be shown before anything has been read from the database.
+
+The file holds each column's arrays (logic.columns) for the table's rows in table order,
+raw and 64-byte aligned, followed by a JSON header with the column kinds, their category
+lists, the values kept aside from the typed storage, the row count and the caller's state
+(filter, sort, paging and sync position). Reading maps the file copy-on-write, so opening
+a snapshot costs the same for a hundred rows or a million and only the pages a screen
+touches are read; a changed cell goes to private memory, never back to the file.
+
+Like logic.columns this only imports NumPy, for the startup preview (ui/startup.py).
+"""
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from logic.columns import CategoryColumn, TextColumn, column_kind, make_column
+
+MAGIC = b"FLSNAP01"
+
+# MAGIC, then the offset and length of the header, then the arrays from ALIGN on
+PREFIX = struct.Struct("<8sQQ")
+
+ALIGN = 64
+
+# Types a value kept aside from the typed storage, or a category, can be written as
+PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def _column_arrays(column, positions):
+    """The column's arrays (name -> array) for the rows at `positions`, in that order."""
+    if isinstance(column, TextColumn):
+        starts, data = column.gather(positions)
+        return {"starts": starts, "lengths": column.lengths[positions], "data": data}
+    if isinstance(column, CategoryColumn):
+        return {"codes": column.codes[positions]}
+    return {"array": column.array[positions]}
+
+
+def _plain(values):
+    if not all(type(value) in PLAIN_TYPES for value in values):
+        raise ValueError("The snapshot can only hold text, numbers and flags outside the typed columns")
+    return values
+
+
+def write_snapshot(path, columns, positions, state):
+    """
+    Writes the rows of `columns` (field -> column) at `positions`, in that order, and
+    `state` (anything JSON can hold) to `path`. The file is replaced once the new one is
+    complete. Raises ValueError if a value can't be written; OSError if the file can't.
+    """
+    positions = np.asarray(positions, np.int64)
+    header = {"count": len(positions), "state": state, "columns": {}}
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(bytes(ALIGN))
+            for field, column in columns.items():
+                entry = header["columns"][field] = {"kind": column_kind(column), "arrays": {}}
+                for name, array in _column_arrays(column, positions).items():
+                    f.write(bytes(-f.tell() % ALIGN))
+                    entry["arrays"][name] = [array.dtype.str, f.tell(), len(array)]
+                    np.ascontiguousarray(array).tofile(f)
+                if isinstance(column, CategoryColumn):
+                    entry["categories"] = _plain(column.categories)
+                if column.other:
+                    rows = {position: row for row, position in enumerate(positions.tolist())}
+                    other = {str(rows[p]): value for p, value in column.other.items() if p in rows}
+                    entry["other"] = dict(zip(other, _plain(list(other.values()))))
+            try:
+                encoded = json.dumps(header).encode()
+            except TypeError as e:
+                raise ValueError(f"The snapshot state can't be written: {e}") from e
+            offset = f.tell()
+            f.write(encoded)
+            f.seek(0)
+            f.write(PREFIX.pack(MAGIC, offset, len(encoded)))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_snapshot(path):
+    """
+    Returns (state, row count, field -> column) from the snapshot at `path`, the columns'
+    arrays mapping the file. Returns None if there is no snapshot or it can't be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):  # Missing, unreadable or empty
+        return None
+    try:
+        magic, offset, length = PREFIX.unpack_from(mapped)
+        if magic != MAGIC:
+            return None
+        header = json.loads(mapped[offset:offset + length])
+        columns = {}
+        for field, entry in header["columns"].items():
+            column = columns[field] = make_column(entry["kind"])
+            for name, (dtype, start, count) in entry["arrays"].items():
+                setattr(column, name, np.frombuffer(mapped, np.dtype(dtype), count, start))
+            if isinstance(column, TextColumn):
+                column.used = len(column.data)
+            if isinstance(column, CategoryColumn):
+                for value in entry["categories"]:
+                    column.code(value)
+            column.other = {int(row): value for row, value in entry.get("other", {}).items()}
+        return header["state"], header["count"], columns
+    except (ValueError, KeyError, TypeError, struct.error):
+        return None
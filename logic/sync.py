@@ -0,0 +1,928 @@
+"""
+Offline-first sync between copies of the flight log. Each crew's laptop and the central
+log keep a database of their own (a replica) and, whenever they can, swap the changes
+the other is missing as a bundle: a file carried across, or an HTTP exchange.
+
+    python -m logic.sync clone crew-b.db --name "Crew B"   # a new replica of this database
+    python -m logic.sync export for-central.bundle --to central
+    python -m logic.sync merge from-crew-b.bundle
+    python -m logic.sync serve --port 8765                  # on the central log
+    python -m logic.sync exchange http://central:8765       # on a laptop: sends, then receives
+    python -m logic.sync status
+    python -m logic.sync conflicts
+
+A replica records its own changes when a sync starts, from the mission history and the
+lookup tables: one entry per mission field (or lookup value) in sync_changes, with who
+made it, its sequence number there and its clock (see db/models.py). A field keeps only
+its latest entry. Each replica's version vector (sync_replicas.seq) says how far it has
+every replica's changes; a bundle carries the entries past the receiver's vector, read
+off the (origin, seq) index, so what a sync costs depends on the changes, not on the
+number of missions. Missions carry their version vector too: the latest change to them
+by each replica that the sender had merged.
+
+Merging is deterministic: of two entries for a field the one with the later clock wins,
+ties going to the higher replica uuid, so replicas that have merged the same changes hold
+the same missions whatever order they came in. Clocks are the time of the change in
+milliseconds, but always later than any clock already merged, so a change made after
+merging another wins over it even on a laptop whose clock is behind. Two changes to the
+same field neither replica had seen the other's (by the mission's version vector) are
+listed in sync_conflicts; the losing value stays in the mission history, so "Revert
+Row..." brings it back. Whether a mission is deleted is a field of its own: a deletion
+and an edit of another field both stand (the mission stays deleted, with the edit if it
+is ever restored).
+
+Missions are known everywhere by the replica that created them and their ID there
+(sync_missions); their local IDs differ, and associated_mission is translated. Lookup
+values only accumulate. A database copied by hand would share its original's identity;
+make copies with `clone`.
+
+Bundles are NumPy .npz archives (deflated): the replicas by uuid, the sender's version
+vector, the missions by (replica, ID) with their version vectors, and the entries and
+their values as typed columns, text as one UTF-8 buffer.
+"""
+import argparse
+import io
+import os
+import sys
+import uuid
+import zipfile
+from collections import namedtuple
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.request import Request, urlopen
+import numpy as np
+from db.database import ReadSessionLocal, SessionLocal, make_engine
+from db.models import HISTORY_FIELDS, MISSION_LOOKUP_TABLES, ROW_DELETED, ROW_INSERTED, SYNC_TABLES
+from logic.formatting import format_value
+from logic.history import from_ms, to_ms
+from logic.schema import FIELD
+
+BUNDLE_FORMAT = 1
+
+# Keeps IN (...) lists well under SQLite's bound-parameter limit
+SYNC_CHUNK_SIZE = 500
+
+# SYNC_TABLES code of the missions
+MISSIONS = 0
+
+# The mission field that holds another mission's ID
+REF_FIELD = HISTORY_FIELDS.index("associated_mission")
+
+# An entry in a bundle. For a mission `key` is (creator's uuid, its ID there); for a
+# lookup value it's None, `field` 0 and `value` the value. A mission's creation
+# (ROW_INSERTED) has its values as a list in HISTORY_FIELDS order. Values of
+# associated_mission are mission keys. `origin` is the uuid of the replica that made it.
+Entry = namedtuple("Entry", "tbl key field value clock origin seq")
+
+SyncResult = namedtuple("SyncResult", "received merged inserted updated deleted conflicts")
+
+# A conflict as listed by conflicts(): replica names (or uuids), resolved_at a datetime
+Conflict = namedtuple("Conflict", "mission_id attr kept lost kept_by lost_by resolved_at")
+
+_local_entry = namedtuple("_local_entry", "value clock origin seq")
+
+_snapshot_columns = ", ".join(HISTORY_FIELDS)
+
+
+class Bundle:
+    """
+    Changes on their way from one replica (`sender`, a uuid) to another: `entries`, and
+    `versions`, {uuid: (seq, clock)} of what the sender had merged of each replica.
+    `row_versions` holds the version vector of each mission with entries, {key: {uuid: seq}}.
+    """
+
+    def __init__(self, sender, names=None):
+        self.sender = sender
+        self.names = dict(names or {})  # uuid -> name, of the replicas the sender knows
+        self.versions = {}
+        self.row_versions = {}
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def to_bytes(self):
+        replicas = list(dict.fromkeys([self.sender, *self.versions, *self.names,
+                                       *(entry.origin for entry in self.entries),
+                                       *(replica for vector in self.row_versions.values() for replica in vector)]))
+        replica_index = {replica: i for i, replica in enumerate(replicas)}
+        rows, row_index = [], {}
+
+        def row(key):
+            if key not in row_index:
+                row_index[key] = len(rows)
+                rows.append(key)
+            return row_index[key]
+
+        values = _ValueColumns(row)
+        columns = {name: [] for name in ("tbl", "row", "field", "value", "clock", "origin", "seq")}
+        for entry in self.entries:
+            columns["tbl"].append(entry.tbl)
+            columns["row"].append(-1 if entry.key is None else row(entry.key))
+            columns["field"].append(entry.field)
+            columns["clock"].append(entry.clock)
+            columns["origin"].append(replica_index[entry.origin])
+            columns["seq"].append(entry.seq)
+            if entry.field == ROW_INSERTED:
+                columns["value"].append(values.add_all(entry.value))
+            else:
+                columns["value"].append(values.add(entry.value, entry.field == REF_FIELD and entry.tbl == MISSIONS))
+        vectors = [(row(key), replica_index[replica], seq) for key, vector in self.row_versions.items()
+                   for replica, seq in vector.items()]
+
+        arrays = {
+            "format": np.array([BUNDLE_FORMAT], np.int64),
+            "replicas": np.frombuffer(b"".join(bytes.fromhex(replica) for replica in replicas), np.uint8),
+            "versions": np.array([self.versions.get(replica, (0, 0)) for replica in replicas], np.int64).reshape(-1, 2),
+            "row_origin": np.array([replica_index[origin] for origin, _ in rows], np.int32),
+            "row_origin_id": np.array([origin_id for _, origin_id in rows], np.int64),
+            "vector_row": np.array([v[0] for v in vectors], np.int32),
+            "vector_replica": np.array([v[1] for v in vectors], np.int32),
+            "vector_seq": np.array([v[2] for v in vectors], np.int64),
+            "tbl": np.array(columns["tbl"], np.int8),
+            "row": np.array(columns["row"], np.int32),
+            "field": np.array(columns["field"], np.int8),
+            "value": np.array(columns["value"], np.int64),
+            "clock": np.array(columns["clock"], np.int64),
+            "origin": np.array(columns["origin"], np.int32),
+            "seq": np.array(columns["seq"], np.int64),
+            **values.arrays(),
+        }
+        arrays["name_lengths"], arrays["names"] = _pack_texts([self.names.get(replica) for replica in replicas])
+        out = io.BytesIO()
+        np.savez_compressed(out, **arrays)
+        return out.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Reads a bundle written by to_bytes; raises ValueError if `data` isn't one."""
+        try:
+            with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+                arrays = {name: archive[name] for name in archive.files}
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            raise ValueError("Not a sync bundle.")
+        if "format" not in arrays or arrays["format"][0] != BUNDLE_FORMAT:
+            raise ValueError("Not a sync bundle, or one from a newer version of the flight log.")
+
+        replicas = [bytes(replica).hex() for replica in arrays["replicas"].reshape(-1, 16)]
+        names = _unpack_texts(arrays["name_lengths"], arrays["names"])
+        bundle = cls(replicas[0], {replica: name for replica, name in zip(replicas, names) if name is not None})
+        bundle.versions = {replica: (int(seq), int(clock))
+                           for replica, (seq, clock) in zip(replicas, arrays["versions"].tolist())}
+        rows = [(replicas[origin], origin_id)
+                for origin, origin_id in zip(arrays["row_origin"].tolist(), arrays["row_origin_id"].tolist())]
+        for row, replica, seq in zip(arrays["vector_row"].tolist(), arrays["vector_replica"].tolist(),
+                                     arrays["vector_seq"].tolist()):
+            bundle.row_versions.setdefault(rows[row], {})[replicas[replica]] = seq
+
+        values = _read_values(arrays, rows)
+        for tbl, row, field, value, clock, origin, seq in zip(
+                arrays["tbl"].tolist(), arrays["row"].tolist(), arrays["field"].tolist(), arrays["value"].tolist(),
+                arrays["clock"].tolist(), arrays["origin"].tolist(), arrays["seq"].tolist()):
+            value = values[value:value + len(HISTORY_FIELDS)] if field == ROW_INSERTED else values[value]
+            bundle.entries.append(Entry(tbl, rows[row] if row >= 0 else None, field, value, clock,
+                                        replicas[origin], seq))
+        return bundle
+
+
+# Value kinds in a bundle
+NULL, INTEGER, REAL, TEXT, BLOB, MISSION = range(6)
+
+
+class _ValueColumns:
+    """Values as a column of kinds and one column per kind; mission keys become rows (see Bundle)."""
+
+    def __init__(self, row):
+        self.row = row
+        self.kinds, self.integers, self.reals, self.texts = [], [], [], []
+
+    def add(self, value, is_ref=False):
+        """Adds a value; returns its index."""
+        self.kinds.append(NULL if value is None else MISSION if is_ref
+                          else INTEGER if isinstance(value, int) else REAL if isinstance(value, float)
+                          else TEXT if isinstance(value, str) else BLOB)
+        kind = self.kinds[-1]
+        if kind == MISSION:
+            self.integers.append(self.row(value))
+        elif kind == INTEGER:
+            self.integers.append(value)
+        elif kind == REAL:
+            self.reals.append(value)
+        elif kind == TEXT:
+            self.texts.append(value.encode())
+        elif kind == BLOB:
+            self.texts.append(bytes(value))
+        return len(self.kinds) - 1
+
+    def add_all(self, values):
+        """Adds a mission's values (HISTORY_FIELDS order); returns the index of the first."""
+        first = len(self.kinds)
+        for field, value in enumerate(values):
+            self.add(value, field == REF_FIELD)
+        return first
+
+    def arrays(self):
+        return {
+            "kinds": np.array(self.kinds, np.int8),
+            "integers": np.array(self.integers, np.int64),
+            "reals": np.array(self.reals, np.float64),
+            "text_lengths": np.array([len(text) for text in self.texts], np.int64),
+            "text": np.frombuffer(b"".join(self.texts), np.uint8),
+        }
+
+
+def _read_values(arrays, rows):
+    integers = iter(arrays["integers"].tolist())
+    reals = iter(arrays["reals"].tolist())
+    data = arrays["text"].tobytes()
+    ends = np.cumsum(arrays["text_lengths"]).tolist()
+    texts = iter(zip([0] + ends, ends))
+    values = []
+    for kind in arrays["kinds"].tolist():
+        if kind == NULL:
+            values.append(None)
+        elif kind == INTEGER:
+            values.append(next(integers))
+        elif kind == MISSION:
+            values.append(rows[next(integers)])
+        elif kind == REAL:
+            values.append(next(reals))
+        else:
+            start, end = next(texts)
+            values.append(data[start:end].decode() if kind == TEXT else data[start:end])
+    return values
+
+
+def _pack_texts(texts):
+    """(lengths, UTF-8 bytes) of a list of text or None (length -1)."""
+    encoded = [None if text is None else text.encode() for text in texts]
+    lengths = np.array([-1 if text is None else len(text) for text in encoded], np.int64)
+    return lengths, np.frombuffer(b"".join(text for text in encoded if text), np.uint8)
+
+
+def _unpack_texts(lengths, data):
+    data, texts, start = data.tobytes(), [], 0
+    for length in lengths.tolist():
+        texts.append(None if length < 0 else data[start:start + length].decode())
+        start += max(length, 0)
+    return texts
+
+
+# --- The database side ---
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), SYNC_CHUNK_SIZE):
+        yield tuple(values[start:start + SYNC_CHUNK_SIZE])
+
+
+def _marks(values):
+    return ", ".join("?" * len(values))
+
+
+def _lock(conn):
+    # Any write takes the write lock, held to the commit, so no other writer's changes can
+    # come between reading what to record and recording it (or merging after it)
+    conn.exec_driver_sql("UPDATE sync_replicas SET seq = seq WHERE 0")
+
+
+def _local_replica(conn):
+    """(id, uuid, seq) of this replica."""
+    return conn.exec_driver_sql("SELECT id, uuid, seq FROM sync_replicas WHERE local").first()
+
+
+def _captured(conn, source):
+    return conn.exec_driver_sql("SELECT last_id FROM sync_captures WHERE source = ?", (source,)).scalar() or 0
+
+
+def _record_captured(conn, source, last_id):
+    conn.exec_driver_sql("INSERT INTO sync_captures (source, last_id) VALUES (?, ?) "
+                         "ON CONFLICT (source) DO UPDATE SET last_id = excluded.last_id", (source, last_id))
+
+
+def _capture(conn):
+    """
+    Records the local changes made since the last time as entries of this replica: from
+    the mission history (a mission's creation, each changed field, deletion) and the
+    lookup values added. Returns how many entries were recorded.
+    """
+    local, _, seq = _local_replica(conn)
+    latest_clock = conn.exec_driver_sql("SELECT MAX(clock) FROM sync_replicas").scalar() or 0
+    changes = conn.exec_driver_sql(
+        "SELECT id, mission_id, changed_at, field, value FROM mission_history WHERE id > ? ORDER BY id",
+        (_captured(conn, "mission_history"),)).fetchall()
+
+    known = set()
+    for chunk in _chunks({mission_id for _, mission_id, _, _, _ in changes}):
+        known.update(mission_id for (mission_id,) in conn.exec_driver_sql(
+            f"SELECT mission_id FROM sync_missions WHERE mission_id IN ({_marks(chunk)})", chunk))
+    new_missions = []
+    latest = {}  # (tbl, row_id, field) -> (changed_at, value) of the last change to each
+    for change_id, mission_id, changed_at, field, value in changes:
+        if field == ROW_INSERTED and mission_id not in known:
+            known.add(mission_id)
+            new_missions.append(mission_id)
+            latest[(MISSIONS, mission_id, ROW_INSERTED)] = (changed_at, change_id)  # Its snapshot
+        elif field == ROW_INSERTED:
+            # Back again (reverted, or SQLite reused its ID): not deleted, with the values
+            # it came back with
+            snapshot = conn.exec_driver_sql(f"SELECT {_snapshot_columns} FROM mission_snapshots "
+                                            f"WHERE id = ? AND change_id = ?", (mission_id, change_id)).first()
+            for code, stored in enumerate(snapshot or ()):
+                latest[(MISSIONS, mission_id, code)] = (changed_at, stored)
+            latest[(MISSIONS, mission_id, ROW_DELETED)] = (changed_at, 0)
+        elif mission_id in known:  # Missions deleted before sync started aren't
+            latest[(MISSIONS, mission_id, field)] = (changed_at, 1 if field == ROW_DELETED else value)
+
+    now = to_ms(datetime.now())
+    lookup_ends = {}
+    for name in MISSION_LOOKUP_TABLES.values():
+        tbl = SYNC_TABLES.index(name)
+        lookup_ends[name] = _captured(conn, name)
+        for lookup_id, value in conn.exec_driver_sql(f"SELECT id, name FROM {name} WHERE id > ? ORDER BY id",
+                                                     (lookup_ends[name],)):
+            latest[(tbl, lookup_id, 0)] = (now, value)
+            lookup_ends[name] = lookup_id
+
+    entries, clock, row_seqs = [], latest_clock, {}
+    for (tbl, row_id, field), (changed_at, value) in latest.items():
+        seq += 1
+        entry_clock = max(changed_at, latest_clock + 1)
+        clock = max(clock, entry_clock)
+        entries.append((tbl, row_id, field, value, entry_clock, local, seq))
+        if tbl == MISSIONS:
+            row_seqs[row_id] = seq
+
+    if new_missions:
+        conn.exec_driver_sql("INSERT INTO sync_missions (mission_id, origin, origin_id) VALUES (?, ?, ?)",
+                             [(mission_id, local, mission_id) for mission_id in new_missions])
+    if entries:
+        conn.exec_driver_sql("INSERT OR REPLACE INTO sync_changes (tbl, row_id, field, value, clock, origin, seq) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", entries)
+        _merge_row_versions(conn, [(row_id, local, row_seq) for row_id, row_seq in row_seqs.items()])
+        conn.exec_driver_sql("UPDATE sync_replicas SET seq = ?, clock = MAX(clock, ?) WHERE id = ?",
+                             (seq, clock, local))
+    if changes:
+        _record_captured(conn, "mission_history", changes[-1][0])
+    for name, last in lookup_ends.items():
+        _record_captured(conn, name, last)
+    return len(entries)
+
+
+def _merge_row_versions(conn, versions):
+    """Raises missions' version vectors to (mission ID, replica id, seq) where they're behind."""
+    if versions:
+        conn.exec_driver_sql("INSERT INTO sync_row_versions (mission_id, replica, seq) VALUES (?, ?, ?) "
+                             "ON CONFLICT (mission_id, replica) DO UPDATE SET seq = MAX(seq, excluded.seq)",
+                             versions)
+
+
+def _replicas(conn):
+    """{id: (uuid, name, seq, clock)} of the replicas known here."""
+    return {id_: tuple(rest) for id_, *rest in conn.exec_driver_sql(
+        "SELECT id, uuid, name, seq, clock FROM sync_replicas")}
+
+
+def _seqs(versions):
+    """{uuid: seq} of a Bundle's versions."""
+    return {replica: seq for replica, (seq, _) in versions.items()}
+
+
+def _mission_keys(conn, mission_ids, uuids):
+    """{local mission ID: (creator's uuid, its ID there)} of those sync knows."""
+    keys = {}
+    for chunk in _chunks(set(mission_ids)):
+        for mission_id, origin, origin_id in conn.exec_driver_sql(
+                f"SELECT mission_id, origin, origin_id FROM sync_missions WHERE mission_id IN ({_marks(chunk)})",
+                chunk):
+            keys[mission_id] = (uuids[origin], origin_id)
+    return keys
+
+
+def _local_ids(conn, keys, ids):
+    """{mission key: local ID} of those known here; `ids` maps uuids to sync_replicas ids."""
+    by_origin = {}
+    for origin, origin_id in keys:
+        by_origin.setdefault(origin, []).append(origin_id)
+    local_ids = {}
+    for origin, origin_ids in by_origin.items():
+        for chunk in _chunks(origin_ids):
+            for origin_id, mission_id in conn.exec_driver_sql(
+                    f"SELECT origin_id, mission_id FROM sync_missions WHERE origin = ? "
+                    f"AND origin_id IN ({_marks(chunk)})", (ids[origin], *chunk)):
+                local_ids[(origin, origin_id)] = mission_id
+    return local_ids
+
+
+def version_bundle(session):
+    """A Bundle of this replica's version vector only, without changes (what `serve` answers a GET with)."""
+    conn = session.connection()
+    replicas = _replicas(conn)
+    bundle = Bundle(_local_replica(conn).uuid, {uuid_: name for uuid_, name, _, _ in replicas.values() if name})
+    bundle.versions = {uuid_: (seq, clock) for uuid_, _, seq, clock in replicas.values()}
+    return bundle
+
+
+def changes_for(session, versions=None):
+    """
+    A Bundle of the changes a replica that has merged `versions` ({uuid: seq}; default
+    nothing) is missing, after recording the local changes made since the last sync.
+    Commits.
+    """
+    versions = versions or {}
+    conn = session.connection()
+    _lock(conn)
+    _capture(conn)
+    bundle = version_bundle(session)
+    replicas = _replicas(conn)
+    uuids = {id_: replica[0] for id_, replica in replicas.items()}
+    changes = []
+    for id_, (uuid_, _, seq, _) in replicas.items():
+        if seq > versions.get(uuid_, 0):
+            changes += conn.exec_driver_sql(
+                "SELECT origin, tbl, row_id, field, value, clock, seq FROM sync_changes "
+                "WHERE origin = ? AND seq > ? ORDER BY seq", (id_, versions.get(uuid_, 0))).fetchall()
+
+    missions = [change for change in changes if change[1] == MISSIONS]
+    creations = [(row_id, value) for _, _, row_id, field, value, _, _ in missions if field == ROW_INSERTED]
+    snapshots = {}
+    for chunk in _chunks(creations):
+        for mission_id, change_id, *values in conn.exec_driver_sql(
+                f"SELECT id, change_id, {_snapshot_columns} FROM mission_snapshots "
+                f"WHERE (id, change_id) IN (VALUES {', '.join(['(?, ?)'] * len(chunk))})",
+                tuple(param for creation in chunk for param in creation)):
+            snapshots[(mission_id, change_id)] = values
+    refs = {values[REF_FIELD] for values in snapshots.values()}
+    refs.update(value for _, _, _, field, value, _, _ in missions if field == REF_FIELD)
+    refs.discard(None)
+    mission_ids = {row_id for _, _, row_id, _, _, _, _ in missions}
+    keys = _mission_keys(conn, mission_ids | refs, uuids)
+    for chunk in _chunks(mission_ids):
+        for mission_id, replica, seq in conn.exec_driver_sql(
+                f"SELECT mission_id, replica, seq FROM sync_row_versions WHERE mission_id IN ({_marks(chunk)})", chunk):
+            bundle.row_versions.setdefault(keys[mission_id], {})[uuids[replica]] = seq
+
+    for origin, tbl, row_id, field, value, clock, seq in changes:
+        if tbl != MISSIONS:
+            bundle.entries.append(Entry(tbl, None, field, value, clock, uuids[origin], seq))
+            continue
+        if field == ROW_INSERTED:
+            value = list(snapshots[(row_id, value)])
+            value[REF_FIELD] = keys.get(value[REF_FIELD])
+        elif field == REF_FIELD:
+            value = keys.get(value)
+        bundle.entries.append(Entry(MISSIONS, keys[row_id], field, value, clock, uuids[origin], seq))
+    session.commit()
+    return bundle
+
+
+def _replica_ids(conn, bundle):
+    """{uuid: sync_replicas id} of the replicas in `bundle`, adding those new here."""
+    uuids = set(bundle.versions) | set(bundle.names) | {entry.origin for entry in bundle.entries}
+    for vector in bundle.row_versions.values():
+        uuids.update(vector)
+    conn.exec_driver_sql("INSERT OR IGNORE INTO sync_replicas (uuid, local, seq, clock) VALUES (?, 0, 0, 0)",
+                         [(replica,) for replica in uuids])
+    if bundle.names:
+        conn.exec_driver_sql("UPDATE sync_replicas SET name = ? WHERE uuid = ? AND NOT local",
+                             [(name, replica) for replica, name in bundle.names.items()])
+    return {replica: id_ for id_, (replica, *_) in _replicas(conn).items()}
+
+
+def _merge_lookups(conn, entries, ids):
+    """Adds lookup values; a value already here keeps its own entry."""
+    by_table = {}
+    for entry in entries:
+        by_table.setdefault(entry.tbl, []).append(entry)
+    for tbl, table_entries in by_table.items():
+        table = SYNC_TABLES[tbl]
+        conn.exec_driver_sql(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)",
+                             [(entry.value,) for entry in table_entries])
+        lookup_ids = {}
+        for chunk in _chunks({entry.value for entry in table_entries}):
+            lookup_ids.update((name, id_) for id_, name in conn.exec_driver_sql(
+                f"SELECT id, name FROM {table} WHERE name IN ({_marks(chunk)})", chunk))
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO sync_changes (tbl, row_id, field, value, clock, origin, seq) "
+            "VALUES (?, ?, 0, ?, ?, ?, ?)",
+            [(tbl, lookup_ids[entry.value], entry.value, entry.clock, ids[entry.origin], entry.seq)
+             for entry in table_entries])
+
+
+def _insert_missions(conn, rows):
+    """Inserts missions as (ID, *values in HISTORY_FIELDS order), stored values as they are."""
+    if rows:
+        conn.exec_driver_sql(
+            f"INSERT INTO missions (id, {_snapshot_columns}, created_at, updated_at) "
+            f"VALUES (?, {_marks(HISTORY_FIELDS)}, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)", rows)
+
+
+def _register_values(conn, mission_id):
+    """A mission's values by its entries: as created, with the fields changed since."""
+    change_id = conn.exec_driver_sql(
+        "SELECT value FROM sync_changes WHERE tbl = ? AND row_id = ? AND field = ?",
+        (MISSIONS, mission_id, ROW_INSERTED)).scalar()
+    values = list(conn.exec_driver_sql(f"SELECT {_snapshot_columns} FROM mission_snapshots "
+                                       f"WHERE id = ? AND change_id = ?", (mission_id, change_id)).first())
+    for field, value in conn.exec_driver_sql(
+            "SELECT field, value FROM sync_changes WHERE tbl = ? AND row_id = ? AND field >= 0",
+            (MISSIONS, mission_id)):
+        values[field] = value
+    return values
+
+
+def merge(session, bundle):
+    """
+    Merges a Bundle from another replica, after recording the local changes made since
+    the last sync: the entries this replica doesn't have yet, each kept if it's later than
+    the field's entry here. Commits. Returns a SyncResult.
+    """
+    conn = session.connection()
+    _lock(conn)
+    _capture(conn)
+    ids = _replica_ids(conn, bundle)
+    replicas = _replicas(conn)
+    uuids = {id_: replica[0] for id_, replica in replicas.items()}
+    known = {id_: replica[2] for id_, replica in replicas.items()}
+    fresh = [entry for entry in bundle.entries if entry.seq > known[ids[entry.origin]]]
+    now = to_ms(datetime.now())
+
+    _merge_lookups(conn, [entry for entry in fresh if entry.tbl != MISSIONS], ids)
+    missions = [entry for entry in fresh if entry.tbl == MISSIONS]
+
+    # Missions new here get the next IDs, past any this database has ever used
+    keys = {entry.key for entry in missions}
+    keys.update(entry.value[REF_FIELD] if entry.field == ROW_INSERTED else entry.value
+                for entry in missions if entry.field in (ROW_INSERTED, REF_FIELD))
+    keys.discard(None)
+    local_ids = _local_ids(conn, keys, ids)
+    created = {entry.key for entry in missions if entry.field == ROW_INSERTED and entry.key not in local_ids}
+    if created:
+        next_id = 1 + conn.exec_driver_sql(
+            "SELECT MAX(IFNULL((SELECT MAX(id) FROM missions), 0), IFNULL((SELECT MAX(mission_id) FROM "
+            "mission_history), 0), IFNULL((SELECT MAX(mission_id) FROM sync_missions), 0))").scalar()
+        for next_id, key in enumerate(sorted(created), start=next_id):
+            local_ids[key] = next_id
+        conn.exec_driver_sql("INSERT INTO sync_missions (mission_id, origin, origin_id) VALUES (?, ?, ?)",
+                             [(local_ids[key], ids[key[0]], key[1]) for key in created])
+    if any(entry.key not in local_ids for entry in missions):
+        raise ValueError("The bundle changes missions it doesn't create.")
+
+    def local_value(field, value):
+        return local_ids.get(value) if field == REF_FIELD and value is not None else value
+
+    existing = {local_ids[entry.key] for entry in missions if entry.key not in created}
+    mine, present = {}, set()
+    for chunk in _chunks(existing):
+        for row_id, field, value, clock, origin, seq in conn.exec_driver_sql(
+                f"SELECT row_id, field, value, clock, origin, seq FROM sync_changes "
+                f"WHERE tbl = {MISSIONS} AND row_id IN ({_marks(chunk)})", chunk):
+            mine[(row_id, field)] = _local_entry(value, clock, origin, seq)
+        present.update(id_ for (id_,) in conn.exec_driver_sql(
+            f"SELECT id FROM missions WHERE id IN ({_marks(chunk)})", chunk))
+
+    winners, conflicts = {}, []  # (mission ID, field) -> (value, clock, origin, seq)
+    for entry in missions:
+        row_id, origin = local_ids[entry.key], ids[entry.origin]
+        if entry.field == ROW_INSERTED:
+            if entry.key in created:
+                winners[(row_id, ROW_INSERTED)] = ([local_value(field, value) for field, value in enumerate(entry.value)],
+                                                   entry.clock, origin, entry.seq)
+            continue  # Created here already
+        value = local_value(entry.field, entry.value)
+        current = mine.get((row_id, entry.field))
+        # A field without an entry of its own has its value from the mission's creation
+        basis = current or mine.get((row_id, ROW_INSERTED))
+        won = basis is None or (entry.clock, entry.origin) > (basis.clock, uuids[basis.origin])
+        if (current is not None and current.value != value
+                and bundle.row_versions.get(entry.key, {}).get(uuids[current.origin], 0) < current.seq):
+            # Neither replica had seen the other's change
+            conflicts.append((row_id, entry.field, value if won else current.value, current.value if won else value,
+                              origin if won else current.origin, current.origin if won else origin, now))
+        if won:
+            winners[(row_id, entry.field)] = (value, entry.clock, origin, entry.seq)
+
+    by_mission = {}
+    for (row_id, field), (value, *_) in winners.items():
+        by_mission.setdefault(row_id, {})[field] = value
+    created_ids = sorted(local_ids[key] for key in created)
+    inserts, updates, deletes, restores = [], {}, [], []
+    for row_id in created_ids:
+        fields = by_mission[row_id]
+        values = fields[ROW_INSERTED]
+        for field, value in fields.items():
+            if field >= 0:
+                values[field] = value
+        inserts.append((row_id, *values))
+        if fields.get(ROW_DELETED) == 1:
+            deletes.append(row_id)
+    for row_id, fields in by_mission.items():
+        if row_id in existing:
+            deleted = fields.get(ROW_DELETED)
+            alive = row_id in present if deleted is None else deleted == 0
+            if not alive:
+                if row_id in present:
+                    deletes.append(row_id)
+            elif row_id not in present:
+                restores.append(row_id)
+            elif any(field >= 0 for field in fields):
+                updates[row_id] = {field: value for field, value in fields.items() if field >= 0}
+
+    # Written as stored, so the triggers see them like any other write (the history and
+    # the rest); new categorical text is encoded by the encode triggers in codes mode
+    _insert_missions(conn, inserts)
+    if created_ids:
+        for row_id, change_id in conn.exec_driver_sql(
+                "SELECT mission_id, MAX(id) FROM mission_history WHERE mission_id BETWEEN ? AND ? AND field = ? "
+                "GROUP BY mission_id", (created_ids[0], created_ids[-1], ROW_INSERTED)):
+            winners[(row_id, ROW_INSERTED)] = (change_id, *winners[(row_id, ROW_INSERTED)][1:])
+    by_fields = {}
+    for row_id, fields in updates.items():
+        by_fields.setdefault(tuple(sorted(fields)), []).append((*(fields[field] for field in sorted(fields)), row_id))
+    for fields, params in by_fields.items():
+        conn.exec_driver_sql(f"UPDATE missions SET {', '.join(f'{HISTORY_FIELDS[field]} = ?' for field in fields)} "
+                             f"WHERE id = ?", params)
+    if winners:
+        conn.exec_driver_sql(
+            "INSERT OR REPLACE INTO sync_changes (tbl, row_id, field, value, clock, origin, seq) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", [(MISSIONS, row_id, field, value, clock, origin, seq)
+                                             for (row_id, field), (value, clock, origin, seq) in winners.items()])
+    # Missions deleted here come back as their entries have them. References to a deleted
+    # mission were cleared where it was deleted, and those changes come with it.
+    _insert_missions(conn, [(row_id, *_register_values(conn, row_id)) for row_id in restores])
+    for chunk in _chunks(deletes):
+        conn.exec_driver_sql(f"DELETE FROM missions WHERE id IN ({_marks(chunk)})", chunk)
+
+    _merge_row_versions(conn, [(local_ids[key], ids[replica], seq) for key, vector in bundle.row_versions.items()
+                               if key in local_ids for replica, seq in vector.items()])
+    if conflicts:
+        conn.exec_driver_sql("INSERT INTO sync_conflicts (mission_id, field, kept, lost, kept_by, lost_by, "
+                             "resolved_at) VALUES (?, ?, ?, ?, ?, ?, ?)", conflicts)
+    # This replica now has everything the sender had
+    sender = ids[bundle.sender]
+    for replica, (seq, clock) in bundle.versions.items():
+        conn.exec_driver_sql("UPDATE sync_replicas SET seq = MAX(seq, ?), clock = MAX(clock, ?) WHERE id = ?",
+                             (seq, clock, ids[replica]))
+        conn.exec_driver_sql("INSERT INTO sync_peer_versions (peer, replica, seq) VALUES (?, ?, ?) "
+                             "ON CONFLICT (peer, replica) DO UPDATE SET seq = MAX(seq, excluded.seq)",
+                             (sender, ids[replica], seq))
+    # What merging wrote isn't a local change
+    _record_captured(conn, "mission_history",
+                     conn.exec_driver_sql("SELECT IFNULL(MAX(id), 0) FROM mission_history").scalar())
+    for name in MISSION_LOOKUP_TABLES.values():
+        _record_captured(conn, name, conn.exec_driver_sql(f"SELECT IFNULL(MAX(id), 0) FROM {name}").scalar())
+    session.commit()
+    alive_created = len(created_ids) - sum(1 for row_id in deletes if row_id not in existing)
+    return SyncResult(len(bundle), len(fresh), alive_created + len(restores), len(updates),
+                      sum(1 for row_id in deletes if row_id in existing), len(conflicts))
+
+
+# --- Files and HTTP ---
+
+def peer_versions(session, peer):
+    """
+    {uuid: seq} of what the replica `peer` (its name or uuid) had merged when it last
+    sent a bundle here; raises ValueError if it's unknown here.
+    """
+    conn = session.connection()
+    peer_id = conn.exec_driver_sql("SELECT id FROM sync_replicas WHERE uuid = ? OR name = ? ORDER BY uuid = ? DESC",
+                                   (peer, peer, peer)).scalar()
+    if peer_id is None:
+        raise ValueError(f"No replica called '{peer}' has synced with this one.")
+    return dict(conn.exec_driver_sql(
+        "SELECT r.uuid, p.seq FROM sync_peer_versions AS p JOIN sync_replicas AS r ON r.id = p.replica "
+        "WHERE p.peer = ?", (peer_id,)).fetchall())
+
+
+def export_bundle(session, path, to=None):
+    """
+    Writes the changes the replica `to` (name or uuid) is missing, by the last bundle it
+    sent here, to a bundle file; without `to`, every change. Returns how many.
+    """
+    bundle = changes_for(session, peer_versions(session, to) if to else None)
+    with open(path, "wb") as f:
+        f.write(bundle.to_bytes())
+    return len(bundle)
+
+
+def merge_file(session, path):
+    """Merges a bundle file written by export_bundle; returns a SyncResult."""
+    with open(path, "rb") as f:
+        return merge(session, Bundle.from_bytes(f.read()))
+
+
+BUNDLE_CONTENT_TYPE = "application/x-flightlog-bundle"
+
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    """
+    `serve`'s requests: GET /sync answers with this replica's version vector, POST /sync
+    merges the bundle sent and answers with the changes its sender is missing.
+    """
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/sync":
+            self.send_error(404)
+            return
+        with self.server.session_factory() as session:
+            self._reply(version_bundle(session))
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/sync":
+            self.send_error(404)
+            return
+        try:
+            bundle = Bundle.from_bytes(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            with self.server.session_factory() as session:
+                merge(session, bundle)
+                self._reply(changes_for(session, _seqs(bundle.versions)))
+        except ValueError as e:
+            self.send_error(400, str(e))
+
+    def _reply(self, bundle):
+        data = bundle.to_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", BUNDLE_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=8765, session_factory=SessionLocal, quiet=False):
+    """An HTTP server that syncs this replica with others (see SyncRequestHandler); call serve_forever()."""
+    server = HTTPServer((host, port), SyncRequestHandler)
+    server.session_factory = session_factory
+    server.quiet = quiet
+    return server
+
+
+def exchange(session, url, timeout=60):
+    """
+    Syncs with the replica served at `url` (make_server): sends it the changes it is
+    missing and merges those it answers with. Returns (changes sent, SyncResult).
+    """
+    url = url.rstrip("/") + "/sync"
+    with urlopen(url, timeout=timeout) as response:
+        theirs = Bundle.from_bytes(response.read())
+    outgoing = changes_for(session, _seqs(theirs.versions))
+    request = Request(url, data=outgoing.to_bytes(), headers={"Content-Type": BUNDLE_CONTENT_TYPE}, method="POST")
+    with urlopen(request, timeout=timeout) as response:
+        reply = Bundle.from_bytes(response.read())
+    return len(outgoing), merge(session, reply)
+
+
+# --- Replicas ---
+
+def clone(session, path, name=None):
+    """
+    Copies this database to `path` as a new replica named `name`, which starts with
+    everything this one has; returns its uuid.
+    """
+    if os.path.exists(path):
+        raise ValueError(f"{path} already exists.")
+    conn = session.connection()
+    _lock(conn)
+    _capture(conn)
+    session.commit()
+    session.connection().exec_driver_sql("VACUUM INTO ?", (os.path.abspath(path),))
+    session.commit()
+
+    source = _local_replica(session.connection()).uuid
+    replica = uuid.uuid4().hex
+    copy = make_engine(path)
+    try:
+        with copy.begin() as conn:
+            conn.exec_driver_sql("UPDATE sync_replicas SET local = 0 WHERE local")
+            conn.exec_driver_sql("INSERT INTO sync_replicas (uuid, name, local, seq, clock) VALUES (?, ?, 1, 0, 0)",
+                                 (replica, name))
+            _copy_versions(conn, source)
+    finally:
+        copy.dispose()
+    conn = session.connection()
+    conn.exec_driver_sql("INSERT INTO sync_replicas (uuid, name, local, seq, clock) VALUES (?, ?, 0, 0, 0)",
+                         (replica, name))
+    _copy_versions(conn, replica)
+    session.commit()
+    return replica
+
+
+def _copy_versions(conn, peer):
+    # The clone and its source start with the same changes
+    conn.exec_driver_sql("INSERT OR REPLACE INTO sync_peer_versions (peer, replica, seq) "
+                         "SELECT (SELECT id FROM sync_replicas WHERE uuid = ?), id, seq FROM sync_replicas "
+                         "WHERE seq > 0", (peer,))
+
+
+def rename(session, name):
+    """Names this replica; the name reaches the others with its next bundle."""
+    session.connection().exec_driver_sql("UPDATE sync_replicas SET name = ? WHERE local", (name,))
+    session.commit()
+
+
+def replica_status(session):
+    """
+    [(name, uuid, local, changes merged here, their latest clock)] of every replica
+    known here, and how many local history rows haven't been recorded for sync yet.
+    """
+    conn = session.connection()
+    replicas = conn.exec_driver_sql("SELECT name, uuid, local, seq, clock FROM sync_replicas "
+                                    "ORDER BY local DESC, name").fetchall()
+    pending = conn.exec_driver_sql(
+        "SELECT COUNT(*) FROM mission_history WHERE id > IFNULL((SELECT last_id FROM sync_captures "
+        "WHERE source = 'mission_history'), 0)").scalar()
+    return replicas, pending
+
+
+def conflicts(session, limit=100):
+    """The latest `limit` conflicts resolved here, newest first, as Conflicts."""
+    names = {id_: name or replica for id_, (replica, name, _, _) in _replicas(session.connection()).items()}
+    return [Conflict(mission_id, "deleted" if field == ROW_DELETED else HISTORY_FIELDS[field], kept, lost,
+                     names[kept_by], names[lost_by], from_ms(resolved_at))
+            for mission_id, field, kept, lost, kept_by, lost_by, resolved_at in session.connection().exec_driver_sql(
+                "SELECT mission_id, field, kept, lost, kept_by, lost_by, resolved_at FROM sync_conflicts "
+                "ORDER BY id DESC LIMIT ?", (limit,))]
+
+
+def _label(attr):
+    field = FIELD.get(attr)
+    return field.label if field else attr
+
+
+def _print_result(result):
+    print(f"Merged {result.merged} of {result.received} change(s): {result.inserted} mission(s) added, "
+          f"{result.updated} changed, {result.deleted} deleted, {result.conflicts} conflict(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list the replicas this one has synced with")
+    name_cmd = commands.add_parser("name", help="name this replica")
+    name_cmd.add_argument("name")
+    clone_cmd = commands.add_parser("clone", help="copy this database as a new replica")
+    clone_cmd.add_argument("path")
+    clone_cmd.add_argument("--name")
+    export_cmd = commands.add_parser("export", help="write the changes a replica is missing to a bundle")
+    export_cmd.add_argument("path")
+    export_cmd.add_argument("--to", help="the replica's name or uuid (default: every change)")
+    merge_cmd = commands.add_parser("merge", help="merge a bundle from another replica")
+    merge_cmd.add_argument("path")
+    serve_cmd = commands.add_parser("serve", help="sync with replicas over HTTP")
+    serve_cmd.add_argument("--host", default="0.0.0.0")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    exchange_cmd = commands.add_parser("exchange", help="sync with a replica that serves")
+    exchange_cmd.add_argument("url")
+    conflicts_cmd = commands.add_parser("conflicts", help="list the latest conflicts and how they were resolved")
+    conflicts_cmd.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "status":
+            with ReadSessionLocal() as session:
+                replicas, pending = replica_status(session)
+            for name, replica, local, seq, clock in replicas:
+                latest = f", latest {from_ms(clock):%Y-%m-%d %H:%M}" if clock else ""
+                print(f"{'*' if local else ' '} {name or '(unnamed)':<20} {replica}  {seq} change(s){latest}")
+            print(f"{pending} local change(s) not recorded yet")
+        elif args.command == "name":
+            with SessionLocal() as session:
+                rename(session, args.name)
+        elif args.command == "clone":
+            with SessionLocal() as session:
+                replica = clone(session, args.path, args.name)
+            print(f"Created replica {replica} at {args.path}")
+        elif args.command == "export":
+            with SessionLocal() as session:
+                count = export_bundle(session, args.path, args.to)
+            print(f"Wrote {count} change(s) to {args.path}")
+        elif args.command == "merge":
+            with SessionLocal() as session:
+                _print_result(merge_file(session, args.path))
+        elif args.command == "serve":
+            server = make_server(args.host, args.port)
+            print(f"Syncing on http://{args.host}:{args.port}/sync (Ctrl+C stops)")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        elif args.command == "exchange":
+            with SessionLocal() as session:
+                sent, result = exchange(session, args.url)
+            print(f"Sent {sent} change(s)")
+            _print_result(result)
+        else:
+            with ReadSessionLocal() as session:
+                for conflict in conflicts(session, args.limit):
+                    print(f"{conflict.resolved_at:%Y-%m-%d %H:%M}  mission {conflict.mission_id} "
+                          f"{_label(conflict.attr)}: kept {format_value(conflict.kept) or '(blank)'} "
+                          f"({conflict.kept_by}) over {format_value(conflict.lost) or '(blank)'} ({conflict.lost_by})")
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""
+Offline METAR archive for filling in a mission's weather from its date and site.
+
+    python -m logic.weather ingest dumps/2019.csv dumps/sa.txt [--month 2019-06]
+    python -m logic.weather lookup KLAF 2024-03-07T19:00
+    python -m logic.weather backfill [--hour 18] [--max-gap 3]
+
+The archive is one memory-mapped file (`[weather] archive` in settings.ini, default
+weather.metar). Reports are sorted by (station, time): a station's observation times
+are a sorted array of int64 seconds that `nearest()` bisects in place, and the report
+text is zlib-compressed in blocks of BLOCK_SIZE consecutive reports against a preset
+dictionary of typical report text, so a lookup reads a few pages and inflates one
+small block. Nothing is loaded up front.
+
+Missions record a site and a date, not a station and a time. Sites map to stations
+through the [stations] section of settings.ini ("Field 9D = KLAF"), then through the
+station most often seen in the site's existing METARs; a site that is itself a station
+in the archive maps to itself. Date-only missions are looked up at FLIGHT_HOUR_UTC.
+"""
+import argparse
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from db.database import SessionLocal
+from db.models import Mission
+from db.settings import load_settings
+from logic.flight_ops import iter_missions, save_missions
+from logic.metar import HEAD_RE, decode_metar
+
+_settings = load_settings()
+ARCHIVE_PATH = _settings.get("weather", "archive", fallback="weather.metar")
+FLIGHT_HOUR_UTC = _settings.getint("weather", "flight_hour_utc", fallback=18)
+MAX_GAP = timedelta(hours=_settings.getfloat("weather", "max_gap_hours", fallback=3))
+CONFIGURED_STATIONS = dict(_settings["stations"]) if _settings.has_section("stations") else {}
+
+# Small blocks keep lookups fast; the preset dictionary keeps them compressing well
+BLOCK_SIZE = 16
+DICTIONARY_SIZE = 4096
+BACKFILL_CHUNK_SIZE = 20_000
+
+# magic, block size, stations, reports, blocks, dictionary size; then the dictionary
+# (padded to 8 bytes), station codes (8 bytes each), station start indexes (stations + 1),
+# times (reports), block offsets (blocks + 1), compressed blocks. Everything is
+# little-endian and 8-byte aligned.
+MAGIC = b"FLTMETR1"
+HEADER = struct.Struct("<8sIIQQQ")
+EPOCH = datetime(1970, 1, 1)
+
+Report = namedtuple("Report", ["station", "time", "raw"])
+
+# NOAA cycle files put "2019/06/01 18:53" on the line before each report
+NOAA_TIME_RE = re.compile(r"^(\d{4})/(\d\d)/(\d\d) (\d\d):(\d\d)$")
+METAR_COLUMNS = ("metar", "raw_text", "raw_metar", "report")
+TIME_COLUMNS = ("valid", "observation_time", "time", "timestamp", "date")
+STATION_COLUMNS = ("station", "station_id", "icao")
+
+
+def to_seconds(when):
+    return (when - EPOCH) // timedelta(seconds=1)
+
+
+def from_seconds(seconds):
+    return EPOCH + timedelta(seconds=seconds)
+
+
+class MetarArchive:
+    """A read-only, memory-mapped METAR archive written by write_archive()."""
+
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.block_size, n_stations, n_reports, n_blocks, dict_size = HEADER.unpack_from(self._map)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a METAR archive")
+
+        view = memoryview(self._map)
+        offset = HEADER.size
+        self._dictionary = bytes(view[offset:offset + dict_size])
+        offset += -(-dict_size // 8) * 8
+        codes = bytes(view[offset:offset + 8 * n_stations])
+        offset += 8 * n_stations
+        starts = view[offset:offset + 8 * (n_stations + 1)].cast("Q")
+        offset += 8 * (n_stations + 1)
+        self._ranges = {codes[8 * i:8 * i + 8].rstrip(b"\0").decode("ascii"): (starts[i], starts[i + 1])
+                        for i in range(n_stations)}
+        starts.release()
+        self._times = view[offset:offset + 8 * n_reports].cast("q")
+        offset += 8 * n_reports
+        self._offsets = view[offset:offset + 8 * (n_blocks + 1)].cast("Q")
+        self._blocks_start = offset + 8 * (n_blocks + 1)
+        self._view = view
+        self._block_cache = {}
+        self.size = n_reports
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, station):
+        return station in self._ranges
+
+    @property
+    def stations(self):
+        return list(self._ranges)
+
+    def _block(self, number):
+        reports = self._block_cache.get(number)
+        if reports is None:
+            start = self._blocks_start + self._offsets[number]
+            end = self._blocks_start + self._offsets[number + 1]
+            inflate = zlib.decompressobj(zdict=self._dictionary)
+            reports = inflate.decompress(self._view[start:end]).decode("ascii").split("\n")
+            if len(self._block_cache) >= 64:
+                self._block_cache.clear()
+            self._block_cache[number] = reports
+        return reports
+
+    def _report(self, station, index):
+        block = self._block(index // self.block_size)
+        return Report(station, from_seconds(self._times[index]), block[index % self.block_size])
+
+    def nearest(self, station, when, max_gap=MAX_GAP):
+        """The station's report closest to `when` (naive UTC), or None if none is within `max_gap`."""
+        lo, hi = self._ranges.get(station, (0, 0))
+        if lo == hi:
+            return None
+        target = to_seconds(when)
+        i = bisect_left(self._times, target, lo, hi)
+        # The closest is the first report at or after `when`, or the one before it
+        if i == hi or (i > lo and target - self._times[i - 1] <= self._times[i] - target):
+            i -= 1
+        if abs(self._times[i] - target) > max_gap.total_seconds():
+            return None
+        return self._report(station, i)
+
+    def reports(self):
+        """Yields every Report in (station, time) order."""
+        for station, (lo, hi) in self._ranges.items():
+            for i in range(lo, hi):
+                yield self._report(station, i)
+
+    def close(self):
+        if self._map.closed:
+            return
+        # Views into the map have to be released before it can be closed
+        self._block_cache.clear()
+        self._times.release()
+        self._offsets.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def open_archive(path=ARCHIVE_PATH):
+    """The archive at `path`, or None if there isn't one yet."""
+    return MetarArchive(path) if os.path.exists(path) else None
+
+
+def write_archive(path, reports, block_size=BLOCK_SIZE):
+    """
+    Writes (station, seconds, raw) tuples to a new archive at `path`, replacing it
+    atomically. A later report for the same station and time replaces an earlier one.
+    Returns the number of reports written.
+    """
+    latest = {}
+    for station, seconds, raw in reports:
+        latest[station, seconds] = raw
+    keys = sorted(latest)
+
+    codes, starts, times = [], array("Q"), array("q", (seconds for _, seconds in keys))
+    for i, (station, _) in enumerate(keys):
+        if not codes or codes[-1] != station:
+            codes.append(station)
+            starts.append(i)
+    starts.append(len(keys))
+
+    # Reports sampled across the archive; zlib looks for matches at the end first
+    step = max(1, len(keys) // 200)
+    sample = "\n".join(latest[key] for key in keys[::step]).encode("ascii", "replace")
+    dictionary = sample[-DICTIONARY_SIZE:] or b"METAR"
+
+    blocks, offsets = [], array("Q", [0])
+    for start in range(0, len(keys), block_size):
+        text = "\n".join(latest[key] for key in keys[start:start + block_size])
+        deflate = zlib.compressobj(9, zdict=dictionary)
+        blocks.append(deflate.compress(text.encode("ascii", "replace")) + deflate.flush())
+        offsets.append(offsets[-1] + len(blocks[-1]))
+
+    part = path + ".part"
+    try:
+        with open(part, "wb") as f:
+            f.write(HEADER.pack(MAGIC, block_size, len(codes), len(keys), len(blocks), len(dictionary)))
+            f.write(dictionary.ljust(-(-len(dictionary) // 8) * 8, b"\0"))
+            f.write(b"".join(code.encode("ascii")[:8].ljust(8, b"\0") for code in codes))
+            for values in (starts, times, offsets):
+                if sys.byteorder != "little":
+                    values.byteswap()
+                f.write(values.tobytes())
+            for block in blocks:
+                f.write(block)
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return len(keys)
+
+
+def _report_time(raw, month):
+    """The time of a report from its DDHHMMZ group and `month` ((year, month))."""
+    head = HEAD_RE.match(raw)
+    if head is None or month is None:
+        return None
+    try:
+        return datetime(month[0], month[1], int(head.group(2)), int(head.group(3)), int(head.group(4)))
+    except ValueError:
+        return None
+
+
+def _parse_time(text):
+    text = text.strip().rstrip("Z")
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def read_dump(path, month=None):
+    """
+    Yields (station, time, raw) for each report in a METAR dump, or (None, None, line)
+    for one that can't be placed. Understands:
+
+      - CSV with a METAR column and a time column (e.g. Iowa Mesonet ASOS downloads,
+        aviationweather.gov CSV; preamble lines before the header are skipped)
+      - text with one report per line, optionally preceded by a "YYYY/MM/DD HH:MM"
+        line (NOAA cycle files); bare reports are dated from `month` ((year, month))
+    """
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        if path.lower().endswith(".csv"):
+            columns = None
+            for row in csv.reader(f):
+                names = [name.strip().lower() for name in row]
+                if columns is None:
+                    if any(name in METAR_COLUMNS for name in names):
+                        columns = [next((names.index(c) for c in candidates if c in names), None)
+                                   for candidates in (METAR_COLUMNS, TIME_COLUMNS, STATION_COLUMNS)]
+                    continue
+                metar_col, time_col, station_col = columns
+                if metar_col >= len(row):
+                    continue
+                raw = " ".join(row[metar_col].split()).upper()
+                if not raw or raw == "M":
+                    continue
+                when = _parse_time(row[time_col]) if time_col is not None and time_col < len(row) else None
+                if when is not None and when.tzinfo is not None:
+                    when = (when - when.utcoffset()).replace(tzinfo=None)
+                when = when or _report_time(raw, month)
+                # The report's own ICAO code; IEM's station column drops the K of US stations
+                head = HEAD_RE.match(raw)
+                station = head.group(1) if head else None
+                if station is None and station_col is not None and station_col < len(row):
+                    station = row[station_col].strip().upper()
+                yield (station, when, raw) if station and when else (None, None, raw)
+        else:
+            stamp = None
+            for line in f:
+                line = " ".join(line.split()).upper()
+                if not line:
+                    continue
+                match = NOAA_TIME_RE.match(line)
+                if match:
+                    stamp = datetime(*map(int, match.groups()))
+                    continue
+                head = HEAD_RE.match(line)
+                when = stamp or _report_time(line, month)
+                stamp = None
+                yield (head.group(1), when, line) if head and when else (None, None, line)
+
+
+def ingest(paths, archive_path=ARCHIVE_PATH, month=None, block_size=BLOCK_SIZE, progress=None):
+    """
+    Adds the reports in the METAR dumps at `paths` to the archive (creating it if needed).
+    Returns (reports read, reports now in the archive, lines that couldn't be placed).
+    """
+    collected = []
+    read = rejected = 0
+    existing = open_archive(archive_path)
+    if existing is not None:
+        with existing:
+            collected.extend((r.station, to_seconds(r.time), r.raw) for r in existing.reports())
+    for number, path in enumerate(paths, 1):
+        for station, when, raw in read_dump(path, month):
+            if station is None:
+                rejected += 1
+                continue
+            collected.append((station, to_seconds(when), raw))
+            read += 1
+        if progress:
+            progress(number, len(paths))
+    total = write_archive(archive_path, collected, block_size)
+    return read, total, rejected
+
+
+def site_stations(session=None):
+    """
+    {site (lower case): station} from settings.ini's [stations] section, filled in with
+    the station seen most often in each site's existing METARs.
+    """
+    seen = defaultdict(Counter)
+    rows = iter_missions([Mission.site.isnot(None), Mission.raw_metar.isnot(None)], "id",
+                         columns=["site", "raw_metar"], session=session)
+    for site, raw in rows:
+        head = HEAD_RE.match(raw.strip().upper())
+        if head:
+            seen[site.strip().lower()][head.group(1)] += 1
+    stations = {site: counts.most_common(1)[0][0] for site, counts in seen.items()}
+    stations.update((site.lower(), station.strip().upper()) for site, station in CONFIGURED_STATIONS.items())
+    return stations
+
+
+def station_for(site, stations, archive):
+    """The archive station for a mission site, or None."""
+    if not site or not site.strip():
+        return None
+    station = stations.get(site.strip().lower())
+    if station is None and site.strip().upper() in archive:
+        station = site.strip().upper()
+    return station
+
+
+def flight_time(date, hour=FLIGHT_HOUR_UTC):
+    """The time to look a mission's weather up at: its own time if it has one."""
+    if date.hour or date.minute:
+        return date
+    return date.replace(hour=hour)
+
+
+def weather_fields(raw):
+    """{sky_conditions, wind_knots} decoded from a METAR, for whatever it reports."""
+    try:
+        metar = decode_metar(raw)
+    except ValueError:
+        return {}
+    fields = {}
+    if metar.sky:
+        fields["sky_conditions"] = "OVC" if metar.sky == "VV" else metar.sky
+    if metar.wind_speed_kt is not None:
+        fields["wind_knots"] = round(metar.wind_speed_kt, 1)
+    return fields
+
+
+def backfill_missions(archive, session=None, hour=FLIGHT_HOUR_UTC, max_gap=MAX_GAP,
+                      chunk_size=BACKFILL_CHUNK_SIZE, progress=None):
+    """
+    Fills in the empty raw_metar, sky_conditions and wind_knots of every mission in one
+    pass: the METAR comes from the archive, and sky and wind are decoded from the
+    mission's METAR (its own, if it already had one). Values that are set are never
+    overwritten. Returns (missions looked at, missions filled in).
+    """
+    own_session = session is None
+    if own_session:
+        session = SessionLocal()
+    try:
+        # Connect the writer first: it puts the database in WAL mode, which lets the
+        # streaming reads below run alongside the writes
+        session.connection()
+        stations = site_stations()
+        missing = [
+            or_(Mission.raw_metar.is_(None), Mission.raw_metar == ""),
+            or_(Mission.sky_conditions.is_(None), Mission.sky_conditions == ""),
+            # Older databases keep '' in wind_knots for "not recorded"
+            or_(Mission.wind_knots.is_(None), Mission.wind_knots == ""),
+        ]
+        rows = iter_missions([or_(*missing)], "id",
+                             columns=["id", "site", "date", "raw_metar", "sky_conditions", "wind_knots"])
+        checked = filled = 0
+        updates = {}
+        for mission_id, site, date, raw, sky, wind in rows:
+            checked += 1
+            changes = {}
+            if not (raw and raw.strip()):
+                station = station_for(site, stations, archive)
+                report = station and archive.nearest(station, flight_time(date, hour), max_gap)
+                if not report:
+                    continue
+                raw = changes["raw_metar"] = report.raw
+            for attr, value in weather_fields(raw).items():
+                current = sky if attr == "sky_conditions" else wind
+                if current is None or current == "":
+                    changes[attr] = value
+            if changes:
+                updates[mission_id] = changes
+            if len(updates) >= chunk_size:
+                save_missions(updates, [], session=session)
+                filled += len(updates)
+                updates = {}
+                if progress:
+                    progress(checked, filled)
+        if updates:
+            save_missions(updates, [], session=session)
+            filled += len(updates)
+        if progress:
+            progress(checked, filled)
+        return checked, filled
+    finally:
+        if own_session:
+            session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--archive", default=ARCHIVE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_cmd = commands.add_parser("ingest", help="add METAR dumps (CSV or text) to the archive")
+    ingest_cmd.add_argument("paths", nargs="+")
+    ingest_cmd.add_argument("--month", help="YYYY-MM to date bare reports with")
+    lookup_cmd = commands.add_parser("lookup", help="print the report nearest to a time")
+    lookup_cmd.add_argument("station")
+    lookup_cmd.add_argument("time", help="UTC, e.g. 2024-03-07T19:00")
+    backfill_cmd = commands.add_parser("backfill", help="fill in every mission's missing weather")
+    backfill_cmd.add_argument("--hour", type=int, default=FLIGHT_HOUR_UTC,
+                              help="UTC hour to look date-only missions up at")
+    backfill_cmd.add_argument("--max-gap", type=float, default=MAX_GAP.total_seconds() / 3600,
+                              help="hours a report may be away from the mission")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        month = None
+        if args.month:
+            try:
+                month = tuple(map(int, args.month.split("-")))
+            except ValueError:
+                sys.exit(f"Bad --month '{args.month}'; expected YYYY-MM")
+        read, total, rejected = ingest(args.paths, args.archive, month)
+        print(f"Read {read} reports ({rejected} skipped); {args.archive} now holds {total}")
+        return
+
+    archive = open_archive(args.archive)
+    if archive is None:
+        sys.exit(f"No archive at {args.archive}; create one with 'ingest' first.")
+    with archive:
+        if args.command == "lookup":
+            when = _parse_time(args.time)
+            if when is None:
+                sys.exit(f"Bad time '{args.time}'")
+            report = archive.nearest(args.station.upper(), when)
+            print(f"{report.time:%Y-%m-%d %H:%M}Z {report.raw}" if report else "No report within range")
+        else:
+            def report(checked, filled):
+                print(f"\r{checked} missions checked, {filled} filled in", end="", file=sys.stderr, flush=True)
+
+            checked, filled = backfill_missions(archive, hour=args.hour,
+                                                max_gap=timedelta(hours=args.max_gap), progress=report)
+            print(file=sys.stderr)
+            print(f"Filled in the weather of {filled} of {checked} missions")
+
+
+if __name__ == "__main__":
+    main()
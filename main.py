@@ -1,11 +1,30 @@
 import sys
 from PyQt5.QtWidgets import QApplication
-from ui.main_window import MainWindow
-from db.database import init_db
+from ui import startup
 
-if __name__ == "__main__":
+
+def start():
+    """
+    Shows the main window of the running QApplication and returns it. The table saved on
+    the last exit is shown first, before the database modules are even imported; the
+    main window then takes its place and syncs it with the database.
+    """
+    snapshot = startup.read_table_snapshot()
+    preview = startup.show_preview(snapshot) if snapshot is not None else None
+    if preview is not None:
+        startup.wait_for_paint(preview)
+
+    from db.database import init_db
+    from ui.main_window import MainWindow
     init_db()
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(snapshot)
     window.show()
+    if preview is not None:
+        preview.close()
+    return window
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = start()
     sys.exit(app.exec_())
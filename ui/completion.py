@@ -0,0 +1,45 @@
+from PyQt5.QtWidgets import QCompleter, QLineEdit, QStyledItemDelegate
+from PyQt5.QtCore import QObject, QStringListModel, Qt
+from logic.lookups import LOOKUP_FIELDS
+
+
+class LookupCompletion(QObject):
+    """
+    One string list model per lookup field, shared by every completer for that field,
+    so a cache reload updates the form and any open cell editor at once.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.models = {field: QStringListModel(self) for field in LOOKUP_FIELDS}
+
+    def set_values(self, values, fields=None):
+        """Shows `values` ({field: sorted list}, see LookupCache) for `fields` (default all)."""
+        for field in fields if fields is not None else values:
+            if field in self.models:
+                self.models[field].setStringList(values[field])
+
+    def completer(self, field, parent=None):
+        """A case-insensitive prefix completer over the field's values."""
+        completer = QCompleter(self.models[field], parent)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        # The values are kept in this order, so the completer bisects instead of scanning
+        completer.setModelSorting(QCompleter.CaseInsensitivelySortedModel)
+        completer.setFilterMode(Qt.MatchStartsWith)
+        return completer
+
+
+class LookupDelegate(QStyledItemDelegate):
+    """Cell editor delegate that adds a completer to the lookup field columns ({column: field})."""
+
+    def __init__(self, completion, columns, parent=None):
+        super().__init__(parent)
+        self.completion = completion
+        self.columns = columns
+
+    def createEditor(self, parent, option, index):
+        editor = super().createEditor(parent, option, index)
+        field = self.columns.get(index.column())
+        if field and isinstance(editor, QLineEdit):
+            editor.setCompleter(self.completion.completer(field, editor))
+        return editor
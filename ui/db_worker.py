@@ -0,0 +1,172 @@
+import itertools
+import threading
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from db.database import SessionLocal, ReadSessionLocal
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled from the GUI thread."""
+
+
+class Job:
+    """
+    A unit of database work submitted to the DatabaseRunner.
+
+    `func(session, job)` runs on the worker thread with a session owned by that thread.
+    Long-running functions call `job.report(done, total)` between steps; that updates
+    the progress display and raises JobCancelled once the job has been cancelled, so
+    the worker can roll the transaction back. Cancelling also interrupts the SQLite
+    statement the job is running, so a slow query stops straight away.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, func, on_done=None, on_error=None, read_only=False, description=""):
+        self.id = next(self._ids)
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.read_only = read_only
+        self.description = description
+        self.done = False  # Set on the GUI thread once the job has finished or failed
+        self._cancelled = threading.Event()
+        self._progress = None  # Set by the worker before the job runs
+        self._interrupt = None  # Interrupts the job's connection while it runs
+
+    def cancel(self):
+        self._cancelled.set()
+        interrupt = self._interrupt
+        if interrupt is not None:
+            interrupt()  # sqlite3's interrupt() is safe to call from another thread
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def report(self, done, total):
+        if self.cancelled:
+            raise JobCancelled()
+        if self._progress is not None:
+            self._progress.emit(self.id, done, total)
+
+
+class DatabaseWorker(QObject):
+    """Runs jobs one at a time on its own thread, with its own write and read sessions."""
+
+    jobFinished = pyqtSignal(int, object)
+    jobFailed = pyqtSignal(int, object)
+    jobProgress = pyqtSignal(int, int, int)
+
+    def __init__(self):
+        super().__init__()
+        self.session = None
+        self.read_session = None
+
+    @pyqtSlot(object)
+    def run(self, job):
+        if job.cancelled:
+            self.jobFailed.emit(job.id, JobCancelled())
+            return
+
+        # Sessions are created on first use so they belong to this thread
+        if self.session is None:
+            self.session = SessionLocal()
+            self.read_session = ReadSessionLocal()
+        session = self.read_session if job.read_only else self.session
+
+        job._progress = self.jobProgress
+        try:
+            job._interrupt = session.connection().connection.driver_connection.interrupt
+            if job.cancelled:
+                raise JobCancelled()  # Cancelled before there was anything to interrupt
+            result = job.func(session, job)
+        except Exception as e:
+            session.rollback()
+            self.jobFailed.emit(job.id, e)
+        else:
+            self.jobFinished.emit(job.id, result)
+        finally:
+            job._interrupt = None
+
+    @pyqtSlot()
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.read_session.close()
+
+
+class DatabaseRunner(QObject):
+    """
+    Owns the database worker thread and hands results back on the GUI thread.
+
+    Jobs run in submission order, so a sync queued after a save sees the saved rows.
+    Callbacks are invoked on the GUI thread; cancelled jobs get neither callback.
+    """
+
+    busyChanged = pyqtSignal(bool)
+    progress = pyqtSignal(str, int, int)  # description, done, total
+
+    _dispatch = pyqtSignal(object)
+    _close = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = {}
+        self._thread = QThread(self)
+        self._worker = DatabaseWorker()
+        self._worker.moveToThread(self._thread)
+
+        # Cross-thread connections are queued: jobs go in, results come back
+        self._dispatch.connect(self._worker.run)
+        self._close.connect(self._worker.close)
+        self._worker.jobFinished.connect(self._job_finished)
+        self._worker.jobFailed.connect(self._job_failed)
+        self._worker.jobProgress.connect(self._job_progress)
+        self._thread.start()
+
+    def submit(self, func, on_done=None, on_error=None, read_only=False, description=""):
+        """Queues `func(session, job)` on the worker thread and returns its Job."""
+        job = Job(func, on_done, on_error, read_only, description)
+        self._jobs[job.id] = job
+        if len(self._jobs) == 1:
+            self.busyChanged.emit(True)
+        self._dispatch.emit(job)
+        return job
+
+    def cancel_all(self):
+        """Cancels the running job (at its next progress report) and everything queued."""
+        for job in self._jobs.values():
+            job.cancel()
+
+    @property
+    def busy(self):
+        return bool(self._jobs)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._close.emit()
+        self._thread.quit()
+        self._thread.wait()
+
+    def _pop(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if job:
+            job.done = True
+        if not self._jobs:
+            self.busyChanged.emit(False)
+        return job
+
+    def _job_finished(self, job_id, result):
+        job = self._pop(job_id)
+        if job and not job.cancelled and job.on_done:
+            job.on_done(result)
+
+    def _job_failed(self, job_id, error):
+        job = self._pop(job_id)
+        if job and not job.cancelled and not isinstance(error, JobCancelled) and job.on_error:
+            job.on_error(error)
+
+    def _job_progress(self, job_id, done, total):
+        job = self._jobs.get(job_id)
+        if job and not job.cancelled:
+            self.progress.emit(job.description, done, total)
@@ -0,0 +1,173 @@
+"""
+Pending cell edits of the mission table and their undo/redo history.
+
+Cells are identified by (row key, column), the row key being the mission ID of a saved
+row or the temporary ID of an unsaved one, so nothing needs renumbering when rows are
+inserted, moved or removed above an edited one. The journal only deals in cell text;
+MissionTableModel finds the rows and shows the text.
+"""
+from contextlib import contextmanager
+
+
+class CellEdit:
+    """One cell changed from `old` to `new` text; `epoch` is its row's when it was made."""
+    __slots__ = ("key", "col", "old", "new", "epoch")
+
+    def __init__(self, key, col, old, new, epoch=0):
+        self.key = key
+        self.col = col
+        self.old = old
+        self.new = new
+        self.epoch = epoch
+
+
+class EditJournal:
+    """
+    Which cells differ from their stored text, and the steps to undo and redo.
+
+    `originals` holds the text a dirty cell had before it was first edited; a cell
+    changed back to that text (by undo or by hand) is clean again. A count of dirty
+    cells per row answers is_row_dirty() without looking at the cells.
+
+    Each undo step is a list of CellEdits: one for a single edit, or all the edits made
+    inside group(), which undo and redo together. Consecutive edits of the same cell are
+    coalesced into one step, as are repeated edits of a cell within a group.
+
+    Forgetting a row (it was deleted, or left the table) costs the same however long the
+    history is: its epoch moves on, and undo and redo skip the edits of older epochs.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns  # Number of columns a row has
+        self.originals = {}  # (key, col) -> text before the first edit
+        self.dirty_rows = {}  # key -> number of dirty cells
+        self.undo_steps = []
+        self.redo_steps = []
+        self._epochs = {}  # key -> times the row was forgotten, for rows that have been
+        self._group = None  # CellEdits of the group being recorded, by cell
+        self._depth = 0
+
+    def __len__(self):
+        return len(self.originals)
+
+    def __bool__(self):
+        return bool(self.originals)
+
+    def is_dirty(self, key, col):
+        return (key, col) in self.originals
+
+    def is_row_dirty(self, key):
+        return key in self.dirty_rows
+
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    def _track(self, key, col, before, after):
+        """Updates the dirty state of a cell whose text changes from `before` to `after`."""
+        cell = (key, col)
+        original = self.originals.get(cell)  # Cell text is never None
+        if original is None:
+            if before == after:
+                return
+            self.originals[cell] = before
+            self.dirty_rows[key] = self.dirty_rows.get(key, 0) + 1
+        elif after == original:
+            del self.originals[cell]
+            count = self.dirty_rows[key] - 1
+            if count:
+                self.dirty_rows[key] = count
+            else:
+                del self.dirty_rows[key]
+
+    def record(self, key, col, old, new):
+        """Records an edit made by the user; clears the redo history."""
+        self._track(key, col, old, new)
+        self.redo_steps.clear()
+        epoch = self._epochs.get(key, 0) if self._epochs else 0
+        if self._group is not None:
+            edit = self._group.get((key, col))
+            if edit is None or edit.epoch != epoch:
+                self._group[key, col] = CellEdit(key, col, old, new, epoch)
+            else:
+                edit.new = new
+            return
+        step = self.undo_steps[-1] if self.undo_steps else None
+        if step is not None and len(step) == 1:
+            edit = step[0]
+            if edit.key == key and edit.col == col and edit.epoch == epoch:
+                edit.new = new
+                if new == edit.old:
+                    self.undo_steps.pop()  # Back where the step started
+                return
+        self.undo_steps.append([CellEdit(key, col, old, new, epoch)])
+
+    @contextmanager
+    def group(self):
+        """Records the edits made inside the block as one undo step (groups can nest)."""
+        if self._depth == 0:
+            self._group = {}
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                step = [edit for edit in self._group.values() if edit.old != edit.new]
+                self._group = None
+                if step:
+                    self.undo_steps.append(step)
+
+    def _take(self, steps):
+        """Pops the last step from `steps` that still has edits of rows not forgotten since."""
+        epochs = self._epochs
+        while steps:
+            step = steps.pop()
+            if epochs:
+                step = [edit for edit in step if edit.epoch == epochs.get(edit.key, 0)]
+            if step:
+                return step
+        return None
+
+    def undo(self):
+        """
+        Takes the last step off the undo history and returns its (key, col, text) changes
+        to apply, last edit first; None if there's nothing to undo.
+        """
+        step = self._take(self.undo_steps)
+        if step is None:
+            return None
+        self.redo_steps.append(step)
+        for edit in reversed(step):
+            self._track(edit.key, edit.col, edit.new, edit.old)
+        return [(edit.key, edit.col, edit.old) for edit in reversed(step)]
+
+    def redo(self):
+        """Like undo(), for the last step undone."""
+        step = self._take(self.redo_steps)
+        if step is None:
+            return None
+        self.undo_steps.append(step)
+        for edit in step:
+            self._track(edit.key, edit.col, edit.old, edit.new)
+        return [(edit.key, edit.col, edit.new) for edit in step]
+
+    def forget(self, keys):
+        """Drops the dirty cells and history of the rows with the given keys (e.g. deleted)."""
+        if not (self.originals or self.undo_steps or self.redo_steps):
+            return
+        for key in keys:
+            if self.dirty_rows.pop(key, None):
+                for col in range(self.columns):
+                    self.originals.pop((key, col), None)
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+
+    def clear(self):
+        """Forgets every pending edit and the history, e.g. once the edits are saved."""
+        self.originals.clear()
+        self.dirty_rows.clear()
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self._epochs.clear()
@@ -1,185 +1,230 @@
-# -*- coding: utf-8 -*-
-
-# Form implementation generated from reading ui file 'flight_log.ui'
-#
-# Created by: PyQt5 UI code generator 5.15.9
-#
-# WARNING: Any manual changes made to this file will be lost when pyuic5 is
-# run again.  Do not edit this file unless you know what you are doing.
-
-
-from PyQt5 import QtCore, QtGui, QtWidgets
-
-
-class Ui_MainWindow(object):
-    def setupUi(self, MainWindow):
-        MainWindow.setObjectName("MainWindow")
-        MainWindow.resize(1200, 800)
-        self.centralwidget = QtWidgets.QWidget(MainWindow)
-        self.centralwidget.setObjectName("centralwidget")
-        self.verticalLayout = QtWidgets.QVBoxLayout(self.centralwidget)
-        self.verticalLayout.setObjectName("verticalLayout")
-        self.missionTable = QtWidgets.QTableWidget(self.centralwidget)
-        self.missionTable.setObjectName("missionTable")
-        self.missionTable.setColumnCount(0)
-        self.missionTable.setRowCount(0)
-        self.verticalLayout.addWidget(self.missionTable)
-        self.missionFormGroup = QtWidgets.QGroupBox(self.centralwidget)
-        self.missionFormGroup.setCheckable(True)
-        self.missionFormGroup.setChecked(False)
-        self.missionFormGroup.setObjectName("missionFormGroup")
-        self.gridLayout = QtWidgets.QGridLayout(self.missionFormGroup)
-        self.gridLayout.setObjectName("gridLayout")
-        self.label = QtWidgets.QLabel(self.missionFormGroup)
-        self.label.setObjectName("label")
-        self.gridLayout.addWidget(self.label, 0, 0, 1, 1)
-        self.dateInput = QtWidgets.QDateTimeEdit(self.missionFormGroup)
-        self.dateInput.setCalendarPopup(True)
-        self.dateInput.setObjectName("dateInput")
-        self.gridLayout.addWidget(self.dateInput, 0, 1, 1, 1)
-        self.label_2 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_2.setObjectName("label_2")
-        self.gridLayout.addWidget(self.label_2, 0, 2, 1, 1)
-        self.platformInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.platformInput.setObjectName("platformInput")
-        self.gridLayout.addWidget(self.platformInput, 0, 3, 1, 1)
-        self.label_3 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_3.setObjectName("label_3")
-        self.gridLayout.addWidget(self.label_3, 0, 4, 1, 1)
-        self.chassisInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.chassisInput.setObjectName("chassisInput")
-        self.gridLayout.addWidget(self.chassisInput, 0, 5, 1, 1)
-        self.label_4 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_4.setObjectName("label_4")
-        self.gridLayout.addWidget(self.label_4, 1, 0, 1, 1)
-        self.customerInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.customerInput.setObjectName("customerInput")
-        self.gridLayout.addWidget(self.customerInput, 1, 1, 1, 1)
-        self.label_5 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_5.setObjectName("label_5")
-        self.gridLayout.addWidget(self.label_5, 1, 2, 1, 1)
-        self.siteInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.siteInput.setObjectName("siteInput")
-        self.gridLayout.addWidget(self.siteInput, 1, 3, 1, 1)
-        self.label_6 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_6.setObjectName("label_6")
-        self.gridLayout.addWidget(self.label_6, 1, 4, 1, 1)
-        self.altitudeInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.altitudeInput.setObjectName("altitudeInput")
-        self.gridLayout.addWidget(self.altitudeInput, 1, 5, 1, 1)
-        self.label_7 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_7.setObjectName("label_7")
-        self.gridLayout.addWidget(self.label_7, 2, 0, 1, 1)
-        self.speedInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.speedInput.setObjectName("speedInput")
-        self.gridLayout.addWidget(self.speedInput, 2, 1, 1, 1)
-        self.label_8 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_8.setObjectName("label_8")
-        self.gridLayout.addWidget(self.label_8, 2, 2, 1, 1)
-        self.spacingInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.spacingInput.setObjectName("spacingInput")
-        self.gridLayout.addWidget(self.spacingInput, 2, 3, 1, 1)
-        self.label_9 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_9.setObjectName("label_9")
-        self.gridLayout.addWidget(self.label_9, 2, 4, 1, 1)
-        self.skyInput = QtWidgets.QComboBox(self.missionFormGroup)
-        self.skyInput.setObjectName("skyInput")
-        self.skyInput.addItems(["", "SKC", "FEW", "SCT", "BKN", "OVC", "VV"])
-        self.gridLayout.addWidget(self.skyInput, 2, 5, 1, 1)
-        self.label_10 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_10.setObjectName("label_10")
-        self.gridLayout.addWidget(self.label_10, 3, 0, 1, 1)
-        self.windInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.windInput.setObjectName("windInput")
-        self.gridLayout.addWidget(self.windInput, 3, 1, 1, 1)
-        self.label_11 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_11.setObjectName("label_11")
-        self.gridLayout.addWidget(self.label_11, 3, 2, 1, 1)
-        self.batteryInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.batteryInput.setObjectName("batteryInput")
-        self.gridLayout.addWidget(self.batteryInput, 3, 3, 1, 1)
-        self.label_12 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_12.setObjectName("label_12")
-        self.gridLayout.addWidget(self.label_12, 3, 4, 1, 1)
-        self.filesizeInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.filesizeInput.setObjectName("filesizeInput")
-        self.gridLayout.addWidget(self.filesizeInput, 3, 5, 1, 1)
-        self.label_13 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_13.setObjectName("label_13")
-        self.gridLayout.addWidget(self.label_13, 4, 0, 1, 1)
-        self.issuesHwInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.issuesHwInput.setObjectName("issuesHwInput")
-        self.gridLayout.addWidget(self.issuesHwInput, 4, 1, 1, 1)
-        self.label_14 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_14.setObjectName("label_14")
-        self.gridLayout.addWidget(self.label_14, 4, 2, 1, 1)
-        self.issuesOperatorInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.issuesOperatorInput.setObjectName("issuesOperatorInput")
-        self.gridLayout.addWidget(self.issuesOperatorInput, 4, 3, 1, 1)
-        self.label_15 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_15.setObjectName("label_15")
-        self.gridLayout.addWidget(self.label_15, 4, 4, 1, 1)
-        self.issuesSwInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.issuesSwInput.setObjectName("issuesSwInput")
-        self.gridLayout.addWidget(self.issuesSwInput, 4, 5, 1, 1)
-        self.label_16 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_16.setObjectName("label_16")
-        self.gridLayout.addWidget(self.label_16, 5, 0, 1, 1)
-        self.outcomeInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.outcomeInput.setObjectName("outcomeInput")
-        self.gridLayout.addWidget(self.outcomeInput, 5, 1, 1, 1)
-        self.label_17 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_17.setObjectName("label_17")
-        self.gridLayout.addWidget(self.label_17, 5, 2, 1, 1)
-        self.commentsInput = QtWidgets.QLineEdit(self.missionFormGroup)
-        self.commentsInput.setObjectName("commentsInput")
-        self.gridLayout.addWidget(self.commentsInput, 5, 3, 1, 1)
-        self.label_18 = QtWidgets.QLabel(self.missionFormGroup)
-        self.label_18.setObjectName("label_18")
-        self.gridLayout.addWidget(self.label_18, 5, 4, 1, 1)
-        self.rawMetarInput = QtWidgets.QTextEdit(self.missionFormGroup)
-        self.rawMetarInput.setObjectName("rawMetarInput")
-        self.gridLayout.addWidget(self.rawMetarInput, 5, 5, 2, 1)
-        self.isTestInput = QtWidgets.QCheckBox(self.missionFormGroup)
-        self.isTestInput.setObjectName("isTestInput")
-        self.gridLayout.addWidget(self.isTestInput, 6, 0, 1, 1)
-        self.formSaveButton = QtWidgets.QPushButton(self.missionFormGroup)
-        self.formSaveButton.setObjectName("formSaveButton")
-        self.gridLayout.addWidget(self.formSaveButton, 6, 3, 1, 1)
-        self.verticalLayout.addWidget(self.missionFormGroup)
-        MainWindow.setCentralWidget(self.centralwidget)
-        self.menubar = QtWidgets.QMenuBar(MainWindow)
-        self.menubar.setGeometry(QtCore.QRect(0, 0, 1200, 22))
-        self.menubar.setObjectName("menubar")
-        MainWindow.setMenuBar(self.menubar)
-        self.statusbar = QtWidgets.QStatusBar(MainWindow)
-        self.statusbar.setObjectName("statusbar")
-        MainWindow.setStatusBar(self.statusbar)
-
-        self.retranslateUi(MainWindow)
-        QtCore.QMetaObject.connectSlotsByName(MainWindow)
-
-    def retranslateUi(self, MainWindow):
-        _translate = QtCore.QCoreApplication.translate
-        MainWindow.setWindowTitle(_translate("MainWindow", "Flight Log"))
-        self.missionFormGroup.setTitle(_translate("MainWindow", "Mission Details"))
-        self.label.setText(_translate("MainWindow", "Date:"))
-        self.label_2.setText(_translate("MainWindow", "Platform:"))
-        self.label_3.setText(_translate("MainWindow", "Chassis:"))
-        self.label_4.setText(_translate("MainWindow", "Customer:"))
-        self.label_5.setText(_translate("MainWindow", "Site:"))
-        self.label_6.setText(_translate("MainWindow", "Altitude (m):"))
-        self.label_7.setText(_translate("MainWindow", "Speed (m/s):"))
-        self.label_8.setText(_translate("MainWindow", "Spacing (m):"))
-        self.label_9.setText(_translate("MainWindow", "Sky:"))
-        self.label_10.setText(_translate("MainWindow", "Wind (kts):"))
-        self.label_11.setText(_translate("MainWindow", "Battery:"))
-        self.label_12.setText(_translate("MainWindow", "Filesize (GB):"))
-        self.label_13.setText(_translate("MainWindow", "HW Issues:"))
-        self.label_14.setText(_translate("MainWindow", "Operator Issues:"))
-        self.label_15.setText(_translate("MainWindow", "SW Issues:"))
-        self.label_16.setText(_translate("MainWindow", "Outcome:"))
-        self.label_17.setText(_translate("MainWindow", "Comments:"))
-        self.label_18.setText(_translate("MainWindow", "Raw METAR:"))
-        self.isTestInput.setText(_translate("MainWindow", "Is Test?"))
-        self.formSaveButton.setText(_translate("MainWindow", "Save New Mission"))
+# Compiled from flight_log.ui with SHA-1 06b880bfdda00236fd388e3571fe788dbf83bffb
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'flight_log.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1100, 800)
+        self.centralwidget = QtWidgets.QWidget(MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.centralwidget)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.missionTable = QtWidgets.QTableView(self.centralwidget)
+        self.missionTable.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked|QtWidgets.QAbstractItemView.SelectedClicked)
+        self.missionTable.setAlternatingRowColors(True)
+        self.missionTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.missionTable.setSortingEnabled(False)
+        self.missionTable.setObjectName("missionTable")
+        self.missionTable.horizontalHeader().setCascadingSectionResizes(False)
+        self.missionTable.horizontalHeader().setSortIndicatorShown(True)
+        self.missionTable.horizontalHeader().setStretchLastSection(True)
+        self.missionTable.verticalHeader().setStretchLastSection(False)
+        self.verticalLayout.addWidget(self.missionTable)
+        self.scrollArea = QtWidgets.QScrollArea(self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.scrollArea.sizePolicy().hasHeightForWidth())
+        self.scrollArea.setSizePolicy(sizePolicy)
+        self.scrollArea.setMinimumSize(QtCore.QSize(0, 200))
+        self.scrollArea.setFrameShape(QtWidgets.QFrame.StyledPanel)
+        self.scrollArea.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAsNeeded)
+        self.scrollArea.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.scrollArea.setWidgetResizable(True)
+        self.scrollArea.setObjectName("scrollArea")
+        self.scrollAreaWidgetContents = QtWidgets.QWidget()
+        self.scrollAreaWidgetContents.setGeometry(QtCore.QRect(0, 0, 1080, 351))
+        self.scrollAreaWidgetContents.setObjectName("scrollAreaWidgetContents")
+        self.gridLayout = QtWidgets.QGridLayout(self.scrollAreaWidgetContents)
+        self.gridLayout.setObjectName("gridLayout")
+        self.labelDate = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelDate.setObjectName("labelDate")
+        self.gridLayout.addWidget(self.labelDate, 0, 0, 1, 1)
+        self.dateInput = QtWidgets.QDateTimeEdit(self.scrollAreaWidgetContents)
+        self.dateInput.setCalendarPopup(True)
+        self.dateInput.setObjectName("dateInput")
+        self.gridLayout.addWidget(self.dateInput, 0, 1, 1, 1)
+        self.labelPlatform = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelPlatform.setObjectName("labelPlatform")
+        self.gridLayout.addWidget(self.labelPlatform, 1, 0, 1, 1)
+        self.platformInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.platformInput.setObjectName("platformInput")
+        self.gridLayout.addWidget(self.platformInput, 1, 1, 1, 1)
+        self.labelChassis = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelChassis.setObjectName("labelChassis")
+        self.gridLayout.addWidget(self.labelChassis, 2, 0, 1, 1)
+        self.chassisInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.chassisInput.setObjectName("chassisInput")
+        self.gridLayout.addWidget(self.chassisInput, 2, 1, 1, 1)
+        self.labelCustomer = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelCustomer.setObjectName("labelCustomer")
+        self.gridLayout.addWidget(self.labelCustomer, 3, 0, 1, 1)
+        self.customerInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.customerInput.setObjectName("customerInput")
+        self.gridLayout.addWidget(self.customerInput, 3, 1, 1, 1)
+        self.labelSite = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelSite.setObjectName("labelSite")
+        self.gridLayout.addWidget(self.labelSite, 4, 0, 1, 1)
+        self.siteInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.siteInput.setObjectName("siteInput")
+        self.gridLayout.addWidget(self.siteInput, 4, 1, 1, 1)
+        self.labelAltitude = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelAltitude.setObjectName("labelAltitude")
+        self.gridLayout.addWidget(self.labelAltitude, 5, 0, 1, 1)
+        self.altitudeInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.altitudeInput.setObjectName("altitudeInput")
+        self.gridLayout.addWidget(self.altitudeInput, 5, 1, 1, 1)
+        self.labelSpeed = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelSpeed.setObjectName("labelSpeed")
+        self.gridLayout.addWidget(self.labelSpeed, 6, 0, 1, 1)
+        self.speedInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.speedInput.setObjectName("speedInput")
+        self.gridLayout.addWidget(self.speedInput, 6, 1, 1, 1)
+        self.labelSpacing = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelSpacing.setObjectName("labelSpacing")
+        self.gridLayout.addWidget(self.labelSpacing, 7, 0, 1, 1)
+        self.spacingInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.spacingInput.setObjectName("spacingInput")
+        self.gridLayout.addWidget(self.spacingInput, 7, 1, 1, 1)
+        self.labelSky = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelSky.setObjectName("labelSky")
+        self.gridLayout.addWidget(self.labelSky, 8, 0, 1, 1)
+        self.skyInput = QtWidgets.QComboBox(self.scrollAreaWidgetContents)
+        self.skyInput.setObjectName("skyInput")
+        self.skyInput.addItem("")
+        self.skyInput.addItem("")
+        self.skyInput.addItem("")
+        self.skyInput.addItem("")
+        self.skyInput.addItem("")
+        self.gridLayout.addWidget(self.skyInput, 8, 1, 1, 1)
+        self.labelWind = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelWind.setObjectName("labelWind")
+        self.gridLayout.addWidget(self.labelWind, 9, 0, 1, 1)
+        self.windInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.windInput.setObjectName("windInput")
+        self.gridLayout.addWidget(self.windInput, 9, 1, 1, 1)
+        self.labelBattery = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelBattery.setObjectName("labelBattery")
+        self.gridLayout.addWidget(self.labelBattery, 10, 0, 1, 1)
+        self.batteryInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.batteryInput.setObjectName("batteryInput")
+        self.gridLayout.addWidget(self.batteryInput, 10, 1, 1, 1)
+        self.labelFilesize = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelFilesize.setObjectName("labelFilesize")
+        self.gridLayout.addWidget(self.labelFilesize, 11, 0, 1, 1)
+        self.filesizeInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.filesizeInput.setObjectName("filesizeInput")
+        self.gridLayout.addWidget(self.filesizeInput, 11, 1, 1, 1)
+        self.labelTest = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelTest.setObjectName("labelTest")
+        self.gridLayout.addWidget(self.labelTest, 12, 0, 1, 1)
+        self.isTestInput = QtWidgets.QCheckBox(self.scrollAreaWidgetContents)
+        self.isTestInput.setText("")
+        self.isTestInput.setObjectName("isTestInput")
+        self.gridLayout.addWidget(self.isTestInput, 12, 1, 1, 1)
+        self.labelHwIssues = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelHwIssues.setObjectName("labelHwIssues")
+        self.gridLayout.addWidget(self.labelHwIssues, 13, 0, 1, 1)
+        self.issuesHwInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.issuesHwInput.setObjectName("issuesHwInput")
+        self.gridLayout.addWidget(self.issuesHwInput, 13, 1, 1, 1)
+        self.labelOperatorIssues = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelOperatorIssues.setObjectName("labelOperatorIssues")
+        self.gridLayout.addWidget(self.labelOperatorIssues, 14, 0, 1, 1)
+        self.issuesOperatorInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.issuesOperatorInput.setObjectName("issuesOperatorInput")
+        self.gridLayout.addWidget(self.issuesOperatorInput, 14, 1, 1, 1)
+        self.labelSwIssues = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelSwIssues.setObjectName("labelSwIssues")
+        self.gridLayout.addWidget(self.labelSwIssues, 15, 0, 1, 1)
+        self.issuesSwInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.issuesSwInput.setObjectName("issuesSwInput")
+        self.gridLayout.addWidget(self.issuesSwInput, 15, 1, 1, 1)
+        self.labelOutcome = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelOutcome.setObjectName("labelOutcome")
+        self.gridLayout.addWidget(self.labelOutcome, 16, 0, 1, 1)
+        self.outcomeInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.outcomeInput.setObjectName("outcomeInput")
+        self.gridLayout.addWidget(self.outcomeInput, 16, 1, 1, 1)
+        self.labelComments = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelComments.setObjectName("labelComments")
+        self.gridLayout.addWidget(self.labelComments, 17, 0, 1, 1)
+        self.commentsInput = QtWidgets.QLineEdit(self.scrollAreaWidgetContents)
+        self.commentsInput.setObjectName("commentsInput")
+        self.gridLayout.addWidget(self.commentsInput, 17, 1, 1, 1)
+        self.labelRawMetar = QtWidgets.QLabel(self.scrollAreaWidgetContents)
+        self.labelRawMetar.setObjectName("labelRawMetar")
+        self.gridLayout.addWidget(self.labelRawMetar, 18, 0, 1, 1)
+        self.rawMetarInput = QtWidgets.QPlainTextEdit(self.scrollAreaWidgetContents)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.rawMetarInput.sizePolicy().hasHeightForWidth())
+        self.rawMetarInput.setSizePolicy(sizePolicy)
+        self.rawMetarInput.setObjectName("rawMetarInput")
+        self.gridLayout.addWidget(self.rawMetarInput, 18, 1, 1, 1)
+        self.scrollArea.setWidget(self.scrollAreaWidgetContents)
+        self.verticalLayout.addWidget(self.scrollArea)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem)
+        self.updateMissionButton = QtWidgets.QPushButton(self.centralwidget)
+        self.updateMissionButton.setObjectName("updateMissionButton")
+        self.horizontalLayout.addWidget(self.updateMissionButton)
+        self.saveNewMissionButton = QtWidgets.QPushButton(self.centralwidget)
+        self.saveNewMissionButton.setObjectName("saveNewMissionButton")
+        self.horizontalLayout.addWidget(self.saveNewMissionButton)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 1100, 22))
+        self.menubar.setObjectName("menubar")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "Mission Log"))
+        self.labelDate.setText(_translate("MainWindow", "Date"))
+        self.labelPlatform.setText(_translate("MainWindow", "Platform *"))
+        self.labelChassis.setText(_translate("MainWindow", "Chassis *"))
+        self.labelCustomer.setText(_translate("MainWindow", "Customer"))
+        self.labelSite.setText(_translate("MainWindow", "Site"))
+        self.labelAltitude.setText(_translate("MainWindow", "Altitude (m)"))
+        self.labelSpeed.setText(_translate("MainWindow", "Speed (m/s)"))
+        self.labelSpacing.setText(_translate("MainWindow", "Spacing (m)"))
+        self.labelSky.setText(_translate("MainWindow", "Sky Conditions"))
+        self.skyInput.setItemText(0, _translate("MainWindow", "Clear"))
+        self.skyInput.setItemText(1, _translate("MainWindow", "Few"))
+        self.skyInput.setItemText(2, _translate("MainWindow", "Scattered"))
+        self.skyInput.setItemText(3, _translate("MainWindow", "Broken"))
+        self.skyInput.setItemText(4, _translate("MainWindow", "Overcast"))
+        self.labelWind.setText(_translate("MainWindow", "Wind (kts)"))
+        self.labelBattery.setText(_translate("MainWindow", "Battery"))
+        self.labelFilesize.setText(_translate("MainWindow", "Filesize (GB)"))
+        self.labelTest.setText(_translate("MainWindow", "Is Test?"))
+        self.labelHwIssues.setText(_translate("MainWindow", "HW Issues"))
+        self.labelOperatorIssues.setText(_translate("MainWindow", "Operator Issues"))
+        self.labelSwIssues.setText(_translate("MainWindow", "SW Issues"))
+        self.labelOutcome.setText(_translate("MainWindow", "Outcome"))
+        self.labelComments.setText(_translate("MainWindow", "Comments"))
+        self.labelRawMetar.setText(_translate("MainWindow", "Raw METAR"))
+        self.updateMissionButton.setText(_translate("MainWindow", "Update Mission"))
+        self.saveNewMissionButton.setText(_translate("MainWindow", "Save New Mission"))
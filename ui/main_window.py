@@ -1,55 +1,105 @@
+import csv
+import io
+import os
 import sys
 from PyQt5.QtWidgets import (
-    QMainWindow, QMessageBox, QTableWidgetItem, QApplication, QToolBar, QAction, QScrollArea, QLineEdit,
-    QVBoxLayout, QHBoxLayout, QLabel, QGridLayout, QWidget
+    QMainWindow, QMessageBox, QApplication, QToolBar, QAction, QScrollArea, QLineEdit,
+    QVBoxLayout, QHBoxLayout, QLabel, QGridLayout, QWidget, QProgressBar, QPushButton,
+    QAbstractItemView, QFileDialog, QInputDialog, QComboBox, QCheckBox, QDateTimeEdit, QPlainTextEdit
 )
-from PyQt5.QtGui import QIcon, QColor, QBrush, QFont
-from PyQt5.QtCore import Qt
-from PyQt5.uic import loadUi
-from db.database import Session
+from PyQt5.QtGui import QIcon, QFont, QKeySequence
+from PyQt5.QtCore import Qt, QTimer
+from sqlalchemy import func
+from db.settings import DATABASE_PATH, SNAPSHOT_PATH
 from db.models import Mission
+from ui.db_worker import DatabaseRunner
+from ui.mission_table_model import HEADERS, MissionTableModel
+from ui.search_results import SearchResultsDock
+from ui.stats_dock import FleetStatsDock
+from ui.completion import LookupCompletion, LookupDelegate
+from ui.startup import restore_layout, setup_ui
+from logic import exporter, history, importer, search, weather
+from logic.lookups import LOOKUP_FIELDS, LookupCache, read_lookups
+from logic.mission_cache import MissionCache
+from logic.snapshot import write_snapshot
+from logic.metar import decode_metar
+from logic.flight_ops import parse_search, split_search, save_missions, delete_missions
+from logic.schema import FIELD, FIELDS, REQUIRED_FIELDS, parse_date, validate_columns
 from datetime import datetime, date
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # The form's input for each Mission attribute it edits; values go through the schema
+    # like table cells do
+    FORM_INPUTS = {
+        "date": "dateInput", "platform": "platformInput", "chassis": "chassisInput",
+        "customer": "customerInput", "site": "siteInput", "altitude_m": "altitudeInput",
+        "speed_m_s": "speedInput", "spacing_m": "spacingInput", "sky_conditions": "skyInput",
+        "wind_knots": "windInput", "battery": "batteryInput", "filesize_gb": "filesizeInput",
+        "is_test": "isTestInput", "issues_hw": "issuesHwInput", "issues_operator": "issuesOperatorInput",
+        "issues_sw": "issuesSwInput", "outcome": "outcomeInput", "comments": "commentsInput",
+        "raw_metar": "rawMetarInput",
+    }
+
+    def __init__(self, snapshot=None):
         super().__init__()
-        # Load the UI file created in Qt Designer
-        loadUi("ui/flight_log.ui", self)
+        # Build the UI designed in Qt Designer (ui/flight_log.ui)
+        setup_ui(self)
 
         # Resize the window to a larger size
         self.resize(1200, 800)
 
-        # --- Database Session ---
-        self.session = Session()
+        # --- Database Worker ---
+        # Every query and write runs on a background thread, so long loads and saves
+        # never freeze the window; results are applied back here on the GUI thread
+        self.db = DatabaseRunner(self)
 
         # --- State Flags ---
-        self.updating_table = False
-        self.is_undoing = False
-        self.is_redoing = False
         self.form_is_visible = True
 
+        # --- Mission Table Model ---
+        # Rows are paged in from the database as the table is scrolled, over a
+        # read-only connection so paging never contends with saves for the write lock,
+        # into a column cache the statistics can read the same missions from
+        self.mission_cache = MissionCache()
+        self.model = MissionTableModel(parent=self, runner=self.db, cache=self.mission_cache)
+        self.missionTable.setModel(self.model)
+        self.edit_triggers = self.missionTable.editTriggers()
+        self.writing = False
+
         # --- Edit Tracking ---
-        self.edited_cells = {}
-        self.undo_stack = []
-        self.redo_stack = []
-        self.current_edit_original_value = None
+        # Pending edits and their undo history live in the model's journal (model.edits)
         self.current_selected_mission_id = None
+        self.weather = None  # Offline METAR archive, see open_weather_archive
+        self.site_stations = {}
 
-        # New set to track unsaved rows by their temporary ID
-        self.unsaved_rows = {}
+        # --- Autocompletion ---
+        # Known platforms, chassis, ... read once and again after writes, so completers
+        # filter in memory instead of querying per keystroke
+        self.lookups = LookupCache()
+        self.completion = LookupCompletion(self)
+        self.lookups_job = None
 
         # --- Connect Original UI Element Signals ---
         self.saveNewMissionButton.clicked.connect(self.save_new_mission)
         self.updateMissionButton.clicked.connect(self.update_mission)
-        self.missionTable.cellPressed.connect(self.cell_pressed_for_edit)
-        self.missionTable.cellChanged.connect(self.cell_was_edited)
-        self.missionTable.cellClicked.connect(self.load_mission_to_form)
+        self.missionTable.clicked.connect(self.load_mission_to_form)
+        self.model.reloaded.connect(self.resize_columns)
+        self.model.queryFailed.connect(self.query_failed)
+        self.rawMetarInput.textChanged.connect(self.metar_changed)
+        self.siteInput.editingFinished.connect(self.fill_weather)
+        self.dateInput.dateChanged.connect(self.fill_weather)
 
         # --- Setup Toolbar and Form UI ---
         self.create_toolbar()
+        self.setup_filter_bar()
         self.setup_form_ui()
-        self.load_missions()
+        self.setup_status_bar()
+        self.setup_completion()
+        # Start from the table the last session left, if there's a snapshot of it
+        if not self.restore_snapshot(snapshot):
+            self.load_missions()
+        self.open_weather_archive()
 
     def setup_form_ui(self):
         """Sets up the layout and widgets within the mission input form."""
@@ -115,6 +165,154 @@ class MainWindow(QMainWindow):
         self.updateMissionButton.hide()
         self.saveNewMissionButton.show()
 
+    def setup_completion(self):
+        """Adds lookup completers to the form's text fields and the table's cell editors."""
+        for field, name in self.FORM_INPUTS.items():
+            widget = getattr(self, name)
+            if field in LOOKUP_FIELDS and isinstance(widget, QLineEdit):
+                widget.setCompleter(self.completion.completer(field, widget))
+        columns = {col: field.attr for col, field in enumerate(FIELDS) if field.attr in LOOKUP_FIELDS}
+        self.missionTable.setItemDelegate(LookupDelegate(self.completion, columns, self.missionTable))
+
+        # Writes from here and from elsewhere both show up as synced rows
+        self.model.synced.connect(self.missions_synced)
+        self.reload_lookups()
+
+    def reload_lookups(self):
+        """Re-reads the lookup values in the background if the cache is out of date."""
+        if not self.lookups.stale:
+            return
+        if self.lookups_job is not None:
+            self.lookups_job.cancel()
+        self.lookups_job = self.db.submit(
+            lambda session, job: read_lookups(session), on_done=self.lookups_loaded, read_only=True,
+            description="Reading lookup values",
+            on_error=lambda e: self.statusbar.showMessage(f"Could not read lookup values: {e}", 10000))
+
+    def lookups_loaded(self, values):
+        self.lookups_job = None
+        self.completion.set_values(self.lookups.values, self.lookups.replace(values))
+
+    def missions_synced(self, inserted, updated, deleted):
+        if inserted or updated:
+            self.lookups.invalidate()
+        self.reload_lookups()
+
+    def setup_status_bar(self):
+        """Adds a progress bar and a Cancel button for background database work."""
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setTextVisible(False)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_database_work)
+        self.statusbar.addPermanentWidget(self.progress_bar)
+        self.statusbar.addPermanentWidget(self.cancel_button)
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+
+        self.db.busyChanged.connect(self.database_busy_changed)
+        self.db.progress.connect(self.database_progress)
+
+    def database_busy_changed(self, busy):
+        self.progress_bar.setVisible(busy)
+        self.cancel_button.setVisible(busy)
+        if busy:
+            self.progress_bar.setRange(0, 0)  # Busy indicator until a job reports progress
+        else:
+            self.statusbar.clearMessage()
+
+    def database_progress(self, description, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.statusbar.showMessage(f"{description}: {done} of {total}")
+
+    def cancel_database_work(self):
+        """Cancels queued and running database jobs; a cancelled write is rolled back."""
+        self.db.cancel_all()
+        self.model.cancel_pending()
+        if self.writing:
+            self.set_writing(False)
+        self.statusbar.showMessage("Cancelled.", 3000)
+
+    def query_failed(self, message):
+        self.statusbar.showMessage(f"Could not load missions: {message}", 10000)
+
+    def set_writing(self, writing):
+        """Locks editing and the write actions while a save or delete is in progress."""
+        self.writing = writing
+        for action in (self.save_action, self.delete_action, self.create_row_action,
+                       self.import_action, self.undo_action, self.redo_action,
+                       self.paste_action, self.fill_down_action, self.set_column_action,
+                       self.revert_row_action):
+            action.setEnabled(not writing)
+        self.saveNewMissionButton.setEnabled(not writing)
+        self.updateMissionButton.setEnabled(not writing)
+        self.missionTable.setEditTriggers(
+            QAbstractItemView.NoEditTriggers if writing else self.edit_triggers)
+
+    def submit_write(self, func, on_done, error_title, description):
+        """Runs a write job on the database thread with the write actions locked."""
+        def done(result):
+            self.set_writing(False)
+            self.lookups.invalidate()
+            on_done(result)
+
+        def failed(error):
+            self.set_writing(False)
+            QMessageBox.critical(self, error_title, f"{description} failed:\n{error}")
+
+        self.set_writing(True)
+        self.db.submit(func, done, failed, description=description)
+
+    def closeEvent(self, event):
+        # Let the database thread finish (or roll back) and close its sessions
+        self.db.shutdown()
+        if self.weather:
+            self.weather.close()
+        self.save_snapshot()
+        super().closeEvent(event)
+
+    def restore_snapshot(self, snapshot):
+        """
+        Shows the table as the snapshot saved on the last exit has it (see ui/startup.py),
+        with its filter, sort and column widths, and syncs it with the database in the
+        background. Returns False if there's no snapshot or it doesn't fit this version.
+        """
+        if snapshot is None:
+            return False
+        state, count, columns = snapshot
+        try:
+            criteria = parse_search(state["filter"])
+            self.mission_cache.restore(columns, count, datetime.fromisoformat(state["synced_at"]))
+            self.model.restore(criteria, state)
+            restore_layout(self, state)
+        except (KeyError, IndexError, TypeError, ValueError):
+            self.mission_cache.clear()
+            return False
+        self.filter_input.blockSignals(True)
+        self.filter_input.setText(state["filter"])
+        self.filter_input.blockSignals(False)
+        self.applied_filter = state["filter"]
+        self.rank_search(self.applied_filter)
+        return True
+
+    def save_snapshot(self):
+        """
+        Saves the loaded table rows with the filter, sort and layout they're shown in, for
+        the next start to show before it has read anything from the database.
+        """
+        state = self.model.snapshot_state()
+        if not SNAPSHOT_PATH or state is None:
+            return
+        header = self.missionTable.horizontalHeader()
+        state.update(database=os.path.abspath(DATABASE_PATH), filter=self.applied_filter, headers=HEADERS,
+                     column_widths=[header.sectionSize(col) for col in range(header.count())],
+                     window_size=[self.width(), self.height()])
+        try:
+            write_snapshot(SNAPSHOT_PATH, self.mission_cache.columns, self.model.positions, state)
+        except (OSError, ValueError):
+            pass  # The next start loads the table from the database instead
+
     def create_toolbar(self):
         """Creates and configures the main toolbar with actions."""
         toolbar = QToolBar("Main Toolbar")
@@ -122,8 +320,8 @@ class MainWindow(QMainWindow):
 
         # --- Refresh Action ---
         self.refresh_action = QAction(QIcon.fromTheme("view-refresh"), "Refresh", self)
-        self.refresh_action.setStatusTip("Reload all missions from the database")
-        self.refresh_action.triggered.connect(self.load_missions)
+        self.refresh_action.setStatusTip("Fetch missions added, changed or deleted since the last refresh")
+        self.refresh_action.triggered.connect(self.refresh_missions)
         toolbar.addAction(self.refresh_action)
 
         # --- Save Edits Action ---
@@ -144,6 +342,18 @@ class MainWindow(QMainWindow):
         self.create_row_action.triggered.connect(self.create_new_empty_row)
         toolbar.addAction(self.create_row_action)
 
+        # --- Import Action ---
+        self.import_action = QAction(QIcon.fromTheme("document-import"), "Import...", self)
+        self.import_action.setStatusTip("Bulk import missions from a CSV or Excel log")
+        self.import_action.triggered.connect(self.import_missions)
+        toolbar.addAction(self.import_action)
+
+        # --- Export Action ---
+        self.export_action = QAction(QIcon.fromTheme("document-export"), "Export...", self)
+        self.export_action.setStatusTip("Export the saved missions matching the current filter and sort")
+        self.export_action.triggered.connect(self.export_missions)
+        toolbar.addAction(self.export_action)
+
         # --- Undo Action ---
         self.undo_action = QAction(QIcon.fromTheme("edit-undo"), "Undo", self)
         self.undo_action.setStatusTip("Undo the last cell edit")
@@ -156,59 +366,180 @@ class MainWindow(QMainWindow):
         self.redo_action.triggered.connect(self.redo_last_edit)
         toolbar.addAction(self.redo_action)
 
+        # --- Bulk Edit Actions ---
+        # On the table itself (and its context menu), so they don't take the keys from
+        # an open cell editor
+        self.paste_action = QAction(QIcon.fromTheme("edit-paste"), "Paste", self)
+        self.paste_action.setShortcut(QKeySequence.Paste)
+        self.paste_action.setStatusTip("Paste cells copied from a spreadsheet, adding rows as needed")
+        self.paste_action.triggered.connect(self.paste_cells)
+        self.fill_down_action = QAction("Fill Down", self)
+        self.fill_down_action.setShortcut(QKeySequence("Ctrl+D"))
+        self.fill_down_action.setStatusTip("Copy the first selected row's cell down the selected rows")
+        self.fill_down_action.triggered.connect(self.fill_down)
+        self.set_column_action = QAction("Set Column...", self)
+        self.set_column_action.setStatusTip("Set the current column of every selected row to one value")
+        self.set_column_action.triggered.connect(self.set_column_for_selection)
+        for action in (self.paste_action, self.fill_down_action, self.set_column_action):
+            action.setShortcutContext(Qt.WidgetShortcut)
+            self.missionTable.addAction(action)
+
+        # --- Revert Row Action ---
+        self.revert_row_action = QAction(QIcon.fromTheme("document-revert"), "Revert Row...", self)
+        self.revert_row_action.setStatusTip("Put the current mission back the way it was before one of its changes")
+        self.revert_row_action.triggered.connect(self.revert_current_row)
+        self.missionTable.addAction(self.revert_row_action)
+        self.missionTable.setContextMenuPolicy(Qt.ActionsContextMenu)
+
+        # --- Statistics Action ---
+        self.stats_dock = FleetStatsDock(self.db, self, cache=self.mission_cache,
+                                         table_filter=lambda: self.model.filters)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.stats_dock)
+        self.stats_dock.hide()
+        self.stats_action = self.stats_dock.toggleViewAction()
+        self.stats_action.setText("Statistics")
+        self.stats_action.setIcon(QIcon.fromTheme("x-office-spreadsheet"))
+        self.stats_action.setStatusTip("Show/Hide flights, data volume, failure rates and issues over time")
+        toolbar.addAction(self.stats_action)
+        # The rollups change with every write, which the table picks up with a sync
+        self.model.synced.connect(self.stats_dock.refresh)
+        self.model.reloaded.connect(self.stats_dock.refresh)
+
         # --- Toggle Form Action ---
         self.toggle_form_action = QAction(QIcon.fromTheme("pan-down"), "Toggle Form", self)
         self.toggle_form_action.setStatusTip("Show/Hide the new mission input form")
         self.toggle_form_action.triggered.connect(self.toggle_form)
         toolbar.addAction(self.toggle_form_action)
 
+    # Typing pauses this long (ms) before the filter is queried
+    FILTER_DELAY = 250
+
+    def setup_filter_bar(self):
+        """Adds the filter bar and makes the column headers sort; both are done in SQL."""
+        toolbar = QToolBar("Filter")
+        self.addToolBarBreak()
+        self.addToolBar(toolbar)
+        self.filter_input = QLineEdit()
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.setPlaceholderText(
+            "Filter, e.g. customer:Acme site:Field* date>=2024-01-01 altitude>100 vibration")
+        self.filter_help = ("field:value (or a,b), field:prefix*, field>value, >=, <, <=; "
+                            "quote terms with spaces; other words find missions with a word starting with them in their text")
+        self.filter_input.setToolTip(self.filter_help)
+        toolbar.addWidget(QLabel("Filter: "))
+        toolbar.addWidget(self.filter_input)
+        self.applied_filter = ""
+
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DELAY)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_input.textChanged.connect(self.filter_timer.start)
+        self.filter_input.returnPressed.connect(self.apply_filter)
+
+        # Free words are also ranked by relevance, with the text around the matches
+        self.search_results = SearchResultsDock(self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.search_results)
+        self.search_results.hide()
+        self.search_results.missionActivated.connect(self.show_mission)
+        self.search_job = None
+
+        header = self.missionTable.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(self.model.sort_column, Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.sort_missions)
+
+    def apply_filter(self):
+        """Shows the missions matching the filter bar; a newer filter replaces a pending query."""
+        self.filter_timer.stop()
+        text = self.filter_input.text().strip()
+        if text == self.applied_filter:
+            return
+        try:
+            criteria = parse_search(text)
+        except ValueError as e:
+            self.filter_input.setStyleSheet("QLineEdit { border: 1px solid red; }")
+            self.filter_input.setToolTip(str(e))
+            self.statusbar.showMessage(str(e), 5000)
+            return
+        self.filter_input.setStyleSheet("")
+        self.filter_input.setToolTip(self.filter_help)
+        if self.reload_table(lambda: self.model.set_filter(criteria), "Do you want to discard them and filter?"):
+            self.applied_filter = text
+            self.rank_search(text)
+        else:
+            self.filter_input.blockSignals(True)
+            self.filter_input.setText(self.applied_filter)
+            self.filter_input.blockSignals(False)
+
+    def rank_search(self, text):
+        """Lists the missions matching the filter's free words in the search results, best first."""
+        if self.search_job is not None:
+            self.search_job.cancel()
+            self.search_job = None
+        if not split_search(text)[1]:
+            self.search_results.hide()
+            return
+        self.search_job = self.db.submit(
+            lambda session, job: search.search_missions(session, text),
+            on_done=self.search_results_loaded, read_only=True, description="Searching",
+            on_error=lambda e: self.statusbar.showMessage(f"Search failed: {e}", 10000))
+
+    def search_results_loaded(self, hits):
+        self.search_job = None
+        self.search_results.show_hits(hits)
+        self.search_results.show()
+
+    def show_mission(self, mission_id):
+        """Selects a mission in the table and loads it into the form, if its row is loaded."""
+        row = self.model.row_for_id(mission_id)
+        if row is None:
+            self.statusbar.showMessage(
+                f"Mission {mission_id} is further down the table; scroll down to load it.", 5000)
+            return
+        index = self.model.index(row, 0)
+        self.missionTable.selectRow(row)
+        self.missionTable.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        self.load_mission_to_form(index)
+
+    def sort_missions(self, column, order):
+        """Slot for a click on a column header: re-queries the table in that order."""
+        descending = order == Qt.DescendingOrder
+        if (column, descending) == (self.model.sort_column, self.model.sort_descending):
+            return
+        if not self.reload_table(lambda: self.model.sort(column, order), "Do you want to discard them and sort?"):
+            header = self.missionTable.horizontalHeader()
+            header.blockSignals(True)
+            header.setSortIndicator(self.model.sort_column,
+                                    Qt.DescendingOrder if self.model.sort_descending else Qt.AscendingOrder)
+            header.blockSignals(False)
+
     def load_missions(self):
-        """Loads all missions from the database and populates the table."""
-        if self.edited_cells:
-            reply = QMessageBox.question(self, "Unsaved Changes",
-                                         "You have unsaved changes. Do you want to discard them and reload?",
+        """Reloads the mission table; rows are paged in from the database on demand."""
+        self.reload_table(self.model.reload)
+
+    def reload_table(self, reload, question="Do you want to discard them and reload?"):
+        """
+        Runs `reload`, which resets the model, after asking whether to discard any unsaved
+        changes. Returns False if the user chose to keep them.
+        """
+        if self.model.edits:
+            reply = QMessageBox.question(self, "Unsaved Changes", f"You have unsaved changes. {question}",
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.No:
-                return
+                return False
 
-        self.updating_table = True
-        self.edited_cells.clear()
-        self.undo_stack.clear()
-        self.redo_stack.clear()
-        self.unsaved_rows.clear()
         self.updateMissionButton.hide()
         self.saveNewMissionButton.show()
 
-        self.missionTable.setRowCount(0)
-        # This header list should match the number of columns and the Mission model attributes
-        headers = [
-            "ID", "Associated", "Date", "Platform", "Chassis", "Customer", "Site",
-            "Altitude (m)", "Speed (m/s)", "Spacing (m)", "Sky", "Wind (kts)",
-            "Battery", "Filesize (GB)", "Test?", "HW Issues", "Operator Issues",
-            "SW Issues", "Outcome", "Comments", "Raw METAR"
-        ]
-        self.missionTable.setColumnCount(len(headers))
-        self.missionTable.setHorizontalHeaderLabels(headers)
-
-        missions = self.session.query(Mission).all()
-        for row_idx, m in enumerate(missions):
-            self.missionTable.insertRow(row_idx)
-            values = [
-                m.id, m.associated_mission, m.date.strftime('%Y-%m-%d') if m.date else "",
-                m.platform, m.chassis, m.customer, m.site, m.altitude_m,
-                m.speed_m_s, m.spacing_m, m.sky_conditions, m.wind_knots,
-                m.battery, m.filesize_gb, "Yes" if m.is_test else "No",
-                m.issues_hw, m.issues_operator, m.issues_sw, m.outcome,
-                m.comments, m.raw_metar
-            ]
-
-            for col_idx, val in enumerate(values):
-                item = QTableWidgetItem(str(val or ""))
-                self.missionTable.setItem(row_idx, col_idx, item)
-
-            # Set the vertical header to the row number
-            self.missionTable.setVerticalHeaderItem(row_idx, QTableWidgetItem(str(row_idx + 1)))
+        # Resetting the model discards pending edits and their undo history and loads the
+        # first page of rows; resize_columns runs once that page has arrived
+        reload()
+        return True
 
+    def resize_columns(self):
+        # Only the rows fetched so far are measured, which keeps this cheap
         self.missionTable.resizeColumnsToContents()
 
         # Adjust column widths for "Altitude", "Speed", and "Spacing"
@@ -217,241 +548,100 @@ class MainWindow(QMainWindow):
         self.missionTable.setColumnWidth(8, altitude_col_width)  # Speed
         self.missionTable.setColumnWidth(9, altitude_col_width)  # Spacing
 
-        self.updating_table = False
-
-    def cell_pressed_for_edit(self, row, col):
-        """Slot for the cellPressed signal. Stores the cell's value before an edit."""
-        if self.updating_table:
-            return
-        item = self.missionTable.item(row, col)
-        if item:
-            self.current_edit_original_value = item.text()
-
-    def cell_was_edited(self, row, col):
-        """
-        Slot for the cellChanged signal. Tracks the edit, adds it to the undo
-        stack, and applies visual feedback.
-        """
-        if self.updating_table or self.is_undoing or self.is_redoing:
-            return
-
-        new_value = self.missionTable.item(row, col).text()
-        old_value = self.current_edit_original_value
-
-        if new_value == old_value:
-            return  # No actual change occurred
-
-        # --- Track the Edit ---
-        # Add to undo stack
-        self.undo_stack.append({'row': row, 'col': col, 'old': old_value, 'new': new_value})
-        self.redo_stack.clear()  # Clear redo stack on new edit
-        # If this is the first time this cell is edited since the last save,
-        # store its very original value.
-        if (row, col) not in self.edited_cells:
-            self.edited_cells[(row, col)] = old_value
-
-        # --- Apply Visual Feedback ---
-        # Highlight the edited cell
-        self.missionTable.item(row, col).setBackground(QColor(255, 255, 204))  # Light yellow
-        # Add an asterisk to the row header to mark it as "dirty"
-        header_item = self.missionTable.verticalHeaderItem(row)
-        if header_item and not header_item.text().endswith('*'):
-            header_item.setText(f"{row + 1}*")
+    def refresh_missions(self):
+        """Patches the table with missions inserted, updated or deleted since the last sync."""
+        self.model.sync()
 
     def undo_last_edit(self):
-        """Reverts the last change made by the user."""
-        if not self.undo_stack:
-            return  # Nothing to undo
-
-        self.is_undoing = True
-
-        last_action = self.undo_stack.pop()
-        self.redo_stack.append(last_action)
-        row, col = last_action['row'], last_action['col']
-        old_value = last_action['old']
-
-        # Revert the cell's text in the table widget
-        self.missionTable.item(row, col).setText(old_value)
-
-        # Check if the cell's value has been reverted to its original, pre-edit state
-        original_value_for_cell = self.edited_cells.get((row, col))
-        if original_value_for_cell is not None and old_value == original_value_for_cell:
-            # If so, this cell is no longer "dirty"
-            del self.edited_cells[(row, col)]
-            # Remove the cell's highlight
-            self.missionTable.item(row, col).setBackground(QBrush(Qt.white))
-
-            # Check if any other cells in the same row are still dirty
-            row_is_still_dirty = any(r == row for r, c in self.edited_cells.keys())
-            if not row_is_still_dirty:
-                # If not, remove the asterisk from the row header
-                header_item = self.missionTable.verticalHeaderItem(row)
-                if header_item:
-                    header_item.setText(str(row + 1))
-
-        self.is_undoing = False
+        """Reverts the last cell edit, or the cells a multi-cell operation changed together."""
+        self.model.undo()
 
     def redo_last_edit(self):
-        """Reapplies the last change that was undone."""
-        if not self.redo_stack:
-            return  # Nothing to redo
-
-        self.is_redoing = True
-
-        last_undone_action = self.redo_stack.pop()
-        self.undo_stack.append(last_undone_action)
-        row, col = last_undone_action['row'], last_undone_action['col']
-        new_value = last_undone_action['new']
-
-        # Reapply the cell's text in the table widget
-        self.missionTable.item(row, col).setText(new_value)
-
-        # Re-apply visual feedback for the edited cell
-        self.missionTable.item(row, col).setBackground(QColor(255, 255, 204))
-        header_item = self.missionTable.verticalHeaderItem(row)
-        if header_item and not header_item.text().endswith('*'):
-            header_item.setText(f"{row + 1}*")
-
-        self.is_redoing = False
+        """Reapplies the last edit that was undone."""
+        self.model.redo()
 
     def save_edits(self):
-        """Commits all tracked changes in the `edited_cells` dictionary to the database."""
-        if not self.edited_cells and not self.unsaved_rows:
+        """Commits the dirty cells in the model's edit journal and the unsaved rows to the database."""
+        unsaved_rows = self.model.unsaved_rows()
+        if not self.model.edits and not unsaved_rows:
             QMessageBox.information(self, "No Changes", "There are no pending edits to save.")
             return
 
-        # Map column index to database model attribute name and type
-        column_map = {
-            1: ("associated_mission", int), 2: ("date", datetime), 3: ("platform", str),
-            4: ("chassis", str), 5: ("customer", str), 6: ("site", str),
-            7: ("altitude_m", float), 8: ("speed_m_s", float),
-            9: ("spacing_m", float), 10: ("sky_conditions", str),
-            11: ("wind_knots", float), 12: ("battery", str),
-            13: ("filesize_gb", float), 14: ("is_test", bool),
-            15: ("issues_hw", str), 16: ("issues_operator", str),
-            17: ("issues_sw", str), 18: ("outcome", str),
-            19: ("comments", str), 20: ("raw_metar", str)
-        }
+        # Every pending cell by column: the saved rows' edited cells as (row, col, mission
+        # ID), and each cell of the unsaved rows
+        edited_cells = {}
+        for key, col in self.model.edits.originals:
+            row = self.model.row_for_key(key)
+            if row is not None and row not in unsaved_rows and FIELDS[col].editable:  # Unsaved rows are read whole below
+                edited_cells.setdefault(col, []).append((row, col, key))
+        edited_texts = {}
+        for col, cells in edited_cells.items():
+            cells.sort()
+            edited_texts[FIELDS[col].attr] = [self.model.cell_text(row, col) for row, _, _ in cells]
+        new_rows = list(unsaved_rows.items())
+        new_texts = {field.attr: [self.model.cell_text(row, col) for row, _ in new_rows]
+                     for col, field in enumerate(FIELDS) if field.editable}
+
+        # Check each column in one pass and collect all problems, so the user can fix them
+        # in one go instead of being stopped at the first bad cell
+        columns = {field.attr: col for col, field in enumerate(FIELDS)}
+        problems = []
+        for error in validate_columns(edited_texts):
+            row, col, mission_id = edited_cells[columns[error.attr]][error.row]
+            problems.append((row, col, f"mission ID {mission_id}", error.message))
+        for error in validate_columns(new_texts, required=REQUIRED_FIELDS):
+            row, temp_id = new_rows[error.row]
+            problems.append((row, columns[error.attr], temp_id, error.message))
+        errors = [f"Row {row + 1} ({name}): {message}." for row, _, name, message in sorted(problems)]
+
+        if errors:
+            shown = errors[:20]
+            if len(errors) > len(shown):
+                shown.append(f"... and {len(errors) - len(shown)} more.")
+            QMessageBox.critical(self, "Input Error",
+                                 f"Nothing was saved. Please fix these {len(errors)} problem(s):\n\n" + "\n".join(shown))
+            return
 
         # Group changes by mission ID to process updates efficiently
         missions_to_update = {}
-
-        # Group edited cells by row to handle updates
-        edited_rows = {row for row, col in self.edited_cells.keys()}
-        try:
-            for row in edited_rows:
-                mission_id_item = self.missionTable.item(row, 0)
-                if not mission_id_item or not mission_id_item.text().isdigit():
-                    # This case should ideally not happen for existing missions but is a safeguard
-                    continue
-
-                mission_id = int(mission_id_item.text())
-                if mission_id not in missions_to_update:
-                    missions_to_update[mission_id] = {}
-
-                for col in range(self.missionTable.columnCount()):
-                    if (row, col) in self.edited_cells:
-                        attr, type_func = column_map.get(col, (None, None))
-                        if attr:
-                            item = self.missionTable.item(row, col)
-                            value = item.text() if item else ""
-                            try:
-                                if value.strip() == "":
-                                    # Allow empty strings for nullable fields
-                                    processed_value = None
-                                elif type_func == datetime:
-                                    # Use the new format string for parsing
-                                    processed_value = datetime.strptime(value, '%Y-%m-%d')
-                                elif type_func == bool:
-                                    processed_value = value.strip().lower() in ["yes", "true", "1"]
-                                else:
-                                    processed_value = type_func(value)
-                                missions_to_update[mission_id][attr] = processed_value
-                            except (ValueError, TypeError):
-                                QMessageBox.critical(self, "Input Error",
-                                                     f"Invalid value '{value}' in column '{self.missionTable.horizontalHeaderItem(col).text()}' for mission ID {mission_id}.")
-                                self.session.rollback()
-                                return
-
-            new_missions_data = []
-            for row, temp_id in self.unsaved_rows.items():
-                new_mission_data = {}
-                for col in range(1, self.missionTable.columnCount()):
-                    attr, type_func = column_map.get(col, (None, None))
-                    if attr:
-                        item = self.missionTable.item(row, col)
-                        value = item.text() if item else ""
-                        try:
-                            if value.strip() == "":
-                                processed_value = None
-                            elif type_func == datetime:
-                                # Use the new format string for parsing
-                                processed_value = datetime.strptime(value, '%Y-%m-%d')
-                            elif type_func == bool:
-                                processed_value = value.strip().lower() in ["yes", "true", "1"]
-                            else:
-                                processed_value = type_func(value)
-                            new_mission_data[attr] = processed_value
-                        except (ValueError, TypeError):
-                            QMessageBox.critical(self, "Input Error",
-                                                 f"Invalid value '{value}' in column '{self.missionTable.horizontalHeaderItem(col).text()}' for new mission.")
-                            self.session.rollback()
-                            return
-
-                # Validate mandatory fields for new rows
-                if not new_mission_data.get('platform') or not new_mission_data.get('chassis'):
-                    QMessageBox.critical(self, "Input Error", "New missions require 'Platform' and 'Chassis'.")
-                    self.session.rollback()
-                    return
-                new_missions_data.append(new_mission_data)
-
-            # Handle updates to existing missions
-            for mission_id, changes in missions_to_update.items():
-                mission = self.session.query(Mission).get(mission_id)
-                if mission:
-                    for attr, value in changes.items():
-                        setattr(mission, attr, value)
-
-            # Handle creation of new missions
-            for data in new_missions_data:
-                new_mission = Mission(**data)
-                self.session.add(new_mission)
-
-            self.session.commit()
+        for col, cells in edited_cells.items():
+            field = FIELDS[col]
+            for (_, _, mission_id), text in zip(cells, edited_texts[field.attr]):
+                missions_to_update.setdefault(mission_id, {})[field.attr] = field.parse(text)
+        new_missions_data = [{attr: FIELD[attr].parse(texts[i]) for attr, texts in new_texts.items()}
+                             for i in range(len(new_rows))]
+
+        def saved(result):
             QMessageBox.information(self, "Success",
                                     f"Successfully saved changes for {len(missions_to_update)} mission(s) and created {len(new_missions_data)} new mission(s).")
-            # Clear edits and reload to reset the state
-            self.edited_cells.clear()
-            self.undo_stack.clear()
-            self.redo_stack.clear()
-            self.unsaved_rows.clear()
-            self.load_missions()
+            # Clear edits and pull the saved rows back in with their stored values
+            self.model.clear_edits()
+            self.refresh_missions()
 
-        except Exception as e:
-            self.session.rollback()
-            QMessageBox.critical(self, "Save Failed", f"Could not save changes:\n{str(e)}")
+        # One executemany UPDATE per set of changed columns and one bulk INSERT,
+        # committed together on the database thread
+        self.submit_write(
+            lambda session, job: save_missions(missions_to_update, new_missions_data,
+                                               session=session, progress=job.report),
+            saved, "Save Failed", "Saving missions")
 
     def delete_selected(self):
         """Deletes the currently selected row(s) from the table and the database."""
-        selected_rows = sorted(list(set(index.row() for index in self.missionTable.selectedIndexes())))
+        selected_rows = sorted(list(set(index.row() for index in self.missionTable.selectionModel().selectedIndexes())))
         if not selected_rows:
             QMessageBox.warning(self, "Warning", "No row selected for deletion.")
             return
 
+        unsaved_rows = self.model.unsaved_rows()
         missions_to_delete = []
         unsaved_rows_to_delete = []
         for row in selected_rows:
-            mission_id_item = self.missionTable.item(row, 0)
-            if mission_id_item and mission_id_item.text().startswith("NEW_"):
+            if row in unsaved_rows:
                 unsaved_rows_to_delete.append(row)
             else:
-                try:
-                    mission_id = int(mission_id_item.text())
-                    mission = self.session.query(Mission).get(mission_id)
-                    if mission:
-                        missions_to_delete.append(mission)
-                except (ValueError, AttributeError):
-                    pass  # Skip invalid or missing IDs
+                mission_id = self.model.mission_id(row)
+                if mission_id is not None:  # Skip invalid or missing IDs
+                    missions_to_delete.append(mission_id)
 
         if not missions_to_delete and not unsaved_rows_to_delete:
             QMessageBox.information(self, "Info", "No valid missions selected for deletion.")
@@ -460,9 +650,7 @@ class MainWindow(QMainWindow):
         # Handle deletion of unsaved rows first, without a database transaction
         if unsaved_rows_to_delete:
             for row in sorted(unsaved_rows_to_delete, reverse=True):
-                self.missionTable.removeRow(row)
-                if row in self.unsaved_rows:
-                    del self.unsaved_rows[row]
+                self.model.remove_row(row)
             QMessageBox.information(self, "Deletion", f"Deleted {len(unsaved_rows_to_delete)} unsaved row(s).")
 
         if missions_to_delete:
@@ -470,28 +658,98 @@ class MainWindow(QMainWindow):
                                          f"Are you sure you want to delete {len(missions_to_delete)} selected mission(s) from the database?",
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                try:
-                    for mission in missions_to_delete:
-                        self.session.delete(mission)
-                    self.session.commit()
+                def deleted(count):
+                    # Drop the deleted rows directly, then sync to pick up missions whose
+                    # association to a deleted mission was cleared
+                    self.model.remove_missions(missions_to_delete)
+                    self.refresh_missions()
                     QMessageBox.information(self, "Success",
-                                            f"Successfully deleted {len(missions_to_delete)} mission(s).")
-                    self.load_missions()
-                except Exception as e:
-                    self.session.rollback()
-                    QMessageBox.critical(self, "Delete Failed", f"Could not delete missions:\n{str(e)}")
+                                            f"Successfully deleted {count} mission(s).")
+
+                self.submit_write(
+                    lambda session, job: delete_missions(missions_to_delete, session=session,
+                                                         progress=job.report),
+                    deleted, "Delete Failed", "Deleting missions")
+
+    def import_missions(self, checked=False, path=None, restart=False):
+        """Bulk imports missions from a CSV/Excel file on the database thread."""
+        if path is None:
+            path, _ = QFileDialog.getOpenFileName(self, "Import Missions", "",
+                                                  "Flight logs (*.csv *.xlsx);;All files (*)")
+            if not path:
+                return
+
+        def imported(result):
+            self.set_writing(False)
+            self.lookups.invalidate()
+            message = f"Imported {result.imported} mission(s)."
+            if result.resumed_at:
+                message = f"Resumed after row {result.resumed_at}. " + message
+            if result.rejected:
+                message += f"\n\n{result.rejected} row(s) were rejected; see {result.rejects_path}"
+            QMessageBox.information(self, "Import Finished", message)
+            self.refresh_missions()
+
+        def failed(error):
+            self.set_writing(False)
+            self.refresh_missions()  # Chunks committed before the error are in the database
+            if isinstance(error, importer.ImportAlreadyDone):
+                reply = QMessageBox.question(self, "Already Imported", f"{error}\n\nImport it again?",
+                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if reply == QMessageBox.Yes:
+                    self.import_missions(path=path, restart=True)
+                return
+            QMessageBox.critical(self, "Import Failed",
+                                 f"Could not import {path}:\n{error}\n\n"
+                                 "Rows imported so far are kept; importing the file again resumes.")
+
+        self.set_writing(True)
+        self.db.submit(
+            lambda session, job: importer.import_missions(path, session=session, restart=restart,
+                                                          progress=job.report),
+            imported, failed, description="Importing missions")
+
+    def export_missions(self):
+        """Streams the missions matching the table's filter and sort to a file."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Missions", "missions.csv",
+            "CSV (*.csv);;JSON Lines (*.jsonl);;Parquet (*.parquet);;Arrow (*.arrow)")
+        if not path:
+            return
+
+        def exported(count):
+            QMessageBox.information(self, "Export Finished", f"Exported {count} mission(s) to {path}.")
 
-    def create_new_empty_row(self):
-        """Adds a new empty row to the table for manual data entry."""
-        row_count = self.missionTable.rowCount()
-        self.missionTable.insertRow(row_count)
+        def failed(error):
+            QMessageBox.critical(self, "Export Failed", f"Could not export missions:\n{error}")
 
-        # Determine the next sequential ID for the new row
-        max_db_id = self.session.query(Mission).order_by(Mission.id.desc()).first()
-        max_db_id = max_db_id.id if max_db_id else 0
+        filters, order = self.model.filters, self.model.order
+        self.db.submit(
+            lambda session, job: exporter.export_missions(path, filters=filters, order=order,
+                                                          session=session, progress=job.report),
+            exported, failed, read_only=True, description="Exporting missions")
 
+    def create_new_empty_row(self, checked=False, count=1, then=None):
+        """
+        Adds `count` new empty rows to the table for manual data entry; `then(first row)`
+        runs once they are in.
+        """
+        def created(max_db_id):
+            row = self.append_empty_rows(max_db_id, count)
+            if then is not None:
+                then(row)
+            else:
+                # Scroll the table to the newly created row
+                self.missionTable.scrollTo(self.model.index(row, 0))
+
+        # Determine the next sequential ID for the new rows once the database answers
+        self.db.submit(lambda session, job: session.query(func.max(Mission.id)).scalar() or 0,
+                       created, read_only=True, description="Creating rows" if count > 1 else "Creating row")
+
+    def append_empty_rows(self, max_db_id, count=1):
+        """Appends `count` unsaved rows numbered after the highest ID in use; returns the first's index."""
         max_unsaved_id = 0
-        for temp_id in self.unsaved_rows.values():
+        for temp_id in self.model.unsaved_rows().values():
             try:
                 # Extract the number from the temporary ID (e.g., "NEW_123")
                 num = int(temp_id.split('_')[1])
@@ -502,24 +760,143 @@ class MainWindow(QMainWindow):
 
         next_id = max(max_db_id, max_unsaved_id) + 1
 
-        temp_id = f"NEW_{next_id}"
-        self.unsaved_rows[row_count] = temp_id
+        return self.model.append_new_rows([f"NEW_{next_id + i}" for i in range(count)])
+
+    # --- Bulk editing ---
+
+    def selected_rows(self):
+        """The rows selected in the table, in order."""
+        return sorted({index.row() for index in self.missionTable.selectionModel().selectedIndexes()})
+
+    def editable_column(self):
+        """The column of the table's current cell if it can be edited, else None."""
+        index = self.missionTable.currentIndex()
+        if not index.isValid() or not self.model.flags(index) & Qt.ItemIsEditable:
+            self.statusbar.showMessage("Select a cell in an editable column first.", 5000)
+            return None
+        return index.column()
+
+    def set_cells(self, changes, verb):
+        """Applies (row, col, text) changes as one edit, undone together."""
+        count = self.model.set_cells(changes)
+        self.statusbar.showMessage(f"{verb} {count} cell(s).", 5000)
 
-        id_item = QTableWidgetItem(temp_id)
-        id_item.setFlags(id_item.flags() & ~Qt.ItemIsEditable)
-        self.missionTable.setItem(row_count, 0, id_item)
+    def paste_cells(self):
+        """
+        Pastes the clipboard's rows of tab-separated cells (as spreadsheets copy them) at
+        the current cell, or a single value into the current column of every selected row.
+        Rows past the bottom of the table are added as new missions.
+        """
+        if self.writing:
+            return
+        text = QApplication.clipboard().text()
+        block = [values for values in csv.reader(io.StringIO(text), delimiter="\t")]
+        index = self.missionTable.currentIndex()
+        if not block or not index.isValid():
+            return
+        rows = self.selected_rows()
+        col = index.column()
+        if len(block) == 1 and len(block[0]) == 1 and len(rows) > 1:
+            if self.editable_column() is not None:
+                self.set_cells(((row, col, block[0][0]) for row in rows), "Pasted")
+            return
+
+        # The block goes to the rows shown now, by row key so the rows a sync or page moves
+        # meanwhile still get theirs, then to new rows for the rest
+        first = rows[0] if rows else index.row()
+        keys = [self.model.row_key(row) for row in range(first, min(first + len(block), self.model.rowCount()))]
+
+        def paste(new_row=None):
+            if self.writing:
+                return  # A save started while the new rows were being numbered
+            targets = [self.model.row_for_key(key) for key in keys]
+            if new_row is not None:
+                targets += range(new_row, new_row + len(block) - len(keys))
+            columns = self.model.columnCount()
+            # Cells falling on the ID column or past the last column are left out
+            self.set_cells(((row, col + j, value)
+                            for row, values in zip(targets, block) if row is not None
+                            for j, value in enumerate(values) if 0 < col + j < columns),
+                           "Pasted")
+
+        if len(block) > len(keys):
+            self.create_new_empty_row(count=len(block) - len(keys), then=paste)
+        else:
+            paste()
+
+    def fill_down(self):
+        """Copies the current column's cell in the first selected row to the other selected rows."""
+        if self.writing:
+            return
+        rows = self.selected_rows()
+        col = self.editable_column()
+        if col is None or len(rows) < 2:
+            return
+        text = self.model.cell_text(rows[0], col)
+        self.set_cells(((row, col, text) for row in rows[1:]), "Filled")
+
+    def set_column_for_selection(self):
+        """Asks for a value and sets the current column of every selected row to it."""
+        if self.writing:
+            return
+        rows = self.selected_rows()
+        col = self.editable_column()
+        if col is None or not rows:
+            return
+        header = self.model.headerData(col, Qt.Horizontal)
+        text, ok = QInputDialog.getText(self, "Set Column", f"{header} for {len(rows)} selected row(s):",
+                                        text=self.model.cell_text(rows[0], col))
+        if ok:
+            self.set_cells(((row, col, text) for row in rows), "Set")
+
+    def revert_current_row(self):
+        """Lists the current mission's changes and puts it back the way it was before the one picked."""
+        if self.writing:
+            return
+        row = self.missionTable.currentIndex().row()
+        mission_id = self.model.mission_id(row) if row >= 0 else None
+        if mission_id is None:
+            self.statusbar.showMessage("Select a saved mission to revert.", 5000)
+            return
+        if self.model.is_row_dirty(row):
+            QMessageBox.information(self, "Revert Row", "Save or undo the row's pending edits first.")
+            return
+        self.db.submit(
+            lambda session, job: history.mission_changes(session, mission_id),
+            on_done=lambda changes: self.choose_revert(mission_id, changes), read_only=True,
+            description="Reading the mission's history",
+            on_error=lambda e: self.statusbar.showMessage(f"Could not read the mission's history: {e}", 10000))
+
+    def choose_revert(self, mission_id, changes):
+        """Asks which write to undo (with every later one) and reverts the mission to before it."""
+        # Newest first; undoing the mission's creation would delete it, which Delete is for
+        steps = [step for step in reversed(history.change_steps(changes))
+                 if not any(change.attr is None and change.old is None for change in step)]
+        if not steps:
+            QMessageBox.information(self, "Revert Row", f"Mission {mission_id} hasn't changed since it was created.")
+            return
+        items = [f"{step[0].changed_at:%Y-%m-%d %H:%M:%S}  " + "; ".join(map(history.describe_change, step))
+                 for step in steps]
+        item, ok = QInputDialog.getItem(self, "Revert Row",
+                                        f"Undo this change to mission {mission_id} and every later one:",
+                                        items, 0, False)
+        if not ok:
+            return
+        before = steps[items.index(item)][0].id
 
-        self.missionTable.setVerticalHeaderItem(row_count, QTableWidgetItem(f"{row_count + 1}*"))
+        def reverted(changed):
+            self.statusbar.showMessage(f"Reverted {len(changed or ())} field(s) of mission {mission_id}.", 5000)
+            self.refresh_missions()
 
-        # Scroll the table to the newly created row
-        self.missionTable.scrollToBottom()
+        self.submit_write(lambda session, job: history.revert_mission(session, mission_id, before=before),
+                          reverted, "Revert Failed", "Reverting mission")
 
     def toggle_form(self):
         """Toggles the visibility of the new mission input form."""
         self.form_is_visible = not self.form_is_visible
         self.scrollArea.setVisible(self.form_is_visible)
 
-    def load_mission_to_form(self, row, col):
+    def load_mission_to_form(self, index):
         """
         Populates the new mission form with data from the selected table row
         and changes the button to "Update Mission".
@@ -527,73 +904,121 @@ class MainWindow(QMainWindow):
         if not self.form_is_visible:
             return
 
-        mission_id_item = self.missionTable.item(row, 0)
-        if not mission_id_item or mission_id_item.text().startswith("NEW_"):
+        row = index.row()
+        mission_id = self.model.mission_id(row)
+        if mission_id is None:
             self.clear_form()
             self.current_selected_mission_id = None
             self.updateMissionButton.hide()
             self.saveNewMissionButton.show()
             return
 
-        try:
-            self.current_selected_mission_id = int(mission_id_item.text())
-        except (ValueError, AttributeError):
-            self.clear_form()
-            self.current_selected_mission_id = None
-            self.updateMissionButton.hide()
-            self.saveNewMissionButton.show()
-            return
-
-        # Parse the date from the table without time
-        date_str = self.missionTable.item(row, 2).text()
-        if date_str:
-            self.dateInput.setDate(datetime.strptime(date_str, '%Y-%m-%d'))
-        else:
-            self.dateInput.clear()
-
-        self.platformInput.setText(self.missionTable.item(row, 3).text())
-        self.chassisInput.setText(self.missionTable.item(row, 4).text())
-        self.customerInput.setText(self.missionTable.item(row, 5).text())
-        self.siteInput.setText(self.missionTable.item(row, 6).text())
-        self.altitudeInput.setText(self.missionTable.item(row, 7).text())
-        self.speedInput.setText(self.missionTable.item(row, 8).text())
-        self.spacingInput.setText(self.missionTable.item(row, 9).text())
-        self.skyInput.setCurrentText(self.missionTable.item(row, 10).text())
-        self.windInput.setText(self.missionTable.item(row, 11).text())
-        self.batteryInput.setText(self.missionTable.item(row, 12).text())
-        self.filesizeInput.setText(self.missionTable.item(row, 13).text())
-        self.isTestInput.setChecked(self.missionTable.item(row, 14).text() == "Yes")
-        self.issuesHwInput.setText(self.missionTable.item(row, 15).text())
-        self.issuesOperatorInput.setText(self.missionTable.item(row, 16).text())
-        self.issuesSwInput.setText(self.missionTable.item(row, 17).text())
-        self.outcomeInput.setText(self.missionTable.item(row, 18).text())
-        self.commentsInput.setText(self.missionTable.item(row, 19).text())
-        self.rawMetarInput.setPlainText(self.missionTable.item(row, 20).text())
+        self.current_selected_mission_id = mission_id
+        for col, field in enumerate(FIELDS):
+            if field.attr in self.FORM_INPUTS:
+                self.set_form_text(field.attr, self.model.cell_text(row, col))
 
         self.saveNewMissionButton.hide()
         self.updateMissionButton.show()
 
+    SKY_LABELS = {"CLR": "Clear", "FEW": "Few", "SCT": "Scattered", "BKN": "Broken",
+                  "OVC": "Overcast", "VV": "Overcast"}
+
+    def metar_changed(self):
+        """Fills in sky and wind from a METAR typed or pasted into the form."""
+        if not self.rawMetarInput.hasFocus():
+            return  # Set programmatically, e.g. when a mission is loaded
+        try:
+            self.apply_metar(decode_metar(self.rawMetarInput.toPlainText()))
+        except ValueError:
+            pass
+
+    def apply_metar(self, metar):
+        if metar.sky:
+            self.skyInput.setCurrentText(self.SKY_LABELS[metar.sky])
+        # Don't overwrite a wind speed the operator entered themselves
+        if metar.wind_speed_kt is not None and not self.windInput.text().strip():
+            self.windInput.setText(f"{metar.wind_speed_kt:g}")
+
+    def open_weather_archive(self):
+        """Opens the offline METAR archive, if there is one, and learns which station each site uses."""
+        try:
+            self.weather = weather.open_archive()
+        except (OSError, ValueError) as e:
+            self.statusbar.showMessage(f"Weather archive unavailable: {e}", 10000)
+        if self.weather:
+            self.db.submit(lambda session, job: weather.site_stations(session), on_done=self.site_stations_loaded,
+                           on_error=lambda e: self.statusbar.showMessage(f"Could not read weather stations: {e}", 10000),
+                           read_only=True, description="Reading weather stations")
+
+    def site_stations_loaded(self, stations):
+        self.site_stations = stations
+
+    def fill_weather(self):
+        """Fills a new mission's METAR, sky and wind from the archive once its site and date are set."""
+        if (not self.weather or self.current_selected_mission_id is not None
+                or self.rawMetarInput.toPlainText().strip() or not self.dateInput.text()):
+            return
+        station = weather.station_for(self.siteInput.text(), self.site_stations, self.weather)
+        if station is None:
+            return
+        when = weather.flight_time(datetime.combine(self.dateInput.date().toPyDate(), datetime.min.time()))
+        report = self.weather.nearest(station, when)
+        if report:
+            self.rawMetarInput.setPlainText(report.raw)
+            try:
+                self.apply_metar(decode_metar(report.raw))
+            except ValueError:
+                pass
+
     def clear_form(self):
         """Clears all input fields in the form."""
-        self.dateInput.clear()
-        self.platformInput.clear()
-        self.chassisInput.clear()
-        self.customerInput.clear()
-        self.siteInput.clear()
-        self.altitudeInput.clear()
-        self.speedInput.clear()
-        self.spacingInput.clear()
-        self.skyInput.setCurrentIndex(0)
-        self.windInput.clear()
-        self.batteryInput.clear()
-        self.filesizeInput.clear()
-        self.isTestInput.setChecked(False)
-        self.issuesHwInput.clear()
-        self.issuesOperatorInput.clear()
-        self.issuesSwInput.clear()
-        self.outcomeInput.clear()
-        self.commentsInput.clear()
-        self.rawMetarInput.clear()
+        for attr in self.FORM_INPUTS:
+            self.set_form_text(attr, "")
+
+    def form_text(self, attr):
+        """The form's input for `attr` as cell text, the way the table would show it."""
+        widget = getattr(self, self.FORM_INPUTS[attr])
+        if isinstance(widget, QDateTimeEdit):
+            return widget.date().toString("yyyy-MM-dd") if widget.text() else ""
+        if isinstance(widget, QComboBox):
+            return widget.currentText()
+        if isinstance(widget, QCheckBox):
+            return "Yes" if widget.isChecked() else "No"
+        if isinstance(widget, QPlainTextEdit):
+            return widget.toPlainText().strip()
+        return widget.text().strip()
+
+    def set_form_text(self, attr, text):
+        """Shows cell text in the form's input for `attr`; blank text clears it."""
+        widget = getattr(self, self.FORM_INPUTS[attr])
+        if isinstance(widget, QDateTimeEdit):
+            try:
+                widget.setDate(parse_date(text))
+            except ValueError:  # Blank, or an edit that isn't a date yet
+                widget.clear()
+        elif isinstance(widget, QComboBox):
+            if text:
+                widget.setCurrentText(text)
+            else:
+                widget.setCurrentIndex(0)
+        elif isinstance(widget, QCheckBox):
+            widget.setChecked(FIELD[attr].parse(text) or False)
+        elif isinstance(widget, QPlainTextEdit):
+            widget.setPlainText(text)
+        else:
+            widget.setText(text)
+
+    def form_values(self):
+        """Reads the form into {Mission attribute: value}; raises ValueError on bad input."""
+        values = {}
+        for attr in self.FORM_INPUTS:
+            text = self.form_text(attr)
+            error = FIELD[attr].error(text)
+            if error:
+                raise ValueError(error[0].upper() + error[1:] + ".")
+            values[attr] = FIELD[attr].parse(text)
+        return values
 
     def update_mission(self):
         """Updates an existing mission in the database using the form fields."""
@@ -601,102 +1026,49 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "No Mission Selected", "Please select a mission from the table to update.")
             return
 
+        # Widgets are read here on the GUI thread; only the write happens in the background
         try:
-            mission = self.session.query(Mission).get(self.current_selected_mission_id)
+            values = self.form_values()
+        except ValueError as e:
+            QMessageBox.critical(self, "Input Error", str(e))
+            return
+        mission_id = self.current_selected_mission_id
+
+        def write(session, job):
+            mission = session.get(Mission, mission_id)
             if not mission:
+                return False
+            for attr, value in values.items():
+                setattr(mission, attr, value)
+            session.commit()
+            return True
+
+        def updated(found):
+            if not found:
                 QMessageBox.critical(self, "Error", "Selected mission not found in the database.")
                 return
-
-            # Extract only the date part and set the time to 00:00:00
-            if self.dateInput.text():
-                date_only = self.dateInput.date().toPyDate()
-                mission.date = datetime.combine(date_only, datetime.min.time())
-            else:
-                mission.date = None
-
-            mission.platform = self.get_text(self.platformInput)
-            mission.chassis = self.get_text(self.chassisInput)
-            mission.customer = self.get_text(self.customerInput)
-            mission.site = self.get_text(self.siteInput)
-            mission.altitude_m = self.get_float(self.altitudeInput, "Altitude (m)")
-            mission.speed_m_s = self.get_float(self.speedInput, "Speed (m/s)")
-            mission.spacing_m = self.get_float(self.spacingInput, "Spacing (m)")
-            mission.sky_conditions = self.skyInput.currentText() or None
-            mission.wind_knots = self.get_float(self.windInput, "Wind (kts)")
-            mission.battery = self.get_text(self.batteryInput)
-            mission.filesize_gb = self.get_float(self.filesizeInput, "Filesize (GB)")
-            mission.is_test = self.isTestInput.isChecked()
-            mission.issues_hw = self.get_text(self.issuesHwInput)
-            mission.issues_operator = self.get_text(self.issuesOperatorInput)
-            mission.issues_sw = self.get_text(self.issuesSwInput)
-            mission.outcome = self.get_text(self.outcomeInput)
-            mission.comments = self.get_text(self.commentsInput)
-            mission.raw_metar = self.rawMetarInput.toPlainText().strip() or None
-
-            self.session.commit()
             QMessageBox.information(self, "Success", "Mission updated successfully.")
-            self.load_missions()
-
-        except ValueError as e:
-            QMessageBox.critical(self, "Input Error", str(e))
-        except Exception as e:
-            self.session.rollback()
-            QMessageBox.critical(self, "Error", f"Could not update mission:\n{str(e)}")
+            self.refresh_missions()
 
-    def get_text(self, widget):
-        if isinstance(widget, QLineEdit):
-            return widget.text().strip() or None
-        return None
-
-    def get_float(self, widget, field_name):
-        text = widget.text().strip()
-        try:
-            return float(text) if text else None
-        except ValueError:
-            raise ValueError(f"Invalid value for '{field_name}': '{text}'. Please enter a number.")
+        self.submit_write(write, updated, "Error", "Updating mission")
 
     def save_new_mission(self):
         """Saves a new mission from the input form fields at the bottom."""
         try:
-            # Extract only the date part and set the time to 00:00:00
-            if self.dateInput.text():
-                date_only = self.dateInput.date().toPyDate()
-                date_value = datetime.combine(date_only, datetime.min.time())
-            else:
-                date_value = None
-
-            m = Mission(
-                associated_mission=None,
-                date=date_value,
-                platform=self.get_text(self.platformInput),
-                chassis=self.get_text(self.chassisInput),
-                customer=self.get_text(self.customerInput),
-                site=self.get_text(self.siteInput),
-                altitude_m=self.get_float(self.altitudeInput, "Altitude (m)"),
-                speed_m_s=self.get_float(self.speedInput, "Speed (m/s)"),
-                spacing_m=self.get_float(self.spacingInput, "Spacing (m)"),
-                sky_conditions=self.skyInput.currentText() or None,
-                wind_knots=self.get_float(self.windInput, "Wind (kts)"),
-                battery=self.get_text(self.batteryInput),
-                filesize_gb=self.get_float(self.filesizeInput, "Filesize (GB)"),
-                is_test=self.isTestInput.isChecked(),
-                issues_hw=self.get_text(self.issuesHwInput),
-                issues_operator=self.get_text(self.issuesOperatorInput),
-                issues_sw=self.get_text(self.issuesSwInput),
-                outcome=self.get_text(self.outcomeInput),
-                comments=self.get_text(self.commentsInput),
-                raw_metar=self.rawMetarInput.toPlainText().strip() or None
-            )
-
-            self.session.add(m)
-            self.session.commit()
-            QMessageBox.information(self, "Success", "New mission saved successfully.")
-            self.load_missions()
+            values = self.form_values()
         except ValueError as e:
             QMessageBox.critical(self, "Input Error", str(e))
-        except Exception as e:
-            self.session.rollback()
-            QMessageBox.critical(self, "Error", f"Could not save new mission:\n{str(e)}")
+            return
+
+        def write(session, job):
+            session.add(Mission(associated_mission=None, **values))
+            session.commit()
+
+        def saved(result):
+            QMessageBox.information(self, "Success", "New mission saved successfully.")
+            self.refresh_missions()
+
+        self.submit_write(write, saved, "Error", "Saving new mission")
 
 
 if __name__ == '__main__':
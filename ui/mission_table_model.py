@@ -0,0 +1,701 @@
+import bisect
+import sys
+from array import array
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QColor
+from sqlalchemy import String, and_, case, false, literal, not_, or_, true, tuple_, type_coerce
+from db.models import Mission, MissionTombstone, decoded
+from logic.flight_ops import format_value, mission_order
+from logic.lookups import INTERNED_FIELDS
+from logic.mission_cache import CACHE_COLUMNS, MissionCache, database_now
+from logic.schema import FIELDS, HEADERS
+from ui.edit_journal import EditJournal
+from datetime import datetime, timedelta
+
+
+# Column order shown in the mission table: (header label, Mission attribute)
+COLUMNS = [(field.label, field.attr) for field in FIELDS]
+
+EDITED_COLOR = QColor(255, 255, 204)  # Light yellow
+
+
+# The cached fields, which start with the table's columns
+QUERY_COLUMNS = CACHE_COLUMNS
+
+# Columns whose few distinct values repeat down the table; loaded rows share one string
+# object per value instead of holding a copy per row
+INTERNED_COLUMNS = [col for col, (_, attr) in enumerate(COLUMNS) if attr in INTERNED_FIELDS]
+
+# Each fetched row carries the raw database value of the sort column after the cached
+# fields, for keyset paging
+SORT_KEY = len(QUERY_COLUMNS)
+
+# How SQLAlchemy stores datetimes in SQLite, so cached dates sort like the stored text
+STORED_DATETIME = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def interned_row(values):
+    """A fetched row as a mutable list, with the INTERNED_COLUMNS interned."""
+    row = list(values)
+    for col in INTERNED_COLUMNS:
+        if isinstance(row[col], str):
+            row[col] = sys.intern(row[col])
+    return row
+
+
+def sort_key_column(attr):
+    # The stored value as SQLite has it (no type conversion), so it compares exactly
+    # the way ORDER BY does when bound back into the keyset condition (categorical ids
+    # decoded, as they are sorted by their text)
+    return type_coerce(decoded(getattr(Mission, attr)), String)
+
+
+def sort_order(attr, descending):
+    """The iter_missions order for sorting by `attr`; the ID breaks ties the same way."""
+    if attr == "id":
+        return ["-id" if descending else "id"]
+    return [f"-{attr}", "-id"] if descending else [attr, "id"]
+
+
+def keyset_after(attr, descending, last_value, last_id):
+    """
+    WHERE criterion for the rows that come after (last_value, last_id) when sorting by
+    (attr, id). SQLite sorts NULLs first, so they lead ascending and trail descending.
+    """
+    if attr == "id":
+        return Mission.id < last_id if descending else Mission.id > last_id
+    column = decoded(getattr(Mission, attr))
+    if last_value is None:
+        if descending:
+            return and_(column.is_(None), Mission.id < last_id)
+        return or_(column.isnot(None), and_(column.is_(None), Mission.id > last_id))
+    # A row-value comparison, so the (column, rowid) index can seek straight to it
+    after = tuple_(column, Mission.id)
+    bound = tuple_(literal(last_value), literal(last_id))
+    if descending:
+        return or_(after < bound, column.is_(None))
+    return after > bound
+
+
+class _Descending:
+    """Inverts comparisons, so bisect can search rows sorted in descending order."""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+def _sqlite_order(value):
+    """A Python sort key that orders raw values like SQLite: NULL, numbers, text, blobs."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, value) if isinstance(value, str) else (3, value)
+
+
+def _runs(rows):
+    """Yields the (first, last) runs of adjacent rows in `rows`, which are sorted in descending order."""
+    run = None
+    for row in rows:
+        if run and row == run[0] - 1:
+            run[0] = row
+        else:
+            if run:
+                yield tuple(run)
+            run = [row, row]
+    if run:
+        yield tuple(run)
+
+
+# --- Queries (run on the database worker thread when the model has a runner) ---
+
+def fetch_page(session, criteria, attr, descending, after, limit):
+    """
+    Returns (database time, the next `limit` missions matching `criteria` in (attr, id)
+    order after the keyset `after` ((raw sort value, ID), None for the first page)).
+    Rows hold the cached fields and end with the raw sort value.
+    """
+    query = session.query(*QUERY_COLUMNS, sort_key_column(attr)).filter(*criteria)
+    if after is not None:
+        query = query.filter(keyset_after(attr, descending, *after))
+    rows = query.order_by(*mission_order(sort_order(attr, descending))).limit(limit).all()
+    return database_now(session), rows
+
+
+def fetch_changes(session, since, criteria, attr, descending, last_key):
+    """
+    Returns (database time, IDs deleted since `since`, rows inserted or updated since
+    `since`). Changed rows hold the cached fields and end with their raw sort value and
+    whether they belong in the loaded part of the table: they match `criteria` and sort
+    at or before `last_key`.
+    """
+    now = database_now(session)
+    deleted = [mission_id for (mission_id,) in
+               session.query(MissionTombstone.mission_id).filter(MissionTombstone.deleted_at >= since)]
+    loaded = not_(keyset_after(attr, descending, *last_key)) if last_key else false()
+    belongs = case((and_(true(), *criteria, loaded), True), else_=False)
+    changed = (session.query(*QUERY_COLUMNS, sort_key_column(attr), belongs)
+               .filter(or_(Mission.updated_at >= since, Mission.created_at >= since))
+               .all())
+    return now, deleted, changed
+
+
+class MissionTableModel(QAbstractTableModel):
+    """
+    Table model over the missions table that pages rows in from SQLite on demand.
+
+    Rows are fetched `batch_size` at a time, whenever the view asks for more via
+    canFetchMore/fetchMore, and stored in a MissionCache (logic.mission_cache) as typed
+    column arrays; the model itself only keeps each row's position in the cache. Cells
+    are only formatted to text when the view requests them, so the cost of a refresh is
+    independent of the number of missions in the database.
+
+    `set_filter()` and `sort()` are applied in SQL: only missions matching the filter
+    criteria are fetched, in (sort column, ID) order, and each page continues from the
+    last row of the previous one (keyset paging), so deep pages cost no more than the
+    first. Saved rows are kept in that order, followed by any unsaved rows the user added.
+    `sync()` patches the loaded rows in place with whatever was inserted, updated or
+    deleted since the previous load or sync instead of reloading everything.
+
+    Edited cells of saved rows are held as text over the cached values until the edits
+    are saved (or discarded), so the cache always has what the database has and can be
+    shared with other readers, such as the statistics. Which cells are dirty, and the
+    undo history, are kept in an EditJournal (ui.edit_journal) by mission ID.
+
+    With a DatabaseRunner, pages and syncs are queried on the worker thread and
+    applied when they arrive; without one they run synchronously on `session`.
+    """
+
+    # Emitted when the user edits a cell: (row, col, old text, new text)
+    cellEdited = pyqtSignal(int, int, str, str)
+    # Emitted once the first page after a reload is in
+    reloaded = pyqtSignal()
+    # Emitted when a sync has been applied: (inserted, updated, deleted)
+    synced = pyqtSignal(int, int, int)
+    # Emitted when a page or sync query fails: (error message)
+    queryFailed = pyqtSignal(str)
+
+    def __init__(self, session=None, batch_size=500, parent=None, runner=None, cache=None):
+        super().__init__(parent)
+        self.session = session
+        self.runner = runner
+        self.batch_size = batch_size
+        self.cache = cache if cache is not None else MissionCache()
+
+        # Current filter and sort, in iter_missions terms; exports honor them
+        self.filters = []
+        self.order = "id"
+        self.sort_column = 0  # Index into COLUMNS
+        self.sort_descending = False
+
+        self.positions = array('q')  # Cache position of each saved row, in table order
+        self.new_rows = []  # Unsaved rows below them, as lists of cell values
+        self.edits = EditJournal(len(COLUMNS))  # Dirty cells and undo history, by mission or temporary ID
+        self._edited_text = {}  # (cache position, col) -> text of an edited saved cell
+        self._last_key = None  # (raw sort value, ID) of the last fetched row
+        self._row_of = None  # Cache position -> row, rebuilt after rows are added or removed
+        self._new_row_of = None  # Temporary ID -> index into new_rows, the same
+        self._jobs = []  # Queries in flight, cancelled when the filter or sort changes
+        self._exhausted = False
+        self._synced_at = None
+
+        # Results of queries issued before the latest reload are dropped
+        self._generation = 0
+        self._fetching = False
+        self._syncing = False
+        self._sync_again = False
+
+    def _run(self, func, on_done, description):
+        """Runs `func(session, job)` on the worker if there is one, else right here."""
+        generation = self._generation
+
+        def apply(result):
+            if generation == self._generation:
+                on_done(result)
+
+        def failed(error):
+            if generation == self._generation:
+                self._fetching = self._syncing = self._sync_again = False
+                self.queryFailed.emit(str(error))
+
+        if self.runner is not None:
+            self._jobs = [job for job in self._jobs if not job.done]
+            self._jobs.append(self.runner.submit(func, apply, failed, read_only=True,
+                                                 description=description))
+        else:
+            apply(func(self.session, None))
+
+    def cancel_pending(self):
+        """Forgets queries in flight (e.g. after they were cancelled) so they can be reissued."""
+        self._generation += 1
+        self._fetching = self._syncing = self._sync_again = False
+
+    def _cancel_queries(self):
+        # Stale pages and syncs would be dropped anyway; cancelling frees the worker now
+        for job in self._jobs:
+            job.cancel()
+        self._jobs = []
+
+    @property
+    def sort_attr(self):
+        return COLUMNS[self.sort_column][1]
+
+    @property
+    def _saved_count(self):
+        return len(self.positions)  # Rows [0, _saved_count) come from the database
+
+    def set_filter(self, criteria):
+        """Shows only missions matching `criteria` (WHERE expressions) and reloads."""
+        self.filters = list(criteria or [])
+        self.reload()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sorts by a column in the database and reloads (QAbstractItemModel.sort)."""
+        self.sort_column = column
+        self.sort_descending = order == Qt.DescendingOrder
+        self.order = sort_order(self.sort_attr, self.sort_descending)
+        self.reload()
+
+    # --- Loading ---
+
+    def reload(self):
+        """Discards all loaded rows and pending edits and starts paging from the top."""
+        self._reset()
+        # Load the first page straight away so the view has something to lay out
+        self.fetchMore(QModelIndex())
+
+    def restore(self, criteria, state):
+        """
+        Shows the rows a snapshot restored into the cache, which are at positions 0
+        onwards in table order, as loaded with the filter `criteria` and the sort and
+        paging `state` of snapshot_state(); then syncs them with the database.
+        """
+        self.filters = list(criteria or [])
+        self.sort_column = state["sort_column"]
+        self.sort_descending = state["sort_descending"]
+        self.order = sort_order(self.sort_attr, self.sort_descending)
+        last_key = state["last_key"]
+        self._reset(array('q', range(self.cache.size)), tuple(last_key) if last_key else None,
+                    state["exhausted"], datetime.fromisoformat(state["synced_at"]))
+        self.sync()
+
+    def snapshot_state(self):
+        """
+        The sort, paging and sync state restore() takes back, as JSON values, or None
+        before the first page is in.
+        """
+        if self._synced_at is None:
+            return None
+        return {"sort_column": self.sort_column, "sort_descending": self.sort_descending,
+                "last_key": self._last_key, "exhausted": self._exhausted,
+                "synced_at": self._synced_at.isoformat()}
+
+    def _reset(self, positions=None, last_key=None, exhausted=False, synced_at=None):
+        """Replaces the saved rows with those at `positions` and drops the new rows and all edits."""
+        self._cancel_queries()
+        self.beginResetModel()
+        self.positions = array('q') if positions is None else positions
+        self.new_rows = []
+        self.edits.clear()
+        self._edited_text.clear()
+        self._last_key = last_key
+        self._row_of = self._new_row_of = None
+        self._exhausted = exhausted
+        self._synced_at = synced_at
+        self._generation += 1
+        self._fetching = self._syncing = self._sync_again = False
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._fetching:
+            return
+        self._fetching = True
+        query = (self.filters, self.sort_attr, self.sort_descending, self._last_key, self.batch_size)
+        self._run(lambda session, job: fetch_page(session, *query),
+                  self._page_loaded, "Loading missions")
+
+    def _page_loaded(self, result):
+        now, batch = result
+        self._fetching = False
+        first_page = self._synced_at is None
+        if first_page:
+            self._synced_at = now
+        if len(batch) < self.batch_size:
+            self._exhausted = True
+
+        if batch:
+            # Saved rows always go above the unsaved rows at the bottom of the table
+            first = self._saved_count
+            positions = self.cache.put(batch, now)
+            self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+            self.positions.extend(positions.tolist())
+            self._row_of = None
+            self.endInsertRows()
+            self._last_key = (batch[-1][SORT_KEY], batch[-1][0])
+
+        if first_page:
+            self.reloaded.emit()
+
+    def sync(self):
+        """
+        Applies the inserts, updates and deletes made since the last load or sync.
+
+        Updated rows are patched in place (cells with pending edits are left alone),
+        deleted rows are removed using the tombstones left by the delete trigger, and
+        new rows are paged in through fetchMore. Emits `synced` when done.
+        """
+        if self._synced_at is None:
+            return  # The first page isn't in yet, so there's nothing to patch
+        if self._syncing:
+            self._sync_again = True
+            return
+        self._syncing = True
+
+        # Step the watermark back a second: CURRENT_TIMESTAMP has one-second resolution,
+        # and re-patching a row that was already current is harmless.
+        since = self._synced_at - timedelta(seconds=1)
+        query = (self.filters, self.sort_attr, self.sort_descending, self._last_key)
+        self._run(lambda session, job: fetch_changes(session, since, *query),
+                  lambda result: self._changes_loaded(result, since), "Syncing missions")
+
+    def _changes_loaded(self, result, since):
+        now, deleted_ids, changed = result
+        self._syncing = False
+        self._synced_at = now
+
+        # Every changed row is looked up once, before any move, so the position -> row map
+        # is built once however many rows the sync touches
+        gone = [row for row in map(self.row_for_id, deleted_ids) if row is not None]
+        deleted = len(gone)
+        self.cache.discard(deleted_ids)
+        self.edits.forget(deleted_ids)
+        rows = {values[0]: self.row_for_id(values[0]) for *values, belongs in changed}
+
+        # Decide which loaded rows move from their cached values before they are overwritten;
+        # rows with pending edits stay put and only their other cells are refreshed
+        moves = {}
+        for *values, belongs in changed:
+            row = rows[values[0]]
+            if row is not None and not self.is_row_dirty(row):
+                # No longer matches the filter, or sorts somewhere else now
+                old = self.cache.value(self.positions[row], self.sort_attr)
+                moves[values[0]] = not belongs or values[self.sort_column] != old
+        # Missions other readers cached are kept current too
+        self.cache.put([row for row in changed if row[-1] or row[0] in self.cache], now)
+        self.cache.changes_applied(since, now)
+
+        # Rows that stay put are repainted while their row numbers still hold
+        updated = inserted = 0
+        for mission_id, row in rows.items():
+            if row is None or moves.get(mission_id):
+                continue
+            # Edited text left over from a save gives way to the stored values
+            position = self.positions[row]
+            for col in range(len(COLUMNS)):
+                if not self.edits.is_dirty(mission_id, col):
+                    self._edited_text.pop((position, col), None)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1),
+                                  [Qt.DisplayRole, Qt.EditRole])
+            updated += 1
+
+        # Deleted and moving rows are taken out before any go back in, so the rows the
+        # inserts bisect are in order by their new values
+        left = {values[0] for *values, belongs in changed if moves.get(values[0]) and not belongs}
+        self._remove_saved_rows(gone + [rows[mission_id] for mission_id in moves if moves[mission_id]])
+        updated += sum(moves.values()) - len(left)
+        deleted += len(left)
+        # The undo history of rows that left the table goes with them
+        self.edits.forget(left)
+        # New, newly matching the filter, now sorting into the loaded part, or moved
+        incoming = [values[0] for *values, belongs in changed
+                    if belongs and (rows[values[0]] is None or moves.get(values[0]))]
+        self._insert_saved_rows([self.cache.position(mission_id) for mission_id in incoming])
+        inserted += sum(not moves.get(mission_id) for mission_id in incoming)
+
+        # Rows past the last fetched row arrive through the normal paging path
+        if self._exhausted:
+            self._exhausted = False
+            self.fetchMore(QModelIndex())
+
+        self.synced.emit(inserted, updated, deleted)
+        if self._sync_again:
+            self._sync_again = False
+            self.sync()
+
+    def _row_order(self, position):
+        """Bisect key for where the cached mission at `position` belongs in the current sort."""
+        value = self.cache.value(position, self.sort_attr)
+        if isinstance(value, datetime):
+            value = value.strftime(STORED_DATETIME)
+        key = (_sqlite_order(value), self.cache.value(position, "id"))
+        return _Descending(key) if self.sort_descending else key
+
+    def _insert_saved_rows(self, positions):
+        """
+        Inserts the cached missions at `positions` where they sort, one insertion per gap
+        between loaded rows. The gaps are all found before any row goes in, and filled from
+        the bottom up so the rows above keep their numbers.
+        """
+        order = self._row_order
+        gaps = {}
+        for position in sorted(positions, key=order):
+            row = bisect.bisect_left(self.positions, order(position), key=order)
+            gaps.setdefault(row, array('q')).append(position)
+        for row, run in sorted(gaps.items(), reverse=True):
+            self.beginInsertRows(QModelIndex(), row, row + len(run) - 1)
+            self.positions[row:row] = run
+            self._row_of = None
+            self.endInsertRows()
+
+    # --- Qt model interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.positions) + len(self.new_rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return format_value(self._value(row, col))
+        if role == Qt.BackgroundRole and self.edits and self.edits.is_dirty(self.row_key(row), col):
+            return EDITED_COLOR
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return HEADERS[section]
+        # Mark rows with unsaved changes with an asterisk
+        if self.is_row_dirty(section):
+            return f"{section + 1}*"
+        return str(section + 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if FIELDS[index.column()].editable:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Called by the view when the user edits a cell."""
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row, col = index.row(), index.column()
+        old_value = self.cell_text(row, col)
+        new_value = "" if value is None else str(value)
+        if new_value == old_value:
+            return False  # No actual change occurred
+
+        self.set_cell_text(row, col, new_value)
+        self.edits.record(self.row_key(row), col, old_value, new_value)
+        self.cellEdited.emit(row, col, old_value, new_value)
+        return True
+
+    def set_cells(self, changes):
+        """
+        Edits many cells at once, e.g. a paste or fill-down: `changes` are (row, col, text).
+        They are recorded as one undo step and repainted together, without a cellEdited
+        per cell. Returns the number of cells that changed.
+        """
+        rows = []
+        with self.edits.group():
+            for row, col, text in changes:
+                old_text = self.cell_text(row, col)
+                if text == old_text:
+                    continue
+                self._store_text(row, col, text)
+                self.edits.record(self.row_key(row), col, old_text, text)
+                rows.append(row)
+        if rows:
+            first, last = min(rows), max(rows)
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(COLUMNS) - 1))
+            self.headerDataChanged.emit(Qt.Vertical, first, last)
+        return len(rows)
+
+    # --- Cell access ---
+
+    def _value(self, row, col):
+        """A cell's value: the cached one, or the text it was edited to."""
+        if row >= len(self.positions):
+            return self.new_rows[row - len(self.positions)][col]
+        position = self.positions[row]
+        if self._edited_text:
+            text = self._edited_text.get((position, col))
+            if text is not None:
+                return text
+        return self.cache.value(position, COLUMNS[col][1])
+
+    def cell_text(self, row, col):
+        """Returns the text shown in a cell."""
+        return format_value(self._value(row, col))
+
+    def set_cell_text(self, row, col, text):
+        """Replaces a cell's text without recording an edit or emitting cellEdited."""
+        self._store_text(row, col, text)
+        index = self.index(row, col)
+        self.dataChanged.emit(index, index)
+        self.headerDataChanged.emit(Qt.Vertical, row, row)
+
+    def _store_text(self, row, col, text):
+        if col in INTERNED_COLUMNS:
+            text = sys.intern(text)  # A pasted or filled column repeats a few values
+        if row >= len(self.positions):
+            self.new_rows[row - len(self.positions)][col] = text
+        else:
+            self._edited_text[self.positions[row], col] = text
+
+    def row_key(self, row):
+        """The key the edit journal knows a row by: its mission ID, or an unsaved row's temporary ID."""
+        if row < len(self.positions):
+            return self.cache.value(self.positions[row], "id")
+        return self.new_rows[row - len(self.positions)][0]
+
+    def row_for_key(self, key):
+        """The row of a row_key(), or None if it isn't loaded."""
+        if not isinstance(key, str):
+            return self.row_for_id(key)
+        if self._new_row_of is None:
+            self._new_row_of = {values[0]: i for i, values in enumerate(self.new_rows)}
+        index = self._new_row_of.get(key)
+        return None if index is None else len(self.positions) + index
+
+    def row_for_id(self, mission_id):
+        """Returns the row index of a loaded mission, or None if it isn't loaded."""
+        position = self.cache.position(mission_id)
+        if position is None:
+            return None
+        if self._row_of is None:
+            self._row_of = np.full(self.cache.size, -1, np.int64)
+            self._row_of[np.array(self.positions, np.int64)] = np.arange(len(self.positions))
+        if position >= len(self._row_of) or self._row_of[position] < 0:
+            return None
+        return int(self._row_of[position])
+
+    def unsaved_rows(self):
+        """Returns {row: temporary ID} for the unsaved rows at the bottom of the table."""
+        return {len(self.positions) + i: values[0] for i, values in enumerate(self.new_rows)}
+
+    def mission_id(self, row):
+        """Returns the database ID of a row, or None for unsaved/invalid rows."""
+        if row < len(self.positions):
+            return self.cache.value(self.positions[row], "id")
+        value = self.new_rows[row - len(self.positions)][0]
+        return value if isinstance(value, int) else None
+
+    # --- Dirty tracking and undo ---
+
+    def undo(self):
+        """Reverts the last edit, or group of edits; returns False if there was none."""
+        changes = self.edits.undo()
+        if changes is None:
+            return False
+        self._apply(changes)
+        return True
+
+    def redo(self):
+        """Reapplies the last edit, or group of edits, undone; returns False if there was none."""
+        changes = self.edits.redo()
+        if changes is None:
+            return False
+        self._apply(changes)
+        return True
+
+    def _apply(self, changes):
+        """Sets the text of the (row key, col, text) cells that are loaded, with one repaint."""
+        rows = []
+        for key, col, text in changes:
+            row = self.row_for_key(key)
+            if row is not None:
+                self._store_text(row, col, text)
+                rows.append(row)
+        if rows:
+            first, last = min(rows), max(rows)
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(COLUMNS) - 1))
+            self.headerDataChanged.emit(Qt.Vertical, first, last)
+
+    def clear_edits(self):
+        """
+        Forgets all pending edits, their undo history and the unsaved rows, e.g. once they
+        have been saved. Edited cells keep showing their text until a sync brings in the
+        stored values.
+        """
+        if self.new_rows:
+            self.beginRemoveRows(QModelIndex(), len(self.positions), self.rowCount() - 1)
+            self.new_rows = []
+            self._new_row_of = None
+            self.endRemoveRows()
+        had_edits = bool(self.edits)
+        self.edits.clear()
+        if had_edits and self.positions:
+            last = len(self.positions) - 1
+            self.dataChanged.emit(self.index(0, 0), self.index(last, len(COLUMNS) - 1), [Qt.BackgroundRole])
+            self.headerDataChanged.emit(Qt.Vertical, 0, last)
+
+    def is_row_dirty(self, row):
+        if row >= self._saved_count:
+            return True  # Unsaved new rows are always dirty
+        return bool(self.edits.dirty_rows) and self.edits.is_row_dirty(self.row_key(row))
+
+    # --- Row management ---
+
+    def append_new_rows(self, temp_ids):
+        """Appends an empty, unsaved row for each of `temp_ids` and returns the first one's index."""
+        row = self.rowCount()
+        self.beginInsertRows(QModelIndex(), row, row + len(temp_ids) - 1)
+        self.new_rows.extend([temp_id] + [None] * (len(COLUMNS) - 1) for temp_id in temp_ids)
+        self._new_row_of = None
+        self.endInsertRows()
+        return row
+
+    def remove_row(self, row, forget=True):
+        """Removes a row; with `forget`, also its pending edits and undo history."""
+        key = self.row_key(row)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        if row < len(self.positions):
+            self._forget_text(self.positions[row:row + 1])
+            del self.positions[row]
+            self._row_of = None
+        else:
+            del self.new_rows[row - len(self.positions)]
+            self._new_row_of = None
+        if forget:
+            self.edits.forget([key])
+        self.endRemoveRows()
+
+    def remove_missions(self, mission_ids):
+        """Removes the loaded rows for the given mission IDs, one contiguous run at a time."""
+        self._remove_saved_rows([row for row in map(self.row_for_id, mission_ids) if row is not None])
+        self.edits.forget(mission_ids)
+
+    def _remove_saved_rows(self, rows):
+        """Removes saved rows, one contiguous run at a time from the bottom up; their edits are kept."""
+        for first, last in _runs(sorted(set(rows), reverse=True)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._forget_text(self.positions[first:last + 1])
+            del self.positions[first:last + 1]
+            self._row_of = None
+            self.endRemoveRows()
+
+    def _forget_text(self, positions):
+        """Drops the edited text of the saved rows at `positions`."""
+        if self._edited_text:
+            for position in positions:
+                for col in range(len(COLUMNS)):
+                    self._edited_text.pop((position, col), None)
@@ -0,0 +1,86 @@
+import html
+from PyQt5.QtWidgets import QDockWidget, QListWidget, QListWidgetItem, QStyledItemDelegate, QStyle
+from PyQt5.QtGui import QTextDocument, QPalette
+from PyQt5.QtCore import Qt, QSize, pyqtSignal
+from logic.search import HIGHLIGHT_START, HIGHLIGHT_END, SEARCH_LIMIT
+
+MISSION_ID_ROLE = Qt.UserRole
+
+
+def snippet_html(snippet):
+    """The snippet as rich text, with the matched words in bold."""
+    return (html.escape(snippet or "")
+            .replace(HIGHLIGHT_START, "<b>").replace(HIGHLIGHT_END, "</b>"))
+
+
+class RichTextDelegate(QStyledItemDelegate):
+    """Draws item text as rich text, so search snippets can show their highlights."""
+
+    def _document(self, option, index):
+        doc = QTextDocument()
+        doc.setDefaultFont(option.font)
+        if option.state & QStyle.State_Selected:
+            color = option.palette.color(QPalette.HighlightedText).name()
+            doc.setDefaultStyleSheet(f"body {{ color: {color}; }}")
+        doc.setHtml(index.data(Qt.DisplayRole) or "")
+        doc.setTextWidth(option.rect.width() if option.rect.width() > 0 else -1)
+        return doc
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        style = option.widget.style() if option.widget else None
+        text = option.text
+        option.text = ""
+        if style:
+            style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+        option.text = text
+        doc = self._document(option, index)
+        painter.save()
+        painter.translate(option.rect.topLeft())
+        painter.setClipRect(0, 0, option.rect.width(), option.rect.height())
+        doc.drawContents(painter)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        self.initStyleOption(option, index)
+        doc = self._document(option, index)
+        return QSize(int(doc.idealWidth()), int(doc.size().height()))
+
+
+class SearchResultsDock(QDockWidget):
+    """
+    Lists the missions matching the filter bar's free words, most relevant first, with
+    the text around the matches. Activating a hit emits missionActivated(mission ID).
+    """
+
+    missionActivated = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__("Search Results", parent)
+        self.setObjectName("searchResultsDock")
+        self.list = QListWidget()
+        self.list.setItemDelegate(RichTextDelegate(self.list))
+        self.list.setWordWrap(True)
+        self.list.itemActivated.connect(self._activated)
+        self.list.itemClicked.connect(self._activated)
+        self.setWidget(self.list)
+
+    def show_hits(self, hits):
+        self.list.clear()
+        for hit in hits:
+            date = hit.date.strftime("%Y-%m-%d") if hasattr(hit.date, "strftime") else hit.date or ""
+            heading = " · ".join(html.escape(str(part)) for part in
+                                 (date, hit.platform, hit.customer, hit.site) if part)
+            item = QListWidgetItem(f"<small>#{hit.mission_id} · {heading}</small><br>"
+                                   f"{snippet_html(hit.snippet)}")
+            item.setData(MISSION_ID_ROLE, hit.mission_id)
+            self.list.addItem(item)
+        if not hits:
+            self.list.addItem(QListWidgetItem("<i>No matches</i>"))
+        more = "+" if len(hits) >= SEARCH_LIMIT else ""
+        self.setWindowTitle(f"Search Results ({len(hits)}{more})")
+
+    def _activated(self, item):
+        mission_id = item.data(MISSION_ID_ROLE)
+        if mission_id is not None:
+            self.missionActivated.emit(mission_id)
@@ -0,0 +1,180 @@
+"""
+What the window shows while the rest of the application is still loading.
+
+Importing SQLAlchemy and the modules built on it takes longer than the user should wait
+for the first paint, so main.py imports only this (PyQt5, NumPy and the settings) first:
+it builds the main window's layout from the precompiled ui/flight_log_ui.py and fills the
+table with the snapshot the last session left (logic.snapshot). MainWindow then opens on
+the same snapshot in its place and syncs it with the database in the background.
+
+The compiled layout is part of the source tree, not something the application writes:
+after editing ui/flight_log.ui, regenerate it with
+
+    python -m ui.startup
+
+Until then the application notices it's stale and loads the .ui file instead.
+"""
+import hashlib
+import io
+import os
+from PyQt5.QtCore import Qt, QAbstractTableModel, QEvent, QEventLoop, QModelIndex, QObject, QTimer
+from PyQt5.QtWidgets import QMainWindow
+from db.settings import DATABASE_PATH, SNAPSHOT_PATH
+from logic.formatting import format_value
+from logic.snapshot import read_snapshot
+
+UI_DIR = os.path.dirname(os.path.abspath(__file__))
+UI_FILE = os.path.join(UI_DIR, "flight_log.ui")
+COMPILED_UI_FILE = os.path.join(UI_DIR, "flight_log_ui.py")
+
+# First line of the compiled UI, so a stale one is recognized without importing it
+COMPILED_UI_HEADER = "# Compiled from flight_log.ui with SHA-1 {}\n"
+
+
+def _ui_header():
+    with open(UI_FILE, "rb") as f:
+        return COMPILED_UI_HEADER.format(hashlib.sha1(f.read()).hexdigest())
+
+
+def compiled_ui_current():
+    """Whether ui/flight_log_ui.py was compiled from the current ui/flight_log.ui."""
+    try:
+        with open(COMPILED_UI_FILE) as f:
+            return f.readline() == _ui_header()
+    except OSError:
+        return False
+
+
+def setup_ui(window):
+    """
+    Builds the Qt Designer layout into `window`, its widgets becoming attributes of the
+    window as with loadUi. The precompiled module is used while it's current, which
+    skips importing uic and parsing the XML; otherwise the .ui file is loaded.
+    """
+    if compiled_ui_current():
+        from ui.flight_log_ui import Ui_MainWindow
+        ui = Ui_MainWindow()
+        ui.setupUi(window)
+        vars(window).update(vars(ui))
+    else:
+        from PyQt5.uic import loadUi
+        loadUi(UI_FILE, window)
+
+
+def compile_ui():
+    """
+    Regenerates ui/flight_log_ui.py if ui/flight_log.ui has changed since it was compiled.
+    Returns whether it did.
+    """
+    if compiled_ui_current():
+        return False
+    from PyQt5.uic import compileUi
+    with open(UI_FILE, "rb") as f:
+        ui_file = io.BytesIO(f.read())
+    ui_file.name = os.path.basename(UI_FILE)  # Named in the generated code, rather than the full path
+    code = io.StringIO()
+    compileUi(ui_file, code)
+    temp_path = f"{COMPILED_UI_FILE}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(_ui_header() + code.getvalue())
+    os.replace(temp_path, COMPILED_UI_FILE)
+    return True
+
+
+def read_table_snapshot():
+    """
+    The snapshot of the table saved on the last exit (see MainWindow.save_snapshot) as
+    (state, row count, field -> column), or None if there is none for this database.
+    """
+    if not SNAPSHOT_PATH:
+        return None
+    snapshot = read_snapshot(SNAPSHOT_PATH)
+    if snapshot is None or snapshot[0].get("database") != os.path.abspath(DATABASE_PATH):
+        return None
+    return snapshot
+
+
+class SnapshotModel(QAbstractTableModel):
+    """Read-only table of a snapshot's rows."""
+
+    def __init__(self, snapshot, parent=None):
+        super().__init__(parent)
+        state, self.count, columns = snapshot
+        self.headers = state["headers"]
+        self.columns = list(columns.values())[:len(self.headers)]  # The table's come first
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return format_value(self.columns[index.column()].value(index.row()))
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        return self.headers[section] if orientation == Qt.Horizontal else str(section + 1)
+
+
+def restore_layout(window, state):
+    """Sizes `window` and its table's columns, and sets the sort indicator, as `state` has them."""
+    window.resize(*state["window_size"])
+    header = window.missionTable.horizontalHeader()
+    header.setSortIndicatorShown(True)
+    header.setSortIndicator(state["sort_column"],
+                            Qt.DescendingOrder if state["sort_descending"] else Qt.AscendingOrder)
+    for col, width in enumerate(state["column_widths"]):
+        header.resizeSection(col, width)
+
+
+def show_preview(snapshot):
+    """
+    Shows the snapshot's table in the main window's layout and returns that window, to be
+    closed once the main window is up. Returns None if the snapshot can't be shown.
+    """
+    window = QMainWindow()
+    setup_ui(window)
+    try:
+        window.missionTable.setModel(SnapshotModel(snapshot, window))
+        restore_layout(window, snapshot[0])
+    except (KeyError, TypeError, ValueError):
+        window.deleteLater()
+        return None
+    window.show()
+    return window
+
+
+class _PaintWatcher(QObject):
+    """Quits `loop` once the widget it filters has painted (and been flushed to the screen)."""
+
+    def __init__(self, loop):
+        super().__init__()
+        self.loop = loop
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            QTimer.singleShot(0, self.loop.quit)
+        return False
+
+
+def wait_for_paint(window, timeout=500):
+    """
+    Runs the event loop until the preview's table has painted, or for `timeout` ms at
+    most: until then it's only been asked to show, and the imports after it would keep
+    it blank.
+    """
+    loop = QEventLoop()
+    watcher = _PaintWatcher(loop)
+    viewport = window.missionTable.viewport()
+    viewport.installEventFilter(watcher)
+    QTimer.singleShot(timeout, loop.quit)
+    loop.exec_()
+    viewport.removeEventFilter(watcher)
+
+
+if __name__ == "__main__":
+    print(f"Compiled {COMPILED_UI_FILE}" if compile_ui() else f"{COMPILED_UI_FILE} is up to date")
@@ -0,0 +1,181 @@
+from datetime import date, timedelta
+from PyQt5.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QTableWidget,
+    QTableWidgetItem, QAbstractItemView, QHeaderView
+)
+from PyQt5.QtCore import Qt
+from logic.fleet_stats import cached_breakdown, cached_totals, fleet_breakdown, fleet_totals
+from logic.mission_cache import fetch_cache_changes, fetch_ids, fetch_rows
+
+# (label, group passed to fleet_breakdown)
+GROUP_CHOICES = [
+    ("Platform", "platform"), ("Chassis", "chassis"), ("Battery", "battery"), ("Site", "site"),
+    ("Customer", "customer"), ("Outcome", "outcome"), ("Month", "month"), ("Day", "day"),
+]
+
+# Which missions are counted: every one (from the rollups), or those the table's filter
+# matches (from the mission cache)
+SCOPE_CHOICES = ["All missions", "Table filter"]
+
+HEADERS = ["", "Flights", "Data (GB)", "Failed", "HW", "Operator", "SW", "Env"]
+
+
+def _months_back(today, months):
+    """The first day of the month `months` before today's."""
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_choices(today=None):
+    """(label, start, end) for the period selector; whole months read the monthly rollup."""
+    today = today or date.today()
+    tomorrow = today + timedelta(days=1)
+    return [
+        ("All time", None, None),
+        ("Last 12 months", _months_back(today, 11), None),
+        ("This year", date(today.year, 1, 1), None),
+        ("Last year", date(today.year - 1, 1, 1), date(today.year, 1, 1)),
+        ("Last 30 days", today - timedelta(days=29), tomorrow),
+        ("Last 7 days", today - timedelta(days=6), tomorrow),
+    ]
+
+
+def _rate(row):
+    return "–" if row.failure_rate is None else f"{row.failure_rate:.1%}"
+
+
+class FleetStatsDock(QDockWidget):
+    """
+    Flights, data volume, failure rate and issue counts for a period, overall and broken
+    down by platform, chassis, ... or over time. Reads the materialized rollups (see
+    logic.fleet_stats) on the database thread, so refreshing is cheap at any log size.
+
+    Given the table's MissionCache and a `table_filter()` returning its criteria, it can
+    also count only the missions the table's filter matches: their IDs are queried, any
+    the cache doesn't have yet are read into it, and the statistics are computed from
+    the cached columns.
+    """
+
+    def __init__(self, runner, parent=None, cache=None, table_filter=None):
+        super().__init__("Fleet Statistics", parent)
+        self.setObjectName("fleetStatsDock")
+        self.runner = runner
+        self.cache = cache
+        self.table_filter = table_filter
+        self.job = None
+
+        self.period_input = QComboBox()
+        self.periods = period_choices()
+        self.period_input.addItems([label for label, _, _ in self.periods])
+        self.group_input = QComboBox()
+        self.group_input.addItems([label for label, _ in GROUP_CHOICES])
+        self.period_input.currentIndexChanged.connect(self.refresh)
+        self.group_input.currentIndexChanged.connect(self.refresh)
+        self.scope_input = QComboBox()
+        self.scope_input.addItems(SCOPE_CHOICES)
+        self.scope_input.setVisible(cache is not None)
+        self.scope_input.currentIndexChanged.connect(self.refresh)
+
+        self.summary = QLabel()
+        self.summary.setWordWrap(True)
+        self.summary.setTextFormat(Qt.RichText)
+
+        self.table = QTableWidget(0, len(HEADERS))
+        self.table.setHorizontalHeaderLabels(HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.period_input)
+        controls.addWidget(self.scope_input)
+        controls.addWidget(QLabel("by"))
+        controls.addWidget(self.group_input)
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self.summary)
+        layout.addWidget(self.table)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+        self.visibilityChanged.connect(self._visibility_changed)
+
+    def _visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+
+    def refresh(self):
+        """Re-reads the statistics for the chosen period and grouping, if the dock is shown."""
+        if not self.isVisible():
+            return
+        if self.job is not None:
+            self.job.cancel()
+        _, start, end = self.periods[self.period_input.currentIndex()]
+        group = GROUP_CHOICES[self.group_input.currentIndex()][1]
+        if self.cache is not None and self.scope_input.currentIndex() == 1:
+            self._refresh_cached(start, end, group)
+            return
+
+        def query(session, job):
+            return fleet_totals(session, start, end), fleet_breakdown(session, group, start, end)
+
+        self.job = self.runner.submit(query, on_done=self._loaded, on_error=self._failed,
+                                      read_only=True, description="Reading fleet statistics")
+
+    def _refresh_cached(self, start, end, group):
+        """Statistics of the missions matching the table's filter, from the mission cache."""
+        cache, criteria = self.cache, self.table_filter()
+        # Bring the cached missions up to date along the way (see MissionCache.synced_at)
+        since = cache.synced_at and cache.synced_at - timedelta(seconds=1)
+
+        def query(session, job):
+            return since and fetch_cache_changes(session, since), fetch_ids(session, criteria)
+
+        def counted(ids):
+            positions = cache.positions(ids)
+            positions = positions[positions >= 0]
+            self._loaded((cached_totals(cache, positions, start, end),
+                          cached_breakdown(cache, positions, group, start, end)))
+
+        def fetched(result):
+            changes, ids = result
+            if changes:
+                cache.apply_changes(changes, since)
+            missing = ids[cache.positions(ids) < 0]
+            if not len(missing):
+                counted(ids)
+                return
+
+            def read(result):
+                cache.put(result[1], result[0])
+                counted(ids)
+
+            self.job = self.runner.submit(lambda session, job: fetch_rows(session, missing),
+                                          on_done=read, on_error=self._failed, read_only=True,
+                                          description="Reading missions for statistics")
+
+        self.job = self.runner.submit(query, on_done=fetched, on_error=self._failed,
+                                      read_only=True, description="Reading fleet statistics")
+
+    def _loaded(self, result):
+        self.job = None
+        totals, rows = result
+        self.summary.setText(
+            f"<b>{totals.flights:,}</b> flights, <b>{totals.data_gb:,.1f}</b> GB of data, "
+            f"<b>{_rate(totals)}</b> failed ({totals.failures:,} of {totals.with_outcome:,} with an outcome), "
+            f"<b>{totals.issues:,}</b> issues noted")
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            cells = [row.key or "(blank)", row.flights, round(row.data_gb, 1), _rate(row),
+                     row.issues_hw, row.issues_operator, row.issues_sw, row.issues_env]
+            for c, value in enumerate(cells):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value)
+                if c:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(r, c, item)
+
+    def _failed(self, error):
+        self.job = None
+        self.summary.setText(f"Could not read the statistics: {error}")